@@ -12,13 +12,17 @@ sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 # Load environment variables
 load_dotenv()
 
-# Import your models
+# Import every model so autogenerate sees the whole schema
 from src.config.database import Base
 from src.models.user import User
-# Import other models as you create them
-# from src.models.video import Video
-# from src.models.channel import Channel
-# from src.models.recommendation import Recommendation
+from src.models.refresh_token import RefreshToken
+from src.models.channel import Channel
+from src.models.recommendation import Recommendation
+from src.models.videos.video import Video
+from src.models.videos.video_view import VideoView
+from src.models.videos.video_like import VideoLike
+from src.models.videos.video_comment import VideoComment
+from src.models.videos.trending_score import TrendingScore
 
 # this is the Alembic Config object
 config = context.config
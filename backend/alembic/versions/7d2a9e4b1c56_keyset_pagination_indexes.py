@@ -0,0 +1,36 @@
+"""Composite (created_at, id) indexes for keyset pagination
+
+Revision ID: 7d2a9e4b1c56
+Revises: 5c1f8a2e7d93
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7d2a9e4b1c56'
+down_revision: Union[str, Sequence[str], None] = '5c1f8a2e7d93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_channels_created_at_id', 'channels', ['created_at', 'id'], unique=False)
+    op.create_index('ix_videos_created_at_id', 'videos', ['created_at', 'id'], unique=False)
+    op.create_index('ix_videos_channel_id_created_at_id', 'videos', ['channel_id', 'created_at', 'id'], unique=False)
+    op.create_index(
+        'ix_recommendations_user_id_created_at_id', 'recommendations', ['user_id', 'created_at', 'id'], unique=False
+    )
+    # ix_video_comments_video_id_created_at_id is created together with the video_comments table
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_recommendations_user_id_created_at_id', table_name='recommendations')
+    op.drop_index('ix_videos_channel_id_created_at_id', table_name='videos')
+    op.drop_index('ix_videos_created_at_id', table_name='videos')
+    op.drop_index('ix_channels_created_at_id', table_name='channels')
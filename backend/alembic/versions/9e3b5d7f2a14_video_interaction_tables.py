@@ -0,0 +1,111 @@
+"""Video interaction tables and hot path indexes
+
+Revision ID: 9e3b5d7f2a14
+Revises: 7d2a9e4b1c56
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9e3b5d7f2a14'
+down_revision: Union[str, Sequence[str], None] = '7d2a9e4b1c56'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _retype_video_ids(type_, using: str) -> None:
+    """
+    videos.id and recommendations.video_id were created as INTEGER while the
+    models (and the uuid ids VideoService generates) use String. The FK has to
+    go while both sides change type on PostgreSQL; SQLite rebuilds the tables.
+    """
+    postgres = op.get_bind().dialect.name == 'postgresql'
+    if postgres:
+        op.drop_constraint('recommendations_video_id_fkey', 'recommendations', type_='foreignkey')
+    with op.batch_alter_table('videos') as batch_op:
+        batch_op.alter_column('id', type_=type_, existing_nullable=False, postgresql_using=f'id::{using}')
+    with op.batch_alter_table('recommendations') as batch_op:
+        batch_op.alter_column('video_id', type_=type_, existing_nullable=False, postgresql_using=f'video_id::{using}')
+    if postgres:
+        op.create_foreign_key('recommendations_video_id_fkey', 'recommendations', 'videos', ['video_id'], ['id'])
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    _retype_video_ids(sa.String(), 'varchar')
+    op.add_column('videos', sa.Column('signed_url', sa.String(), nullable=True))
+    op.create_index('ix_recommendations_user_id_score', 'recommendations', ['user_id', 'score'], unique=False)
+
+    op.create_table('video_views',
+    sa.Column('id', sa.String(), nullable=False),
+    sa.Column('video_id', sa.String(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('watch_time', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.ForeignKeyConstraint(['video_id'], ['videos.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('video_id', 'user_id', name='uq_video_view')
+    )
+    op.create_index(op.f('ix_video_views_id'), 'video_views', ['id'], unique=False)
+    op.create_index('ix_video_views_user_id_created_at', 'video_views', ['user_id', 'created_at'], unique=False)
+
+    op.create_table('video_likes',
+    sa.Column('id', sa.String(), nullable=False),
+    sa.Column('video_id', sa.String(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('is_liked', sa.Boolean(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.ForeignKeyConstraint(['video_id'], ['videos.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('video_id', 'user_id', name='uq_video_like')
+    )
+    op.create_index(op.f('ix_video_likes_id'), 'video_likes', ['id'], unique=False)
+    op.create_index('ix_video_likes_user_id', 'video_likes', ['user_id'], unique=False)
+    # Partial: like counts only ever look at is_liked rows
+    op.create_index(
+        'ix_video_likes_video_id_liked', 'video_likes', ['video_id'], unique=False,
+        postgresql_where=sa.text('is_liked'), sqlite_where=sa.text('is_liked')
+    )
+
+    op.create_table('video_comments',
+    sa.Column('id', sa.String(), nullable=False),
+    sa.Column('video_id', sa.String(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('content', sa.Text(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.ForeignKeyConstraint(['video_id'], ['videos.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_video_comments_id'), 'video_comments', ['id'], unique=False)
+    op.create_index(
+        'ix_video_comments_video_id_created_at_id', 'video_comments', ['video_id', 'created_at', 'id'], unique=False
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_video_comments_video_id_created_at_id', table_name='video_comments')
+    op.drop_index(op.f('ix_video_comments_id'), table_name='video_comments')
+    op.drop_table('video_comments')
+    op.drop_index('ix_video_likes_video_id_liked', table_name='video_likes')
+    op.drop_index('ix_video_likes_user_id', table_name='video_likes')
+    op.drop_index(op.f('ix_video_likes_id'), table_name='video_likes')
+    op.drop_table('video_likes')
+    op.drop_index('ix_video_views_user_id_created_at', table_name='video_views')
+    op.drop_index(op.f('ix_video_views_id'), table_name='video_views')
+    op.drop_table('video_views')
+    op.drop_index('ix_recommendations_user_id_score', table_name='recommendations')
+    with op.batch_alter_table('videos') as batch_op:
+        batch_op.drop_column('signed_url')
+    _retype_video_ids(sa.Integer(), 'integer')
@@ -0,0 +1,38 @@
+"""Snapshot table for trending scores
+
+Revision ID: a8d2f5c7e316
+Revises: f7a3c1e9b254
+Create Date: 2026-10-18 19:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a8d2f5c7e316'
+down_revision: Union[str, Sequence[str], None] = 'f7a3c1e9b254'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# src.utils.ids.UUID_STR, frozen here
+UUID_STR = sa.Uuid(as_uuid=False).with_variant(sa.String(), 'sqlite')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('trending_scores',
+    sa.Column('video_id', UUID_STR, nullable=False),
+    sa.Column('channel_id', sa.Integer(), nullable=True),
+    sa.Column('log_score', sa.Float(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.ForeignKeyConstraint(['video_id'], ['videos.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('video_id')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('trending_scores')
@@ -0,0 +1,28 @@
+"""Index users.updated_at for the token version refresh
+
+Revision ID: b6d4e1f9a327
+Revises: a8d2f5c7e316
+Create Date: 2026-10-18 21:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b6d4e1f9a327'
+down_revision: Union[str, Sequence[str], None] = 'a8d2f5c7e316'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Every worker selects users with updated_at inside the token lifetime every few seconds
+    op.create_index(op.f('ix_users_updated_at'), 'users', ['updated_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_users_updated_at'), table_name='users')
@@ -0,0 +1,97 @@
+"""Time-ordered ids for videos and video interaction tables
+
+Revision ID: c2f6a8d4e915
+Revises: 9e3b5d7f2a14
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from datetime import timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c2f6a8d4e915'
+down_revision: Union[str, Sequence[str], None] = '9e3b5d7f2a14'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INTERACTION_TABLES = ('video_views', 'video_likes', 'video_comments')
+VIDEO_ID_REFERENCES = ('recommendations',) + INTERACTION_TABLES
+
+# Snowflake layout of src.utils.ids, frozen here: ms since 2025-01-01 << 22 | worker << 12 | sequence
+EPOCH_MS = 1_735_689_600_000
+MAX_SEQUENCE = 4095
+
+
+def _snowflakes(created_ats):
+    """Worker-0 snowflake ids for rows in (created_at, id) order, strictly increasing."""
+    last_ms, sequence = -1, 0
+    for created_at in created_ats:
+        ms = EPOCH_MS
+        if created_at is not None:
+            if created_at.tzinfo is None:
+                created_at = created_at.replace(tzinfo=timezone.utc)  # CURRENT_TIMESTAMP is UTC
+            ms = max(int(created_at.timestamp() * 1000), EPOCH_MS)
+        ms = max(ms, last_ms)
+        if ms == last_ms:
+            sequence += 1
+            if sequence > MAX_SEQUENCE:
+                ms, sequence = ms + 1, 0
+        else:
+            sequence = 0
+        last_ms = ms
+        yield ((ms - EPOCH_MS) << 22) | sequence
+
+
+def _renumber(table_name: str) -> None:
+    """
+    Replace the uuid4 ids of `table_name` with snowflakes derived from created_at
+    (as text, until the column is retyped). Nothing references these ids.
+    """
+    bind = op.get_bind()
+    table = sa.table(table_name, sa.column('id', sa.String()), sa.column('created_at', sa.DateTime(timezone=True)))
+    rows = bind.execute(sa.select(table.c.id, table.c.created_at).order_by(table.c.created_at, table.c.id)).all()
+    if rows:
+        new_ids = _snowflakes(created_at for _, created_at in rows)
+        bind.execute(
+            table.update().where(table.c.id == sa.bindparam('old_id')).values(id=sa.bindparam('new_id')),
+            [{'old_id': old_id, 'new_id': str(new_id)} for (old_id, _), new_id in zip(rows, new_ids)],
+        )
+
+
+def _retype_video_ids(type_, using: str) -> None:
+    """videos.id and every FK to it; PostgreSQL needs the FKs gone meanwhile."""
+    if op.get_bind().dialect.name != 'postgresql':
+        return  # SQLite keeps video ids as text (see UUID_STR)
+    for table in VIDEO_ID_REFERENCES:
+        op.drop_constraint(f'{table}_video_id_fkey', table, type_='foreignkey')
+    op.alter_column('videos', 'id', type_=type_, existing_nullable=False, postgresql_using=f'id::{using}')
+    for table in VIDEO_ID_REFERENCES:
+        op.alter_column(table, 'video_id', type_=type_, existing_nullable=False, postgresql_using=f'video_id::{using}')
+        op.create_foreign_key(f'{table}_video_id_fkey', table, 'videos', ['video_id'], ['id'])
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Existing video ids are uuid4 strings and convert as they are; new ones are UUIDv7
+    _retype_video_ids(sa.Uuid(), 'uuid')
+    # The primary keys already index these
+    op.drop_index(op.f('ix_videos_id'), table_name='videos')
+    for table in INTERACTION_TABLES:
+        op.drop_index(op.f(f'ix_{table}_id'), table_name=table)
+        _renumber(table)
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.alter_column('id', type_=sa.BigInteger(), existing_nullable=False, postgresql_using='id::bigint')
+
+
+def downgrade() -> None:
+    """Downgrade schema. Interaction ids stay the snowflake values, as text."""
+    for table in INTERACTION_TABLES:
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.alter_column('id', type_=sa.String(), existing_nullable=False, postgresql_using='id::varchar')
+        op.create_index(op.f(f'ix_{table}_id'), table, ['id'], unique=False)
+    op.create_index(op.f('ix_videos_id'), 'videos', ['id'], unique=False)
+    _retype_video_ids(sa.String(), 'varchar')
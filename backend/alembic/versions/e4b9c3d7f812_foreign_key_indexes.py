@@ -0,0 +1,38 @@
+"""Index every foreign key
+
+Revision ID: e4b9c3d7f812
+Revises: c2f6a8d4e915
+Create Date: 2026-10-18 17:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4b9c3d7f812'
+down_revision: Union[str, Sequence[str], None] = 'c2f6a8d4e915'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Found by src.utils.schema_lint: FK columns no index starts with
+FK_INDEXES = (
+    ('ix_channels_owner_id', 'channels', 'owner_id'),
+    ('ix_videos_uploader_id', 'videos', 'uploader_id'),
+    ('ix_recommendations_video_id', 'recommendations', 'video_id'),
+    ('ix_recommendations_channel_id', 'recommendations', 'channel_id'),
+    ('ix_video_comments_user_id', 'video_comments', 'user_id'),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for name, table, column in FK_INDEXES:
+        op.create_index(name, table, [column], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name, table, _ in reversed(FK_INDEXES):
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,54 @@
+"""Generations for batch-materialized recommendations
+
+Revision ID: f7a3c1e9b254
+Revises: e4b9c3d7f812
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f7a3c1e9b254'
+down_revision: Union[str, Sequence[str], None] = 'e4b9c3d7f812'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('recommendations') as batch_op:
+        batch_op.add_column(sa.Column('generation', sa.Integer(), server_default='0', nullable=False))
+    op.create_index(
+        'ix_recommendations_user_id_generation_score', 'recommendations',
+        ['user_id', 'generation', 'score'], unique=False
+    )
+    op.create_table('recommendation_generations',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('generation', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+    op.create_table('recommendation_runs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('mode', sa.String(), nullable=False),
+    sa.Column('watermark', sa.BigInteger(), nullable=False),
+    sa.Column('users', sa.Integer(), nullable=False),
+    sa.Column('rows', sa.Integer(), nullable=False),
+    sa.Column('started_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('recommendation_runs')
+    op.drop_table('recommendation_generations')
+    op.drop_index('ix_recommendations_user_id_generation_score', table_name='recommendations')
+    with op.batch_alter_table('recommendations') as batch_op:
+        batch_op.drop_column('generation')
@@ -0,0 +1,55 @@
+"""
+Benchmark: p50 / p99 latency and peak Python memory of GET /auth/me with and
+without the user cache, for a user with many VideoView rows (regression check
+that authenticating doesn't load the user's collections).
+
+Run from backend/:
+    python -m benchmarks.bench_auth_me --requests 500 --views 10000
+"""
+import argparse
+import time
+import tracemalloc
+from benchmarks.common import build_auth_app, seed_user_with_views, percentiles, temp_database
+from src.services.auth.user_cache import UserCache, MemoryUserCacheBackend
+from src.utils.auth_utils import create_access_token
+
+
+def run(requests: int, views: int) -> None:
+    with temp_database() as session_factory:
+        with session_factory() as db:
+            user = seed_user_with_views(db, views)
+            token = create_access_token({"user_id": user.id, "email": user.email})
+        headers = {"Authorization": f"Bearer {token}"}
+
+        for enabled in (False, True):
+            cache = UserCache(MemoryUserCacheBackend(), enabled=enabled)
+            client = build_auth_app(session_factory, cache)
+            client.get("/auth/me", headers=headers)  # warm up
+
+            timings = []
+            for _ in range(requests):
+                start = time.perf_counter()
+                response = client.get("/auth/me", headers=headers)
+                timings.append(time.perf_counter() - start)
+                assert response.status_code == 200
+
+            tracemalloc.start()
+            for _ in range(10):
+                client.get("/auth/me", headers=headers)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            p50, p99 = percentiles(timings, 50, 99)
+            label = "cache on " if enabled else "cache off"
+            print(
+                f"{label}: p50={p50 * 1000:.3f}ms p99={p99 * 1000:.3f}ms "
+                f"peak={peak / 2**20:.2f}MiB stats={cache.stats()}"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--views", type=int, default=10000)
+    args = parser.parse_args()
+    run(args.requests, args.views)
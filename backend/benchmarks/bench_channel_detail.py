@@ -0,0 +1,136 @@
+"""
+Benchmark: concurrent GET /channels/{id}, the old handler (blocking Session
+queries inside `async def`, so every query stalls the event loop) vs the
+AsyncSession port.
+
+SQLite answers in microseconds, so each statement also waits `--latency-ms`
+inside the thread that runs it, like a round trip to a database server: on the
+event loop for the blocking handler, on the driver's worker thread for aiosqlite.
+
+Run from backend/:
+    python -m benchmarks.bench_channel_detail --requests 2000 --concurrency 50 --latency-ms 0,2
+"""
+import argparse
+import asyncio
+import random
+import time
+import httpx
+from fastapi import Depends, FastAPI, HTTPException
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
+from benchmarks.common import percentiles, temp_database
+from src.api import channels
+from src.config.database import async_database_url, get_async_db, get_db
+from src.models.channel import Channel
+from src.models.loaders import CHANNEL_WITH_COUNTS
+from src.models.user import User
+from src.models.videos.video import Video
+from src.schemas.channel import ChannelDetails
+
+CHANNELS = 200
+
+
+def seed(session_factory) -> None:
+    with session_factory() as db:
+        owner = User(email="channels@example.com", username="channels")
+        db.add(owner)
+        db.flush()
+        db.add_all(Channel(name=f"c{i}", owner_id=owner.id) for i in range(CHANNELS))
+        db.flush()
+        db.add_all(Video(id=f"v{i}", title=f"v{i}", video_url="u", uploader_id=owner.id, channel_id=1 + i % CHANNELS)
+                   for i in range(CHANNELS * 10))
+        db.commit()
+
+
+def add_latency(engine, seconds: float, is_async: bool) -> None:
+    """Sleep `seconds` per statement in whichever thread executes it."""
+    @event.listens_for(engine, "connect")
+    def on_connect(dbapi_conn, _record):
+        raw = dbapi_conn.driver_connection._conn if is_async else dbapi_conn  # aiosqlite wraps sqlite3
+        raw.set_trace_callback(lambda _sql: time.sleep(seconds))
+
+
+def build_app(url: str, is_async: bool, latency: float, pool_size: int) -> tuple[FastAPI, object]:
+    """
+    Both pools get a connection per concurrent request: with a smaller sync pool
+    the blocking handler waits for a checkout on the event loop, which is the
+    only thing that could return a connection, until pool_timeout.
+    """
+    app = FastAPI()
+    if is_async:
+        engine = create_async_engine(async_database_url(url), pool_size=pool_size, max_overflow=0)
+        add_latency(engine.sync_engine, latency, is_async=True)
+        session_factory = async_sessionmaker(engine, expire_on_commit=False)
+
+        async def _get_async_db():
+            async with session_factory() as db:
+                yield db
+
+        app.include_router(channels.router)
+        app.dependency_overrides[get_async_db] = _get_async_db
+        return app, engine
+
+    engine = create_engine(url, connect_args={"check_same_thread": False}, pool_size=pool_size, max_overflow=0)
+    add_latency(engine, latency, is_async=False)
+    session_factory = sessionmaker(bind=engine)
+
+    def _get_db():
+        with session_factory() as db:
+            yield db
+
+    # The handler as it was before the port
+    @app.get("/channels/{channel_id}", response_model=ChannelDetails)
+    async def get_channel(channel_id: int, db: Session = Depends(get_db)):
+        channel = db.query(Channel).options(*CHANNEL_WITH_COUNTS).filter(Channel.id == channel_id).first()
+        if not channel:
+            raise HTTPException(status_code=404, detail="Channel not found")
+        return channel
+
+    app.dependency_overrides[get_db] = _get_db
+    return app, engine
+
+
+async def hammer(app, requests: int, concurrency: int) -> list[float]:
+    transport = httpx.ASGITransport(app=app)
+    latencies: list[float] = []
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def worker(seed: int):
+            rng = random.Random(seed)
+            for _ in range(requests // concurrency):
+                start = time.perf_counter()
+                response = await client.get(f"/channels/{rng.randint(1, CHANNELS)}")
+                latencies.append(time.perf_counter() - start)
+                assert response.status_code == 200, response.text
+
+        await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    return latencies
+
+
+def run(requests: int, concurrency: int, latencies_ms: list[float]) -> None:
+    with temp_database() as session_factory:
+        seed(session_factory)
+        url = str(session_factory.kw["bind"].url)
+        for latency_ms in latencies_ms:
+            for label, is_async in (("blocking Session", False), ("AsyncSession    ", True)):
+                app, engine = build_app(url, is_async, latency_ms / 1000, concurrency)
+                asyncio.run(hammer(app, concurrency, concurrency))  # warm up the pool
+                start = time.perf_counter()
+                samples = asyncio.run(hammer(app, requests, concurrency))
+                wall = time.perf_counter() - start
+                if is_async:
+                    asyncio.run(engine.dispose())
+                else:
+                    engine.dispose()
+                p50, p99 = percentiles(samples, 50, 99)
+                print(f"latency {latency_ms:g}ms | {label}: {len(samples) / wall:,.0f} req/s | "
+                      f"p50={p50 * 1000:.1f}ms p99={p99 * 1000:.1f}ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--latency-ms", default="0,2", help="comma-separated simulated round trips per statement")
+    args = parser.parse_args()
+    run(args.requests, args.concurrency, [float(value) for value in args.latency_ms.split(",")])
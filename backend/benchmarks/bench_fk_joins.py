@@ -0,0 +1,129 @@
+"""
+Benchmark: joins across users, videos and interactions with the original
+foreign keys (video_views.user_id String -> users.id Integer, recommendations
+.video_id Integer -> videos.id String, no index on recommendations.video_id)
+vs matching, indexed ones.
+
+Prints the average time per query and its EXPLAIN QUERY PLAN. SQLite only:
+PostgreSQL refuses to create the original FKs at all (incompatible types).
+
+Run from backend/:
+    python -m benchmarks.bench_fk_joins --users 20000 --views 200000
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from sqlalchemy import Column, Float, ForeignKey, Index, Integer, MetaData, String, Table, create_engine, text
+from src.utils.ids import UUID_STR, uuid7
+from src.utils.schema_lint import check_metadata
+
+VIDEOS = 5000
+CHANNELS = 200
+QUERIES = {
+    # A channel's recommendations: channel -> videos -> recommendations.video_id
+    "channel recommendations": (
+        "SELECT count(*) FROM videos JOIN recommendations ON recommendations.video_id = videos.id "
+        "WHERE videos.channel_id = :channel_id"
+    ),
+    # Watch history of a cohort of users: users -> video_views.user_id
+    "cohort watch time": (
+        "SELECT sum(video_views.watch_time) FROM users JOIN video_views ON video_views.user_id = users.id "
+        "WHERE users.id BETWEEN :first AND :first + 50"
+    ),
+}
+
+
+def schema(fixed: bool) -> MetaData:
+    metadata = MetaData()
+    Table("users", metadata, Column("id", Integer, primary_key=True), Column("username", String))
+    Table(
+        "videos", metadata,
+        Column("id", UUID_STR if fixed else String, primary_key=True),
+        Column("channel_id", Integer, nullable=False),
+        Index("ix_videos_channel_id", "channel_id"),
+    )
+    Table(
+        "video_views", metadata,
+        Column("id", Integer, primary_key=True),
+        Column("video_id", UUID_STR if fixed else String, ForeignKey("videos.id"), nullable=False),
+        Column("user_id", Integer if fixed else String, ForeignKey("users.id"), nullable=False),
+        Column("watch_time", Integer, nullable=False),
+        Index("ix_video_views_video_id_user_id", "video_id", "user_id", unique=True),
+        Index("ix_video_views_user_id", "user_id"),
+    )
+    recommendations = Table(
+        "recommendations", metadata,
+        Column("id", Integer, primary_key=True),
+        Column("user_id", Integer, ForeignKey("users.id"), nullable=False),
+        Column("video_id", UUID_STR if fixed else Integer, ForeignKey("videos.id"), nullable=False),
+        Column("score", Float, nullable=False),
+        Index("ix_recommendations_user_id_score", "user_id", "score"),
+    )
+    if fixed:
+        Index("ix_recommendations_video_id", recommendations.c.video_id)
+    return metadata
+
+
+def seed(engine, metadata: MetaData, users: int, views: int) -> None:
+    rng = random.Random(3)
+    video_ids = [uuid7() for _ in range(VIDEOS)]
+    tables = metadata.tables
+    with engine.begin() as conn:
+        conn.execute(tables["users"].insert(), [{"id": i, "username": f"u{i}"} for i in range(1, users + 1)])
+        conn.execute(tables["videos"].insert(), [
+            {"id": video_id, "channel_id": i % CHANNELS} for i, video_id in enumerate(video_ids)
+        ])
+        pairs = set()
+        while len(pairs) < views:
+            pairs.add((rng.choice(video_ids), rng.randint(1, users)))
+        # Stored the way the old column types made the application write them
+        conn.execute(tables["video_views"].insert(), [
+            {"video_id": video_id, "user_id": user_id, "watch_time": rng.randrange(600)} for video_id, user_id in pairs
+        ])
+        conn.execute(tables["recommendations"].insert(), [
+            {"user_id": rng.randint(1, users), "video_id": rng.choice(video_ids), "score": rng.random()}
+            for _ in range(views // 2)
+        ])
+
+
+def plan(conn, sql: str, params: dict) -> str:
+    return " / ".join(row[-1] for row in conn.execute(text(f"EXPLAIN QUERY PLAN {sql}"), params))
+
+
+def run_schema(url: str, fixed: bool, users: int, views: int, repeat: int) -> None:
+    metadata = schema(fixed)
+    engine = create_engine(url)
+    metadata.create_all(engine)
+    try:
+        seed(engine, metadata, users, views)
+        with engine.connect() as conn:
+            conn.execute(text("ANALYZE"))
+            label = "matching, indexed FKs" if fixed else "original FKs         "
+            print(f"{label}: {len(check_metadata(metadata, [conn.dialect]))} lint problem(s)")
+            rng = random.Random(5)
+            for name, sql in QUERIES.items():
+                samples = [{"channel_id": rng.randrange(CHANNELS), "first": rng.randint(1, users - 50)} for _ in range(repeat)]
+                start = time.perf_counter()
+                for params in samples:
+                    conn.execute(text(sql), params).scalar()
+                elapsed = (time.perf_counter() - start) / repeat
+                print(f"  {name}: {elapsed * 1000:.3f}ms | {plan(conn, sql, samples[0])}")
+    finally:
+        engine.dispose()
+
+
+def run(users: int, views: int, repeat: int) -> None:
+    for fixed in (False, True):
+        with tempfile.TemporaryDirectory() as tmp:
+            run_schema(f"sqlite:///{os.path.join(tmp, 'joins.db')}", fixed, users, views, repeat)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=20000)
+    parser.add_argument("--views", type=int, default=200000)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+    run(args.users, args.views, args.repeat)
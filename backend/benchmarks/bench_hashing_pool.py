@@ -0,0 +1,72 @@
+"""
+Benchmark: bcrypt throughput and event-loop lag by hashing pool size and kind.
+
+For each configuration, `--burst` password checks are submitted at once
+(a login storm) while a probe measures how late a 10ms timer fires on the
+event loop. Prints verifies/s, loop lag percentiles and how many checks the
+bounded queue rejected, to pick HASHING_WORKERS / HASHING_MAX_QUEUE /
+HASHING_EXECUTOR_KIND for the host (throughput stops growing at the number
+of cores; loop lag should stay flat for every pool size).
+
+Run from backend/:
+    python -m benchmarks.bench_hashing_pool --burst 32 --workers 1 2 4 8
+"""
+import argparse
+import asyncio
+import os
+import time
+from benchmarks.common import percentiles
+from src.utils.auth_utils import get_password_hash, verify_password
+from src.utils.hashing import HashingExecutor, HashingQueueFull
+
+PASSWORD = "pool-password"
+PROBE_INTERVAL = 0.01
+
+
+async def storm(executor: HashingExecutor, hashed: str, burst: int) -> tuple[float, list[float], int]:
+    done = asyncio.Event()
+    lags: list[float] = []
+
+    async def probe():
+        while not done.is_set():
+            scheduled = time.perf_counter() + PROBE_INTERVAL
+            await asyncio.sleep(PROBE_INTERVAL)
+            lags.append(time.perf_counter() - scheduled)
+
+    async def check() -> bool:
+        try:
+            return await executor.run(verify_password, PASSWORD, hashed)
+        except HashingQueueFull:
+            return False
+
+    prober = asyncio.create_task(probe())
+    start = time.perf_counter()
+    results = await asyncio.gather(*(check() for _ in range(burst)))
+    wall = time.perf_counter() - start
+    done.set()
+    await prober
+    return wall, lags, results.count(False)
+
+
+def run(burst: int, workers: list[int], max_queue: int, kinds: list[str]) -> None:
+    hashed = get_password_hash(PASSWORD)
+    print(f"{os.cpu_count()} CPU(s), burst of {burst} verifies, queue {max_queue}")
+    configurations = [("inline", 0)] + [(kind, n) for kind in kinds for n in workers]
+    for kind, n in configurations:
+        executor = HashingExecutor(max_workers=n, max_queue=max_queue, kind=kind if n else "thread")
+        asyncio.run(storm(executor, hashed, min(burst, n or 1)))  # start the workers
+        wall, lags, rejected = asyncio.run(storm(executor, hashed, burst))
+        executor.shutdown()
+        p50, p99, worst = percentiles(lags or [0.0], 50, 99, 100)
+        print(f"{kind:>7} x{n}: {(burst - rejected) / wall:6.1f} verifies/s | loop lag p50={p50 * 1000:.1f}ms "
+              f"p99={p99 * 1000:.1f}ms max={worst * 1000:.1f}ms | rejected {rejected}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--burst", type=int, default=32)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--max-queue", type=int, default=64)
+    parser.add_argument("--kinds", nargs="+", default=["thread", "process"])
+    args = parser.parse_args()
+    run(args.burst, args.workers, args.max_queue, args.kinds)
@@ -0,0 +1,142 @@
+"""
+Benchmark: watch-time heartbeat ingestion through the ASGI app, per-heartbeat
+ORM read-modify-write (before) vs the micro-batched multi-row upsert (after).
+
+Concurrent players post batches of heartbeats; the batched path merges every
+request that arrives within one window into a single INSERT ... ON CONFLICT.
+
+Run from backend/:
+    python -m benchmarks.bench_heartbeats --heartbeats 50000 --players 200 --per-request 20
+"""
+import argparse
+import asyncio
+import random
+import time
+import httpx
+from fastapi import Depends, FastAPI, HTTPException
+from sqlalchemy import event, select
+from sqlalchemy.exc import OperationalError
+from benchmarks.common import percentiles, temp_database
+from src.api import watch
+from src.models.channel import Channel
+from src.models.user import User
+from src.models.videos.video import Video
+from src.models.videos.video_view import VideoView
+from src.schemas.user import TokenData
+from src.schemas.video import HeartbeatBatch
+from src.services.auth.token_versions import token_versions
+from src.services.dependencies import get_token_claims
+from src.services.video_counters import VideoCounterBuffer
+from src.services.watch_time import HeartbeatBatcher
+from src.utils.auth_utils import create_access_token, user_token_data
+
+VIDEOS = 500
+
+
+def seed(session_factory, players: int) -> dict[int, str]:
+    """Players, videos and an access token per player."""
+    with session_factory() as db:
+        users = [User(email=f"p{i}@example.com", username=f"p{i}") for i in range(players)]
+        db.add_all(users)
+        db.flush()
+        channel = Channel(name="bench", owner_id=users[0].id)
+        db.add(channel)
+        db.flush()
+        db.add_all(Video(id=f"v{i}", title=f"v{i}", video_url="u", uploader_id=users[0].id, channel_id=channel.id)
+                   for i in range(VIDEOS))
+        db.commit()
+        # Stateless claims: the real auth dependency, without a users lookup per request
+        token_versions.refresh(db)
+        return {user.id: create_access_token(user_token_data(user)) for user in users}
+
+
+def build_app(session_factory, batched: bool) -> FastAPI:
+    app = FastAPI()
+    if batched:
+        watch.heartbeat_batcher = HeartbeatBatcher(session_factory, counters=VideoCounterBuffer(session_factory))
+        app.include_router(watch.router)
+        return app
+
+    @app.post("/video/heartbeats", status_code=202)
+    def naive_heartbeats(batch: HeartbeatBatch, claims: TokenData = Depends(get_token_claims)):
+        with session_factory() as db:
+            try:
+                _store_one_by_one(db, batch, claims.user_id)
+            except OperationalError:  # "database is locked" after the busy timeout
+                raise HTTPException(status_code=503, detail="Database busy")
+        return {"accepted": len(batch.heartbeats)}
+
+    return app
+
+
+def _store_one_by_one(db, batch: HeartbeatBatch, user_id: int) -> None:
+    for heartbeat in batch.heartbeats:
+        view = db.scalar(select(VideoView).where(
+            VideoView.video_id == heartbeat.video_id, VideoView.user_id == user_id
+        ))
+        if view is None:
+            db.add(VideoView(video_id=heartbeat.video_id, user_id=user_id, watch_time=heartbeat.watch_time))
+        elif heartbeat.watch_time > view.watch_time:
+            view.watch_time = heartbeat.watch_time
+        db.commit()
+
+
+async def play(app, tokens: dict[int, str], heartbeats: int, per_request: int) -> tuple[list[float], int]:
+    transport = httpx.ASGITransport(app=app)
+    requests_per_player = max(1, heartbeats // (len(tokens) * per_request))
+    latencies: list[float] = []
+    failed = 0
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def player(user_id: int, token: str):
+            nonlocal failed
+            headers = {"Authorization": f"Bearer {token}"}
+            rng = random.Random(user_id)
+            position = 0
+            for _ in range(requests_per_player):
+                beats = []
+                for _ in range(per_request):
+                    position += 5
+                    beats.append({"video_id": f"v{rng.randrange(VIDEOS)}", "watch_time": position})
+                start = time.perf_counter()
+                response = await client.post("/video/heartbeats", json={"heartbeats": beats}, headers=headers)
+                latencies.append(time.perf_counter() - start)
+                failed += response.status_code == 503
+                assert response.status_code in (202, 503), response.text
+
+        await asyncio.gather(*(player(user_id, token) for user_id, token in tokens.items()))
+    return latencies, failed
+
+
+def run(heartbeats: int, players: int, per_request: int) -> None:
+    for label, batched in (("per-heartbeat ORM", False), ("batched upsert   ", True)):
+        with temp_database() as session_factory:
+            tokens = seed(session_factory, players)
+            engine = session_factory.kw["bind"]
+            writes = 0
+
+            def count_writes(conn, cursor, statement, *args):
+                nonlocal writes
+                writes += statement.startswith(("INSERT INTO video_views", "UPDATE video_views"))
+
+            event.listen(engine, "before_cursor_execute", count_writes)
+            app = build_app(session_factory, batched)
+            start = time.perf_counter()
+            latencies, failed = asyncio.run(play(app, tokens, heartbeats, per_request))
+            wall = time.perf_counter() - start
+            sent = (len(latencies) - failed) * per_request
+            with session_factory() as db:
+                stored = len(db.scalars(select(VideoView.id)).all())
+            p50, p99 = percentiles(latencies, 50, 99)
+            print(f"{label}: {sent / wall:,.0f} heartbeats/s ({len(latencies) / wall:,.0f} req/s) | "
+                  f"request p50={p50 * 1000:.1f}ms p99={p99 * 1000:.1f}ms | "
+                  f"write statements={writes} views stored={stored} failed requests={failed}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--heartbeats", type=int, default=50000)
+    parser.add_argument("--players", type=int, default=200)
+    parser.add_argument("--per-request", type=int, default=20)
+    args = parser.parse_args()
+    run(args.heartbeats, args.players, args.per_request)
@@ -0,0 +1,104 @@
+"""
+Benchmark: batch materialization of per-user recommendations.
+
+Seeds a SQLite file with synthetic users, videos, views and likes (the same
+taste-cluster generator as bench_recommendations), then runs a full
+materialization and an incremental one after 1% of users watch something new.
+Prints wall time, rows written per second and the time spent building the
+model vs scoring and writing.
+
+Run from backend/:
+    python -m benchmarks.bench_materialize --users 100000 --workers 4
+"""
+import argparse
+import os
+import numpy as np
+from sqlalchemy import insert
+from benchmarks.bench_recommendations import synthetic
+from benchmarks.common import temp_database
+from src.config.recommendations import RecommendationSettings
+from src.models.channel import Channel
+from src.models.user import User
+from src.models.videos.video import Video
+from src.models.videos.video_like import VideoLike
+from src.models.videos.video_view import VideoView
+from src.services.recommendation_materializer import RecommendationMaterializer
+from src.utils.ids import EPOCH_MS, compose_snowflake
+
+CHANNELS = 500
+BATCH = 50_000
+
+
+def insert_batches(conn, table, rows) -> None:
+    for start in range(0, len(rows), BATCH):
+        conn.execute(insert(table), rows[start:start + BATCH])
+
+
+def seed(engine, users: int, videos: int, interactions: int) -> None:
+    user_index, video_ids, watch_times, likes = synthetic(users, videos, interactions)
+    # One view / like per (user, video), as the unique constraints require
+    key = user_index * videos + np.array([int(video_id.split("-")[1]) for video_id in video_ids])
+    _, first = np.unique(key, return_index=True)
+    ms = EPOCH_MS + np.arange(len(first))  # ids in insertion order
+    with engine.begin() as conn:
+        insert_batches(conn, User.__table__, [
+            {"id": i + 1, "email": f"user{i}@example.com", "username": f"user{i}"} for i in range(users)
+        ])
+        insert_batches(conn, Channel.__table__, [
+            {"id": c + 1, "name": f"channel{c}", "owner_id": c + 1} for c in range(CHANNELS)
+        ])
+        insert_batches(conn, Video.__table__, [
+            {"id": f"video-{i}", "title": f"video {i}", "video_url": "u",
+             "uploader_id": i % CHANNELS + 1, "channel_id": i % CHANNELS + 1}
+            for i in range(videos)
+        ])
+        insert_batches(conn, VideoView.__table__, [
+            {"id": compose_snowflake(int(ms[j]), 0, 0), "user_id": int(user_index[row]) + 1,
+             "video_id": video_ids[row], "watch_time": int(watch_times[row])}
+            for j, row in enumerate(first)
+        ])
+        insert_batches(conn, VideoLike.__table__, [
+            {"id": compose_snowflake(int(ms[j]), 1, 0), "user_id": int(user_index[row]) + 1,
+             "video_id": video_ids[row], "is_liked": bool(likes[row])}
+            for j, row in enumerate(first) if likes[row] >= 0
+        ])
+    print(f"seeded {users:,} users, {videos:,} videos, {len(first):,} views")
+
+
+def report(label: str, result: dict) -> None:
+    scoring = result["seconds"] - result["model_seconds"]
+    print(
+        f"{label}: {result['users']:,} users, {result['rows']:,} rows in {result['seconds']:.1f}s "
+        f"({result['rows_per_second']:,.0f} rows/s; load + model {result['model_seconds']:.1f}s, "
+        f"score + write {scoring:.1f}s)"
+    )
+
+
+def run(users: int, videos: int, interactions: int, workers: int, top_n: int) -> None:
+    with temp_database() as session_factory:
+        engine = session_factory.kw["bind"]
+        seed(engine, users, videos, interactions)
+        settings = RecommendationSettings(rec_materialize_top_n=top_n)
+        materializer = RecommendationMaterializer(session_factory, settings)
+        report(f"full ({workers} workers)", materializer.run(workers=workers))
+
+        rng = np.random.default_rng(3)
+        changed = rng.choice(users, users // 100, replace=False) + 1
+        with engine.begin() as conn:
+            # Fresh snowflake ids (default), so they're past the full run's watermark
+            conn.execute(insert(VideoView).prefix_with("OR IGNORE"), [
+                {"user_id": int(user_id), "video_id": f"video-{rng.integers(videos)}", "watch_time": 60}
+                for user_id in changed
+            ])
+        report("incremental", materializer.run(incremental=True, workers=workers))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=100000)
+    parser.add_argument("--videos", type=int, default=20000)
+    parser.add_argument("--interactions", type=int, default=1000000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--top-n", type=int, default=50)
+    args = parser.parse_args()
+    run(args.users, args.videos, args.interactions, args.workers, args.top_n)
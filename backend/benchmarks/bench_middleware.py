@@ -0,0 +1,99 @@
+"""
+Benchmark: latency each middleware layer adds to /health.
+
+Each stack is a bare FastAPI app with /health plus the listed middleware;
+the reported overhead is the p50 difference to the bare app. The old
+BaseHTTPMiddleware versions of both middlewares are included for comparison.
+
+Run from backend/:
+    python -m benchmarks.bench_middleware --requests 5000
+"""
+import argparse
+import asyncio
+import time
+import httpx
+from fastapi import FastAPI, Request
+from starlette.middleware.base import BaseHTTPMiddleware
+from benchmarks.bench_rate_limit import DequeLimiter
+from benchmarks.common import percentiles
+from src.middleware import QueryStatsMiddleware, RateLimitMiddleware, SecurityHeadersMiddleware
+from src.middleware.security import SECURITY_HEADERS
+
+
+class OldSecurityHeadersMiddleware(BaseHTTPMiddleware):
+    """The previous implementation: headers set on every Response object."""
+
+    async def dispatch(self, request: Request, call_next):
+        response = await call_next(request)
+        for name, value in SECURITY_HEADERS.items():
+            response.headers[name] = value
+        return response
+
+
+class OldRateLimitMiddleware(BaseHTTPMiddleware):
+    """The previous implementation: BaseHTTPMiddleware around the deque limiter."""
+
+    def __init__(self, app, calls: int = 100, period: int = 60):
+        super().__init__(app)
+        self.limiter = DequeLimiter(calls, period)
+
+    async def dispatch(self, request: Request, call_next):
+        self.limiter.hit(request.client.host, time.time())
+        return await call_next(request)
+
+
+# Huge limits: the benchmark measures the bookkeeping, never a 429
+LIMITS = {"calls": 10**9, "period": 60}
+
+STACKS = {
+    "bare": [],
+    "security headers (old)": [(OldSecurityHeadersMiddleware, {})],
+    "security headers": [(SecurityHeadersMiddleware, {})],
+    "rate limit (old)": [(OldRateLimitMiddleware, LIMITS)],
+    "rate limit": [(RateLimitMiddleware, LIMITS)],
+    "both (old)": [(OldRateLimitMiddleware, LIMITS), (OldSecurityHeadersMiddleware, {})],
+    "both": [(RateLimitMiddleware, LIMITS), (SecurityHeadersMiddleware, {})],
+    "query stats": [(QueryStatsMiddleware, {})],
+    "all three": [(QueryStatsMiddleware, {}), (RateLimitMiddleware, LIMITS), (SecurityHeadersMiddleware, {})],
+}
+
+
+def build_app(stack) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/health")
+    async def health_check():
+        return {"status": "healthy"}
+
+    for middleware, options in stack:
+        app.add_middleware(middleware, **options)
+    return app
+
+
+async def measure(app: FastAPI, requests: int) -> list[float]:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for _ in range(200):  # warm up
+            await client.get("/health")
+        samples = []
+        for _ in range(requests):
+            start = time.perf_counter()
+            await client.get("/health")
+            samples.append(time.perf_counter() - start)
+    return samples
+
+
+async def main(requests: int):
+    baseline = None
+    print(f"{'stack':<24} {'p50 us':>8} {'p99 us':>8} {'+p50 us':>8}")
+    for name, stack in STACKS.items():
+        p50, p99 = percentiles(await measure(build_app(stack), requests), 50, 99)
+        baseline = p50 if baseline is None else baseline
+        print(f"{name:<24} {p50 * 1e6:8.0f} {p99 * 1e6:8.0f} {(p50 - baseline) * 1e6:+8.0f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=5000)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests))
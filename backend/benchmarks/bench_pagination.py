@@ -0,0 +1,72 @@
+"""
+Benchmark: time to fetch one page at increasing depth, OFFSET vs keyset
+(created_at, id) cursors, on the videos table.
+
+Run from backend/:
+    python -m benchmarks.bench_pagination --rows 200000 --page-size 20
+"""
+import argparse
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import insert, select
+from benchmarks.common import temp_database
+from src.models.channel import Channel
+from src.models.user import User
+from src.models.videos.video import Video
+from src.utils.pagination import encode_cursor, paginate
+
+
+def seed(db, rows: int) -> None:
+    user = User(email="pages@example.com", username="pages")
+    db.add(user)
+    db.flush()
+    channel = Channel(name="pages", owner_id=user.id)
+    db.add(channel)
+    db.flush()
+    start = datetime(2026, 1, 1)
+    db.execute(insert(Video), [
+        {"id": f"v{i:08d}", "title": "t", "video_url": "u", "uploader_id": user.id,
+         "channel_id": channel.id, "created_at": start + timedelta(seconds=i // 3)}
+        for i in range(rows)
+    ])
+    db.commit()
+
+
+def timed(func, repeat: int = 20) -> float:
+    func()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main(rows: int, page_size: int):
+    with temp_database() as session_factory:
+        with session_factory() as db:
+            seed(db, rows)
+            ordered = select(Video).order_by(Video.created_at.desc(), Video.id.desc())
+            print(f"{rows:,} videos, {page_size} per page")
+            print(f"{'depth (rows)':>12} {'offset ms':>10} {'keyset ms':>10}")
+            for depth in (0, 1_000, 10_000, 100_000, rows - page_size):
+                if depth >= rows:
+                    continue
+                # The cursor a client would hold after reading `depth` rows
+                if depth:
+                    last = db.execute(
+                        select(Video.created_at, Video.id).order_by(Video.created_at.desc(), Video.id.desc())
+                        .offset(depth - 1).limit(1)
+                    ).one()
+                    cursor = encode_cursor(last.created_at, last.id)
+                else:
+                    cursor = None
+                offset_ms = timed(lambda: db.execute(ordered.offset(depth).limit(page_size)).all())
+                keyset_ms = timed(lambda: paginate(db, select(Video), Video.created_at, Video.id, cursor, page_size))
+                print(f"{depth:>12,} {offset_ms:10.2f} {keyset_ms:10.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--page-size", type=int, default=20)
+    args = parser.parse_args()
+    main(args.rows, args.page_size)
@@ -0,0 +1,83 @@
+"""
+Benchmark: per-request cost of the rate limiter backends, and memory held by
+the in-memory backend with 1M distinct clients. The old deque-per-IP limiter
+(sha256 + timestamp deque) is measured alongside for comparison.
+
+Run from backend/:
+    python -m benchmarks.bench_rate_limit --hits 200000 --clients 1000000
+"""
+import argparse
+import hashlib
+import os
+import tempfile
+import time
+import tracemalloc
+from collections import defaultdict, deque
+from src.middleware.rate_limit import MemoryRateLimitBackend, RateLimit, SQLiteRateLimitBackend
+
+LIMIT = RateLimit(calls=100, period=60)
+
+
+class DequeLimiter:
+    """The previous implementation: a timestamp deque per sha256(IP)."""
+
+    def __init__(self, calls: int, period: int):
+        self.calls = calls
+        self.period = period
+        self.clients = defaultdict(deque)
+
+    def hit(self, ip: str, now: float) -> bool:
+        client_id = hashlib.sha256(ip.encode()).hexdigest()[:16]
+        timestamps = self.clients[client_id]
+        while timestamps and timestamps[0] <= now - self.period:
+            timestamps.popleft()
+        if len(timestamps) >= self.calls:
+            return False
+        timestamps.append(now)
+        return True
+
+
+def per_hit(name: str, hit, hits: int, clients: int) -> None:
+    keys = [f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}" for i in range(clients)]
+    start = time.perf_counter()
+    for i in range(hits):
+        hit(keys[i % clients], time.time())
+    elapsed = time.perf_counter() - start
+    print(f"{name:<10} {elapsed / hits * 1e6:8.2f} us/request  ({hits / elapsed:,.0f} req/s)")
+
+
+def memory(name: str, hit, clients: int) -> None:
+    now = time.time()
+    tracemalloc.start()
+    for i in range(clients):
+        hit(f"c{i}", now)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{name:<10} {current / 2**20:8.1f} MiB for {clients:,} clients ({current / clients:.0f} B/client)")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--hits", type=int, default=200_000)
+    parser.add_argument("--clients", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    print("Per-request overhead (1,000 active clients)")
+    old = DequeLimiter(LIMIT.calls, LIMIT.period)
+    per_hit("deque", old.hit, args.hits, 1000)
+    memory_backend = MemoryRateLimitBackend(max_clients=args.clients)
+    per_hit("memory", lambda key, now: memory_backend.hit(key, LIMIT, now), args.hits, 1000)
+    with tempfile.TemporaryDirectory() as tmp:
+        sqlite_backend = SQLiteRateLimitBackend(os.path.join(tmp, "limits.db"))
+        per_hit("sqlite", lambda key, now: sqlite_backend.hit(key, LIMIT, now), args.hits // 10, 1000)
+
+    print(f"\nMemory with {args.clients:,} distinct clients (one request each)")
+    memory("deque", DequeLimiter(LIMIT.calls, LIMIT.period).hit, args.clients)
+    backend = MemoryRateLimitBackend(max_clients=args.clients)
+    memory("memory", lambda key, now: backend.hit(key, LIMIT, now), args.clients)
+    capped = MemoryRateLimitBackend(max_clients=100_000)
+    memory("capped", lambda key, now: capped.hit(key, LIMIT, now), args.clients)
+
+
+if __name__ == "__main__":
+    main()
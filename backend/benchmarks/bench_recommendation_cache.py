@@ -0,0 +1,99 @@
+"""
+Benchmark: GET /recommendations/ with and without the serving cache.
+
+Seeds a SQLite file with the synthetic users, videos and views of
+bench_materialize, builds the item-item model, then sends requests for
+Zipf-skewed users (a few heavy users account for most traffic) from
+`--concurrency` clients. Prints req/s, latency percentiles and the cache's
+hit rate and recompute latency, and then a stampede: `--concurrency`
+simultaneous requests for one cold user, counting how many computations
+they cause.
+
+Run from backend/:
+    python -m benchmarks.bench_recommendation_cache --requests 5000 --concurrency 50
+"""
+import argparse
+import asyncio
+import time
+import httpx
+import numpy as np
+from fastapi import FastAPI
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+from benchmarks.bench_materialize import seed
+from benchmarks.common import percentiles, temp_database
+from src.api import recommendations
+from src.config.database import async_database_url, get_async_db
+from src.services.recommendation_cache import RecommendationCache
+from src.services.recommendation_engine import recommendation_engine
+
+
+def build_app(url: str) -> tuple[FastAPI, object]:
+    engine = create_async_engine(async_database_url(url), poolclass=NullPool)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+
+    async def _get_async_db():
+        async with session_factory() as db:
+            yield db
+
+    app = FastAPI()
+    app.include_router(recommendations.router, prefix="/recommendations")
+    app.dependency_overrides[get_async_db] = _get_async_db
+    return app, engine
+
+
+async def hammer(app, user_ids: np.ndarray, concurrency: int) -> list[float]:
+    transport = httpx.ASGITransport(app=app)
+    latencies: list[float] = []
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def worker(offset: int):
+            for user_id in user_ids[offset::concurrency].tolist():
+                start = time.perf_counter()
+                response = await client.get("/recommendations/recommendations/", params={"user_id": user_id})
+                latencies.append(time.perf_counter() - start)
+                assert response.status_code in (200, 404), response.text
+
+        await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    return latencies
+
+
+def run(users: int, videos: int, interactions: int, requests: int, concurrency: int) -> None:
+    with temp_database() as session_factory:
+        seed(session_factory.kw["bind"], users, videos, interactions)
+        recommendation_engine.session_factory = session_factory
+        recommendation_engine.rebuild()
+        app, engine = build_app(str(session_factory.kw["bind"].url))
+        rng = np.random.default_rng(2)
+        traffic = np.minimum(rng.zipf(1.3, requests), users)
+
+        for label, enabled in (("no cache", False), ("cache   ", True)):
+            cache = RecommendationCache(enabled=enabled)
+            recommendations.recommendation_cache = cache
+            start = time.perf_counter()
+            samples = asyncio.run(hammer(app, traffic, concurrency))
+            wall = time.perf_counter() - start
+            p50, p99 = percentiles(samples, 50, 99)
+            stats = cache.stats()
+            print(f"{label}: {len(samples) / wall:,.0f} req/s | p50={p50 * 1000:.1f}ms p99={p99 * 1000:.1f}ms | "
+                  f"hit rate {stats['hit_rate']:.1%}, {stats['recomputes']:,} recomputes "
+                  f"(avg {stats['recompute_avg_ms']:.1f}ms, max {stats['recompute_max_ms']:.1f}ms)")
+
+            cold = np.full(concurrency, users // 2 + 1)  # a user outside the Zipf head
+            start = time.perf_counter()
+            asyncio.run(hammer(app, cold, concurrency))
+            wall = time.perf_counter() - start
+            computed = cache.recomputes - stats["recomputes"] if enabled else concurrency
+            print(f"  stampede: {concurrency} requests for one cold user in {wall * 1000:.0f}ms, "
+                  f"{computed} computation(s)")
+        asyncio.run(engine.dispose())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--videos", type=int, default=5000)
+    parser.add_argument("--interactions", type=int, default=200000)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+    run(args.users, args.videos, args.interactions, args.requests, args.concurrency)
@@ -0,0 +1,111 @@
+"""
+Benchmark: item-item recommendation model on a synthetic interaction log.
+
+Users pick most of their videos from a few taste clusters with Zipf-like
+popularity, the way real watch histories concentrate. Reports model build
+time and peak memory (tracemalloc sees NumPy's buffers), then per-user serve
+latency of `ItemNeighbours.recommend` with each user's latest videos as seeds,
+and how often a held-out video of the user shows up in their top 20
+(vs. the 20 most popular videos they haven't seen).
+
+Run from backend/:
+    python -m benchmarks.bench_recommendations --interactions 1000000
+"""
+import argparse
+import time
+import tracemalloc
+import numpy as np
+from src.config.recommendations import recommendation_settings
+from src.services.recommendation_engine import InteractionLoader, ItemNeighbours, like_weights, view_weights
+
+CLUSTERS = 100
+
+
+def synthetic(users: int, videos: int, interactions: int, seed: int = 7):
+    """(user_ids, video_ids, watch_times, likes) with likes: 1 like, 0 dislike, -1 none."""
+    rng = np.random.default_rng(seed)
+    cluster_of_video = rng.integers(0, CLUSTERS, videos)
+    by_cluster = [np.flatnonzero(cluster_of_video == c) for c in range(CLUSTERS)]
+    tastes = rng.integers(0, CLUSTERS, (users, 3))
+    user_ids = rng.integers(0, users, interactions)
+    in_taste = rng.random(interactions) < 0.8
+    video_index = rng.integers(0, videos, interactions)  # the other 20%: anything
+    clusters = tastes[user_ids, rng.integers(0, 3, interactions)]
+    for c in range(CLUSTERS):
+        rows = np.flatnonzero(in_taste & (clusters == c))
+        members = by_cluster[c]
+        rank = np.minimum(rng.zipf(1.3, len(rows)) - 1, len(members) - 1)
+        video_index[rows] = members[rank]
+    watch_times = rng.exponential(120, interactions).astype(np.int64)
+    likes = np.where(rng.random(interactions) < 0.15, (rng.random(interactions) < 0.9).astype(np.int64), -1)
+    return user_ids, np.array([f"video-{i}" for i in range(videos)], dtype=object)[video_index], watch_times, likes
+
+
+def load(user_ids, video_ids, watch_times, likes):
+    settings = recommendation_settings
+    loader = InteractionLoader()
+    recency = np.arange(len(user_ids))
+    loader.add(user_ids, video_ids, view_weights(watch_times, settings.rec_watch_time_scale), recency)
+    liked = likes >= 0
+    loader.add(user_ids[liked], video_ids[liked], like_weights(likes[liked] == 1, settings.rec_like_weight), recency[liked])
+    return loader.interactions()
+
+
+def run(users: int, videos: int, interactions: int, requests: int) -> None:
+    settings = recommendation_settings
+    user_ids, video_ids, watch_times, likes = synthetic(users, videos, interactions)
+    # Hold out each sampled user's latest video to check the recommendations are sensible
+    rng = np.random.default_rng(11)
+    sampled = rng.choice(np.unique(user_ids), requests, replace=False)
+    last_row = {}
+    for row in np.flatnonzero(np.isin(user_ids, sampled)):
+        last_row[user_ids[row]] = row
+    held_out = np.zeros(len(user_ids), bool)
+    held_out[list(last_row.values())] = True
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    data = load(user_ids[~held_out], video_ids[~held_out], watch_times[~held_out], likes[~held_out])
+    model = ItemNeighbours.build(data, settings.rec_neighbours, settings.rec_max_items_per_user)
+    build = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    model_bytes = model.neighbours.nbytes + model.scores.nbytes
+    print(f"{interactions:,} interactions, {users:,} users, {videos:,} videos")
+    print(f"build: {build:.2f}s, peak traced memory {peak / 2**20:.0f} MiB, model {model_bytes / 2**20:.1f} MiB")
+
+    histories = {}
+    for row in np.flatnonzero(np.isin(user_ids, sampled) & ~held_out):
+        histories.setdefault(user_ids[row], []).append(row)
+    # Baseline: the most watched videos the user hasn't seen
+    popular = [model.video_ids[i] for i in np.argsort(-np.bincount(data.video_index))[:20 + settings.rec_history]]
+    latencies, hits, popular_hits = [], 0, 0
+    for user_id in sampled:
+        rows = histories.get(user_id, [])[::-1][:settings.rec_history]
+        seen = [video_ids[row] for row in rows]
+        seeds = {}
+        for row in rows[:settings.rec_seed_items]:
+            seeds[video_ids[row]] = seeds.get(video_ids[row], 0.0) + float(
+                view_weights(watch_times[row], settings.rec_watch_time_scale)
+            )
+        start = time.perf_counter()
+        ranked = model.recommend(seeds, seen, 20)
+        latencies.append(time.perf_counter() - start)
+        hits += video_ids[last_row[user_id]] in {video_id for video_id, _ in ranked}
+        popular_hits += video_ids[last_row[user_id]] in [v for v in popular if v not in set(seen)][:20]
+    latencies = np.array(latencies) * 1000
+    print(
+        f"serve ({requests} users): p50 {np.percentile(latencies, 50):.3f}ms, "
+        f"p99 {np.percentile(latencies, 99):.3f}ms; held-out video in top 20 for {hits / requests:.0%} "
+        f"(most popular unseen: {popular_hits / requests:.0%})"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=50000)
+    parser.add_argument("--videos", type=int, default=20000)
+    parser.add_argument("--interactions", type=int, default=1000000)
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+    run(args.users, args.videos, args.interactions, args.requests)
@@ -0,0 +1,56 @@
+"""
+Benchmark: /auth/refresh cost with the refresh-token store, next to the
+bcrypt hash + verify pair the previous scheme paid on every refresh.
+
+Run from backend/:
+    python -m benchmarks.bench_refresh --refreshes 500
+"""
+import argparse
+import asyncio
+import time
+from passlib.hash import bcrypt
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+from benchmarks.common import percentiles, temp_database
+from src.config.database import async_database_url
+from src.models.user import User
+from src.services.auth.async_auth_service import AsyncAuthService
+
+
+async def rotate(url: str, user_id: int, refreshes: int) -> list[float]:
+    engine = create_async_engine(async_database_url(url), poolclass=NullPool)
+    async with async_sessionmaker(engine, expire_on_commit=False)() as db:
+        service = AsyncAuthService(db)
+        tokens = await service.create_tokens(await db.get(User, user_id), device="bench")
+        timings = []
+        for _ in range(refreshes):
+            start = time.perf_counter()
+            tokens = await service.refresh_access_token(tokens.refresh_token)
+            timings.append(time.perf_counter() - start)
+    await engine.dispose()
+    return timings
+
+
+def run(refreshes: int) -> None:
+    with temp_database() as session_factory:
+        with session_factory() as db:
+            user = User(email="refresh@example.com", username="refresh", provider="email")
+            db.add(user)
+            db.commit()
+            user_id = user.id
+        timings = asyncio.run(rotate(str(session_factory.kw["bind"].url), user_id, refreshes))
+
+    p50, p99 = percentiles(timings, 50, 99)
+    print(f"token store : p50={p50 * 1000:.3f}ms p99={p99 * 1000:.3f}ms over {refreshes} refreshes")
+
+    token = "x" * 200
+    start = time.perf_counter()
+    bcrypt.verify(token, bcrypt.hash(token))
+    print(f"bcrypt pair : {(time.perf_counter() - start) * 1000:.3f}ms per refresh (previous scheme)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--refreshes", type=int, default=500)
+    args = parser.parse_args()
+    run(args.refreshes)
@@ -0,0 +1,143 @@
+"""
+Benchmark: the related videos index on synthetic titles and descriptions.
+
+Videos are written from topics: each topic favours a few hundred words of a
+Zipf-distributed vocabulary, and some videos are episodes of a series
+(the same title with another part number). Reports build time, index size,
+save and memory-mapped load time, incremental add / remove cost, and for
+sampled videos the query latency and recall@10 of the LSH index against an
+exact brute-force cosine scan (an inverted index over every vector).
+
+Run from backend/:
+    python -m benchmarks.bench_related_videos --videos 500000
+"""
+import argparse
+import os
+import tempfile
+import time
+import numpy as np
+from benchmarks.common import percentiles
+from src.services.related_videos import RelatedVideoIndex
+
+VOCABULARY = 50_000
+TOPICS = 2_000
+TOPIC_WORDS = 200
+
+
+def synthetic(videos: int, seed: int = 9):
+    """(video_id, title, description) rows."""
+    rng = np.random.default_rng(seed)
+    words = np.array([f"w{i}" for i in range(VOCABULARY)])
+    topic_words = rng.integers(0, VOCABULARY, (TOPICS, TOPIC_WORDS))
+    topics = np.minimum(rng.zipf(1.1, videos), TOPICS) - 1
+    rows = []
+    for i in range(videos):
+        topic = topic_words[topics[i]]
+
+        def text(length: int) -> str:
+            on_topic = topic[np.minimum(rng.zipf(1.5, length), TOPIC_WORDS) - 1]
+            general = np.minimum(rng.zipf(1.2, length), VOCABULARY) - 1
+            return " ".join(words[np.where(rng.random(length) < 0.7, on_topic, general)])
+
+        if rows and rng.random() < 0.1:  # the next episode of an earlier video
+            _, title, _ = rows[rng.integers(len(rows))]
+            title = f"{title.rsplit(' part ', 1)[0]} part {rng.integers(2, 30)}"
+        else:
+            title = text(int(rng.integers(4, 9)))
+        rows.append((f"video-{i}", title, text(int(rng.integers(10, 41)))))
+    return rows
+
+
+class BruteForce:
+    """Exact cosine of one video against all others, via an inverted index of the stored vectors."""
+
+    def __init__(self, index: RelatedVideoIndex):
+        live = np.flatnonzero(index.alive[:index.n])
+        lengths = index.lengths[live].astype(np.int64)
+        positions = np.repeat(index.starts[live] - np.concatenate(([0], np.cumsum(lengths)[:-1])), lengths) \
+            + np.arange(lengths.sum())
+        features = index.features[positions]
+        order = np.argsort(features, kind="stable")
+        self.features = features[order]
+        self.weights = index.weights[positions][order]
+        self.owner = np.repeat(live, lengths)[order]
+        self.index = index
+
+    def similar(self, video_id: str, limit: int = 10):
+        index = self.index
+        slot = index.slot[video_id]
+        start, length = index.starts[slot], index.lengths[slot]
+        scores = np.zeros(index.n)
+        for feature, weight in zip(index.features[start:start + length], index.weights[start:start + length]):
+            lo, hi = np.searchsorted(self.features, feature), np.searchsorted(self.features, feature, "right")
+            np.add.at(scores, self.owner[lo:hi], weight * self.weights[lo:hi])
+        scores[slot] = 0
+        best = np.argsort(-scores, kind="stable")[:limit]
+        return [(index.ids[i], scores[i]) for i in best if scores[i] > 0]
+
+
+def run(videos: int, queries: int, signature_bits: int, max_candidates: int) -> None:
+    start = time.perf_counter()
+    rows = synthetic(videos)
+    print(f"generated {len(rows):,} videos in {time.perf_counter() - start:.0f}s")
+
+    index = RelatedVideoIndex(signature_bits=signature_bits, max_candidates=max_candidates)
+    start = time.perf_counter()
+    index.add_many(rows)
+    build = time.perf_counter() - start
+    size = sum(array.nbytes for array in (
+        index.starts, index.lengths, index.features, index.weights, index.signatures, index.df,
+    ))
+    print(f"build: {build:.1f}s ({len(rows) / build:,.0f} videos/s), arrays {size / 2**20:.0f} MiB, "
+          f"{signature_bits}-bit signatures")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "related")
+        start = time.perf_counter()
+        index.save(path)
+        saved = time.perf_counter() - start
+        loaded = RelatedVideoIndex(signature_bits=signature_bits, max_candidates=max_candidates)
+        start = time.perf_counter()
+        loaded.load(path)
+        load = time.perf_counter() - start
+        print(f"save: {saved:.1f}s; memory-mapped load: {load:.2f}s")
+
+        rng = np.random.default_rng(1)
+        sample = [rows[i][0] for i in rng.choice(len(rows), queries, replace=False)]
+        brute = BruteForce(index)
+        recalls, latencies, exact_latencies = [], [], []
+        for video_id in sample:
+            tick = time.perf_counter()
+            approximate = loaded.similar(video_id, 10)
+            latencies.append(time.perf_counter() - tick)
+            tick = time.perf_counter()
+            exact = brute.similar(video_id, 10)
+            exact_latencies.append(time.perf_counter() - tick)
+            if exact:
+                recalls.append(len({v for v, _ in approximate} & {v for v, _ in exact}) / len(exact))
+        p50, p99 = percentiles(latencies, 50, 99)
+        exact_p50, = percentiles(exact_latencies, 50)
+        print(f"query (mapped index): p50 {p50 * 1000:.2f}ms, p99 {p99 * 1000:.2f}ms; "
+              f"recall@10 vs brute force {np.mean(recalls):.3f} (brute force p50 {exact_p50 * 1000:.0f}ms)")
+
+        new = synthetic(1000, seed=10)
+        start = time.perf_counter()
+        for video_id, title, description in new:
+            loaded.add(f"new-{video_id}", title, description)
+        added = time.perf_counter() - start
+        start = time.perf_counter()
+        for video_id, _, _ in new:
+            loaded.remove(f"new-{video_id}")
+        removed = time.perf_counter() - start
+        print(f"incremental: add {added:.2f}s / remove {removed:.2f}s for 1,000 videos, one at a time "
+              f"(the first add copies the mapped arrays into memory)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--videos", type=int, default=500000)
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--signature-bits", type=int, default=256)
+    parser.add_argument("--max-candidates", type=int, default=2000)
+    args = parser.parse_args()
+    run(args.videos, args.queries, args.signature_bits, args.max_candidates)
@@ -0,0 +1,102 @@
+"""
+Benchmark: rendering 1k ChannelDetails / Recommendation objects.
+
+  validated+json    FastAPI default: response_model validation, stdlib json
+  validated+orjson  response_model validation, ORJSONResponse (app default now)
+  trusted           trusted_response: fields read off the objects, orjson, no validation
+
+Measured both as the bare serialization step and end to end through a route.
+
+Run from backend/:
+    python -m benchmarks.bench_serialization --items 1000 --rounds 50
+"""
+import argparse
+import asyncio
+import time
+from datetime import datetime
+from types import SimpleNamespace
+import httpx
+from fastapi import FastAPI
+from fastapi._compat import ModelField
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+from src.schemas.channel import ChannelDetails
+from src.schemas.recommendation import Recommendation
+from src.utils.responses import ORJSONResponse, trusted_response
+
+
+def make_channels(n: int) -> list[SimpleNamespace]:
+    return [
+        SimpleNamespace(
+            id=i, name=f"channel {i}", description="A channel about things " * 4,
+            subscribers_count=i * 7, videos_count=i % 300, created_at=datetime(2026, 1, 1),
+            links=["https://example.com", f"https://example.com/{i}"],
+        )
+        for i in range(n)
+    ]
+
+
+def make_recommendations(n: int) -> list[SimpleNamespace]:
+    return [SimpleNamespace(id=i, user_id=i % 100, video_id=i, score=1 / (i + 1)) for i in range(n)]
+
+
+async def render(path: str, field: ModelField, items, schema) -> bytes:
+    if path == "trusted":
+        return trusted_response(items, schema).body
+    content = await serialize_response(field=field, response_content=items)
+    response_class = JSONResponse if path == "validated+json" else ORJSONResponse
+    return response_class(content).body
+
+
+def build_app(items, schema) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/validated+json", response_model=list[schema], response_class=JSONResponse)
+    async def validated_json():
+        return items
+
+    @app.get("/validated+orjson", response_model=list[schema], response_class=ORJSONResponse)
+    async def validated_orjson():
+        return items
+
+    @app.get("/trusted", response_model=list[schema])
+    async def trusted():
+        return trusted_response(items, schema)
+
+    return app
+
+
+async def main(items: int, rounds: int):
+    paths = ["validated+json", "validated+orjson", "trusted"]
+    for schema, objects in [
+        (ChannelDetails, make_channels(items)),
+        (Recommendation, make_recommendations(items)),
+    ]:
+        field = create_model_field(name="Response", type_=list[schema], mode="serialization")
+        app = build_app(objects, schema)
+        transport = httpx.ASGITransport(app=app)
+        print(f"\n{items:,} x {schema.__name__}")
+        print(f"{'path':<18} {'serialize ms':>13} {'route ms':>10}")
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for path in paths:
+                await render(path, field, objects, schema)
+                start = time.perf_counter()
+                for _ in range(rounds):
+                    await render(path, field, objects, schema)
+                serialize = (time.perf_counter() - start) / rounds
+
+                await client.get(f"/{path}")
+                start = time.perf_counter()
+                for _ in range(rounds):
+                    await client.get(f"/{path}")
+                route = (time.perf_counter() - start) / rounds
+                print(f"{path:<18} {serialize * 1e3:13.2f} {route * 1e3:10.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=1000)
+    parser.add_argument("--rounds", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(main(args.items, args.rounds))
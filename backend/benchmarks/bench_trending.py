@@ -0,0 +1,144 @@
+"""
+Benchmark: replay a synthetic day of view and like events into the trending feed.
+
+Events follow a diurnal rate (quiet nights, busy evenings) over Zipf-popular
+videos, plus a few viral spikes: videos that get a burst of attention at a
+random hour and fade. They are fed in time order through
+`TrendingFeed.record`, as the counter listener would. Reports events/s,
+memory, `top()` latency for the global and per-channel lists, a snapshot to
+SQLite and a warm start from it, and how the end-of-day top-K compares with
+exact decayed scores recomputed from every event (the full rescan the feed
+avoids; its cost is printed too).
+
+Run from backend/:
+    python -m benchmarks.bench_trending --events 2000000
+"""
+import argparse
+import time
+import tracemalloc
+import numpy as np
+from sqlalchemy import insert
+from benchmarks.common import temp_database
+from src.models.channel import Channel
+from src.models.user import User
+from src.models.videos.trending_score import TrendingScore  # noqa: F401
+from src.models.videos.video import Video
+from src.services.trending import TrendingFeed
+from src.utils.ids import EPOCH_MS
+
+DAY = 24 * 3600
+START = EPOCH_MS / 1000 + 300 * DAY
+SPIKES = 20
+
+
+def synthetic(events: int, videos: int, channels: int, seed: int = 5):
+    """(times, video_index, weights, channel_of_video), times ascending."""
+    rng = np.random.default_rng(seed)
+    # Diurnal rate by rejection: peak around 20:00, trough around 05:00
+    times = rng.uniform(0, DAY, events * 2)
+    rate = 1 + 0.8 * np.sin(2 * np.pi * (times / DAY - 0.59 + 0.25))
+    times = times[rng.random(len(times)) * 1.8 < rate][:events]
+    video_index = np.minimum(rng.zipf(1.2, len(times)) - 1, videos - 1)
+    video_index = rng.permutation(videos)[video_index]  # popularity unrelated to id
+    # Viral spikes take 10% of the traffic, each decaying over ~2 hours from its start
+    spiking = rng.random(len(times)) < 0.1
+    spike = rng.integers(0, SPIKES, spiking.sum())
+    spike_video = rng.integers(0, videos, SPIKES)
+    spike_start = rng.uniform(0, DAY - 4 * 3600, SPIKES)
+    video_index[spiking] = spike_video[spike]
+    times[spiking] = np.minimum(spike_start[spike] + rng.exponential(2 * 3600, spiking.sum()), DAY - 1)
+    order = np.argsort(times, kind="stable")
+    weights = np.where(rng.random(len(times)) < 0.05, 4.0, 1.0)  # a like (3) rides with 5% of views
+    return START + times[order], video_index[order], weights, rng.integers(1, channels + 1, videos)
+
+
+def exact_top(times, video_index, weights, videos, now, half_life_hours, mask=None):
+    """Decayed score of every video from every event: the full rescan."""
+    decay = weights * np.exp2(-(now - times) / (half_life_hours * 3600))
+    scores = np.bincount(video_index, weights=decay, minlength=videos)
+    if mask is not None:
+        scores = np.where(mask, scores, 0)
+    return scores
+
+
+def recall(feed_top, scores, k):
+    best = set(np.argsort(-scores, kind="stable")[:k].tolist())
+    return len(best & {int(video_id.split("-")[1]) for video_id, _ in feed_top}) / k
+
+
+def run(events: int, videos: int, channels: int, k: int, half_life_hours: float) -> None:
+    times, video_index, weights, channel_of_video = synthetic(events, videos, channels)
+    video_ids = [f"video-{i}" for i in range(videos)]
+    now = START + DAY
+    print(f"{len(times):,} events over a day, {videos:,} videos in {channels} channels, K={k}")
+
+    with temp_database() as session_factory:
+        with session_factory.kw["bind"].begin() as conn:
+            conn.execute(insert(User.__table__), [{"id": 1, "email": "b@example.com", "username": "b"}])
+            conn.execute(insert(Channel.__table__), [
+                {"id": c, "name": f"channel{c}", "owner_id": 1} for c in range(1, channels + 1)
+            ])
+            conn.execute(insert(Video.__table__), [
+                {"id": video_ids[i], "title": "v", "video_url": "u", "uploader_id": 1,
+                 "channel_id": int(channel_of_video[i])}
+                for i in range(videos)
+            ])
+
+        rows = list(zip([video_ids[i] for i in video_index.tolist()], weights.tolist(), times.tolist(),
+                        channel_of_video[video_index].tolist()))
+
+        def replay() -> TrendingFeed:
+            feed = TrendingFeed(session_factory, k=k, half_life_hours=half_life_hours, clock=lambda: now)
+            for video_id, weight, at, channel_id in rows:
+                feed.record(video_id, weight, at=at, channel_id=channel_id)
+            return feed
+
+        tracemalloc.start()
+        replay()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        start = time.perf_counter()
+        feed = replay()
+        seconds = time.perf_counter() - start
+        print(f"replay: {len(rows) / seconds:,.0f} events/s, peak {peak / 2**20:.1f} MiB for "
+              f"{len(feed.scores):,} scores and {len(feed.channel_top)} channel lists")
+
+        tick = time.perf_counter()
+        scores = exact_top(times, video_index, weights, videos, now, half_life_hours)
+        rescan = time.perf_counter() - tick
+        channel_scores = exact_top(times, video_index, weights, videos, now, half_life_hours, channel_of_video == 1)
+        print(f"full rescan of the day's events: {rescan * 1000:.0f}ms; recall@{k} vs exact: "
+              f"global {recall(feed.top(k), scores, k):.3f}, "
+              f"channel 1 {recall(feed.top(k, channel_id=1), channel_scores, min(k, int((channel_scores > 0).sum()))):.3f}")
+
+        for label, channel_id in (("global", None), ("per-channel", 1)):
+            samples = []
+            for _ in range(2000):
+                feed.record(video_ids[0], 1.0, at=now, channel_id=int(channel_of_video[0]))  # invalidate the read copy
+                tick = time.perf_counter()
+                feed.top(20, channel_id=channel_id)
+                samples.append(time.perf_counter() - tick)
+            p50, p99 = np.percentile(samples, [50, 99]) * 1e6
+            print(f"top(20) {label}: p50 {p50:.1f}us, p99 {p99:.1f}us (after a write)")
+
+        tick = time.perf_counter()
+        written = feed.snapshot()
+        snapshot = time.perf_counter() - tick
+        restarted = TrendingFeed(session_factory, k=k, half_life_hours=half_life_hours, clock=lambda: now)
+        tick = time.perf_counter()
+        loaded = restarted.load()
+        warm = time.perf_counter() - tick
+        same = [v for v, _ in restarted.top(k)] == [v for v, _ in feed.top(k)]
+        print(f"snapshot: {written:,} rows in {snapshot:.2f}s; warm start: {loaded:,} rows in {warm:.2f}s "
+              f"(same top-K: {same})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--events", type=int, default=2000000)
+    parser.add_argument("--videos", type=int, default=20000)
+    parser.add_argument("--channels", type=int, default=500)
+    parser.add_argument("--k", type=int, default=100)
+    parser.add_argument("--half-life-hours", type=float, default=6.0)
+    args = parser.parse_args()
+    run(args.events, args.videos, args.channels, args.k, args.half_life_hours)
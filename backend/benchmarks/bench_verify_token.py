@@ -0,0 +1,122 @@
+"""
+Benchmark: requests/sec on /auth/verify-token through a sync baseline
+(Session + threadpool dependency) and the AsyncSession auth dependencies,
+with the user cache disabled (every request hits the database) and enabled.
+
+The app only authenticates asynchronously; the sync route lives here to
+keep the comparison.
+
+Run from backend/:
+    python -m benchmarks.bench_verify_token --requests 2000 --concurrency 50
+"""
+import argparse
+import asyncio
+import time
+import httpx
+from typing import Optional
+from fastapi import APIRouter, Depends, FastAPI, HTTPException, status
+from fastapi.security import HTTPAuthorizationCredentials
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from benchmarks.common import temp_database
+from src.config.database import async_database_url, get_async_db
+from src.models.loaders import USER_ONLY
+from src.models.user import User
+from src.services.auth.async_auth_service import AsyncAuthService
+from src.services.auth.user_cache import UserCache
+from src.services.dependencies import get_async_auth_service, get_current_user_async, security
+from src.utils.auth_utils import create_access_token, verify_token
+
+
+def sync_current_user(session_factory: sessionmaker):
+    """The pre-async dependency: a blocking Session lookup run in the threadpool."""
+
+    def current_user(credentials: Optional[HTTPAuthorizationCredentials] = Depends(security)) -> User:
+        payload = verify_token(credentials.credentials, "access") if credentials else None
+        if not payload:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid access token")
+        with session_factory() as db:
+            user = db.execute(
+                select(User).options(*USER_ONLY).where(User.id == payload.get("user_id")).limit(1)
+            ).scalar_one_or_none()
+        if not user or not user.is_active or payload.get("ver", 0) < user.token_version:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found or inactive")
+        return user
+
+    return current_user
+
+
+def build_app(cache: Optional[UserCache], session_factory, async_session_factory) -> FastAPI:
+    """verify-token on the sync baseline if `cache` is None, else on the async path."""
+    router = APIRouter(prefix="/auth")
+    current_user = sync_current_user(session_factory) if cache is None else get_current_user_async
+
+    @router.get("/verify-token")
+    async def verify_token_route(user: User = Depends(current_user)):
+        return {"valid": True, "user_id": user.id, "email": user.email}
+
+    async def _get_async_db():
+        async with async_session_factory() as db:
+            yield db
+
+    def _get_async_auth_service(db=Depends(get_async_db)):
+        return AsyncAuthService(db, cache)
+
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides.update({
+        get_async_db: _get_async_db,
+        get_async_auth_service: _get_async_auth_service,
+    })
+    return app
+
+
+async def hammer(app: FastAPI, token: str, requests: int, concurrency: int) -> float:
+    transport = httpx.ASGITransport(app=app)
+    headers = {"Authorization": f"Bearer {token}"}
+    remaining = iter(range(requests))
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def worker():
+            for _ in remaining:
+                response = await client.get("/auth/verify-token", headers=headers)
+                assert response.status_code == 200, response.text
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return requests / (time.perf_counter() - start)
+
+
+def run(requests: int, concurrency: int) -> None:
+    with temp_database() as session_factory:
+        with session_factory() as db:
+            user = User(email="verify@example.com", username="verify", provider="email")
+            db.add(user)
+            db.commit()
+            token = create_access_token({"user_id": user.id, "email": user.email})
+
+        async_engine = create_async_engine(async_database_url(str(session_factory.kw["bind"].url)), pool_size=concurrency)
+        async_session_factory = async_sessionmaker(async_engine, expire_on_commit=False)
+
+        async def main():
+            variants = (
+                ("sync              ", None),
+                ("async             ", UserCache(enabled=False)),
+                ("async + user cache", UserCache()),
+            )
+            for label, cache in variants:
+                app = build_app(cache, session_factory, async_session_factory)
+                await hammer(app, token, min(100, requests), concurrency)  # warm up
+                rps = await hammer(app, token, requests, concurrency)
+                print(f"{label}: {rps:8.1f} req/s ({requests} requests, concurrency {concurrency})")
+            await async_engine.dispose()
+
+        asyncio.run(main())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+    run(args.requests, args.concurrency)
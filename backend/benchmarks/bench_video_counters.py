@@ -0,0 +1,91 @@
+"""
+Benchmark: 1,000 concurrent likes on one video, one UPDATE ... + 1 per like
+(before) vs buffered counter deltas flushed in one statement (after).
+
+Every per-event UPDATE queues on the same row lock (on SQLite, the database
+write lock); the buffer turns them into lock-striped dict updates.
+
+Run from backend/:
+    python -m benchmarks.bench_video_counters --likes 1000 --threads 32
+"""
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import event, select, update
+from sqlalchemy.exc import OperationalError
+from benchmarks.common import percentiles, temp_database
+from src.models.channel import Channel
+from src.models.user import User
+from src.models.videos.video import Video
+from src.services.video_counters import VideoCounterBuffer
+
+
+def seed(session_factory) -> None:
+    with session_factory() as db:
+        user = User(email="viral@example.com", username="viral")
+        db.add(user)
+        db.flush()
+        channel = Channel(name="viral", owner_id=user.id)
+        db.add(channel)
+        db.flush()
+        db.add(Video(id="viral", title="viral", video_url="u", uploader_id=user.id, channel_id=channel.id))
+        db.commit()
+
+
+def naive_like(session_factory) -> None:
+    with session_factory() as db:
+        db.execute(update(Video).where(Video.id == "viral").values(like_count=Video.like_count + 1))
+        db.commit()
+
+
+def hammer(like, likes: int, threads: int):
+    latencies, errors = [], 0
+
+    def timed(_):
+        nonlocal errors
+        start = time.perf_counter()
+        try:
+            like()
+        except OperationalError:  # "database is locked" after the busy timeout
+            errors += 1
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(timed, range(likes)))
+    return time.perf_counter() - start, latencies, errors
+
+
+def run(likes: int, threads: int) -> None:
+    for label in ("per-event UPDATE", "buffered deltas "):
+        with temp_database() as session_factory:
+            seed(session_factory)
+            engine = session_factory.kw["bind"]
+            updates = 0
+
+            def count_updates(conn, cursor, statement, *args):
+                nonlocal updates
+                updates += statement.startswith("UPDATE videos")
+
+            event.listen(engine, "before_cursor_execute", count_updates)
+            if label.startswith("per-event"):
+                wall, latencies, errors = hammer(lambda: naive_like(session_factory), likes, threads)
+            else:
+                counters = VideoCounterBuffer(session_factory)
+                wall, latencies, errors = hammer(lambda: counters.record_like("viral"), likes, threads)
+                flush_start = time.perf_counter()
+                counters.flush()
+                wall += time.perf_counter() - flush_start
+            with session_factory() as db:
+                stored = db.scalar(select(Video.like_count).where(Video.id == "viral"))
+            p50, p99 = percentiles(latencies, 50, 99)
+            print(f"{label}: {likes} likes in {wall * 1000:.1f}ms | per like p50={p50 * 1e6:.1f}us "
+                  f"p99={p99 * 1e6:.1f}us | UPDATEs={updates} errors={errors} like_count={stored}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--likes", type=int, default=1000)
+    parser.add_argument("--threads", type=int, default=32)
+    args = parser.parse_args()
+    run(args.likes, args.threads)
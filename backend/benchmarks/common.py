@@ -0,0 +1,97 @@
+"""Shared helpers for the benchmark scripts."""
+import os
+import tempfile
+from contextlib import contextmanager
+from typing import Iterator, Optional
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import NullPool
+from src.config.database import Base, async_database_url, get_async_db
+from src.models.user import User
+from src.models.channel import Channel
+from src.models.recommendation import Recommendation  # noqa: F401
+from src.models.videos.video import Video
+from src.models.videos.video_view import VideoView
+from src.models.videos.video_like import VideoLike  # noqa: F401
+from src.models.videos.video_comment import VideoComment  # noqa: F401
+from src.services.auth.async_auth_service import AsyncAuthService
+from src.services.auth.user_cache import UserCache
+from src.services.dependencies import get_async_auth_service
+
+
+@contextmanager
+def temp_database() -> Iterator[sessionmaker]:
+    """Yield a session factory bound to a fresh SQLite file."""
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(
+            f"sqlite:///{os.path.join(tmp, 'bench.db')}",
+            connect_args={"check_same_thread": False},
+        )
+        Base.metadata.create_all(bind=engine)
+        try:
+            yield sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        finally:
+            engine.dispose()
+
+
+def seed_user_with_views(db: Session, views: int, email: str = "bench@example.com") -> User:
+    """Create a user who owns a channel and has `views` VideoView rows."""
+    user = User(email=email, username=email.split("@")[0], provider="email")
+    db.add(user)
+    db.flush()
+    channel = Channel(name="bench", owner_id=user.id)
+    db.add(channel)
+    db.flush()
+    db.add_all(
+        Video(id=f"v{i}", title=f"video {i}", video_url=f"https://cdn/{i}.mp4",
+              uploader_id=user.id, channel_id=channel.id)
+        for i in range(views)
+    )
+    db.add_all(VideoView(video_id=f"v{i}", user_id=user.id, watch_time=i) for i in range(views))
+    db.commit()
+    db.refresh(user)
+    return user
+
+
+def build_auth_app(session_factory: sessionmaker, cache: Optional[UserCache] = None) -> TestClient:
+    """Auth router on a bare app, wired to `session_factory`."""
+    return TestClient(build_auth_asgi_app(session_factory, cache))
+
+
+def build_auth_asgi_app(session_factory: sessionmaker, cache: Optional[UserCache] = None) -> FastAPI:
+    """Auth router plus /health on a bare app, wired to `session_factory`."""
+    from src.api.auth import router as auth_router
+
+    # The auth routes run on AsyncSession: point it at the same file
+    async_engine = create_async_engine(
+        async_database_url(str(session_factory.kw["bind"].url)), poolclass=NullPool
+    )
+    async_session_factory = async_sessionmaker(async_engine, expire_on_commit=False)
+
+    async def _get_async_db():
+        async with async_session_factory() as db:
+            yield db
+
+    async def _get_async_auth_service():
+        async with async_session_factory() as db:
+            yield AsyncAuthService(db, cache)
+
+    app = FastAPI()
+    app.include_router(auth_router)
+    app.dependency_overrides[get_async_db] = _get_async_db
+    app.dependency_overrides[get_async_auth_service] = _get_async_auth_service
+
+    @app.get("/health")
+    async def health_check():
+        return {"status": "healthy"}
+
+    return app
+
+
+def percentiles(samples: list[float], *points: int) -> list[float]:
+    """Nearest-rank percentiles of `samples`."""
+    ordered = sorted(samples)
+    return [ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))] for p in points]
@@ -1,12 +1,13 @@
 """All api routes for Authentication"""
+from typing import Optional
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
 from src.schemas.user import (
-    UserCreate, UserResponse, Token, LoginRequest,
-    GoogleTokenRequest, RefreshTokenRequest
+    UserCreate, UserUpdate, UserResponse, Token, LoginRequest,
+    GoogleTokenRequest, RefreshTokenRequest, PasswordChange, TokenData
 )
-from src.services.auth.auth_service import AuthService
-from src.services.dependencies import get_current_user, get_auth_service
+from src.services.auth.async_auth_service import AsyncAuthService
+from src.services.dependencies import get_current_user_async, get_async_auth_service, get_token_claims
 from src.models.user import User
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
@@ -14,11 +15,11 @@ router = APIRouter(prefix="/auth", tags=["Authentication"])
 @router.post("/register", response_model=UserResponse)
 async def register(
     user_data: UserCreate,
-    auth_service: AuthService = Depends(get_auth_service)
+    auth_service: AsyncAuthService = Depends(get_async_auth_service)
 ):
     """Register new user with email and password."""
     try:
-        user = auth_service.create_user(user_data)
+        user = await auth_service.create_user(user_data)
         return user
     except HTTPException as e:
         raise e
@@ -31,25 +32,25 @@ async def register(
 @router.post("/login", response_model=Token)
 async def login(
     login_data: LoginRequest,
-    auth_service: AuthService = Depends(get_auth_service)
+    auth_service: AsyncAuthService = Depends(get_async_auth_service)
 ):
     """Login with email and password."""
-    user = auth_service.authenticate_user(login_data.email, login_data.password)
+    user = await auth_service.authenticate_user(login_data.email, login_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password"
         )
     
-    return auth_service.create_tokens(user)
+    return await auth_service.create_tokens(user, device=login_data.device)
 
 @router.post("/login/oauth2", response_model=Token)
 async def login_oauth2(
     form_data: OAuth2PasswordRequestForm = Depends(),
-    auth_service: AuthService = Depends(get_auth_service)
+    auth_service: AsyncAuthService = Depends(get_async_auth_service)
 ):
     """Login with OAuth2 password flow (for compatibility)."""
-    user = auth_service.authenticate_user(form_data.username, form_data.password)
+    user = await auth_service.authenticate_user(form_data.username, form_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -57,17 +58,17 @@ async def login_oauth2(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    return auth_service.create_tokens(user)
+    return await auth_service.create_tokens(user)
 
 @router.post("/google", response_model=Token)
 async def google_auth(
     google_data: GoogleTokenRequest,
-    auth_service: AuthService = Depends(get_auth_service)
+    auth_service: AsyncAuthService = Depends(get_async_auth_service)
 ):
     """Authenticate with Google access token."""
     try:
         user = await auth_service.authenticate_google_user(google_data.access_token)
-        return auth_service.create_tokens(user)
+        return await auth_service.create_tokens(user, device=google_data.device)
     except HTTPException as e:
         raise e
     except Exception as e:
@@ -79,11 +80,11 @@ async def google_auth(
 @router.post("/refresh", response_model=Token)
 async def refresh_token(
     refresh_data: RefreshTokenRequest,
-    auth_service: AuthService = Depends(get_auth_service)
+    auth_service: AsyncAuthService = Depends(get_async_auth_service)
 ):
     """Refresh access token using refresh token."""
     try:
-        return auth_service.refresh_access_token(refresh_data.refresh_token)
+        return await auth_service.refresh_access_token(refresh_data.refresh_token)
     except HTTPException as e:
         raise e
     except Exception as e:
@@ -94,23 +95,47 @@ async def refresh_token(
 
 @router.post("/logout")
 async def logout(
-    current_user: User = Depends(get_current_user),
-    auth_service: AuthService = Depends(get_auth_service)
+    refresh_data: Optional[RefreshTokenRequest] = None,
+    current_user: User = Depends(get_current_user_async),
+    auth_service: AsyncAuthService = Depends(get_async_auth_service)
 ):
-    """Logout current user."""
-    auth_service.logout_user(current_user)
+    """Logout current user (this device if a refresh token is given, otherwise everywhere)."""
+    await auth_service.logout_user(
+        current_user, refresh_data.refresh_token if refresh_data else None
+    )
     return {"message": "Successfully logged out"}
 
 @router.get("/me", response_model=UserResponse)
-async def get_current_user_info(current_user: User = Depends(get_current_user)):
+async def get_current_user_info(current_user: User = Depends(get_current_user_async)):
     """Get current user information."""
     return current_user
 
+@router.patch("/me", response_model=UserResponse)
+async def update_current_user_info(
+    user_data: UserUpdate,
+    current_user: User = Depends(get_current_user_async),
+    auth_service: AsyncAuthService = Depends(get_async_auth_service)
+):
+    """Update current user profile."""
+    return await auth_service.update_user(current_user, user_data)
+
+@router.post("/change-password")
+async def change_password(
+    password_data: PasswordChange,
+    current_user: User = Depends(get_current_user_async),
+    auth_service: AsyncAuthService = Depends(get_async_auth_service)
+):
+    """Change password of current user (signs out every session)."""
+    await auth_service.change_password(
+        current_user, password_data.current_password, password_data.new_password
+    )
+    return {"message": "Password changed"}
+
 @router.get("/verify-token")
-async def verify_token(current_user: User = Depends(get_current_user)):
-    """Verify if current token is valid."""
+async def verify_token(claims: TokenData = Depends(get_token_claims)):
+    """Verify if current token is valid (claims only, no user row)."""
     return {
         "valid": True,
-        "user_id": current_user.id,
-        "email": current_user.email
+        "user_id": claims.user_id,
+        "email": claims.email
     }
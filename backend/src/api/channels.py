@@ -1,26 +1,33 @@
 """ Channel API """
-from sqlalchemy.orm import Session
-from fastapi import APIRouter,HTTPException, Depends
+from typing import Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import APIRouter,HTTPException, Depends, Query
 from src.schemas.channel import ChannelCreate, ChannelDetails, Channel
+from src.utils.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, Page
 from src.services.channel_service import ChannelService
-from src.config.database import get_db
+from src.config.database import get_async_db
+from src.utils.responses import trusted_page
 
 router = APIRouter()
 
 @router.post("/channels/", response_model=Channel)
-async def create_channel(channel: ChannelCreate, db: Session = Depends(get_db)):
+async def create_channel(channel: ChannelCreate, db: AsyncSession = Depends(get_async_db)):
     """Create a new channel."""
     channel_service = ChannelService(db)
-    return channel_service.create_channel(channel)
+    return await channel_service.create_channel(channel)
 
-@router.get("/channels/", response_model=list[ChannelDetails])
-async def get_channels(db: Session = Depends(get_db)):
-    """Get all channels."""
+@router.get("/channels/", response_model=Page[ChannelDetails])
+async def get_channels(
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get channels, newest first; pass `next_cursor` back as `cursor` for the next page."""
     channel_service = ChannelService(db)
-    return await channel_service.get_all_channels()
+    return trusted_page(await channel_service.get_all_channels(cursor, limit), ChannelDetails)
 
 @router.get("/channels/{channel_id}", response_model=ChannelDetails)
-async def get_channel(channel_id: int, db: Session = Depends(get_db)):
+async def get_channel(channel_id: int, db: AsyncSession = Depends(get_async_db)):
     """Get a channel by ID."""
     channel_service = ChannelService(db)
     channel = await channel_service.get_channel(channel_id)
@@ -1,32 +1,39 @@
-from fastapi import APIRouter, HTTPException, Depends
-from typing import List
-from src.schemas.recommendation import RecommendationList
+from fastapi import APIRouter, HTTPException, Depends, Query
+from typing import Optional
+from src.schemas.recommendation import Recommendation, RecommendationCreate
+from src.schemas.video import VideoOut
+from src.services.recommendation_cache import RecommendationCache, get_recommendation_cache
 from src.services.recommendation_service import RecommendationService
-from src.config.database import get_db
-from sqlalchemy.orm import Session
+from src.config.database import get_async_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.utils.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, Page
+from src.utils.responses import trusted_page
 
 router = APIRouter()
 # recommendation_service = RecommendationService()
 
-@router.get("/recommendations/", response_model=List[RecommendationList])
-async def get_recommendations(user_id: int, db: Session = Depends(get_db)):
-    recommendation_service = RecommendationService(db)
-    recommendations = await recommendation_service.get_recommendations(user_id)
-    if not recommendations:
+@router.get("/recommendations/", response_model=Page[VideoOut])
+async def get_recommendations(
+    user_id: int,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_async_db),
+    cache: RecommendationCache = Depends(get_recommendation_cache),
+):
+    recommendation_service = RecommendationService(db, cache=cache)
+    recommendations = await recommendation_service.get_recommendations(user_id, cursor, limit)
+    if not recommendations.items and cursor is None:
         raise HTTPException(status_code=404, detail="No recommendations found")
-    return recommendations
+    return trusted_page(recommendations, VideoOut)
 
-@router.post("/recommendations/", response_model=RecommendationList)
-async def add_recommendation(recommendation: RecommendationList, db: Session = Depends(get_db)):
-    recommendation_service = RecommendationService(db)
-    # Use the correct attribute from RecommendationList, e.g. recommendation.id or add video_id to the schema
-    video_id = getattr(recommendation, "video_id", None)
-    if video_id is None or not isinstance(video_id, int):
-        raise HTTPException(status_code=400, detail="Missing or invalid video_id in recommendation")
-    user_id = getattr(recommendation, "user_id", None)
-    if user_id is None or not isinstance(user_id, int):
-        raise HTTPException(status_code=400, detail="Missing or invalid user_id in recommendation")
+@router.post("/recommendations/", response_model=Recommendation)
+async def add_recommendation(
+    recommendation: RecommendationCreate,
+    db: AsyncSession = Depends(get_async_db),
+    cache: RecommendationCache = Depends(get_recommendation_cache),
+):
+    recommendation_service = RecommendationService(db, cache=cache)
     new_recommendation = await recommendation_service.add_user_preference(
-        user_id, video_id
+        recommendation.user_id, recommendation.video_id, recommendation.score
     )
-    return new_recommendation
\ No newline at end of file
+    return new_recommendation
@@ -0,0 +1,19 @@
+"""Trending videos, served from memory"""
+from typing import Optional
+from fastapi import APIRouter, Query
+from src.schemas.video import TrendingList, TrendingVideo
+from src.services.trending import trending_feed
+from src.utils.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+
+router = APIRouter(prefix="/trending", tags=["trending"])
+
+@router.get("", response_model=TrendingList)
+async def get_trending(
+    channel_id: Optional[int] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+):
+    """Top videos by time-decayed views and likes, globally or in one channel; no database access"""
+    return TrendingList(items=[
+        TrendingVideo(video_id=video_id, score=score)
+        for video_id, score in trending_feed.top(limit, channel_id)
+    ])
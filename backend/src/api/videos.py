@@ -1,35 +1,78 @@
 """Manage all routes for Videos"""
-from fastapi import APIRouter, HTTPException, Depends
-from src.schemas.video import VideoCreate, VideoOut
-from src.services.dependencies import get_current_user
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.config.database import get_async_db
+from src.schemas.user import TokenData
+from src.schemas.video import VideoCreate, VideoInDb, VideoOut, VideoRating, VideoVote
+from src.services.dependencies import get_current_active_user_async, get_token_claims
 from src.services.video_service import VideoService
+from src.utils.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, Page
 
 router = APIRouter(prefix="/video", tags=["videos"])
 
-@router.post("/add", response_model=VideoOut)
-async def add_video(video: VideoCreate, current_user = Depends(get_current_user)):
+@router.post("/add", response_model=VideoInDb)
+async def add_video(
+    video: VideoCreate,
+    current_user = Depends(get_current_active_user_async),
+    db: AsyncSession = Depends(get_async_db)
+):
     """Add new video"""
     try:
-        video_service = VideoService()
+        video_service = VideoService(db)
         return await video_service.create_video(video, current_user)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
-# @router.get("/videos/", response_model=List[VideoOut])
-# async def get_videos(db: Session = Depends(get_db)):
-#     try:
-#         video_service = VideoService(db)
-#         return await video_service.get_all_videos()
-#     except Exception as e:
-#         raise HTTPException(status_code=400, detail=str(e))
+@router.get("/", response_model=Page[VideoOut])
+async def get_videos(
+    channel_id: Optional[int] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get videos (of one channel with `channel_id`), newest first."""
+    video_service = VideoService(db)
+    return await video_service.get_videos(channel_id, cursor, limit)
 
-# @router.get("/videos/{video_id}", response_model=VideoOut)
-# async def get_video(video_id: int, db: Session = Depends(get_db)):
-#     try:
-#         video_service = VideoService(db)
-#         video = await video_service.get_video(video_id)
-#         if video is None:
-#             raise HTTPException(status_code=404, detail="Video not found")
-#         return video
-#     except Exception as e:
-#         raise HTTPException(status_code=400, detail=str(e)
\ No newline at end of file
+@router.get("/{video_id}/related", response_model=Page[VideoOut])
+async def get_related_videos(
+    video_id: str,
+    limit: int = Query(10, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get the videos whose titles and descriptions are most like this one's."""
+    video_service = VideoService(db)
+    return await video_service.get_related(video_id, limit)
+
+@router.put("/{video_id}/like", response_model=VideoRating)
+async def rate_video(
+    video_id: str,
+    vote: VideoVote,
+    claims: TokenData = Depends(get_token_claims),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Like (`liked: true`) or dislike (`liked: false`) a video, replacing any earlier vote."""
+    video_service = VideoService(db)
+    return await video_service.rate_video(video_id, claims.user_id, vote.liked)
+
+@router.delete("/{video_id}/like", response_model=VideoRating)
+async def clear_video_rating(
+    video_id: str,
+    claims: TokenData = Depends(get_token_claims),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Remove the caller's like or dislike of a video."""
+    video_service = VideoService(db)
+    return await video_service.rate_video(video_id, claims.user_id, None)
+
+@router.get("/{video_id}", response_model=VideoOut)
+async def get_video(video_id: str, db: AsyncSession = Depends(get_async_db)):
+    """Get a video by ID."""
+    video_service = VideoService(db)
+    video = await video_service.get_video(video_id)
+    if video is None:
+        raise HTTPException(status_code=404, detail="Video not found")
+    return video
@@ -0,0 +1,17 @@
+"""Watch-time heartbeat ingestion"""
+from fastapi import APIRouter, Depends, status
+from src.schemas.user import TokenData
+from src.schemas.video import HeartbeatAck, HeartbeatBatch
+from src.services.dependencies import get_token_claims
+from src.services.watch_time import heartbeat_batcher
+
+# Kept apart from the videos router so the ingestion path doesn't load the storage client
+router = APIRouter(prefix="/video", tags=["videos"])
+
+@router.post("/heartbeats", response_model=HeartbeatAck, status_code=status.HTTP_202_ACCEPTED)
+async def record_heartbeats(batch: HeartbeatBatch, claims: TokenData = Depends(get_token_claims)):
+    """Store watch progress; only the furthest position per video is kept"""
+    await heartbeat_batcher.submit(
+        claims.user_id, ((heartbeat.video_id, heartbeat.watch_time) for heartbeat in batch.heartbeats)
+    )
+    return HeartbeatAck(accepted=len(batch.heartbeats))
@@ -6,7 +6,39 @@ class AuthSettings(BaseSettings):
     algorithm: str = "HS256"
     access_token_expire_minutes: int = 30
     refresh_token_expire_days: int = 30
-    
+    refresh_token_purge_interval_seconds: int = 3600
+
+    # Stateless access tokens: trust token claims + in-memory token_version map
+    stateless_access_tokens: bool = True
+    token_version_refresh_seconds: int = 5
+
+    # Authenticated user cache
+    user_cache_enabled: bool = True
+    user_cache_ttl_seconds: int = 60
+    user_cache_max_size: int = 10000
+    user_cache_backend: str = "memory"  # "memory" (per worker) or "redis" (shared; needs the redis package)
+    user_cache_redis_url: str = "redis://localhost:6379/0"
+
+    # Write-behind buffer for login-time user updates (flush interval = loss window)
+    login_write_flush_seconds: float = 5.0
+    login_write_max_pending: int = 10000
+
+    # Password / token hashing pool
+    hashing_workers: int = 4
+    hashing_max_queue: int = 64
+    hashing_executor_kind: str = "thread"  # "thread" or "process"
+
+    # Rate limiting ("memory" = per worker, "sqlite" = shared through rate_limit_sqlite_path)
+    rate_limit_enabled: bool = True
+    rate_limit_calls: int = 100
+    rate_limit_period_seconds: int = 60
+    rate_limit_login_calls: int = 10  # /auth/login and /auth/register, per period
+    rate_limit_backend: str = "memory"
+    rate_limit_sqlite_path: str = "rate_limits.db"
+    rate_limit_max_clients: int = 100000
+    # Proxies / load balancers (comma-separated addresses or CIDRs) whose X-Forwarded-For is believed
+    rate_limit_trusted_proxies: str = ""
+
     # Google OAuth2
     google_client_id: str = ""
     google_client_secret: str =""
@@ -27,4 +59,8 @@ class AuthSettings(BaseSettings):
     def cors_origins_list(self) -> list[str]:
         return [origin.strip() for origin in self.cors_origins.split(",")]
 
+    @property
+    def rate_limit_trusted_proxies_list(self) -> list[str]:
+        return [proxy.strip() for proxy in self.rate_limit_trusted_proxies.split(",") if proxy.strip()]
+
 auth_settings = AuthSettings()
@@ -1,40 +1,148 @@
+from dataclasses import dataclass, replace
+from typing import Any, Dict, Optional
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 from pydantic_settings import BaseSettings
+from src.utils.db_metrics import (
+    instrument_pool, instrument_queries, instrumented_pool_class, pool_metrics, query_metrics
+)
+from src.utils.db_routing import Replica, ReplicaRouter, RoutingSession
 import os
 
 
+@dataclass(frozen=True)
+class EngineProfile:
+    """Pool / connection settings for one deployment flavour."""
+    pool_size: int
+    max_overflow: int
+    pool_timeout: float  # seconds to wait for a free connection
+    pool_recycle: int  # seconds, -1 = never
+    pool_pre_ping: bool
+    statement_timeout_ms: int  # 0 = no limit (PostgreSQL only)
+    prepared_statement_cache_size: int  # asyncpg only, 0 disables (e.g. behind pgbouncer)
+    echo: bool = False
+
+
+ENGINE_PROFILES: Dict[str, EngineProfile] = {
+    "dev": EngineProfile(
+        pool_size=5, max_overflow=10, pool_timeout=30, pool_recycle=1800,
+        pool_pre_ping=True, statement_timeout_ms=0, prepared_statement_cache_size=100,
+    ),
+    "test": EngineProfile(
+        pool_size=2, max_overflow=2, pool_timeout=5, pool_recycle=-1,
+        pool_pre_ping=False, statement_timeout_ms=5000, prepared_statement_cache_size=0,
+    ),
+    "prod": EngineProfile(
+        pool_size=10, max_overflow=20, pool_timeout=10, pool_recycle=300,
+        pool_pre_ping=True, statement_timeout_ms=15000, prepared_statement_cache_size=500,
+    ),
+}
+
+
 class DatabaseSettings(BaseSettings):
     database_url: str
+    # Comma-separated read replicas; empty = every query goes to database_url
+    database_replica_urls: str = ""
+    db_replica_check_seconds: float = 5.0
+
+    # Engine profile ("dev", "test" or "prod"); the db_* fields override single values
+    db_profile: str = "dev"
+    db_pool_size: Optional[int] = None
+    db_max_overflow: Optional[int] = None
+    db_pool_timeout: Optional[float] = None
+    db_pool_recycle: Optional[int] = None
+    db_pool_pre_ping: Optional[bool] = None
+    db_statement_timeout_ms: Optional[int] = None
+    db_prepared_statement_cache_size: Optional[int] = None
+    db_echo: Optional[bool] = None
+
+    # Per-request query accounting (headers, /health/db totals, N+1 warnings)
+    db_query_stats: bool = True
+    db_n_plus_one_threshold: int = 10
+
+    # Worker id (0-1023) in snowflake row ids; unique per process writing to the database
+    id_worker_id: Optional[int] = None
     
     class Config:
         env_file = ".env"
         extra = "ignore"
 
+    def engine_profile(self) -> EngineProfile:
+        """The named profile with any explicit overrides applied."""
+        if self.db_profile not in ENGINE_PROFILES:
+            raise ValueError(f"Unknown db_profile {self.db_profile!r}, expected one of {sorted(ENGINE_PROFILES)}")
+        overrides = {
+            field: getattr(self, f"db_{field}")
+            for field in EngineProfile.__dataclass_fields__
+            if getattr(self, f"db_{field}") is not None
+        }
+        return replace(ENGINE_PROFILES[self.db_profile], **overrides)
+
+    @property
+    def replica_urls(self) -> list[str]:
+        return [url.strip() for url in self.database_replica_urls.split(",") if url.strip()]
+
+
+def async_database_url(url: str) -> str:
+    """Swap in the async driver for a sync database URL."""
+    if url.startswith("postgresql://"):
+        return url.replace("postgresql://", "postgresql+asyncpg://")
+    if url.startswith("sqlite:///"):
+        return url.replace("sqlite:///", "sqlite+aiosqlite:///")
+    return url
+
+
+def engine_options(url: str, profile: EngineProfile, is_async: bool = False) -> Dict[str, Any]:
+    """create_engine / create_async_engine keyword arguments for `url` under `profile`."""
+    parsed = make_url(url)
+    options: Dict[str, Any] = {"echo": profile.echo, "pool_pre_ping": profile.pool_pre_ping}
+    connect_args: Dict[str, Any] = {}
+    backend = parsed.get_backend_name()
+
+    if backend == "sqlite":
+        if not is_async:
+            connect_args["check_same_thread"] = False
+        if parsed.database in (None, "", ":memory:"):
+            # In-memory SQLite uses a single-connection pool; sizing doesn't apply
+            return {**options, "connect_args": connect_args}
+    elif backend == "postgresql":
+        if parsed.get_driver_name() == "asyncpg":
+            connect_args["prepared_statement_cache_size"] = profile.prepared_statement_cache_size
+            if not profile.prepared_statement_cache_size:
+                connect_args["statement_cache_size"] = 0  # asyncpg's own cache too
+            if profile.statement_timeout_ms:
+                connect_args["server_settings"] = {"statement_timeout": str(profile.statement_timeout_ms)}
+        elif profile.statement_timeout_ms:
+            connect_args["options"] = f"-c statement_timeout={profile.statement_timeout_ms}"
+
+    base_pool = AsyncAdaptedQueuePool if is_async else QueuePool
+    options.update(
+        poolclass=instrumented_pool_class(base_pool),
+        pool_size=profile.pool_size,
+        max_overflow=profile.max_overflow,
+        pool_timeout=profile.pool_timeout,
+        pool_recycle=profile.pool_recycle,
+        connect_args=connect_args,
+    )
+    return options
+
 
 # -------------------
 # SETTINGS
 # -------------------
 db_settings = DatabaseSettings(database_url=os.getenv("DATABASE_URL", "sqlite:///./test.db"))
+engine_profile = db_settings.engine_profile()
 
 
 # -------------------
 # SYNC DATABASE
 # -------------------
-if db_settings.database_url.startswith("sqlite"):
-    engine = create_engine(
-        db_settings.database_url,
-        connect_args={"check_same_thread": False}
-    )
-else:  # PostgreSQL or others
-    engine = create_engine(
-        db_settings.database_url,
-        pool_size=10,
-        max_overflow=20,
-        pool_pre_ping=True,
-        pool_recycle=300
-    )
+engine = create_engine(db_settings.database_url, **engine_options(db_settings.database_url, engine_profile))
+instrument_pool(engine.pool)
+instrument_queries(engine)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
@@ -42,18 +150,64 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 # -------------------
 # ASYNC DATABASE
 # -------------------
-if db_settings.database_url.startswith("postgresql://"):
-    async_url = db_settings.database_url.replace("postgresql://", "postgresql+asyncpg://")
-elif db_settings.database_url.startswith("sqlite:///"):
-    async_url = db_settings.database_url.replace("sqlite:///", "sqlite+aiosqlite:///")
-else:
-    async_url = db_settings.database_url
-
-async_engine = create_async_engine(
-    async_url,
-    echo=True,
-    pool_pre_ping=True
-)
+async_url = async_database_url(db_settings.database_url)
+
+async_engine = create_async_engine(async_url, **engine_options(async_url, engine_profile, is_async=True))
+instrument_pool(async_engine.sync_engine.pool)
+instrument_queries(async_engine.sync_engine)
+
+
+# -------------------
+# READ REPLICAS
+# -------------------
+def build_replica_router(primary, async_primary, urls: list[str], profile: EngineProfile) -> ReplicaRouter:
+    """Instrumented sync + async engines for each replica URL."""
+    replicas = []
+    for i, url in enumerate(urls):
+        replica_engine = create_engine(url, **engine_options(url, profile))
+        replica_async_url = async_database_url(url)
+        replica_async_engine = create_async_engine(
+            replica_async_url, **engine_options(replica_async_url, profile, is_async=True)
+        )
+        for instrumented in (replica_engine, replica_async_engine.sync_engine):
+            instrument_pool(instrumented.pool)
+            instrument_queries(instrumented)
+        replicas.append(Replica(f"replica-{i}", replica_engine, replica_async_engine))
+    return ReplicaRouter(primary, replicas, async_primary)
+
+
+replica_router: Optional[ReplicaRouter] = None
+if db_settings.replica_urls:
+    replica_router = build_replica_router(engine, async_engine, db_settings.replica_urls, engine_profile)
+    SessionLocal = sessionmaker(class_=RoutingSession, router=replica_router, autocommit=False, autoflush=False)
+
+
+def check_replicas() -> Dict[str, bool]:
+    """Health-check the replicas (periodic task; no-op without replicas)."""
+    return replica_router.check() if replica_router is not None else {}
+
+
+def pool_stats() -> Dict[str, Dict[str, Any]]:
+    """Pool metrics for every engine (checked out, waits, overflow, invalidations)."""
+    stats = {
+        "sync": pool_metrics(engine.pool).snapshot(engine.pool),
+        "async": pool_metrics(async_engine.sync_engine.pool).snapshot(async_engine.sync_engine.pool),
+    }
+    for replica in replica_router.replicas if replica_router is not None else ():
+        stats[f"{replica.name}-sync"] = pool_metrics(replica.engine.pool).snapshot(replica.engine.pool)
+        replica_pool = replica.async_engine.sync_engine.pool
+        stats[f"{replica.name}-async"] = pool_metrics(replica_pool).snapshot(replica_pool)
+    return stats
+
+
+def replica_stats() -> Dict[str, Any]:
+    """Replica health and how many reads fell back to the primary."""
+    return replica_router.stats() if replica_router is not None else {}
+
+
+def query_stats() -> Dict[str, Dict[str, Any]]:
+    """Per-route query counts, DB time and N+1 flags since startup."""
+    return query_metrics.snapshot()
 
 
 # ASYNC
@@ -64,6 +218,16 @@ AsyncSessionLocal = sessionmaker(
     autocommit=False,
     expire_on_commit=False,
 )
+if replica_router is not None:
+    AsyncSessionLocal = sessionmaker(
+        class_=AsyncSession,
+        sync_session_class=RoutingSession,
+        router=replica_router,
+        is_async=True,
+        autoflush=False,
+        autocommit=False,
+        expire_on_commit=False,
+    )
 
 # -------------------
 # BASE MODEL
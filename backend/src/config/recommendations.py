@@ -0,0 +1,35 @@
+from pydantic_settings import BaseSettings
+
+class RecommendationSettings(BaseSettings):
+
+    # Item-item model (rebuilt in the background from video_views / video_likes)
+    rec_rebuild_seconds: float = 900
+    rec_neighbours: int = 50  # similar videos kept per video
+    rec_max_items_per_user: int = 200  # most recent interactions per user that count
+    rec_watch_time_scale: float = 60.0  # seconds; view weight = log1p(watch_time / scale)
+    rec_like_weight: float = 2.0  # added for a like; a dislike removes the interaction
+
+    # Serving: the user's latest interactions seed the neighbour aggregation
+    rec_seed_items: int = 20
+    rec_history: int = 100  # interactions read per request, all excluded from results
+
+    # Batch materializer: top-N per user written to the recommendations table
+    rec_materialize_in_process: bool = True  # False: only the CLI / a cron job runs it
+    rec_materialize_seconds: float = 3600  # in-process incremental runs
+    rec_materialize_lease_seconds: float = 1800  # a run that stops renewing this long is presumed dead
+    rec_materialize_top_n: int = 50
+    rec_materialize_chunk_users: int = 2000
+    rec_materialize_workers: int = 0  # processes; 0: one per CPU, 1: no pool
+
+    # Serving cache: pages per (user, cursor, limit), dropped on TTL, LRU or invalidation
+    rec_cache_enabled: bool = True
+    rec_cache_ttl_seconds: float = 300
+    rec_cache_max_users: int = 10000
+    rec_cache_pages_per_user: int = 4
+    rec_cache_change_threshold: int = 5  # interaction changes that invalidate a user's pages
+
+    class Config:
+        env_file = ".env"
+        extra = "ignore"
+
+recommendation_settings = RecommendationSettings()
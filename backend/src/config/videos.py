@@ -0,0 +1,34 @@
+from pydantic_settings import BaseSettings
+
+class VideoSettings(BaseSettings):
+
+    # Buffered view / like / dislike counters (flush interval = loss window)
+    counter_flush_seconds: float = 2.0
+    counter_max_pending: int = 10000
+    counter_shards: int = 16
+
+    # Watch-time heartbeats: concurrent requests share one upsert per window
+    heartbeat_flush_seconds: float = 0.02
+    heartbeat_max_batch: int = 5000
+
+    # Trending: time-decayed view / like scores, top-K kept in memory
+    trending_half_life_hours: float = 6.0
+    trending_top_k: int = 100  # per scope: global and each channel
+    trending_view_weight: float = 1.0
+    trending_like_weight: float = 3.0
+    trending_min_score: float = 0.01  # decayed score below which a video is forgotten
+    trending_snapshot_seconds: float = 60.0
+
+    # Related videos: hashed TF-IDF of title + description, random-projection LSH
+    related_index_path: str = "related_videos"  # directory of .npy files, memory-mapped on startup
+    related_feature_bits: int = 20  # words hash into 2**n features
+    related_signature_bits: int = 256  # LSH bits per video (a multiple of 64)
+    related_max_candidates: int = 2000  # closest signatures, rescored by exact cosine
+    related_save_seconds: float = 300.0
+    related_sync_seconds: float = 60.0  # picks up videos other workers indexed
+
+    class Config:
+        env_file = ".env"
+        extra = "ignore"
+
+video_settings = VideoSettings()
@@ -1,10 +1,83 @@
 """Starting File - Main Fie to start App"""
+import asyncio
+import logging
+from contextlib import asynccontextmanager, suppress
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
 # from fastapi.security import HTTPBearer
 from src.config.auth import auth_settings
-from src.api import auth, videos, recommendations, channels # ,users -> used later
+from src.config.database import check_replicas, db_settings, pool_stats, query_stats, replica_stats
+from src.config.recommendations import recommendation_settings
+from src.config.videos import video_settings
+from src.api import auth, videos, recommendations, channels, trending, watch # ,users -> used later
+from src.middleware import (
+    QueryStatsMiddleware, RateLimit, RateLimitMiddleware, SecurityHeadersMiddleware,
+    SQLiteRateLimitBackend,
+)
+from src.services.auth.async_auth_service import purge_expired_refresh_tokens
+from src.services.auth.token_versions import refresh_token_versions
+from src.services.auth.user_cache import user_cache
+from src.services.recommendation_cache import recommendation_cache
+from src.services.recommendation_engine import recommendation_engine
+from src.services.recommendation_materializer import recommendation_materializer
+from src.services.related_videos import related_videos
+from src.services.trending import trending_feed
+from src.services.video_counters import video_counters
+from src.services.watch_time import heartbeat_batcher
+from src.services.write_behind import user_write_behind
+from src.utils.hashing import hashing_executor
+from src.utils.responses import ORJSONResponse
+
+logger = logging.getLogger(__name__)
+
+
+async def run_periodically(interval: float, func):
+    """Run a blocking `func` in a worker thread every `interval` seconds."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await asyncio.to_thread(func)
+        except Exception:  # keep the loop alive; next run retries
+            logger.exception("Periodic task %s failed", func.__name__)
+
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    """Start up / shut down background resources."""
+    video_counters.subscribe(trending_feed.observe)
+    heartbeat_batcher.subscribe(recommendation_cache.record_interactions)
+    tasks = [
+        asyncio.create_task(run_periodically(
+            auth_settings.refresh_token_purge_interval_seconds, purge_expired_refresh_tokens
+        )),
+        asyncio.create_task(run_periodically(
+            auth_settings.token_version_refresh_seconds, refresh_token_versions
+        )),
+        asyncio.create_task(user_write_behind.run(auth_settings.login_write_flush_seconds)),
+        asyncio.create_task(run_periodically(db_settings.db_replica_check_seconds, check_replicas)),
+        asyncio.create_task(video_counters.run(video_settings.counter_flush_seconds)),
+        asyncio.create_task(trending_feed.run(video_settings.trending_snapshot_seconds)),
+        asyncio.create_task(related_videos.run(video_settings.related_save_seconds, video_settings.related_sync_seconds)),
+        asyncio.create_task(recommendation_engine.run(recommendation_settings.rec_rebuild_seconds)),
+    ]
+    if recommendation_settings.rec_materialize_in_process:
+        # Every worker schedules it; the lease lets one run at a time through
+        tasks.append(asyncio.create_task(run_periodically(
+            recommendation_settings.rec_materialize_seconds, recommendation_materializer.run_incremental
+        )))
+    await asyncio.to_thread(refresh_token_versions)
+    yield
+    for task in tasks:
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+    await asyncio.to_thread(user_write_behind.flush)
+    await heartbeat_batcher.drain()
+    await asyncio.to_thread(video_counters.flush)
+    await asyncio.to_thread(trending_feed.snapshot)
+    await asyncio.to_thread(related_videos.save_if_changed)
+    hashing_executor.shutdown()
 
 
 # Create FastAPI app
@@ -13,9 +86,33 @@ app = FastAPI(
     description="A secure video platform API with JWT and OAuth2 authentication",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
+# Query accounting per request
+if db_settings.db_query_stats:
+    app.add_middleware(QueryStatsMiddleware, n_plus_one_threshold=db_settings.db_n_plus_one_threshold)
+
+# Rate limiting (inside security and CORS, so 429s still get their headers)
+if auth_settings.rate_limit_enabled:
+    login_limit = RateLimit(auth_settings.rate_limit_login_calls, auth_settings.rate_limit_period_seconds)
+    app.add_middleware(
+        RateLimitMiddleware,
+        calls=auth_settings.rate_limit_calls,
+        period=auth_settings.rate_limit_period_seconds,
+        route_limits={"/auth/login": login_limit, "/auth/register": login_limit},
+        backend=(
+            SQLiteRateLimitBackend(auth_settings.rate_limit_sqlite_path)
+            if auth_settings.rate_limit_backend == "sqlite" else None
+        ),
+        max_clients=auth_settings.rate_limit_max_clients,
+        trusted_proxies=auth_settings.rate_limit_trusted_proxies_list,
+    )
+
+app.add_middleware(SecurityHeadersMiddleware)
+
 # Security middleware
 app.add_middleware(
     TrustedHostMiddleware,
@@ -36,6 +133,8 @@ app.add_middleware(
 # # Include routers
 app.include_router(auth.router)
 app.include_router(videos.router)
+app.include_router(watch.router)
+app.include_router(trending.router)
 app.include_router(channels.router, prefix="", tags=["channels"])
 # app.include_router(users.router, prefix="/users", tags=["users"])
 app.include_router(recommendations.router, prefix="/recommendations", tags=["recommendations"])
@@ -59,8 +158,23 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    """Check Health of app"""
-    return {"status": "healthy"}
+    """Check Health of app, with the authenticated user cache's hit rate"""
+    return {"status": "healthy", "user_cache": user_cache.stats()}
+
+@app.get("/health/db")
+async def database_health():
+    """Connection pool metrics, replica health, per-route query counts and write-behind lag"""
+    return {
+        "pools": pool_stats(),
+        "replicas": replica_stats(),
+        "queries": query_stats(),
+        "write_behind": user_write_behind.stats(),
+    }
+
+@app.get("/health/recommendations")
+async def recommendations_health():
+    """Item-item model state and serving cache hit rate / recompute latency"""
+    return {"model": recommendation_engine.stats(), "cache": recommendation_cache.stats()}
 
 if __name__ == "__main__":
     import uvicorn
@@ -1,3 +1,20 @@
 from .security import RateLimitMiddleware, SecurityHeadersMiddleware
+from .query_stats import QueryStatsMiddleware
+from .rate_limit import (
+    RateLimit,
+    RateLimitBackend,
+    MemoryRateLimitBackend,
+    SQLiteRateLimitBackend,
+    RedisRateLimitBackend,
+)
 
-__all__ = ["RateLimitMiddleware", "SecurityHeadersMiddleware"]
\ No newline at end of file
+__all__ = [
+    "RateLimitMiddleware",
+    "SecurityHeadersMiddleware",
+    "QueryStatsMiddleware",
+    "RateLimit",
+    "RateLimitBackend",
+    "MemoryRateLimitBackend",
+    "SQLiteRateLimitBackend",
+    "RedisRateLimitBackend",
+]
\ No newline at end of file
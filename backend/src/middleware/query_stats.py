@@ -0,0 +1,59 @@
+# src/middleware/query_stats.py
+import logging
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from src.utils.db_metrics import QueryMetrics, QueryStats, current_query_stats, query_metrics
+
+logger = logging.getLogger(__name__)
+
+
+class QueryStatsMiddleware:
+    """
+    Count the queries and DB time of each request.
+    Adds X-DB-Query-Count / X-DB-Time-Ms (and Server-Timing) response headers,
+    feeds per-route totals into `metrics`, and logs statement shapes repeated
+    more than `n_plus_one_threshold` times in one request.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        n_plus_one_threshold: int = 10,
+        metrics: QueryMetrics = query_metrics,
+    ):
+        self.app = app
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self.metrics = metrics
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = current_query_stats.set(stats)
+        repeated = []
+
+        async def send_with_stats(message: Message) -> None:
+            nonlocal repeated
+            if message["type"] == "http.response.start":
+                repeated = stats.repeated(self.n_plus_one_threshold)
+                duration = f"{stats.seconds * 1000:.2f}"
+                headers = [
+                    *message.get("headers", ()),
+                    (b"x-db-query-count", str(stats.count).encode()),
+                    (b"x-db-time-ms", duration.encode()),
+                    (b"server-timing", f'db;dur={duration};desc="{stats.count} queries"'.encode()),
+                ]
+                if repeated:
+                    headers.append((b"x-db-n-plus-one", str(len(repeated)).encode()))
+                message["headers"] = headers
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_stats)
+        finally:
+            current_query_stats.reset(token)
+            route = getattr(scope.get("route"), "path", scope["path"])
+            self.metrics.observe(route, stats, len(repeated))
+            for shape, count in repeated:
+                logger.warning("Possible N+1 on %s %s: %d x %s", scope["method"], route, count, shape)
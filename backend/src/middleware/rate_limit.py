@@ -0,0 +1,205 @@
+# src/middleware/rate_limit.py
+"""
+Sliding-window-counter rate limiting.
+
+Each client keeps only the request count of the current and the previous fixed
+window; the allowance is estimated as
+    prev * (1 - elapsed / period) + curr
+which is O(1) memory per client regardless of the request rate.
+"""
+import math
+from abc import ABC, abstractmethod
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, NamedTuple, Optional, Tuple
+
+_COUNT_BITS = 20
+_COUNT_MASK = (1 << _COUNT_BITS) - 1
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    """`calls` requests per `period` seconds."""
+    calls: int
+    period: int
+
+
+class RateLimitResult(NamedTuple):
+    allowed: bool
+    remaining: int
+    retry_after: int  # seconds, 0 when allowed
+
+
+def _decide(limit: RateLimit, now: float, window: int, prev: int, curr: int) -> Tuple[RateLimitResult, int]:
+    """Apply the sliding-window estimate; returns the result and the new `curr`."""
+    elapsed = now - window * limit.period
+    estimate = prev * (1 - elapsed / limit.period) + curr
+    if estimate >= limit.calls:
+        # Wait until the previous window's weight has decayed enough (or the window ends)
+        if prev:
+            wait = (estimate - limit.calls + 1) * limit.period / prev
+            wait = min(wait, limit.period - elapsed)
+        else:
+            wait = limit.period - elapsed
+        return RateLimitResult(False, 0, max(1, math.ceil(wait))), curr
+    return RateLimitResult(True, max(0, int(limit.calls - estimate - 1)), 0), curr + 1
+
+
+class RateLimitBackend(ABC):
+    """Stores per-key window counters."""
+
+    # True if hit() waits on I/O or locks held by other processes: callers on the event loop
+    # run it in a worker thread instead
+    blocking = False
+
+    @abstractmethod
+    def hit(self, key: str, limit: RateLimit, now: Optional[float] = None) -> RateLimitResult: ...
+
+
+class MemoryRateLimitBackend(RateLimitBackend):
+    """
+    Per-process backend. State per client is one packed int
+    (window index, previous count, current count) in an LRU-ordered dict;
+    clients idle for two periods are evicted, and at most `max_clients`
+    are tracked (the least recently seen are dropped first).
+    Use one instance per period: eviction compares window indexes.
+    """
+
+    def __init__(self, max_clients: int = 100_000):
+        self.max_clients = max_clients
+        self._clients: "OrderedDict[str, int]" = OrderedDict()
+        self._swept_window = -1
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._clients)
+
+    def hit(self, key: str, limit: RateLimit, now: Optional[float] = None) -> RateLimitResult:
+        now = time.time() if now is None else now
+        window = int(now // limit.period)
+        with self._lock:
+            packed = self._clients.get(key)
+            prev = curr = 0
+            if packed is not None:
+                stored_window = packed >> (2 * _COUNT_BITS)
+                if stored_window == window:
+                    prev = (packed >> _COUNT_BITS) & _COUNT_MASK
+                    curr = packed & _COUNT_MASK
+                elif stored_window == window - 1:
+                    prev = packed & _COUNT_MASK
+                self._clients.move_to_end(key)
+
+            result, curr = _decide(limit, now, window, prev, curr)
+            self._clients[key] = (window << (2 * _COUNT_BITS)) | (prev << _COUNT_BITS) | min(curr, _COUNT_MASK)
+            # Entries only go stale when the window moves, and only grow on new keys
+            if packed is None or window != self._swept_window:
+                self._evict(window)
+        return result
+
+    def _evict(self, window: int) -> None:
+        clients = self._clients
+        while len(clients) > self.max_clients:
+            clients.popitem(last=False)
+        # Oldest first: stop at the first client that still matters
+        while clients:
+            key, packed = next(iter(clients.items()))
+            if packed >> (2 * _COUNT_BITS) >= window - 1:
+                break
+            del clients[key]
+        self._swept_window = window
+
+
+class SQLiteRateLimitBackend(RateLimitBackend):
+    """
+    Backend shared by every worker on the host through a SQLite file (WAL mode).
+    Each hit is one short IMMEDIATE transaction; stale rows are swept periodically.
+    A hit can wait up to the 5s busy timeout for other workers' transactions.
+    """
+
+    blocking = True
+
+    def __init__(self, path: str, sweep_every: int = 10_000):
+        self.path = path
+        self.sweep_every = sweep_every
+        self._local = threading.local()
+        self._hits = 0
+        conn = self._connection()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS rate_limits ("
+            " key TEXT PRIMARY KEY, window INTEGER NOT NULL,"
+            " prev INTEGER NOT NULL, curr INTEGER NOT NULL,"
+            " expires REAL NOT NULL) WITHOUT ROWID"
+        )
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=OFF")
+            self._local.conn = conn
+        return conn
+
+    def hit(self, key: str, limit: RateLimit, now: Optional[float] = None) -> RateLimitResult:
+        now = time.time() if now is None else now
+        window = int(now // limit.period)
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT window, prev, curr FROM rate_limits WHERE key = ?", (key,)
+            ).fetchone()
+            prev = curr = 0
+            if row is not None:
+                if row[0] == window:
+                    prev, curr = row[1], row[2]
+                elif row[0] == window - 1:
+                    prev = row[2]
+
+            result, new_curr = _decide(limit, now, window, prev, curr)
+            conn.execute(
+                "INSERT INTO rate_limits (key, window, prev, curr, expires) VALUES (?, ?, ?, ?, ?)"
+                " ON CONFLICT(key) DO UPDATE SET window = excluded.window,"
+                " prev = excluded.prev, curr = excluded.curr, expires = excluded.expires",
+                (key, window, prev, new_curr, (window + 2) * limit.period),
+            )
+            self._hits += 1
+            if self._hits % self.sweep_every == 0:
+                conn.execute("DELETE FROM rate_limits WHERE expires < ?", (now,))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return result
+
+
+class RedisRateLimitBackend(RateLimitBackend):
+    """
+    Backend shared across workers/hosts through any Redis-compatible client
+    (needs pipeline() with incr / expire / get). Keys expire after two periods,
+    so idle clients cost nothing. Rejected requests are counted too, so a client
+    that keeps hammering stays limited.
+    """
+
+    blocking = True
+
+    def __init__(self, client: Any, prefix: str = "rl:"):
+        self.client = client
+        self.prefix = prefix
+
+    def hit(self, key: str, limit: RateLimit, now: Optional[float] = None) -> RateLimitResult:
+        now = time.time() if now is None else now
+        window = int(now // limit.period)
+        current_key = f"{self.prefix}{key}:{window}"
+        pipe = self.client.pipeline()
+        pipe.incr(current_key)
+        pipe.expire(current_key, 2 * limit.period)
+        pipe.get(f"{self.prefix}{key}:{window - 1}")
+        curr, _, prev = pipe.execute()
+
+        # The counter was already incremented; judge the request on what came before it
+        result, _ = _decide(limit, now, window, int(prev or 0), int(curr) - 1)
+        return result
@@ -1,74 +1,153 @@
 # src/middleware/security.py
-from fastapi import Request, HTTPException, status
+import asyncio
+import ipaddress
+from fastapi import status
 from fastapi.responses import JSONResponse
-from starlette.middleware.base import BaseHTTPMiddleware
-import time
-from collections import defaultdict, deque
-from typing import Dict, Deque
-import hashlib
-
-class RateLimitMiddleware(BaseHTTPMiddleware):
-    """Rate limiting middleware to prevent abuse."""
-    
-    def __init__(self, app, calls: int = 100, period: int = 60):
-        super().__init__(app)
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from typing import Dict, Iterable, List, Optional, Tuple
+from src.middleware.rate_limit import MemoryRateLimitBackend, RateLimit, RateLimitBackend
+
+class RateLimitMiddleware:
+    """
+    Rate limiting middleware to prevent abuse.
+    `calls` per `period` seconds per client by default; `route_limits` maps a path
+    prefix to its own RateLimit (longest prefix wins, counted separately).
+    Counters live in `backend` (shared across workers for SQLite / Redis);
+    without one, each limit gets its own bounded in-memory store.
+    Clients are identified by peer address; X-Forwarded-For is only believed
+    when the peer is one of `trusted_proxies` (addresses or CIDR networks).
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        calls: int = 100,
+        period: int = 60,
+        route_limits: Optional[Dict[str, RateLimit]] = None,
+        backend: Optional[RateLimitBackend] = None,
+        max_clients: int = 100_000,
+        trusted_proxies: Iterable[str] = (),
+    ):
+        self.app = app
+        self.trusted_proxies = [ipaddress.ip_network(proxy, strict=False) for proxy in trusted_proxies]
         self.calls = calls
         self.period = period
-        self.clients: Dict[str, Deque[float]] = defaultdict(deque)
-    
-    async def dispatch(self, request: Request, call_next):
-        # Get client identifier
-        client_ip = request.client.host if request.client is not None else "unknown"
-        forwarded_for = request.headers.get("X-Forwarded-For")
-        if forwarded_for:
-            client_ip = forwarded_for.split(",")[0].strip()
-        
-        # Create client key
-        client_key = hashlib.sha256(client_ip.encode()).hexdigest()[:16]
-        
+        self.default_limit = RateLimit(calls, period)
+        # Longest prefix first
+        self.route_limits: List[Tuple[str, RateLimit]] = sorted(
+            (route_limits or {}).items(), key=lambda item: len(item[0]), reverse=True
+        )
+        self.backends: Dict[str, RateLimitBackend] = {}
+        for prefix, _limit in [("", self.default_limit), *self.route_limits]:
+            self.backends[prefix] = backend or MemoryRateLimitBackend(max_clients)
+
+    def resolve_limit(self, path: str) -> Tuple[str, RateLimit]:
+        """Pick the limit that applies to `path`."""
+        for prefix, limit in self.route_limits:
+            if path.startswith(prefix):
+                return prefix, limit
+        return "", self.default_limit
+
+    def _trusted(self, address: str) -> bool:
+        try:
+            ip = ipaddress.ip_address(address)
+        except ValueError:
+            return False
+        return any(ip in network for network in self.trusted_proxies)
+
+    def client_ip(self, scope: Scope) -> str:
+        """
+        The peer address; behind trusted proxies, the nearest X-Forwarded-For hop
+        that isn't one of them (hops further left are client-supplied and spoofable).
+        """
+        client = scope.get("client")
+        peer = client[0] if client else "unknown"
+        if not self.trusted_proxies or not self._trusted(peer):
+            return peer
+        hops = [
+            hop.strip().decode("latin-1")
+            for name, value in scope["headers"] if name == b"x-forwarded-for"
+            for hop in value.split(b",")
+        ]
+        for hop in reversed(hops):
+            if hop and not self._trusted(hop):
+                return hop
+        return hops[0] if hops and hops[0] else peer
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
         # Check rate limit
-        now = time.time()
-        client_requests = self.clients[client_key]
-        
-        # Remove old requests
-        while client_requests and client_requests[0] <= now - self.period:
-            client_requests.popleft()
-        
-        # Check if limit exceeded
-        if len(client_requests) >= self.calls:
-            return JSONResponse(
+        prefix, limit = self.resolve_limit(scope["path"])
+        backend = self.backends[prefix]
+        key = f"{prefix}|{self.client_ip(scope)}"
+        if backend.blocking:  # shared stores: keep the event loop free while waiting on them
+            result = await asyncio.to_thread(backend.hit, key, limit)
+        else:
+            result = backend.hit(key, limit)
+
+        if not result.allowed:
+            response = JSONResponse(
                 status_code=status.HTTP_429_TOO_MANY_REQUESTS,
                 content={
-                    "detail": f"Rate limit exceeded. Max {self.calls} requests per {self.period} seconds."
-                }
+                    "detail": f"Rate limit exceeded. Max {limit.calls} requests per {limit.period} seconds."
+                },
+                headers={"Retry-After": str(result.retry_after)}
             )
-        
-        # Add current request
-        client_requests.append(now)
-        
+            await response(scope, receive, send)
+            return
+
         # Process request
-        response = await call_next(request)
-        return response
-
-class SecurityHeadersMiddleware(BaseHTTPMiddleware):
-    """Add security headers to all responses."""
-    
-    async def dispatch(self, request: Request, call_next):
-        response = await call_next(request)
-        
-        # Add security headers
-        response.headers["X-Content-Type-Options"] = "nosniff"
-        response.headers["X-Frame-Options"] = "DENY"
-        response.headers["X-XSS-Protection"] = "1; mode=block"
-        response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
-        response.headers["Content-Security-Policy"] = (
-            "default-src 'self'; "
-            "script-src 'self'; "
-            "style-src 'self' 'unsafe-inline'; "
-            "img-src 'self' data: https:; "
-            "font-src 'self'; "
-            "connect-src 'self'; "
-            "frame-ancestors 'none'"
-        )
-        
-        return response
+        await self.app(scope, receive, send)
+
+
+SECURITY_HEADERS: Dict[str, str] = {
+    "X-Content-Type-Options": "nosniff",
+    "X-Frame-Options": "DENY",
+    "X-XSS-Protection": "1; mode=block",
+    "Referrer-Policy": "strict-origin-when-cross-origin",
+    "Content-Security-Policy": (
+        "default-src 'self'; "
+        "script-src 'self'; "
+        "style-src 'self' 'unsafe-inline'; "
+        "img-src 'self' data: https:; "
+        "font-src 'self'; "
+        "connect-src 'self'; "
+        "frame-ancestors 'none'"
+    ),
+}
+
+
+class SecurityHeadersMiddleware:
+    """
+    Add security headers to all responses.
+    The header block is encoded once and appended to each `http.response.start`,
+    so streaming responses pass through untouched.
+    """
+
+    def __init__(self, app: ASGIApp, headers: Optional[Dict[str, str]] = None):
+        self.app = app
+        headers = SECURITY_HEADERS if headers is None else headers
+        self.raw_headers: List[Tuple[bytes, bytes]] = [
+            (name.lower().encode("latin-1"), value.encode("latin-1"))
+            for name, value in headers.items()
+        ]
+        self.header_names = frozenset(name for name, _ in self.raw_headers)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_headers(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                # Ours win over anything the route set
+                headers = message.get("headers", ())
+                message["headers"] = [
+                    header for header in headers if header[0].lower() not in self.header_names
+                ] + self.raw_headers
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
@@ -1,15 +1,20 @@
-from sqlalchemy import String, Text, ForeignKey, DateTime, Integer, func
-from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy import String, Text, ForeignKey, DateTime, Index, Integer, func
+from sqlalchemy.orm import Mapped, mapped_column, query_expression, relationship
 from src.config.database import Base
 from typing import TYPE_CHECKING
 if TYPE_CHECKING:
     from src.models.user import User
-    from models.videos.video import Video
+    from src.models.videos.video import Video
     from src.models.recommendation import Recommendation
 
 
 class Channel(Base):
     __tablename__ = "channels"
+    __table_args__ = (
+        # Keyset pagination: newest first
+        Index("ix_channels_created_at_id", "created_at", "id"),
+        Index("ix_channels_owner_id", "owner_id"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     name: Mapped[str] = mapped_column(String, nullable=False, index=True)
@@ -17,7 +22,10 @@ class Channel(Base):
     owner_id: Mapped[int] = mapped_column(ForeignKey("users.id"), nullable=False)
     created_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), server_default=func.now())    # pylint: disable=not-callable
 
-    # Relationships
+    # Filled only by loader bundles that ask for it (src.models.loaders)
+    videos_count: Mapped[int | None] = query_expression()
+
+    # Relationships (collections must be loaded explicitly)
     owner: Mapped["User"] = relationship("User", back_populates="channels") # pylint: disable=undefined-variable
-    videos: Mapped[list["Video"]] = relationship("Video", back_populates="channel") # pylint: disable=undefined-variable
-    recommendations: Mapped[list["Recommendation"]] = relationship("Recommendation", back_populates="channel")  # pylint: disable=undefined-variable
+    videos: Mapped[list["Video"]] = relationship("Video", back_populates="channel", lazy="raise") # pylint: disable=undefined-variable
+    recommendations: Mapped[list["Recommendation"]] = relationship("Recommendation", back_populates="channel", lazy="raise")  # pylint: disable=undefined-variable
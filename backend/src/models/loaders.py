@@ -0,0 +1,40 @@
+# src/models/loaders.py
+"""
+Named loader-option bundles.
+
+Relationship collections default to lazy="raise", so every query states what it
+loads: `select(Channel).options(*CHANNEL_WITH_OWNER)`. Anything not in the
+bundle raises on access instead of issuing a hidden query per row.
+"""
+from sqlalchemy import func, select
+from sqlalchemy.orm import joinedload, raiseload, with_expression
+from src.models.channel import Channel
+from src.models.recommendation import Recommendation
+from src.models.user import User
+from src.models.videos.video import Video
+from src.models.videos.video_comment import VideoComment
+
+_channel_videos_count = (
+    select(func.count(Video.id)).where(Video.channel_id == Channel.id).correlate(Channel).scalar_subquery()
+)
+_video_comment_count = (
+    select(func.count(VideoComment.id)).where(VideoComment.video_id == Video.id).correlate(Video).scalar_subquery()
+)
+
+# The user row only (authentication, /auth/me)
+USER_ONLY = (raiseload("*"),)
+
+CHANNEL_WITH_OWNER = (joinedload(Channel.owner).options(raiseload("*")),)
+CHANNEL_WITH_COUNTS = (with_expression(Channel.videos_count, _channel_videos_count),)
+CHANNEL_WITH_OWNER_AND_COUNTS = CHANNEL_WITH_OWNER + CHANNEL_WITH_COUNTS
+
+VIDEO_WITH_CHANNEL = (joinedload(Video.channel).options(raiseload("*")),)
+# view / like / dislike counts are columns; comments are counted in the same query
+VIDEO_WITH_CHANNEL_AND_COUNTS = VIDEO_WITH_CHANNEL + (
+    with_expression(Video.comment_count, _video_comment_count),
+)
+VIDEO_WITH_UPLOADER_AND_CHANNEL = VIDEO_WITH_CHANNEL + (joinedload(Video.uploader).options(raiseload("*")),)
+
+RECOMMENDATION_WITH_VIDEO = (
+    joinedload(Recommendation.video).options(joinedload(Video.channel).options(raiseload("*")), raiseload("*")),
+)
@@ -1,25 +1,72 @@
-from sqlalchemy import String, DateTime, Float, ForeignKey, Integer, func
+from sqlalchemy import BigInteger, String, DateTime, Float, ForeignKey, Index, Integer, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from src.config.database import Base
+from src.utils.ids import UUID_STR
 from typing import TYPE_CHECKING
 if TYPE_CHECKING:
     from src.models.user import User
-    from models.videos.video import Video
+    from src.models.videos.video import Video
     from src.models.channel import Channel
 
 class Recommendation(Base):
     __tablename__ = "recommendations"
+    __table_args__ = (
+        # Keyset pagination of a user's recommendations
+        Index("ix_recommendations_user_id_created_at_id", "user_id", "created_at", "id"),
+        # A user's best recommendations first
+        Index("ix_recommendations_user_id_score", "user_id", "score"),
+        # A user's live materialized generation, best first
+        Index("ix_recommendations_user_id_generation_score", "user_id", "generation", "score"),
+        Index("ix_recommendations_video_id", "video_id"),
+        Index("ix_recommendations_channel_id", "channel_id"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), nullable=False)
-    video_id: Mapped[int] = mapped_column(ForeignKey("videos.id"), nullable=False)
+    video_id: Mapped[str] = mapped_column(UUID_STR, ForeignKey("videos.id"), nullable=False)
     channel_id: Mapped[int] = mapped_column(ForeignKey("channels.id"), nullable=False)
     score: Mapped[float] = mapped_column(Float, nullable=False)
     reason: Mapped[str | None] = mapped_column(String, nullable=True)  # e.g., "similar_content", "trending"
     details: Mapped[str | None] = mapped_column(String, nullable=True)  # could store JSON string
+    # 0: explicit preference; otherwise the materializer run that wrote the row
+    generation: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
     created_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), server_default=func.now())    # pylint: disable=not-callable
 
     # Optional relationships
     user: Mapped["User"] = relationship("User", back_populates="recommendations")
     video: Mapped["Video"] = relationship("Video", back_populates="recommendations")
     channel: Mapped["Channel"] = relationship("Channel", back_populates="recommendations")
+
+
+class RecommendationGeneration(Base):
+    """The materialized generation a user's recommendations are read from."""
+    __tablename__ = "recommendation_generations"
+
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), primary_key=True)
+    generation: Mapped[int] = mapped_column(Integer, nullable=False)
+    updated_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), server_default=func.now())    # pylint: disable=not-callable
+
+
+class RecommendationRun(Base):
+    """One materializer run; its id is the generation it writes."""
+    __tablename__ = "recommendation_runs"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    mode: Mapped[str] = mapped_column(String, nullable=False)  # "full" or "incremental"
+    # Interactions with snowflake ids below this were visible to the run
+    watermark: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    users: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    rows: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    started_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), server_default=func.now())    # pylint: disable=not-callable
+    finished_at: Mapped[DateTime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+
+
+class RecommendationLease(Base):
+    """Which materializer run may write, until `expires_at` unless renewed."""
+    __tablename__ = "recommendation_leases"
+
+    name: Mapped[str] = mapped_column(String, primary_key=True)
+    holder: Mapped[str] = mapped_column(String, nullable=False)
+    # The holder's run; left unfinished if the holder died mid-run
+    run_id: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    expires_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), nullable=False)
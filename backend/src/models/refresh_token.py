@@ -0,0 +1,28 @@
+from typing import TYPE_CHECKING
+from sqlalchemy import String, DateTime, ForeignKey, Integer, func
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+from src.config.database import Base
+if TYPE_CHECKING:
+    from src.models.user import User
+
+
+class RefreshToken(Base):
+    """
+    One issued refresh token, keyed by its `jti` claim.
+    Tokens minted by rotating each other share a `family_id` (one per device login);
+    presenting an already-rotated token revokes the whole family.
+    """
+    __tablename__ = "refresh_tokens"
+
+    jti: Mapped[str] = mapped_column(String(32), primary_key=True)
+    user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    family_id: Mapped[str] = mapped_column(String(32), nullable=False, index=True)
+    token_hash: Mapped[str] = mapped_column(String(64), nullable=False)  # HMAC-SHA256 fingerprint
+    device: Mapped[str | None] = mapped_column(String, nullable=True)
+    replaced_by: Mapped[str | None] = mapped_column(String(32), nullable=True)
+    created_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), server_default=func.now()) # pylint: disable=not-callable
+    expires_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), nullable=False, index=True)
+    revoked_at: Mapped[DateTime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+
+    # Relationships
+    user: Mapped["User"] = relationship("User", back_populates="refresh_tokens")
@@ -1,5 +1,5 @@
-from typing import TYPE_CHECKING, Any
-from sqlalchemy.orm import Mapped, mapped_column, relationship
+from typing import TYPE_CHECKING
+from sqlalchemy.orm import DynamicMapped, Mapped, mapped_column, relationship
 from sqlalchemy import String, Boolean, DateTime, Integer, func
 from src.config.database import Base
 
@@ -10,6 +10,7 @@ if TYPE_CHECKING:
     from src.models.videos.video_like import VideoLike
     from src.models.videos.video_comment import VideoComment
     from src.models.recommendation import Recommendation
+    from src.models.refresh_token import RefreshToken
 
 
 class User(Base):
@@ -25,29 +26,32 @@ class User(Base):
     hashed_password: Mapped[str] = mapped_column(String, nullable=True)
     is_active: Mapped[bool] = mapped_column(Boolean, default=True)
     is_verified: Mapped[bool] = mapped_column(Boolean, default=False)
+    # Bumped on logout / deactivation / password change; access tokens carry it as "ver"
+    token_version: Mapped[int] = mapped_column(Integer, default=0, server_default="0", nullable=False)
 
     # OAuth fields
     google_id: Mapped[str | None] = mapped_column(String, unique=True, nullable=True, index=True)
     provider: Mapped[str] = mapped_column(String, default="email")  # "email", "google"
 
-    # Refresh token (hashed)
-    refresh_token_hash: Mapped[str | None] = mapped_column(String, nullable=True)
-
     # Timestamps
     created_at: Mapped[DateTime] = mapped_column(
         DateTime(timezone=True), server_default=func.now()
     )  # pylint: disable=not-callable
+    # Indexed: the token version map reloads recently updated users every few seconds
     updated_at: Mapped[DateTime | None] = mapped_column(
-        DateTime(timezone=True), onupdate=func.now()
+        DateTime(timezone=True), onupdate=func.now(), index=True
     )  # pylint: disable=not-callable
     last_login: Mapped[DateTime | None] = mapped_column(DateTime(timezone=True), nullable=True)
 
     # Relationships
-    channels: Mapped[list["Channel"]] = relationship("Channel", back_populates="owner")
-    recommendations: Mapped[list["Recommendation"]] = relationship("Recommendation", back_populates="user")
-    videos: Mapped[list["Video"]] = relationship("Video", back_populates="uploader", lazy="selectin")
-    video_views: Mapped[list["VideoView"]] = relationship("VideoView", back_populates="user", lazy="selectin")
-
-    # Use Any for dynamic relationships (not list)
-    video_likes: Mapped[Any] = relationship("VideoLike", back_populates="user", lazy="dynamic")
-    video_comments: Mapped[Any] = relationship("VideoComment", back_populates="user", lazy="dynamic")
+    # Collections never load implicitly (lazy="raise"): a User is loaded on every
+    # authenticated request. Load them explicitly with src.models.loaders.
+    channels: Mapped[list["Channel"]] = relationship("Channel", back_populates="owner", lazy="raise")
+    recommendations: Mapped[list["Recommendation"]] = relationship("Recommendation", back_populates="user", lazy="raise")
+    refresh_tokens: Mapped[list["RefreshToken"]] = relationship("RefreshToken", back_populates="user", passive_deletes=True, lazy="raise")
+    videos: Mapped[list["Video"]] = relationship("Video", back_populates="uploader", lazy="raise")
+    video_views: Mapped[list["VideoView"]] = relationship("VideoView", back_populates="user", lazy="raise")
+
+    # Dynamic relationships (return a query, not a list)
+    video_likes: DynamicMapped["VideoLike"] = relationship("VideoLike", back_populates="user", lazy="dynamic")
+    video_comments: DynamicMapped["VideoComment"] = relationship("VideoComment", back_populates="user", lazy="dynamic")
@@ -0,0 +1,15 @@
+from sqlalchemy import DateTime, Float, ForeignKey, Integer, func
+from sqlalchemy.orm import Mapped, mapped_column
+from src.config.database import Base
+from src.utils.ids import UUID_STR
+
+class TrendingScore(Base):
+    """Snapshot of a video's time-decayed trending score (see src.services.trending)."""
+    __tablename__ = "trending_scores"
+
+    video_id: Mapped[str] = mapped_column(UUID_STR, ForeignKey("videos.id", ondelete="CASCADE"), primary_key=True)
+    # Copy of videos.channel_id, so a warm start needs no join
+    channel_id: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    # log of the score scaled to the fixed reference time; comparable across restarts
+    log_score: Mapped[float] = mapped_column(Float, nullable=False)
+    updated_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now()) # pylint: disable=not-callable
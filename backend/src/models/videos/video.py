@@ -1,7 +1,8 @@
 from typing import TYPE_CHECKING
-from sqlalchemy import String, DateTime, Text, ForeignKey, Boolean, Integer, func
-from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy import String, DateTime, Text, ForeignKey, Boolean, Index, Integer, func
+from sqlalchemy.orm import Mapped, mapped_column, query_expression, relationship
 from src.config.database import Base
+from src.utils.ids import UUID_STR, uuid7
 if TYPE_CHECKING:
     from src.models.channel import Channel
     from src.models.user import User
@@ -12,8 +13,14 @@ if TYPE_CHECKING:
 
 class Video(Base):
     __tablename__ = "videos"
+    # Keyset pagination: the global feed and per-channel lists
+    __table_args__ = (
+        Index("ix_videos_created_at_id", "created_at", "id"),
+        Index("ix_videos_channel_id_created_at_id", "channel_id", "created_at", "id"),
+        Index("ix_videos_uploader_id", "uploader_id"),
+    )
 
-    id: Mapped[str] = mapped_column(String, primary_key=True, index=True)
+    id: Mapped[str] = mapped_column(UUID_STR, primary_key=True, default=uuid7)
     title: Mapped[str] = mapped_column(String, nullable=False, index=True)
     description: Mapped[str | None] = mapped_column(Text, nullable=True)
     video_url: Mapped[str] = mapped_column(String, nullable=False)
@@ -29,10 +36,13 @@ class Video(Base):
     created_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), server_default=func.now()) # pylint: disable=not-callable
     updated_at: Mapped[DateTime | None] = mapped_column(DateTime(timezone=True), onupdate=func.now()) # pylint: disable=not-callable
 
-    # Relationships
+    # Filled only by loader bundles that ask for it (src.models.loaders)
+    comment_count: Mapped[int | None] = query_expression()
+
+    # Relationships (collections must be loaded explicitly)
     uploader: Mapped["User"] = relationship("User", back_populates="videos")
     channel: Mapped["Channel"] = relationship("Channel", back_populates="videos")
-    recommendations: Mapped[list["Recommendation"]] = relationship("Recommendation", back_populates="video")
-    video_comments: Mapped[list["VideoComment"]] = relationship("VideoComment", back_populates="video")
-    video_views: Mapped[list["VideoView"]] = relationship("VideoView", back_populates="video")
-    video_likes: Mapped[list["VideoLike"]] = relationship("VideoLike", back_populates="video")
\ No newline at end of file
+    recommendations: Mapped[list["Recommendation"]] = relationship("Recommendation", back_populates="video", lazy="raise")
+    video_comments: Mapped[list["VideoComment"]] = relationship("VideoComment", back_populates="video", lazy="raise")
+    video_views: Mapped[list["VideoView"]] = relationship("VideoView", back_populates="video", lazy="raise")
+    video_likes: Mapped[list["VideoLike"]] = relationship("VideoLike", back_populates="video", lazy="raise")
\ No newline at end of file
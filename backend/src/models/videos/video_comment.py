@@ -1,8 +1,8 @@
 from typing import TYPE_CHECKING
-import uuid
-from sqlalchemy import String, Text, DateTime, ForeignKey, func
+from sqlalchemy import BigInteger, Text, DateTime, ForeignKey, Index, Integer, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from src.config.database import Base
+from src.utils.ids import UUID_STR, snowflake_ids
 if TYPE_CHECKING:
     from src.models.videos.video import Video
     from src.models.user import User
@@ -10,10 +10,15 @@ if TYPE_CHECKING:
 class VideoComment(Base):
     """Represents a comment on a video by a user."""
     __tablename__ = "video_comments"
+    __table_args__ = (
+        # Keyset pagination of a video's comments
+        Index("ix_video_comments_video_id_created_at_id", "video_id", "created_at", "id"),
+        Index("ix_video_comments_user_id", "user_id"),
+    )
 
-    id: Mapped[str] = mapped_column(String, primary_key=True, index=True, default=lambda: str(uuid.uuid4()))
-    video_id: Mapped[str] = mapped_column(String, ForeignKey("videos.id"), nullable=False)
-    user_id: Mapped[str] = mapped_column(String, ForeignKey("users.id"), nullable=False)
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=False, default=snowflake_ids.next_id)
+    video_id: Mapped[str] = mapped_column(UUID_STR, ForeignKey("videos.id"), nullable=False)
+    user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id"), nullable=False)
     content: Mapped[str] = mapped_column(Text, nullable=False)
     created_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), server_default=func.now()) # pylint: disable=not-callable
     updated_at: Mapped[DateTime | None] = mapped_column(DateTime(timezone=True), onupdate=func.now()) # pylint: disable=not-callable
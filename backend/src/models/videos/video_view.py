@@ -1,8 +1,8 @@
 from typing import TYPE_CHECKING
-import uuid
-from sqlalchemy import String, DateTime, ForeignKey, Integer, UniqueConstraint, func
+from sqlalchemy import BigInteger, DateTime, ForeignKey, Index, Integer, UniqueConstraint, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from src.config.database import Base
+from src.utils.ids import UUID_STR, snowflake_ids
 if TYPE_CHECKING:
     from src.models.videos.video import Video
     from src.models.user import User
@@ -10,11 +10,14 @@ if TYPE_CHECKING:
 class VideoView(Base):
     """Represents a view of a video by a user."""
     __tablename__ = "video_views"
-    __table_args__ = (UniqueConstraint("video_id", "user_id", name="uq_video_like"),)
+    __table_args__ = (
+        UniqueConstraint("video_id", "user_id", name="uq_video_view"),
+        Index("ix_video_views_user_id_created_at", "user_id", "created_at"),
+    )
 
-    id: Mapped[str] = mapped_column(String, primary_key=True, index=True, default=lambda: str(uuid.uuid4()))
-    video_id: Mapped[str] = mapped_column(String, ForeignKey("videos.id"), nullable=False)
-    user_id: Mapped[str] = mapped_column(String, ForeignKey("users.id"), nullable=False)
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=False, default=snowflake_ids.next_id)
+    video_id: Mapped[str] = mapped_column(UUID_STR, ForeignKey("videos.id"), nullable=False)
+    user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id"), nullable=False)
     watch_time: Mapped[int] = mapped_column(Integer, default=0)
     created_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), server_default=func.now()) # pylint: disable=not-callable
     updated_at: Mapped[DateTime | None] = mapped_column(DateTime(timezone=True), onupdate=func.now()) # pylint: disable=not-callable
@@ -1,3 +1,5 @@
+from datetime import datetime
+from typing import Optional
 from pydantic import BaseModel
 
 class ChannelBase(BaseModel):
@@ -25,11 +27,12 @@ class ChannelList(BaseModel):
     channels: list[Channel]
 
 class ChannelDetails(ChannelBase):
-    description: str
-    subscribers_count: int
-    videos_count: int
-    created_at: str
-    links: list[str]
+    id: int
+    description: Optional[str] = None
+    subscribers_count: int = 0
+    videos_count: int = 0
+    created_at: datetime
+    links: list[str] = []
 
     class Config:
         from_attributes = True
\ No newline at end of file
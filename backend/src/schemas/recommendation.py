@@ -3,7 +3,7 @@ from pydantic import BaseModel
 
 class RecommendationBase(BaseModel):
     user_id: int
-    video_id: int
+    video_id: str
     score: float
 
 class RecommendationCreate(RecommendationBase):
@@ -44,8 +44,16 @@ class Token(BaseModel):
     expires_in: int
 
 class TokenData(BaseModel):
+    """Claims carried by an access token (enough for routes that don't need the user row)."""
     user_id: Optional[int] = None
     email: Optional[str] = None
+    token_version: int = 0
+    is_active: bool = True
+    is_verified: bool = False
+
+class PasswordChange(BaseModel):
+    current_password: str
+    new_password: str
 
 class RefreshTokenRequest(BaseModel):
     refresh_token: str
@@ -53,9 +61,11 @@ class RefreshTokenRequest(BaseModel):
 class LoginRequest(BaseModel):
     email: EmailStr
     password: str
+    device: Optional[str] = None  # device label, one refresh session per device
 
 class GoogleTokenRequest(BaseModel):
     access_token: str  # Google access token from React Native
+    device: Optional[str] = None
 
 class PasswordResetRequest(BaseModel):
     email: EmailStr
@@ -1,7 +1,8 @@
 """Pydantic models for videoes"""
 from typing import Optional
+from datetime import datetime
 from enum import Enum
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 class Privacy(str, Enum):
     """Privacy settings for video"""
@@ -28,3 +29,55 @@ class VideoInDb(VideoBase):
     """
     id: str
     signed_url: str
+
+
+class VideoOut(VideoBase):
+    """
+    Video as listed to clients
+    """
+    id: str
+    thumbnail_url: Optional[str] = None
+    duration: Optional[int] = None
+    view_count: int = 0
+    like_count: int = 0
+    channel_id: int
+    uploader_id: int
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class VideoVote(BaseModel):
+    """A user's like (True) or dislike (False) of a video"""
+    liked: bool
+
+class VideoRating(BaseModel):
+    """The caller's vote on a video and its counts after it"""
+    video_id: str
+    liked: Optional[bool] = None
+    like_count: int
+    dislike_count: int
+
+
+class WatchHeartbeat(BaseModel):
+    """Player progress on one video, in seconds"""
+    video_id: str
+    watch_time: int = Field(ge=0)
+
+class HeartbeatBatch(BaseModel):
+    """Heartbeats a player buffered since its last call"""
+    heartbeats: list[WatchHeartbeat] = Field(min_length=1, max_length=500)
+
+class HeartbeatAck(BaseModel):
+    accepted: int
+
+
+class TrendingVideo(BaseModel):
+    """A trending video and its time-decayed engagement score"""
+    video_id: str
+    score: float
+
+class TrendingList(BaseModel):
+    """Trending videos, best first"""
+    items: list[TrendingVideo]
@@ -0,0 +1,409 @@
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+import uuid
+from sqlalchemy import delete, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm.attributes import set_committed_value
+from fastapi import HTTPException, status
+from src.models.user import User
+from src.models.refresh_token import RefreshToken
+from src.utils.db_routing import pin_primary
+from src.models.loaders import USER_ONLY
+from src.schemas.user import TokenData, UserCreate, UserCreateOAuth, UserUpdate, Token
+from src.utils.auth_utils import (
+    verify_password_async,
+    get_password_hash_async,
+    create_access_token,
+    create_refresh_token,
+    user_token_data,
+    verify_token,
+    fingerprint_refresh_token,
+    verify_refresh_token_fingerprint
+)
+from src.services.auth.google_auth import google_auth_service
+from src.services.auth.user_cache import UserCache, user_cache
+from src.services.auth.token_versions import token_versions
+from src.services.write_behind import WriteBehindBuffer, user_write_behind
+from src.config.auth import auth_settings
+from src.config.database import SessionLocal
+
+class AsyncAuthService:
+    """Authentication and token management on an AsyncSession, so auth queries don't block the event loop."""
+
+    def __init__(
+        self,
+        db: AsyncSession,
+        cache: Optional[UserCache] = None,
+        write_behind: Optional[WriteBehindBuffer] = None
+    ):
+        self.db = db
+        self.cache = cache or user_cache
+        self.write_behind = write_behind or user_write_behind
+
+    async def _first(self, *criteria) -> Optional[User]:
+        result = await self.db.execute(select(User).options(*USER_ONLY).where(*criteria).limit(1))
+        return result.scalar_one_or_none()
+
+    async def get_user_by_email(self, email: str) -> Optional[User]:
+        """Get user by email."""
+        return await self._first(User.email == email)
+
+    async def get_user_by_id(self, user_id: int) -> Optional[User]:
+        """Get user by ID."""
+        return await self._first(User.id == user_id)
+
+    async def get_user_for_auth(self, user_id: int) -> Optional[User]:
+        """Get user by ID through the identity cache."""
+        user = await self.cache.aload(user_id)
+        if user is not None:
+            return await self.db.merge(user, load=False)
+
+        user = await self.get_user_by_id(user_id)
+        if user is not None:
+            await self.cache.aset(user)
+        return user
+
+    async def get_user_by_google_id(self, google_id: str) -> Optional[User]:
+        """Get user by Google ID."""
+        return await self._first(User.google_id == google_id)
+
+    async def create_user(self, user_data: UserCreate) -> User:
+        """Create new user with email/password."""
+        # Check if user exists
+        if await self.get_user_by_email(user_data.email):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Email already registered"
+            )
+
+        # Create user
+        hashed_password = await get_password_hash_async(user_data.password)
+        db_user = User(
+            email=user_data.email,
+            username=user_data.username,
+            full_name=user_data.full_name,
+            avatar_url=user_data.avatar_url,
+            hashed_password=hashed_password,
+            provider="email"
+        )
+
+        self.db.add(db_user)
+        await self.db.commit()
+        await self.db.refresh(db_user)
+        return db_user
+
+    async def create_oauth_user(self, user_data: UserCreateOAuth) -> User:
+        """Create new user from OAuth (Google)."""
+        db_user = User(
+            email=user_data.email,
+            username=user_data.username,
+            full_name=user_data.full_name,
+            avatar_url=user_data.avatar_url,
+            google_id=user_data.google_id,
+            provider=user_data.provider,
+            is_verified=user_data.is_verified
+        )
+
+        self.db.add(db_user)
+        await self.db.commit()
+        await self.db.refresh(db_user)
+        return db_user
+
+    async def authenticate_user(self, email: str, password: str) -> Optional[User]:
+        """Authenticate user with email and password."""
+        user = await self.get_user_by_email(email)
+        if not user or not user.hashed_password:
+            return None
+
+        if not await verify_password_async(password, user.hashed_password):
+            return None
+
+        if not user.is_active:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Account is deactivated"
+            )
+
+        # Update last login (buffered, written with the next batch)
+        self.write_behind.record(user.id, last_login=datetime.now(timezone.utc))
+        return user
+
+    async def authenticate_google_user(self, access_token: str) -> User:
+        """Authenticate user with Google access token."""
+        # Verify Google token
+        google_user_info = await google_auth_service.verify_google_token(access_token)
+
+        if not google_user_info:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid Google token"
+            )
+
+        email = google_user_info["email"]
+        google_id = google_user_info["google_id"]
+
+        # Check if user exists by Google ID
+        user = await self.get_user_by_google_id(google_id)
+
+        if user:
+            # Update user info from Google (buffered, written with the next batch)
+            self.write_behind.record(
+                user.id,
+                full_name=google_user_info.get("full_name", user.full_name),
+                avatar_url=google_user_info.get("avatar_url", user.avatar_url),
+                last_login=datetime.now(timezone.utc),
+            )
+            # A change in verification status is written right away
+            is_verified = google_user_info.get("verified_email", user.is_verified)
+            if is_verified != user.is_verified:
+                user.is_verified = is_verified
+                await self.db.commit()
+                await self.cache.ainvalidate(user.id)
+            return user
+
+        # Check if user exists by email (different provider)
+        existing_user = await self.get_user_by_email(email)
+        if existing_user:
+            # Link Google account to existing user
+            existing_user.google_id = google_id
+            existing_user.provider = "google"  # Update primary provider
+            existing_user.is_verified = True
+            existing_user.last_login = datetime.now(timezone.utc)
+            await self.db.commit()
+            await self.cache.ainvalidate(existing_user.id)
+            return existing_user
+
+        # Create new user
+        user_data = UserCreateOAuth(
+            email=email,
+            full_name=google_user_info.get("full_name"),
+            avatar_url=google_user_info.get("avatar_url"),
+            google_id=google_id,
+            provider="google",
+            is_verified=google_user_info.get("verified_email", False)
+        )
+
+        return await self.create_oauth_user(user_data)
+
+    async def create_tokens(self, user: User, device: Optional[str] = None, replaces: Optional[RefreshToken] = None) -> Token:
+        """
+        Create access and refresh tokens for user.
+        `replaces` is the refresh token being rotated; the new one joins its family.
+        """
+        # Token payload
+        token_data = user_token_data(user)
+        jti = uuid.uuid4().hex
+
+        # Create tokens
+        access_token = create_access_token(token_data)
+        refresh_token = create_refresh_token({**token_data, "jti": jti})
+
+        if replaces is not None:
+            # Claim the old token atomically so two concurrent refreshes can't both rotate it
+            result = await self.db.execute(
+                update(RefreshToken)
+                .where(RefreshToken.jti == replaces.jti, RefreshToken.revoked_at.is_(None))
+                .values(revoked_at=datetime.utcnow(), replaced_by=jti)
+                .execution_options(synchronize_session=False)
+            )
+            if not result.rowcount:
+                await self.db.rollback()
+                await self.revoke_token_family(replaces.family_id)
+                raise HTTPException(
+                    status_code=status.HTTP_401_UNAUTHORIZED,
+                    detail="Refresh token reuse detected"
+                )
+
+        # Store refresh token fingerprint (a new family per login, shared by its rotations)
+        self.db.add(RefreshToken(
+            jti=jti,
+            user_id=user.id,
+            family_id=replaces.family_id if replaces is not None else uuid.uuid4().hex,
+            token_hash=fingerprint_refresh_token(refresh_token),
+            device=replaces.device if replaces is not None else device,
+            expires_at=datetime.utcnow() + timedelta(days=auth_settings.refresh_token_expire_days)
+        ))
+        await self.db.commit()
+
+        return Token(
+            access_token=access_token,
+            refresh_token=refresh_token,
+            token_type="bearer",
+            expires_in=auth_settings.access_token_expire_minutes * 60
+        )
+
+    async def refresh_access_token(self, refresh_token: str) -> Token:
+        """Refresh access token using refresh token (rotates the refresh token)."""
+        # Verify refresh token
+        payload = verify_token(refresh_token, "refresh")
+        if not payload or not payload.get("jti"):
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid refresh token"
+            )
+
+        # Look up stored token
+        # Primary: the token may have been issued a moment ago, before replicas caught up
+        with pin_primary():
+            stored = await self.db.get(RefreshToken, payload["jti"])
+        if not stored or not verify_refresh_token_fingerprint(refresh_token, stored.token_hash):
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid refresh token"
+            )
+
+        if stored.revoked_at is not None:
+            # A rotated token came back: assume it was stolen and kill the whole family
+            if stored.replaced_by is not None:
+                await self.revoke_token_family(stored.family_id)
+                raise HTTPException(
+                    status_code=status.HTTP_401_UNAUTHORIZED,
+                    detail="Refresh token reuse detected"
+                )
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Refresh token revoked"
+            )
+
+        # Get user
+        user = await self.get_user_for_auth(stored.user_id)
+        if not user or not user.is_active:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="User not found or inactive"
+            )
+
+        # Rotate: retire the presented token and issue its successor in the same family
+        return await self.create_tokens(user, replaces=stored)
+
+    async def revoke_token_family(self, family_id: str) -> int:
+        """Revoke every live refresh token of a rotation family."""
+        result = await self.db.execute(
+            update(RefreshToken)
+            .where(RefreshToken.family_id == family_id, RefreshToken.revoked_at.is_(None))
+            .values(revoked_at=datetime.utcnow())
+        )
+        await self.db.commit()
+        return result.rowcount
+
+    async def revoke_user_tokens(self, user_id: int) -> int:
+        """Revoke every live refresh token of a user (all devices)."""
+        result = await self.db.execute(
+            update(RefreshToken)
+            .where(RefreshToken.user_id == user_id, RefreshToken.revoked_at.is_(None))
+            .values(revoked_at=datetime.utcnow())
+        )
+        await self.db.commit()
+        return result.rowcount
+
+    async def purge_expired_tokens(self) -> int:
+        """Delete expired refresh tokens in one statement."""
+        result = await self.db.execute(
+            delete(RefreshToken).where(RefreshToken.expires_at < datetime.utcnow())
+        )
+        await self.db.commit()
+        return result.rowcount
+
+    async def logout_user(self, user: User, refresh_token: Optional[str] = None):
+        """
+        Logout user. With a refresh token only that device session (its family)
+        is revoked, otherwise every session of the user. Outstanding access
+        tokens are invalidated either way (other devices simply refresh).
+        """
+        payload = verify_token(refresh_token, "refresh") if refresh_token else None
+        with pin_primary():
+            stored = await self.db.get(RefreshToken, payload["jti"]) if payload and payload.get("jti") else None
+        if stored is not None and stored.user_id == user.id:
+            await self.revoke_token_family(stored.family_id)
+        else:
+            await self.revoke_user_tokens(user.id)
+        await self.bump_token_version(user)
+
+    async def bump_token_version(self, user: User) -> User:
+        """Invalidate every access token issued to user so far."""
+        # Increment in SQL: `user` may be a cached snapshot with a stale version.
+        # Pending changes on `user` (deactivation, new password) autoflush first.
+        result = await self.db.execute(
+            update(User)
+            .where(User.id == user.id)
+            .values(token_version=User.token_version + 1)
+            .returning(User.token_version, User.is_active)
+            .execution_options(synchronize_session=False)
+        )
+        token_version, is_active = result.one()
+        await self.db.commit()
+        set_committed_value(user, "token_version", token_version)
+        token_versions.bump(user.id, token_version, is_active)
+        await self.cache.ainvalidate(user.id)
+        return user
+
+    async def change_password(self, user: User, current_password: str, new_password: str) -> User:
+        """Change password and invalidate existing tokens."""
+        # The cached identity never carries the hash; load it explicitly
+        await self.db.refresh(user, ["hashed_password"])
+        if not user.hashed_password or not await verify_password_async(current_password, user.hashed_password):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Incorrect password"
+            )
+        user.hashed_password = await get_password_hash_async(new_password)
+        await self.revoke_user_tokens(user.id)
+        await self.bump_token_version(user)
+        return user
+
+    async def update_user(self, user: User, user_data: UserUpdate) -> User:
+        """Update profile fields of a user."""
+        changes = user_data.model_dump(exclude_unset=True)
+        # An explicit edit wins over buffered login-time values
+        self.write_behind.discard(user.id, *changes)
+        for key, value in changes.items():
+            setattr(user, key, value)
+        await self.db.commit()
+        await self.db.refresh(user)
+        await self.cache.ainvalidate(user.id)
+        return user
+
+    async def deactivate_user(self, user: User) -> User:
+        """Deactivate a user account."""
+        user.is_active = False
+        await self.revoke_user_tokens(user.id)
+        await self.bump_token_version(user)
+        return user
+
+    async def get_current_user_from_token(self, token: str) -> User:
+        """Get current user from access token."""
+        payload = verify_token(token, "access")
+        if not payload:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid access token",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+
+        user_id = payload.get("user_id")
+        user = await self.get_user_for_auth(user_id)
+        # The cached row can predate a bump another request made; the version map can't
+        if (
+            not user
+            or not user.is_active
+            or payload.get("ver", 0) < user.token_version
+            or not token_versions.is_current(
+                TokenData(user_id=user_id, token_version=payload.get("ver", 0), is_active=user.is_active)
+            )
+        ):
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="User not found or inactive",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+
+        return user
+
+
+def purge_expired_refresh_tokens(session_factory: sessionmaker = SessionLocal) -> int:
+    """Bulk-delete expired refresh tokens (blocking: run periodically off the event loop)."""
+    with session_factory() as db:
+        result = db.execute(delete(RefreshToken).where(RefreshToken.expires_at < datetime.utcnow()))
+        db.commit()
+        return result.rowcount
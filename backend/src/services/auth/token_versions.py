@@ -0,0 +1,81 @@
+# src/services/auth/token_versions.py
+from datetime import datetime, timedelta, timezone
+from threading import Lock
+from typing import Dict, Optional, Tuple
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from src.config.auth import auth_settings
+from src.config.database import SessionLocal
+from src.models.user import User
+from src.schemas.user import TokenData
+
+
+class TokenVersionMap:
+    """
+    In-memory view of recently changed users' token_version / is_active.
+
+    An access token only lives `window` seconds, so only users whose row changed
+    within that window can hold a token the claims alone would wrongly accept.
+    `refresh()` reloads exactly those rows in one query; changes made by this
+    process are applied immediately through `bump()`, changes made by other
+    workers become visible after the next refresh.
+    """
+
+    def __init__(self, window_seconds: int):
+        self.window = timedelta(seconds=window_seconds)
+        self.refreshed_at: Optional[datetime] = None
+        self._versions: Dict[int, Tuple[int, bool]] = {}
+        self._local: Dict[int, Tuple[int, bool, datetime]] = {}
+        self._lock = Lock()
+
+    @property
+    def ready(self) -> bool:
+        return self.refreshed_at is not None
+
+    def bump(self, user_id: int, token_version: int, is_active: bool) -> None:
+        """Record a local change to a user's token version / status."""
+        with self._lock:
+            self._versions[user_id] = (token_version, is_active)
+            self._local[user_id] = (token_version, is_active, datetime.now(timezone.utc))
+
+    def is_current(self, claims: TokenData) -> bool:
+        """True if the claims weren't superseded by a newer version or deactivation."""
+        entry = self._versions.get(claims.user_id)
+        if entry is None:
+            return claims.is_active
+        token_version, is_active = entry
+        return is_active and claims.token_version >= token_version
+
+    def refresh(self, db: Session) -> int:
+        """Reload every user changed inside the token lifetime window in bulk (an ix_users_updated_at range scan)."""
+        now = datetime.now(timezone.utc)  # updated_at is timestamptz
+        rows = db.execute(
+            select(User.id, User.token_version, User.is_active)
+            .where(User.updated_at >= now - self.window)
+        ).all()
+        versions = {row.id: (row.token_version, row.is_active) for row in rows}
+        with self._lock:
+            # Re-apply local bumps the query may have raced with
+            for user_id, (token_version, is_active, bumped_at) in list(self._local.items()):
+                if bumped_at < now - self.window:
+                    del self._local[user_id]
+                elif user_id not in versions or versions[user_id][0] < token_version:
+                    versions[user_id] = (token_version, is_active)
+            self._versions = versions
+            self.refreshed_at = now
+        return len(rows)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._versions.clear()
+            self._local.clear()
+            self.refreshed_at = None
+
+
+token_versions = TokenVersionMap(window_seconds=auth_settings.access_token_expire_minutes * 60 + 60)
+
+
+def refresh_token_versions() -> int:
+    """Reload the token version map (run periodically off the event loop)."""
+    with SessionLocal() as db:
+        return token_versions.refresh(db)
@@ -0,0 +1,219 @@
+# src/services/auth/user_cache.py
+from abc import ABC, abstractmethod
+import asyncio
+from datetime import datetime
+from threading import Lock
+from typing import Any, Callable, Dict, Optional
+import time
+import orjson
+from cachetools import TTLCache
+from sqlalchemy.orm import Session, make_transient_to_detached
+from src.config.auth import auth_settings
+from src.models.user import User
+
+# Columns kept in the identity cache. Secrets (password / refresh token hashes)
+# are deliberately left out; they stay expired and load on demand.
+CACHED_USER_FIELDS = (
+    "id",
+    "email",
+    "username",
+    "full_name",
+    "avatar_url",
+    "is_active",
+    "is_verified",
+    "token_version",
+    "google_id",
+    "provider",
+    "created_at",
+    "updated_at",
+    "last_login",
+)
+_DATETIME_FIELDS = ("created_at", "updated_at", "last_login")
+
+
+class UserCacheBackend(ABC):
+    """Storage interface for cached user snapshots (plain dicts keyed by user id)."""
+
+    # Backends doing network I/O set this so async callers run them in a thread
+    blocking = False
+
+    @abstractmethod
+    def get(self, user_id: int) -> Optional[Dict[str, Any]]: ...
+
+    @abstractmethod
+    def set(self, user_id: int, snapshot: Dict[str, Any]) -> None: ...
+
+    @abstractmethod
+    def delete(self, user_id: int) -> None: ...
+
+    @abstractmethod
+    def clear(self) -> None: ...
+
+
+class MemoryUserCacheBackend(UserCacheBackend):
+    """Per-process TTL + LRU backend."""
+
+    def __init__(self, maxsize: int = 10_000, ttl: int = 60, timer: Callable[[], float] = time.monotonic):
+        self._cache: TTLCache = TTLCache(maxsize=maxsize, ttl=ttl, timer=timer)
+        self._lock = Lock()
+
+    def get(self, user_id: int) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return self._cache.get(user_id)
+
+    def set(self, user_id: int, snapshot: Dict[str, Any]) -> None:
+        with self._lock:
+            self._cache[user_id] = snapshot
+
+    def delete(self, user_id: int) -> None:
+        with self._lock:
+            self._cache.pop(user_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+
+
+class RedisUserCacheBackend(UserCacheBackend):
+    """
+    Shared backend for multiple workers.
+    Accepts any Redis-compatible client exposing get / set(ex=) / delete / scan_iter,
+    so invalidations made by one worker are seen by all of them.
+    """
+
+    blocking = True
+
+    def __init__(self, client: Any, ttl: int = 60, prefix: str = "user-cache:"):
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def _key(self, user_id: int) -> str:
+        return f"{self.prefix}{user_id}"
+
+    def get(self, user_id: int) -> Optional[Dict[str, Any]]:
+        raw = self.client.get(self._key(user_id))
+        if raw is None:
+            return None
+        snapshot = orjson.loads(raw)
+        for field in _DATETIME_FIELDS:
+            if snapshot.get(field):
+                snapshot[field] = datetime.fromisoformat(snapshot[field])
+        return snapshot
+
+    def set(self, user_id: int, snapshot: Dict[str, Any]) -> None:
+        self.client.set(self._key(user_id), orjson.dumps(snapshot), ex=self.ttl)
+
+    def delete(self, user_id: int) -> None:
+        self.client.delete(self._key(user_id))
+
+    def clear(self) -> None:
+        for key in self.client.scan_iter(f"{self.prefix}*"):
+            self.client.delete(key)
+
+
+class UserCache:
+    """Identity cache in front of the users table used by token authentication."""
+
+    def __init__(self, backend: Optional[UserCacheBackend] = None, enabled: bool = True):
+        self.backend = backend or MemoryUserCacheBackend()
+        self.enabled = enabled
+        self._lock = Lock()  # lookups run on the event loop and in worker threads
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def snapshot(user: User) -> Dict[str, Any]:
+        """Copy the cacheable columns of a loaded user."""
+        return {field: getattr(user, field) for field in CACHED_USER_FIELDS}
+
+    def load(self, user_id: int) -> Optional[User]:
+        """Return the cached user as a detached instance, or None."""
+        if not self.enabled:
+            return None
+
+        snapshot = self.backend.get(user_id)
+        with self._lock:
+            if snapshot is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        if snapshot is None:
+            return None
+
+        user = User(**snapshot)
+        make_transient_to_detached(user)
+        return user
+
+    def get(self, db: Session, user_id: int) -> Optional[User]:
+        """Return the cached user attached to `db` without emitting SQL, or None."""
+        user = self.load(user_id)
+        return db.merge(user, load=False) if user is not None else None
+
+    def set(self, user: User) -> None:
+        """Store a snapshot of `user`."""
+        if self.enabled:
+            self.backend.set(user.id, self.snapshot(user))
+
+    def invalidate(self, user_id: int) -> None:
+        """Drop the cached entry for `user_id`."""
+        with self._lock:
+            self.invalidations += 1
+        self.backend.delete(user_id)
+
+    def clear(self) -> None:
+        self.backend.clear()
+
+    async def _call(self, method: Callable, *args: Any) -> Any:
+        if self.backend.blocking:  # shared stores: keep the event loop free while waiting on them
+            return await asyncio.to_thread(method, *args)
+        return method(*args)
+
+    async def aload(self, user_id: int) -> Optional[User]:
+        """`load` for callers on the event loop."""
+        return await self._call(self.load, user_id)
+
+    async def aset(self, user: User) -> None:
+        """`set` for callers on the event loop."""
+        if self.enabled:
+            await self._call(self.backend.set, user.id, self.snapshot(user))
+
+    async def ainvalidate(self, user_id: int) -> None:
+        """`invalidate` for callers on the event loop."""
+        await self._call(self.invalidate, user_id)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit / miss counters."""
+        with self._lock:
+            hits, misses, invalidations = self.hits, self.misses, self.invalidations
+        lookups = hits + misses
+        return {
+            "backend": type(self.backend).__name__,
+            "hits": hits,
+            "misses": misses,
+            "invalidations": invalidations,
+            "hit_rate": hits / lookups if lookups else 0.0,
+        }
+
+
+def backend_from_settings() -> UserCacheBackend:
+    """The backend chosen by USER_CACHE_BACKEND ("memory" or "redis")."""
+    if auth_settings.user_cache_backend == "memory":
+        return MemoryUserCacheBackend(
+            maxsize=auth_settings.user_cache_max_size,
+            ttl=auth_settings.user_cache_ttl_seconds,
+        )
+    if auth_settings.user_cache_backend == "redis":
+        try:
+            import redis  # optional: only needed for the shared backend
+        except ImportError as e:
+            raise RuntimeError("USER_CACHE_BACKEND=redis needs the redis package installed") from e
+        return RedisUserCacheBackend(
+            redis.Redis.from_url(auth_settings.user_cache_redis_url),
+            ttl=auth_settings.user_cache_ttl_seconds,
+        )
+    raise ValueError(f"Unknown USER_CACHE_BACKEND: {auth_settings.user_cache_backend!r}")
+
+
+user_cache = UserCache(backend_from_settings(), enabled=auth_settings.user_cache_enabled)
@@ -1,5 +1,9 @@
-from sqlalchemy.orm import Session
+from typing import Optional
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from src.models.channel import Channel as ChannelModel   # ORM model
+from src.models.loaders import CHANNEL_WITH_COUNTS
+from src.utils.pagination import DEFAULT_PAGE_SIZE, Page, paginate_async
 from src.schemas.channel import (
     ChannelCreate,
     ChannelUpdate,
@@ -7,35 +11,38 @@ from src.schemas.channel import (
     Channel as ChannelSchema,   # Pydantic schema
 )
 class ChannelService:
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
 
-    def create_channel(self, channel_data: ChannelCreate) -> ChannelModel:
+    async def create_channel(self, channel_data: ChannelCreate) -> ChannelModel:
         new_channel = ChannelModel(**channel_data.dict())
         self.db.add(new_channel)
-        self.db.commit()
-        self.db.refresh(new_channel)
+        await self.db.commit()
+        await self.db.refresh(new_channel)
         return new_channel
 
     async def get_channel(self, channel_id: int) -> ChannelModel | None:
-        return self.db.query(ChannelModel).filter(ChannelModel.id == channel_id).first()
+        stmt = select(ChannelModel).options(*CHANNEL_WITH_COUNTS).where(ChannelModel.id == channel_id)
+        return await self.db.scalar(stmt)
 
-    async def get_all_channels(self, limit=10) -> list[ChannelModel]:
-        return self.db.query(ChannelModel).limit(limit).all()
+    async def get_all_channels(self, cursor: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE) -> Page:
+        """Channels newest first, one keyset page at a time."""
+        stmt = select(ChannelModel).options(*CHANNEL_WITH_COUNTS)
+        return await paginate_async(self.db, stmt, ChannelModel.created_at, ChannelModel.id, cursor, limit)
 
     async def update_channel(self, channel_id: int, channel_data: ChannelUpdate) -> ChannelModel | None:
         channel = await self.get_channel(channel_id)
         if channel:
             for key, value in channel_data.dict(exclude_unset=True).items():
                 setattr(channel, key, value)
-            self.db.commit()
-            self.db.refresh(channel)
+            await self.db.commit()
+            await self.db.refresh(channel)
         return channel
 
-    def delete_channel(self, channel_id: int) -> bool:
-        channel = self.get_channel(channel_id)
+    async def delete_channel(self, channel_id: int) -> bool:
+        channel = await self.get_channel(channel_id)
         if channel:
-            self.db.delete(channel)
-            self.db.commit()
+            await self.db.delete(channel)
+            await self.db.commit()
             return True
         return False
@@ -2,21 +2,25 @@
 from typing import Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
-from src.config.database import get_db
-from src.services.auth.auth_service import AuthService
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.config.database import get_async_db
+from src.services.auth.async_auth_service import AsyncAuthService
+from src.services.auth.token_versions import token_versions
 from src.models.user import User
+from src.schemas.user import TokenData
+from src.config.auth import auth_settings
+from src.utils.auth_utils import verify_token
 
 # Security scheme
 security = HTTPBearer(auto_error=False)
 
-def get_auth_service(db: Session = Depends(get_db)) -> AuthService:
-    """Get authentication service instance."""
-    return AuthService(db)
+async def get_async_auth_service(db: AsyncSession = Depends(get_async_db)) -> AsyncAuthService:
+    """Get async authentication service instance."""
+    return AsyncAuthService(db)
 
-def get_current_user(
+async def get_current_user_async(
     credentials: Optional[HTTPAuthorizationCredentials] = Depends(security),
-    auth_service: AuthService = Depends(get_auth_service)
+    auth_service: AsyncAuthService = Depends(get_async_auth_service)
 ) -> User:
     """Get current authenticated user (required)."""
     if not credentials:
@@ -26,23 +30,23 @@ def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    return auth_service.get_current_user_from_token(credentials.credentials)
+    return await auth_service.get_current_user_from_token(credentials.credentials)
 
-def get_current_user_optional(
+async def get_current_user_optional_async(
     credentials: Optional[HTTPAuthorizationCredentials] = Depends(security),
-    auth_service: AuthService = Depends(get_auth_service)
+    auth_service: AsyncAuthService = Depends(get_async_auth_service)
 ) -> Optional[User]:
     """Get current authenticated user (optional)."""
     if not credentials:
         return None
     
     try:
-        return auth_service.get_current_user_from_token(credentials.credentials)
+        return await auth_service.get_current_user_from_token(credentials.credentials)
     except HTTPException:
         return None
 
-def get_current_active_user(
-    current_user: User = Depends(get_current_user)
+async def get_current_active_user_async(
+    current_user: User = Depends(get_current_user_async)
 ) -> User:
     """Get current active user."""
     if not current_user.is_active:
@@ -52,8 +56,8 @@ def get_current_active_user(
         )
     return current_user
 
-def get_current_verified_user(
-    current_user: User = Depends(get_current_active_user)
+async def get_current_verified_user_async(
+    current_user: User = Depends(get_current_active_user_async)
 ) -> User:
     """Get current verified user."""
     if not current_user.is_verified:
@@ -62,3 +66,54 @@ def get_current_verified_user(
             detail="Email verification required"
         )
     return current_user
+
+
+async def get_token_claims(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(security),
+    auth_service: AsyncAuthService = Depends(get_async_auth_service)
+) -> TokenData:
+    """
+    Get the caller's token claims (required) for routes that only need the user id.
+    With stateless access tokens this does no database work: claims are checked
+    against the in-memory token version map. Until that map has loaded (or with
+    the mode off) the user row is checked instead.
+    """
+    if not credentials:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Authentication required",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    
+    payload = verify_token(credentials.credentials, "access")
+    if not payload:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid access token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    
+    if auth_settings.stateless_access_tokens and token_versions.ready:
+        claims = TokenData(
+            user_id=payload.get("user_id"),
+            email=payload.get("email"),
+            token_version=payload.get("ver", 0),
+            is_active=payload.get("active", True),
+            is_verified=payload.get("verified", False),
+        )
+        if not token_versions.is_current(claims):
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="User not found or inactive",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+        return claims
+    
+    user = await auth_service.get_current_user_from_token(credentials.credentials)
+    return TokenData(
+        user_id=user.id,
+        email=user.email,
+        token_version=user.token_version,
+        is_active=user.is_active,
+        is_verified=user.is_verified,
+    )
@@ -0,0 +1,198 @@
+# src/services/recommendation_cache.py
+"""
+Serving cache for recommendation pages.
+
+Pages are kept per user, keyed by (cursor, limit), in a TTL + LRU map of at
+most `max_users` users with `pages_per_user` pages each. A user's pages are
+dropped when they add a preference, or once `change_threshold` interaction
+changes (new views) have been reported for them.
+
+Concurrent misses for the same page are coalesced: the first request computes
+it and the others wait for its result (single flight), so a burst of requests
+for a cold page runs the computation once.
+"""
+import asyncio
+import time
+from threading import Lock
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from cachetools import TTLCache
+from src.config.recommendations import recommendation_settings
+
+PageKey = Tuple[Optional[str], int]
+
+
+class _UserPages:
+    __slots__ = ("pages", "changes")
+
+    def __init__(self):
+        self.pages: Dict[PageKey, Tuple[float, Any]] = {}  # key -> (expires, page)
+        self.changes = 0
+
+
+class RecommendationCache:
+    """Per-process page cache with single-flight recomputation."""
+
+    def __init__(
+        self,
+        ttl: float = 300,
+        max_users: int = 10_000,
+        pages_per_user: int = 4,
+        change_threshold: int = 5,
+        enabled: bool = True,
+        timer: Callable[[], float] = time.monotonic,
+    ):
+        self.ttl = ttl
+        self.pages_per_user = pages_per_user
+        self.change_threshold = change_threshold
+        self.enabled = enabled
+        self.timer = timer
+        self._users: TTLCache = TTLCache(maxsize=max_users, ttl=ttl, timer=timer)
+        # Interaction reports arrive from worker threads: every access to
+        # _users and _inflight holds this lock
+        self._lock = Lock()
+        self._inflight: Dict[Tuple[int, Optional[str], int], asyncio.Future] = {}
+
+        # Metrics
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.invalidations = 0
+        self.recomputes = 0
+        self.recompute_seconds = 0.0
+        self.recompute_max_seconds = 0.0
+
+    def _lookup(self, user_id: int, key: PageKey) -> Optional[Any]:
+        with self._lock:
+            entry = self._users.get(user_id)
+            cached = entry.pages.get(key) if entry is not None else None
+            if cached is None:
+                return None
+            if cached[0] <= self.timer():
+                del entry.pages[key]
+                return None
+            return cached[1]
+
+    def _store(self, user_id: int, key: PageKey, page: Any) -> None:
+        with self._lock:
+            entry = self._users.get(user_id)
+            if entry is None:
+                entry = _UserPages()
+            if key not in entry.pages and len(entry.pages) >= self.pages_per_user:
+                del entry.pages[next(iter(entry.pages))]  # oldest page
+            entry.pages[key] = (self.timer() + self.ttl, page)
+            self._users[user_id] = entry  # also marks the user most recently used
+
+    async def get(
+        self, user_id: int, cursor: Optional[str], limit: int, compute: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        """The cached page, or `compute()`'s result, computed once however many requests are waiting."""
+        if not self.enabled:
+            return await compute()
+        key = (cursor, limit)
+        flight = (user_id, cursor, limit)
+        while True:
+            page = self._lookup(user_id, key)
+            if page is not None:
+                self.hits += 1
+                return page
+            future, computing = self._join(flight)
+            if computing:
+                break
+            self.coalesced += 1
+            await asyncio.wait((future,))
+            if not future.cancelled():  # the computing request was cancelled: try again
+                return future.result()
+
+        self.misses += 1
+        start = time.perf_counter()
+        try:
+            page = await compute()
+        except Exception as e:
+            self._finish(flight, future)
+            future.set_exception(e)
+            future.exception()  # retrieved: nobody may be waiting
+            raise
+        except BaseException:
+            self._finish(flight, future)
+            future.cancel()
+            raise
+        elapsed = time.perf_counter() - start
+        self.recomputes += 1
+        self.recompute_seconds += elapsed
+        self.recompute_max_seconds = max(self.recompute_max_seconds, elapsed)
+        # An invalidation while computing means the result may already be stale: serve, don't keep
+        if self._finish(flight, future):
+            self._store(user_id, key, page)
+        future.set_result(page)
+        return page
+
+    def _join(self, flight: Tuple[int, Optional[str], int]) -> Tuple[asyncio.Future, bool]:
+        """The future computing `flight`, and True if this caller just became the one to compute it."""
+        with self._lock:
+            future = self._inflight.get(flight)
+            if future is not None:
+                return future, False
+            future = self._inflight[flight] = asyncio.get_running_loop().create_future()
+            return future, True
+
+    def _finish(self, flight: Tuple[int, Optional[str], int], future: asyncio.Future) -> bool:
+        """Stop routing requests to `future`; False if an invalidation already did."""
+        with self._lock:
+            if self._inflight.get(flight) is future:
+                del self._inflight[flight]
+                return True
+            return False
+
+    def invalidate(self, user_id: int) -> None:
+        """Drop the user's pages, and keep pages being computed for them from being stored."""
+        with self._lock:
+            self.invalidations += 1
+            self._users.pop(user_id, None)
+            for flight in [flight for flight in self._inflight if flight[0] == user_id]:
+                del self._inflight[flight]
+
+    def record_interactions(self, user_id: int, changes: int = 1) -> None:
+        """Count interaction changes of a cached user; invalidates at the threshold."""
+        with self._lock:
+            entry = self._users.get(user_id)
+            if entry is None:
+                return
+            entry.changes += changes
+            if entry.changes < self.change_threshold:
+                return
+        self.invalidate(user_id)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._users.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit rate and recompute latency."""
+        lookups = self.hits + self.misses + self.coalesced
+        with self._lock:
+            users = len(self._users)
+        return {
+            "users": users,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "invalidations": self.invalidations,
+            "hit_rate": (self.hits + self.coalesced) / lookups if lookups else 0.0,
+            "recomputes": self.recomputes,
+            "recompute_avg_ms": self.recompute_seconds / self.recomputes * 1000 if self.recomputes else 0.0,
+            "recompute_max_ms": self.recompute_max_seconds * 1000,
+        }
+
+
+recommendation_cache = RecommendationCache(
+    ttl=recommendation_settings.rec_cache_ttl_seconds,
+    max_users=recommendation_settings.rec_cache_max_users,
+    pages_per_user=recommendation_settings.rec_cache_pages_per_user,
+    change_threshold=recommendation_settings.rec_cache_change_threshold,
+    enabled=recommendation_settings.rec_cache_enabled,
+)
+
+
+def get_recommendation_cache() -> RecommendationCache:
+    """The process-wide cache, as a dependency (tests override it with a fresh one)."""
+    return recommendation_cache
@@ -0,0 +1,342 @@
+# src/services/recommendation_engine.py
+"""
+Item-item collaborative filtering over video_views and video_likes.
+
+Interactions form a sparse users x videos matrix X: a view is worth
+log1p(watch_time / scale), a like adds `like_weight`, and a dislike drops the
+pair. Two videos are similar when the same users engage with both, cosine of
+their X columns; only the top `neighbours` per video are kept. A user's
+recommendations are the neighbours of their latest videos, weighted by how
+much they engaged and how similar the neighbour is, minus what they've seen.
+
+X lives as CSR (by user) and CSC (by video) index arrays. X^T X is computed a
+block of videos at a time with bincount, so memory is bounded by the block
+size rather than videos^2.
+"""
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from src.config.database import SessionLocal
+from src.config.recommendations import recommendation_settings
+from src.models.videos.video_like import VideoLike
+from src.models.videos.video_view import VideoView
+
+logger = logging.getLogger(__name__)
+
+BLOCK_CELLS = 1 << 22  # dense co-occurrence cells per block (32 MiB of float64)
+BLOCK_PAIRS = 1 << 23  # (video, co-watched video) pairs expanded per block
+CHUNK_ROWS = 50_000
+
+
+@dataclass
+class Interactions:
+    """Interaction rows as parallel arrays; several rows may share a (user, video) pair."""
+    videos: List[str]  # video id per video index
+    user_ids: np.ndarray  # int64
+    video_index: np.ndarray  # int64, into `videos`
+    weights: np.ndarray  # float64; -inf vetoes the pair (dislike)
+    recency: np.ndarray  # int64, higher is newer (snowflake ids are time-ordered)
+
+
+class InteractionLoader:
+    """Accumulates chunks of (user_id, video_id, weight, recency) rows, numbering videos as they appear."""
+
+    def __init__(self):
+        self.index: Dict[str, int] = {}
+        self.parts: List[Tuple[np.ndarray, ...]] = []
+
+    def add(self, user_ids: Sequence[int], video_ids: Sequence[str], weights: np.ndarray, recency: Sequence[int]) -> None:
+        index = self.index
+        video_index = np.fromiter(
+            (index.setdefault(video_id, len(index)) for video_id in video_ids), np.int64, len(video_ids)
+        )
+        self.parts.append((np.asarray(user_ids, np.int64), video_index, weights, np.asarray(recency, np.int64)))
+
+    def interactions(self) -> Interactions:
+        columns = [np.concatenate(column) for column in zip(*self.parts)] if self.parts else [
+            np.empty(0, np.int64), np.empty(0, np.int64), np.empty(0), np.empty(0, np.int64)
+        ]
+        return Interactions(list(self.index), *columns)
+
+
+def view_weights(watch_times: np.ndarray, scale: float) -> np.ndarray:
+    return np.log1p(np.maximum(watch_times, 0) / scale)
+
+
+def like_weights(is_liked: np.ndarray, like_weight: float) -> np.ndarray:
+    return np.where(is_liked, like_weight, -np.inf)
+
+
+def _pointers(sorted_index: np.ndarray, n: int) -> np.ndarray:
+    """CSR row pointers for entries sorted by `sorted_index`."""
+    return np.concatenate(([0], np.cumsum(np.bincount(sorted_index, minlength=n))))
+
+
+class InteractionMatrix:
+    """Users x videos with one positive value per pair, as CSR and CSC index arrays."""
+
+    def __init__(
+        self, video_ids: np.ndarray, user_ids: np.ndarray, user_index: np.ndarray, item_index: np.ndarray,
+        values: np.ndarray, recency: Optional[np.ndarray] = None, vetoed: Optional[np.ndarray] = None,
+    ):
+        self.video_ids = video_ids
+        self.user_ids = user_ids
+        self.n_items = len(video_ids)
+        self.n_users = len(user_ids)
+        by_user = np.lexsort((item_index, user_index))
+        self.user_index = user_index[by_user]
+        self.user_ptr = _pointers(self.user_index, self.n_users)
+        self.user_items = item_index[by_user]
+        self.user_values = values[by_user]
+        self.user_recency = recency[by_user] if recency is not None else np.zeros(len(by_user), np.int64)
+        by_item = np.lexsort((user_index, item_index))
+        self.item_index = item_index[by_item]
+        self.item_ptr = _pointers(self.item_index, self.n_items)
+        self.item_users = user_index[by_item]
+        self.item_values = values[by_item]
+        # Disliked (user, video) pairs as sorted user * n_items + video keys
+        self.vetoed = vetoed if vetoed is not None else np.empty(0, np.int64)
+
+    @property
+    def nnz(self) -> int:
+        return len(self.user_items)
+
+    @classmethod
+    def from_interactions(cls, interactions: Interactions, max_items_per_user: int) -> "InteractionMatrix":
+        """Sum each pair's weights, drop vetoed pairs, keep each user's most recent pairs."""
+        video_ids = np.array(interactions.videos, dtype=object)
+        item_index = interactions.video_index
+        user_ids, user_index = np.unique(interactions.user_ids, return_inverse=True)
+        if not len(item_index):
+            return cls(video_ids, user_ids, user_index, item_index, interactions.weights)
+        # One entry per (user, video), newest row last
+        key = user_index.astype(np.int64) * len(video_ids) + item_index
+        order = np.lexsort((interactions.recency, key))
+        key = key[order]
+        starts = np.flatnonzero(np.r_[True, key[1:] != key[:-1]])
+        values = np.add.reduceat(interactions.weights[order], starts)
+        recency = interactions.recency[order][np.r_[starts[1:], len(key)] - 1]
+        key = key[starts]
+        keep = values > 0
+        vetoed = key[np.isneginf(values)]
+        key, values, recency = key[keep], values[keep], recency[keep]
+        user_index, item_index = key // len(video_ids), key % len(video_ids)
+        # Cap heavy users: similarity work grows with the square of a user's items
+        order = np.lexsort((-recency, user_index))
+        rank = group_rank(user_index[order])
+        keep = np.empty(len(order), bool)
+        keep[order] = rank < max_items_per_user
+        return cls(
+            video_ids, user_ids, user_index[keep], item_index[keep], values[keep], recency[keep], vetoed,
+        )
+
+
+def group_rank(groups: np.ndarray) -> np.ndarray:
+    """Position of each element within its run of equal values in sorted `groups`."""
+    if not len(groups):
+        return np.empty(0, np.int64)
+    first = np.r_[0, np.flatnonzero(np.diff(groups)) + 1]
+    return np.arange(len(groups)) - np.repeat(first, np.diff(np.r_[first, len(groups)]))
+
+
+def expand_rows(ptr: np.ndarray, rows: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Entry positions of CSR `rows`, and for each the position in `rows` it came from."""
+    lengths = ptr[rows + 1] - ptr[rows]
+    offsets = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    return np.repeat(ptr[rows], lengths) + offsets, np.repeat(np.arange(len(rows)), lengths)
+
+
+def _blocks(cost: np.ndarray, max_rows: int, max_cost: int) -> Iterable[Tuple[int, int]]:
+    """Consecutive [first, last) ranges of at most `max_rows` rows and (unless one row alone exceeds it) `max_cost`."""
+    cumulative = np.cumsum(cost)
+    first = 0
+    while first < len(cost):
+        spent = cumulative[first - 1] if first else 0
+        last = int(np.searchsorted(cumulative, spent + max_cost, side="right"))
+        last = min(max(last, first + 1), first + max_rows, len(cost))
+        yield first, last
+        first = last
+
+
+def item_neighbours(
+    matrix: InteractionMatrix, k: int, block_cells: int = BLOCK_CELLS, block_pairs: int = BLOCK_PAIRS
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Top-`k` cosine neighbours per video: (indices, scores), best first, padded with -1 / 0."""
+    n = matrix.n_items
+    k = min(k, max(n - 1, 0))
+    neighbours = np.full((n, k), -1, np.int32)
+    scores = np.zeros((n, k), np.float32)
+    if not k or not matrix.nnz:
+        return neighbours, scores
+    norms = np.sqrt(np.bincount(matrix.item_index, weights=matrix.item_values ** 2, minlength=n))
+    norms[norms == 0] = 1  # videos with no entries: co-occurrence is 0 anyway
+    user_degree = np.diff(matrix.user_ptr)
+    cost = np.bincount(matrix.item_index, weights=user_degree[matrix.item_users], minlength=n)
+    for first, last in _blocks(cost, max(1, block_cells // n), block_pairs):
+        rows = last - first
+        lo, hi = matrix.item_ptr[first], matrix.item_ptr[last]
+        # Every (video in block, user, other video of that user) triple, flattened
+        positions, entry = expand_rows(matrix.user_ptr, matrix.item_users[lo:hi])
+        entry += lo
+        cells = (matrix.item_index[entry] - first) * n + matrix.user_items[positions]
+        weights = matrix.item_values[entry] * matrix.user_values[positions]
+        similarity = np.bincount(cells, weights=weights, minlength=rows * n).reshape(rows, n)
+        similarity[np.arange(rows), np.arange(first, last)] = 0  # not its own neighbour
+        similarity /= norms[first:last, None]
+        similarity /= norms[None, :]
+        top = np.argpartition(-similarity, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(similarity, top, axis=1)
+        order = np.argsort(-top_scores, axis=1, kind="stable")
+        top, top_scores = np.take_along_axis(top, order, axis=1), np.take_along_axis(top_scores, order, axis=1)
+        top[top_scores <= 0] = -1
+        neighbours[first:last] = top
+        scores[first:last] = np.maximum(top_scores, 0)
+    return neighbours, scores
+
+
+class ItemNeighbours:
+    """Top-k similar videos per video; immutable once built, so readers need no lock."""
+
+    def __init__(self, video_ids: np.ndarray, neighbours: np.ndarray, scores: np.ndarray):
+        self.video_ids = video_ids
+        self.neighbours = neighbours
+        self.scores = scores
+        self.index = {video_id: i for i, video_id in enumerate(video_ids.tolist())}
+
+    @classmethod
+    def build(cls, interactions: Interactions, neighbours: int, max_items_per_user: int) -> "ItemNeighbours":
+        matrix = InteractionMatrix.from_interactions(interactions, max_items_per_user)
+        return cls(matrix.video_ids, *item_neighbours(matrix, neighbours))
+
+    def similar(self, video_id: str, limit: int) -> List[Tuple[str, float]]:
+        """Videos most similar to `video_id`."""
+        return self.recommend({video_id: 1.0}, (), limit)
+
+    def recommend(self, seeds: Dict[str, float], exclude: Iterable[str], limit: int) -> List[Tuple[str, float]]:
+        """Neighbours of the `seeds` videos, scored by sum(seed weight * similarity), best first."""
+        rows = [self.index[video_id] for video_id in seeds if video_id in self.index]
+        if not rows or limit <= 0:
+            return []
+        seed_weights = np.array([seeds[self.video_ids[row]] for row in rows])
+        candidates = self.neighbours[rows].ravel()
+        weighted = (self.scores[rows] * seed_weights[:, None]).ravel()
+        valid = candidates >= 0
+        candidates, inverse = np.unique(candidates[valid], return_inverse=True)
+        totals = np.bincount(inverse, weights=weighted[valid])
+        excluded = rows + [self.index[video_id] for video_id in exclude if video_id in self.index]
+        keep = ~np.isin(candidates, excluded)
+        candidates, totals = candidates[keep], totals[keep]
+        best = np.argsort(-totals, kind="stable")[:limit]
+        return [(self.video_ids[candidates[i]], float(totals[i])) for i in best]
+
+
+def load_interactions(db: Session, settings=recommendation_settings) -> Interactions:
+    """Stream every view and like out of the database into arrays."""
+    loader = InteractionLoader()
+    views = db.execute(
+        select(VideoView.user_id, VideoView.video_id, VideoView.watch_time, VideoView.id)
+        .execution_options(yield_per=CHUNK_ROWS)
+    )
+    for chunk in views.partitions():
+        user_ids, video_ids, watch_times, ids = zip(*chunk)
+        weights = view_weights(np.array(watch_times, np.float64), settings.rec_watch_time_scale)
+        loader.add(user_ids, video_ids, weights, ids)
+    likes = db.execute(
+        select(VideoLike.user_id, VideoLike.video_id, VideoLike.is_liked, VideoLike.id)
+        .execution_options(yield_per=CHUNK_ROWS)
+    )
+    for chunk in likes.partitions():
+        user_ids, video_ids, is_liked, ids = zip(*chunk)
+        loader.add(user_ids, video_ids, like_weights(np.array(is_liked, bool), settings.rec_like_weight), ids)
+    return loader.interactions()
+
+
+class RecommendationEngine:
+    """Owns the current model: rebuilt in the background, swapped in whole."""
+
+    def __init__(self, session_factory=SessionLocal, settings=recommendation_settings):
+        self.session_factory = session_factory
+        self.settings = settings
+        self.model: Optional[ItemNeighbours] = None
+        self.builds = 0
+        self.last_build_seconds: Optional[float] = None
+        self.last_build_interactions = 0
+
+    def rebuild(self) -> ItemNeighbours:
+        """Build a model from the current interactions and swap it in (blocking)."""
+        start = time.perf_counter()
+        with self.session_factory() as db:
+            interactions = load_interactions(db, self.settings)
+        model = ItemNeighbours.build(
+            interactions, self.settings.rec_neighbours, self.settings.rec_max_items_per_user
+        )
+        self.model = model
+        self.builds += 1
+        self.last_build_seconds = time.perf_counter() - start
+        self.last_build_interactions = len(interactions.user_ids)
+        logger.info(
+            "Rebuilt recommendations: %d videos from %d interactions in %.1fs",
+            len(model.video_ids), self.last_build_interactions, self.last_build_seconds,
+        )
+        return model
+
+    async def run(self, interval: float) -> None:
+        """Build now, then every `interval` seconds."""
+        while True:
+            try:
+                await asyncio.to_thread(self.rebuild)
+            except Exception:  # keep serving the previous model
+                logger.exception("Recommendation rebuild failed")
+            await asyncio.sleep(interval)
+
+    async def user_history(self, db: AsyncSession, user_id: int) -> Tuple[Dict[str, float], set]:
+        """The user's latest videos with their weights, and every video they've seen or disliked."""
+        settings = self.settings
+        views = await db.execute(
+            select(VideoView.video_id, VideoView.watch_time)
+            .where(VideoView.user_id == user_id)
+            .order_by(VideoView.created_at.desc())
+            .limit(settings.rec_history)
+        )
+        likes = await db.execute(
+            select(VideoLike.video_id, VideoLike.is_liked)
+            .where(VideoLike.user_id == user_id)
+            .order_by(VideoLike.id.desc())
+            .limit(settings.rec_history)
+        )
+        weights: Dict[str, float] = {}
+        for video_id, watch_time in views:
+            weights[video_id] = float(view_weights(np.float64(watch_time or 0), settings.rec_watch_time_scale))
+        for video_id, is_liked in likes:
+            weights[video_id] = weights.get(video_id, 0.0) + (settings.rec_like_weight if is_liked else -np.inf)
+        seen = set(weights)
+        # Views come first, newest first: the seeds are the latest videos the user didn't dislike
+        seeds = {video_id: weight for video_id, weight in weights.items() if weight > 0}
+        seeds = dict(list(seeds.items())[:settings.rec_seed_items])
+        return seeds, seen
+
+    async def recommend_for_user(self, db: AsyncSession, user_id: int, limit: int) -> List[Tuple[str, float]]:
+        """Ranked (video_id, score) for the user; empty without a model or history."""
+        model = self.model
+        if model is None:
+            return []
+        seeds, seen = await self.user_history(db, user_id)
+        return model.recommend(seeds, seen, limit)
+
+    def stats(self) -> Dict[str, Any]:
+        model = self.model
+        return {
+            "videos": len(model.video_ids) if model is not None else 0,
+            "builds": self.builds,
+            "last_build_seconds": self.last_build_seconds,
+            "last_build_interactions": self.last_build_interactions,
+        }
+
+
+recommendation_engine = RecommendationEngine()
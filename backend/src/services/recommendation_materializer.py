@@ -0,0 +1,387 @@
+# src/services/recommendation_materializer.py
+"""
+Batch job writing each user's top-N item-item recommendations to the
+recommendations table.
+
+A run builds the model from every view and like, scores users in chunks on a
+process pool, and bulk inserts each chunk's rows under the run's generation
+(its recommendation_runs id). The same transaction points the chunk's
+recommendation_generations rows at that generation, which is what makes the
+rows visible: readers see a user's complete old set or complete new set,
+never a mix. Superseded rows are deleted afterwards.
+
+Incremental runs recompute only users with a view or like at or after the
+previous run's watermark (snowflake ids are time-ordered).
+
+Only one run writes at a time per database: a run first claims the
+recommendation_leases row and renews it in every chunk's transaction; a chunk
+whose run lost the lease is rolled back. Other web workers (or a cron job)
+find the lease held and skip their run. A lease that runs out belonged to a process that died; the next run takes it over and deletes
+the superseded rows the dead run's committed chunks had not dropped yet.
+
+Run from backend/:
+    python -m src.services.recommendation_materializer [--incremental] [--workers N]
+"""
+import argparse
+import logging
+import multiprocessing
+import os
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+import numpy as np
+from sqlalchemy import delete, func, insert, select, union, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from src.config.database import SessionLocal
+from src.config.recommendations import recommendation_settings
+from src.models.recommendation import (
+    Recommendation, RecommendationGeneration, RecommendationLease, RecommendationRun,
+)
+from src.models.videos.video import Video
+from src.models.videos.video_like import VideoLike
+from src.models.videos.video_view import VideoView
+from src.services.recommendation_engine import (
+    InteractionMatrix, expand_rows, group_rank, item_neighbours, load_interactions,
+)
+from src.utils.ids import compose_snowflake
+
+logger = logging.getLogger(__name__)
+
+REASON = "item_item"
+LEASE = "materializer"
+# Interactions are written by several processes with their own clocks
+WATERMARK_SLACK_MS = 60_000
+
+
+class UserScorer:
+    """Top-N videos per user from the item-item model; picklable, so each pool worker gets a copy."""
+
+    def __init__(
+        self, matrix: InteractionMatrix, neighbours: np.ndarray, scores: np.ndarray,
+        uploader_index: np.ndarray, seed_items: int, top_n: int,
+    ):
+        self.n_items = matrix.n_items
+        self.user_ptr = matrix.user_ptr
+        self.user_items = matrix.user_items
+        self.user_values = matrix.user_values
+        self.user_recency = matrix.user_recency
+        self.neighbours = neighbours
+        self.scores = scores
+        self.seed_items = seed_items
+        self.top_n = top_n
+        # Pairs never recommended: the user disliked the video, or uploaded it
+        uploaded = np.flatnonzero(uploader_index >= 0)
+        self.blocked = np.union1d(matrix.vetoed, uploader_index[uploaded] * self.n_items + uploaded)
+
+    def __call__(self, users: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(user index, video index, score) rows for `users`, best first per user."""
+        n, k = self.n_items, self.neighbours.shape[1]
+        positions, owner = expand_rows(self.user_ptr, users)
+        # The same seeds as online serving: each user's latest videos
+        order = np.lexsort((-self.user_recency[positions], owner))
+        seeds = order[group_rank(owner[order]) < self.seed_items]
+        seed_items = self.user_items[positions[seeds]]
+        candidates = self.neighbours[seed_items].ravel()
+        weights = (self.scores[seed_items] * self.user_values[positions[seeds], None]).ravel()
+        keys = np.repeat(users[owner[seeds]], k) * n + candidates
+        valid = candidates >= 0
+        keys, inverse = np.unique(keys[valid], return_inverse=True)
+        totals = np.bincount(inverse, weights=weights[valid])
+        if not len(keys):
+            return keys, keys, totals
+        blocked = self.blocked[np.searchsorted(self.blocked, keys[0]):np.searchsorted(self.blocked, keys[-1], "right")]
+        seen = users[owner] * n + self.user_items[positions]
+        keep = ~np.isin(keys, seen) & ~np.isin(keys, blocked)
+        keys, totals = keys[keep], totals[keep]
+        user_index = keys // n
+        order = np.lexsort((-totals, user_index))
+        order = order[group_rank(user_index[order]) < self.top_n]
+        return user_index[order], keys[order] % n, totals[order]
+
+
+_worker_scorer: Optional[UserScorer] = None
+
+
+def _init_worker(scorer: UserScorer) -> None:
+    global _worker_scorer  # pylint: disable=global-statement
+    _worker_scorer = scorer
+
+
+def _score_in_worker(users: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    return _worker_scorer(users)
+
+
+class LeaseLost(RuntimeError):
+    """The run stopped renewing for too long and another run took the lease over."""
+
+
+class RecommendationMaterializer:
+    """Writes recommendation generations; one run at a time per database (see the lease)."""
+
+    def __init__(self, session_factory=SessionLocal, settings=recommendation_settings):
+        self.session_factory = session_factory
+        self.settings = settings
+        self.last_run: Optional[Dict[str, Any]] = None
+
+    @contextmanager
+    def _scoring(self, scorer: UserScorer, workers: int) -> Iterator[Callable]:
+        """map(score, chunks), in order: in this process, or on a pool of `workers` processes."""
+        if workers <= 1:
+            yield lambda chunks: map(scorer, chunks)
+            return
+        # spawn, not fork: the web server calls this with threads running
+        with ProcessPoolExecutor(
+            workers, mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker, initargs=(scorer,),
+        ) as pool:
+            yield lambda chunks: pool.map(_score_in_worker, chunks)
+
+    def _changed_users(self, db: Session, matrix: InteractionMatrix, since: int) -> np.ndarray:
+        """Matrix indices of users with a view or like at or after snowflake id `since`."""
+        stmt = union(
+            select(VideoView.user_id).where(VideoView.id >= since),
+            select(VideoLike.user_id).where(VideoLike.id >= since),
+        )
+        user_ids = np.array(sorted(db.scalars(stmt)), np.int64)
+        index = np.searchsorted(matrix.user_ids, user_ids)
+        found = index < matrix.n_users
+        found[found] = matrix.user_ids[index[found]] == user_ids[found]
+        return index[found]
+
+    def _video_owners(self, db: Session, matrix: InteractionMatrix) -> Tuple[np.ndarray, np.ndarray]:
+        """Per matrix video: its uploader's matrix user index (-1 if none) and its channel id."""
+        uploader_index = np.full(matrix.n_items, -1, np.int64)
+        channel_ids = np.zeros(matrix.n_items, np.int64)
+        position = {video_id: i for i, video_id in enumerate(matrix.video_ids.tolist())}
+        rows = db.execute(
+            select(Video.id, Video.uploader_id, Video.channel_id).execution_options(yield_per=50_000)
+        )
+        for video_id, uploader_id, channel_id in rows:
+            i = position.get(video_id)
+            if i is None:
+                continue
+            channel_ids[i] = channel_id
+            user = np.searchsorted(matrix.user_ids, uploader_id)
+            if user < matrix.n_users and matrix.user_ids[user] == uploader_id:
+                uploader_index[i] = user
+        return uploader_index, channel_ids
+
+    def _write(self, holder: str, generation: int, users: np.ndarray, rows: Dict[str, np.ndarray]) -> None:
+        """Insert a chunk's rows and switch its users to `generation`, then drop what it replaced."""
+        user_ids = users.tolist()
+        with self.session_factory() as db:
+            # Renewing first locks the lease row until the commit, so a claimant can't
+            # take the lease over while this chunk is being switched
+            if not self._renew_in(db, holder):
+                db.rollback()
+                raise LeaseLost("Materializer lease was taken over by another run")
+            if len(rows["user_id"]):
+                # Core insert of the table: a plain executemany, no ORM bookkeeping per row
+                db.execute(insert(Recommendation.__table__), [
+                    {"user_id": user_id, "video_id": video_id, "channel_id": channel_id,
+                     "score": score, "reason": REASON, "generation": generation}
+                    for user_id, video_id, channel_id, score in zip(
+                        rows["user_id"].tolist(), rows["video_id"].tolist(),
+                        rows["channel_id"].tolist(), rows["score"].tolist(),
+                    )
+                ])
+            db.execute(delete(RecommendationGeneration).where(RecommendationGeneration.user_id.in_(user_ids)))
+            db.execute(insert(RecommendationGeneration.__table__), [
+                {"user_id": user_id, "generation": generation} for user_id in user_ids
+            ])
+            db.commit()
+            db.execute(delete(Recommendation).where(
+                Recommendation.user_id.in_(user_ids),
+                Recommendation.generation > 0,
+                Recommendation.generation != generation,
+            ))
+            db.commit()
+
+    def _lease_expiry(self) -> datetime:
+        return datetime.now(timezone.utc) + timedelta(seconds=self.settings.rec_materialize_lease_seconds)
+
+    def _claim(self, holder: str) -> bool:
+        """Take the lease if it is free or has expired."""
+        with self.session_factory() as db:
+            # One conditional UPDATE: of two claimants, only one matches the expired row
+            claimed = db.execute(
+                update(RecommendationLease)
+                .where(RecommendationLease.name == LEASE, RecommendationLease.expires_at < datetime.now(timezone.utc))
+                .values(holder=holder, expires_at=self._lease_expiry())
+            ).rowcount
+            if not claimed:
+                if db.get(RecommendationLease, LEASE) is not None:
+                    return False
+                db.add(RecommendationLease(name=LEASE, holder=holder, expires_at=self._lease_expiry()))
+            try:
+                db.commit()
+            except IntegrityError:  # another process created the row first
+                return False
+        return True
+
+    def _renew_in(self, db: Session, holder: str) -> bool:
+        """Extend the lease in `db`'s transaction; False if `holder` no longer holds an unexpired lease."""
+        return db.execute(
+            update(RecommendationLease)
+            .where(
+                RecommendationLease.name == LEASE,
+                RecommendationLease.holder == holder,
+                RecommendationLease.expires_at > datetime.now(timezone.utc),
+            )
+            .values(expires_at=self._lease_expiry())
+        ).rowcount == 1
+
+    def _renew(self, holder: str) -> None:
+        with self.session_factory() as db:
+            renewed = self._renew_in(db, holder)
+            db.commit()
+        if not renewed:
+            raise LeaseLost("Materializer lease was taken over by another run")
+
+    def _release(self, holder: str) -> None:
+        with self.session_factory() as db:
+            db.execute(
+                update(RecommendationLease)
+                .where(RecommendationLease.name == LEASE, RecommendationLease.holder == holder)
+                .values(expires_at=datetime.now(timezone.utc))
+            )
+            db.commit()
+
+    def _clean_up_after(self, db: Session, generation: int) -> int:
+        """
+        Delete the rows an unfinished run's chunks superseded: each chunk
+        switched its users and then dropped their older rows in a second
+        commit, which a dead process may never have reached.
+        """
+        switched = select(RecommendationGeneration.user_id).where(RecommendationGeneration.generation == generation)
+        deleted = db.execute(delete(Recommendation).where(
+            Recommendation.user_id.in_(switched),
+            Recommendation.generation > 0,
+            Recommendation.generation != generation,
+        )).rowcount
+        if deleted:
+            logger.warning("Deleted %d recommendations left behind by unfinished run %d", deleted, generation)
+        return deleted
+
+    def run(self, incremental: bool = False, workers: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """
+        Materialize every user (or, incrementally, the changed ones); blocking.
+        Returns None without doing anything while another run holds the lease.
+        """
+        holder = uuid.uuid4().hex
+        if not self._claim(holder):
+            logger.info("Materializer run skipped: another run holds the lease")
+            return None
+        try:
+            return self._materialize(holder, incremental, workers)
+        finally:
+            self._release(holder)
+
+    def _materialize(self, holder: str, incremental: bool, workers: Optional[int]) -> Dict[str, Any]:
+        settings = self.settings
+        workers = workers or settings.rec_materialize_workers or os.cpu_count() or 1
+        start = time.perf_counter()
+        with self.session_factory() as db:
+            previous = db.execute(
+                select(RecommendationRun.id)
+                .join(RecommendationLease, RecommendationLease.run_id == RecommendationRun.id)
+                .where(RecommendationLease.name == LEASE, RecommendationRun.finished_at.is_(None))
+            ).scalar()
+            if previous is not None:
+                self._clean_up_after(db, previous)
+            since = db.scalar(
+                select(RecommendationRun.watermark)
+                .where(RecommendationRun.finished_at.is_not(None))
+                .order_by(RecommendationRun.id.desc())
+                .limit(1)
+            ) if incremental else None
+            # Taken before reading: whatever lands after it is seen again next run
+            watermark = compose_snowflake(time.time_ns() // 1_000_000 - WATERMARK_SLACK_MS, 0, 0)
+            run = RecommendationRun(mode="full" if since is None else "incremental", watermark=watermark)
+            db.add(run)
+            db.flush()
+            db.execute(update(RecommendationLease).where(RecommendationLease.name == LEASE).values(run_id=run.id))
+            db.commit()
+            generation, mode = run.id, run.mode
+            interactions = load_interactions(db, settings)
+            matrix = InteractionMatrix.from_interactions(interactions, settings.rec_max_items_per_user)
+            del interactions
+            users = np.arange(matrix.n_users) if since is None else self._changed_users(db, matrix, since)
+            uploader_index, channel_ids = self._video_owners(db, matrix)
+        neighbours, scores = item_neighbours(matrix, settings.rec_neighbours)
+        model_seconds = time.perf_counter() - start
+        self._renew(holder)
+        scorer = UserScorer(
+            matrix, neighbours, scores, uploader_index, settings.rec_seed_items, settings.rec_materialize_top_n
+        )
+
+        size = settings.rec_materialize_chunk_users
+        chunks = [users[i:i + size] for i in range(0, len(users), size)]
+        written = 0
+        with self._scoring(scorer, min(workers, max(len(chunks), 1))) as score_chunks:
+            for chunk, (user_index, item_index, score) in zip(chunks, score_chunks(chunks)):
+                self._write(holder, generation, matrix.user_ids[chunk], {
+                    "user_id": matrix.user_ids[user_index],
+                    "video_id": matrix.video_ids[item_index],
+                    "channel_id": channel_ids[item_index],
+                    "score": score,
+                })
+                written += len(score)
+
+        with self.session_factory() as db:
+            db.execute(
+                update(RecommendationRun).where(RecommendationRun.id == generation)
+                .values(users=len(users), rows=written, finished_at=func.now())  # pylint: disable=not-callable
+            )
+            db.commit()
+        seconds = time.perf_counter() - start
+        self.last_run = {
+            "generation": generation,
+            "mode": mode,
+            "users": len(users),
+            "rows": written,
+            "model_seconds": model_seconds,
+            "seconds": seconds,
+            "rows_per_second": written / seconds if seconds else 0.0,
+        }
+        logger.info(
+            "Materialized %d recommendations for %d users (%s) in %.1fs",
+            written, len(users), mode, seconds,
+        )
+        return self.last_run
+
+    def run_incremental(self) -> Optional[Dict[str, Any]]:
+        return self.run(incremental=True)
+
+
+recommendation_materializer = RecommendationMaterializer()
+
+
+def main() -> None:
+    # pylint: disable=import-outside-toplevel,unused-import
+    from src.models.user import User  # noqa: F401
+    from src.models.refresh_token import RefreshToken  # noqa: F401
+    from src.models.channel import Channel  # noqa: F401
+    from src.models.videos.video_comment import VideoComment  # noqa: F401
+
+    parser = argparse.ArgumentParser(description="Materialize per-user recommendations")
+    parser.add_argument("--incremental", action="store_true", help="only users with new views or likes")
+    parser.add_argument("--workers", type=int, default=None, help="scoring processes (default: REC_MATERIALIZE_WORKERS)")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    result = recommendation_materializer.run(incremental=args.incremental, workers=args.workers)
+    if result is None:
+        print("another run holds the lease; nothing done")
+        return
+    print(
+        f"generation {result['generation']} ({result['mode']}): {result['rows']} rows for "
+        f"{result['users']} users in {result['seconds']:.1f}s ({result['rows_per_second']:.0f} rows/s)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,29 +1,115 @@
-from typing import List
-from sqlalchemy.orm import Session
-from models.videos.video import Video
-from src.models.recommendation import Recommendation
+from typing import Optional
+from fastapi import HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.models.videos.video import Video
+from src.models.recommendation import Recommendation, RecommendationGeneration
+from src.schemas.video import VideoOut
+from src.services.recommendation_cache import RecommendationCache
+from src.services.recommendation_engine import RecommendationEngine, recommendation_engine
+from src.utils.ids import fits_uuid_column
+from src.utils.pagination import DEFAULT_PAGE_SIZE, Page, decode_offset_cursor, offset_page, paginate_async
+
+# Where a recommendation page comes from, named in offset cursors
+MATERIALIZED = "materialized"
+ITEM_ITEM = "item_item"
 
 class RecommendationService:
-    def __init__(self, db: Session):
+    def __init__(
+        self, db: AsyncSession, engine: Optional[RecommendationEngine] = None,
+        cache: Optional[RecommendationCache] = None,
+    ):
         self.db = db
+        self.engine = engine or recommendation_engine
+        self.cache = cache
+
+    async def get_recommendations(self, user_id: int, cursor: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE) -> Page:
+        if self.cache is None:
+            return await self.compute_recommendations(user_id, cursor, limit)
+
+        async def compute() -> Page:
+            # Cached pages outlive this session: keep plain VideoOut copies, not ORM rows
+            page = await self.compute_recommendations(user_id, cursor, limit)
+            return Page(items=[VideoOut.model_validate(video) for video in page.items], next_cursor=page.next_cursor)
+
+        return await self.cache.get(user_id, cursor, limit, compute)
+
+    async def compute_recommendations(self, user_id: int, cursor: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE) -> Page:
+        # Item-item recommendations: the batch-materialized ones, else computed
+        # from the user's history. Users the model can't place yet (no model,
+        # no history) get newest first. The ranked lists page by offset, and a
+        # cursor stays on the list its first page came from.
+        if cursor is None:
+            for first_page in (self.get_materialized, self.get_item_item):
+                page = await first_page(user_id, 0, limit)
+                if page.items:
+                    return page
+        elif (ranked := decode_offset_cursor(cursor)) is not None:
+            source, offset = ranked
+            if source == MATERIALIZED:
+                return await self.get_materialized(user_id, offset, limit)
+            if source == ITEM_ITEM:
+                return await self.get_item_item(user_id, offset, limit)
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid pagination cursor")
+        stmt = select(Video).where(Video.uploader_id != user_id)
+        return await paginate_async(self.db, stmt, Video.created_at, Video.id, cursor, limit)
+
+    async def get_materialized(self, user_id: int, offset: int = 0, limit: int = DEFAULT_PAGE_SIZE) -> Page:
+        # The user's live generation from the materializer, best first. At
+        # most rec_materialize_top_n rows per user, so OFFSET stays cheap.
+        live = (
+            select(RecommendationGeneration.generation)
+            .where(RecommendationGeneration.user_id == user_id)
+            .scalar_subquery()
+        )
+        stmt = (
+            select(Video)
+            .join(Recommendation, Recommendation.video_id == Video.id)
+            .where(Recommendation.user_id == user_id, Recommendation.generation == live)
+            .order_by(Recommendation.score.desc(), Recommendation.id.desc())
+            .offset(offset)
+            .limit(limit + 1)
+        )
+        return offset_page(list(await self.db.scalars(stmt)), MATERIALIZED, offset, limit)
 
-    async def get_recommendations(self, user_id: int) -> List[Video]:
-        # Placeholder for recommendation logic
-        # This should be replaced with actual recommendation algorithm
-        recommended_videos = self.db.query(Video).filter(Video.user_id != user_id).all()
-        return recommended_videos
+    async def get_item_item(self, user_id: int, offset: int = 0, limit: int = DEFAULT_PAGE_SIZE) -> Page:
+        # Ranked from the user's history on every call; a later page re-ranks
+        # and skips the entries earlier pages covered
+        ranked = (await self.engine.recommend_for_user(self.db, user_id, offset + limit + 1))[offset:]
+        if not ranked:
+            return Page(items=[])
+        video_ids = [video_id for video_id, _ in ranked[:limit]]
+        videos = await self.db.scalars(
+            select(Video).where(Video.id.in_(video_ids), Video.uploader_id != user_id)
+        )
+        by_id = {video.id: video for video in videos}
+        page = offset_page(ranked, ITEM_ITEM, offset, limit)
+        page.items = [by_id[video_id] for video_id in video_ids if video_id in by_id]
+        return page
 
-    def add_user_preference(self, user_id: int, video_id: int):
+    async def add_user_preference(self, user_id: int, video_id: str, score: float = 1.0) -> Recommendation:
         # Logic to add user preferences for recommendations
-        preference = Recommendation(user_id=user_id, video_id=video_id)
+        channel_id = None
+        if fits_uuid_column(self.db.get_bind().dialect, video_id):
+            channel_id = await self.db.scalar(select(Video.channel_id).where(Video.id == video_id))
+        if channel_id is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Video not found"
+            )
+        preference = Recommendation(user_id=user_id, video_id=video_id, channel_id=channel_id, score=score)
         self.db.add(preference)
-        self.db.commit()
-        self.db.refresh(preference)
+        await self.db.commit()
+        await self.db.refresh(preference)
+        if self.cache is not None:
+            self.cache.invalidate(user_id)
         return preference
 
-    async def get_user_preferences(self, user_id: int) -> List[Video]:
-        # Logic to fetch user preferences for recommendations
-        preferences = self.db.query(Recommendation).filter(Recommendation.user_id == user_id).all()
-        video_ids = [pref.video_id for pref in preferences]
-        recommended_videos = self.db.query(Video).filter(Video.id.in_(video_ids)).all()
-        return recommended_videos
\ No newline at end of file
+    async def get_user_preferences(self, user_id: int, cursor: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE) -> Page:
+        # Videos the user has preferences for, most recent preference first
+        stmt = (
+            select(Video)
+            .join(Recommendation, Recommendation.video_id == Video.id)
+            .where(Recommendation.user_id == user_id, Recommendation.generation == 0)
+        )
+        return await paginate_async(self.db, stmt, Recommendation.created_at, Recommendation.id, cursor, limit)
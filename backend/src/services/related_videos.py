@@ -0,0 +1,547 @@
+# src/services/related_videos.py
+"""
+"More like this": videos with similar titles and descriptions.
+
+Each video becomes a hashed TF-IDF vector. Its words are hashed into
+2**feature_bits features, so there is no vocabulary to keep. Each feature is
+weighted by 1 + log(count) times its inverse document frequency as of when
+the video was added, and the vector is L2 normalized. Vectors are stored
+sparse, as flat feature / weight arrays.
+
+Neighbours come from random-projection LSH. A vector's signature bit i is
+the sign of its dot product with random +/-1 vector i. Those vectors are
+derived by hashing feature ids, so they are never stored. Two vectors
+disagree on a bit with probability angle / pi, so Hamming distance between
+signatures ranks candidates by estimated cosine. A query scans the packed
+signatures (one contiguous uint64 row per 64 bits, XOR + popcount) and
+rescores the `max_candidates` closest exactly.
+
+Removed videos are masked out, and their storage is reclaimed once they
+make up half the arrays.
+
+`save` writes the arrays as .npy files and `load` maps them read-only, so
+startup doesn't read the index. The first add after a load copies the
+arrays into memory. Each save writes uniquely named files and then swaps in
+the meta.json naming them, so workers saving at once don't clobber each other.
+
+Every process keeps its own index and re-syncs it from the videos table:
+videos created since the index's watermark (saved with it) are added, and
+deleted ones dropped, on startup and then every `sync` interval. Uploads
+served by any worker thus reach all of them, and whichever worker saves
+writes the same index.
+"""
+import asyncio
+import contextlib
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+import zlib
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import sessionmaker
+from src.config.database import SessionLocal
+from src.config.videos import video_settings
+from src.models.videos.video import Video
+
+logger = logging.getLogger(__name__)
+
+TOKEN = re.compile(r"[a-z0-9]{2,}")
+STOPWORDS = frozenset(
+    "an and are as at be by for from has have in is it its of on or that the this to was were will with you your".split()
+)
+TITLE_WEIGHT = 2  # a title word counts as this many description words
+SIGNATURE_CHUNK = 2048  # documents per signature batch
+# Re-sync overlap: uploads commit after their created_at, and hosts' clocks differ
+SYNC_SLACK_SECONDS = 300
+ARRAYS = ("ids", "lengths", "features", "weights", "signatures", "df")
+LOAD_ATTEMPTS = 3
+# Files no save references after this long belong to a save that died
+STALE_SAVE_SECONDS = 3600
+LOOKUP_BATCH = 1000  # ids per IN (...) when checking which indexed videos still exist
+
+
+def _mix(x: np.ndarray) -> np.ndarray:
+    """splitmix64 finalizer: well-spread uint64 hashes of uint64 keys."""
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+
+def tokenize(title: str, description: Optional[str]) -> Counter:
+    words = Counter()
+    for text, weight in ((title, TITLE_WEIGHT), (description, 1)):
+        for token in TOKEN.findall((text or "").lower()):
+            if token not in STOPWORDS:
+                words[token] += weight
+    return words
+
+
+def _grow(array: np.ndarray, capacity: int, axis: int = 0) -> np.ndarray:
+    """A zero-padded in-memory copy of `array` with `capacity` entries along `axis`."""
+    shape = list(array.shape)
+    shape[axis] = capacity
+    grown = np.zeros(shape, array.dtype)
+    grown[(slice(None),) * axis + (slice(0, array.shape[axis]),)] = array
+    return grown
+
+
+def _saved_files(path: str) -> set:
+    """Array files the current meta.json in `path` refers to."""
+    try:
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            return set((json.load(f).get("files") or {name: f"{name}.npy" for name in ARRAYS}).values())
+    except (OSError, ValueError):
+        return set()
+
+
+def _remove_unused(path: str, previous: set, current: set) -> None:
+    """Delete the save `current` replaced, and leftovers of saves that never finished."""
+    stale = time.time() - STALE_SAVE_SECONDS
+    for name in os.listdir(path):
+        if name == "meta.json" or name in current:
+            continue
+        full = os.path.join(path, name)
+        with contextlib.suppress(OSError):  # another save may be removing it too
+            if name in previous or os.path.getmtime(full) < stale:
+                os.remove(full)
+
+
+def _offsets(lengths: np.ndarray) -> np.ndarray:
+    return np.concatenate(([0], np.cumsum(lengths)[:-1])).astype(np.int64)
+
+
+class RelatedVideoIndex:
+    """Hashed TF-IDF vectors of video texts with LSH signatures; thread-safe."""
+
+    def __init__(self, feature_bits: int = 20, signature_bits: int = 256, max_candidates: int = 2000, seed: int = 0):
+        if signature_bits % 64:
+            raise ValueError("signature_bits must be a multiple of 64")
+        self.dims = 1 << feature_bits
+        self.words = signature_bits // 64
+        self.max_candidates = max_candidates
+        self.seed = seed
+        self._lock = threading.RLock()
+        self._save_lock = threading.Lock()
+        self._clear()
+
+    def _clear(self) -> None:
+        self.n = 0  # slots used; removed videos keep theirs until compaction
+        self.nnz = 0
+        self.docs = 0  # live videos
+        self.ids = np.zeros(0, object)
+        self.alive = np.zeros(0, bool)
+        self.starts = np.zeros(0, np.int64)
+        self.lengths = np.zeros(0, np.int32)
+        self.features = np.zeros(0, np.int32)
+        self.weights = np.zeros(0, np.float32)
+        self.signatures = np.zeros((self.words, 0), np.uint64)  # word-major: each scan reads one row
+        self.df = np.zeros(self.dims, np.int32)
+        self.slot: Dict[str, int] = {}
+        self.version = 0  # bumped by every add / remove
+        self.saved_version = 0
+        self.watermark = 0.0  # unix time: videos created before it are indexed (kept by the caller)
+
+    @property
+    def dirty(self) -> bool:
+        """Changed since the last completed save (or load)."""
+        return self.version != self.saved_version
+
+    # Vectors and signatures
+
+    def _feature_counts(self, words: Counter) -> Tuple[np.ndarray, np.ndarray]:
+        counts: Dict[int, int] = {}
+        for word, count in words.items():
+            feature = zlib.crc32(word.encode()) & (self.dims - 1)
+            counts[feature] = counts.get(feature, 0) + count
+        features = np.fromiter(counts.keys(), np.int32, len(counts))
+        order = np.argsort(features)
+        return features[order], np.fromiter(counts.values(), np.float32, len(counts))[order]
+
+    def _vectorize(self, features: np.ndarray, counts: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+        """TF-IDF weights of the flattened (features, counts) of documents with `lengths`, unit norm each."""
+        owner = np.repeat(np.arange(len(lengths)), lengths)
+        idf = np.log((1.0 + self.docs) / (1.0 + self.df[features])) + 1.0
+        weights = (1.0 + np.log(counts)) * idf
+        norms = np.sqrt(np.bincount(owner, weights=weights ** 2, minlength=len(lengths)))
+        return (weights / np.maximum(norms[owner], 1e-12)).astype(np.float32)
+
+    def _signatures(self, features: np.ndarray, weights: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+        """(words, docs) packed signs of the projections onto the hashed +/-1 vectors."""
+        packed = np.zeros((self.words, len(lengths)), np.uint64)
+        nonempty = np.flatnonzero(lengths)  # empty texts keep an all-zero signature
+        if not len(nonempty):
+            return packed
+        offsets = _offsets(lengths)[nonempty]
+        shifts = np.arange(64, dtype=np.uint64)
+        salt = np.uint64(self.seed) * np.uint64(0x9E3779B97F4A7C15)
+        for word in range(self.words):
+            hashed = _mix(features.astype(np.uint64) * np.uint64(self.words) + np.uint64(word) + salt)
+            signs = ((hashed[:, None] >> shifts) & np.uint64(1)).astype(np.float32) * 2 - 1
+            bits = np.add.reduceat(signs * weights[:, None], offsets, axis=0) > 0
+            packed[word, nonempty] = np.packbits(bits, axis=1, bitorder="little").view(np.uint64)[:, 0]
+        return packed
+
+    # Writes
+
+    def _reserve(self, slots: int, nnz: int) -> None:
+        if self.n + slots > len(self.alive):
+            capacity = max(self.n + slots, 2 * len(self.alive), 1024)
+            for name in ("ids", "alive", "starts", "lengths"):
+                setattr(self, name, _grow(getattr(self, name)[:self.n], capacity))
+            self.signatures = _grow(self.signatures[:, :self.n], capacity, axis=1)
+        if self.nnz + nnz > len(self.features):
+            capacity = max(self.nnz + nnz, 2 * len(self.features), 16384)
+            self.features = _grow(self.features[:self.nnz], capacity)
+            self.weights = _grow(self.weights[:self.nnz], capacity)
+        if not self.df.flags.writeable:
+            self.df = np.array(self.df)
+
+    def add_many(self, videos: Iterable[Tuple[str, str, Optional[str]]]) -> int:
+        """Index (video_id, title, description) rows; re-adding a video replaces it."""
+        rows = list({row[0]: row for row in videos}.values())
+        if not rows:
+            return 0
+        parsed = [self._feature_counts(tokenize(title, description)) for _, title, description in rows]
+        lengths = np.array([len(features) for features, _ in parsed], np.int64)
+        ends = np.cumsum(lengths)
+        features = np.concatenate([features for features, _ in parsed])
+        counts = np.concatenate([counts for _, counts in parsed])
+        with self._lock:
+            self.remove_many([video_id for video_id, _, _ in rows if video_id in self.slot])
+            self._reserve(len(rows), len(features))
+            # Document frequencies first, so a batch is weighted against itself too
+            np.add.at(self.df, features, 1)
+            self.docs += len(rows)
+            for start in range(0, len(rows), SIGNATURE_CHUNK):
+                stop = min(start + SIGNATURE_CHUNK, len(rows))
+                lo, hi = int(ends[start] - lengths[start]), int(ends[stop - 1])
+                chunk = lengths[start:stop]
+                weights = self._vectorize(features[lo:hi], counts[lo:hi], chunk)
+                slots = slice(self.n, self.n + stop - start)
+                self.ids[slots] = [video_id for video_id, _, _ in rows[start:stop]]
+                self.alive[slots] = True
+                self.starts[slots] = self.nnz + _offsets(chunk)
+                self.lengths[slots] = chunk
+                self.signatures[:, slots] = self._signatures(features[lo:hi], weights, chunk)
+                self.features[self.nnz:self.nnz + hi - lo] = features[lo:hi]
+                self.weights[self.nnz:self.nnz + hi - lo] = weights
+                for offset, (video_id, _, _) in enumerate(rows[start:stop]):
+                    self.slot[video_id] = self.n + offset
+                self.n += stop - start
+                self.nnz += hi - lo
+            self.version += 1
+        return len(rows)
+
+    def add(self, video_id: str, title: str, description: Optional[str] = None) -> None:
+        self.add_many([(video_id, title, description)])
+
+    def remove_many(self, video_ids: Iterable[str]) -> int:
+        removed = 0
+        with self._lock:
+            for video_id in video_ids:
+                slot = self.slot.pop(video_id, None)
+                if slot is None:
+                    continue
+                if not self.df.flags.writeable:
+                    self.df = np.array(self.df)
+                self.alive[slot] = False
+                start = self.starts[slot]
+                self.df[self.features[start:start + self.lengths[slot]]] -= 1
+                self.docs -= 1
+                removed += 1
+            if removed:
+                self.version += 1
+                if self.n >= 1024 and self.docs < self.n // 2:
+                    self._compact()
+        return removed
+
+    def remove(self, video_id: str) -> bool:
+        return self.remove_many([video_id]) == 1
+
+    def video_ids(self) -> List[str]:
+        with self._lock:
+            return list(self.slot)
+
+    def _positions(self, slots: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Flat feature positions of `slots`, and the index into `slots` each belongs to."""
+        lengths = self.lengths[slots].astype(np.int64)
+        positions = np.repeat(self.starts[slots] - _offsets(lengths), lengths) + np.arange(lengths.sum())
+        return positions, np.repeat(np.arange(len(slots)), lengths)
+
+    def _compact(self) -> None:
+        """Drop removed videos' slots and features."""
+        live = np.flatnonzero(self.alive[:self.n])
+        positions, _ = self._positions(live)
+        self.features, self.weights = self.features[positions], self.weights[positions]
+        self.starts = _offsets(self.lengths[live])
+        for name in ("ids", "alive", "lengths"):
+            setattr(self, name, getattr(self, name)[live])
+        self.signatures = self.signatures[:, live]
+        self.n, self.nnz = len(live), len(positions)
+        self.slot = {video_id: i for i, video_id in enumerate(self.ids.tolist())}
+
+    # Reads
+
+    def _closest(self, slot: int) -> np.ndarray:
+        """Live slots with the `max_candidates` smallest signature Hamming distances to `slot`."""
+        distance = np.bitwise_count(self.signatures[0, :self.n] ^ self.signatures[0, slot]).astype(np.uint16)
+        for word in range(1, self.words):
+            distance += np.bitwise_count(self.signatures[word, :self.n] ^ self.signatures[word, slot])
+        distance[~self.alive[:self.n]] = np.iinfo(np.uint16).max
+        distance[slot] = np.iinfo(np.uint16).max
+        if self.docs - 1 <= self.max_candidates:
+            return np.flatnonzero(distance < np.iinfo(np.uint16).max)
+        return np.argpartition(distance, self.max_candidates)[:self.max_candidates]
+
+    def _cosines(self, features: np.ndarray, weights: np.ndarray, candidates: np.ndarray) -> np.ndarray:
+        """Exact cosine of the (sorted) query vector with each candidate."""
+        positions, owner = self._positions(candidates)
+        candidate_features = self.features[positions]
+        found = np.minimum(np.searchsorted(features, candidate_features), len(features) - 1)
+        products = np.where(features[found] == candidate_features, weights[found] * self.weights[positions], 0)
+        return np.bincount(owner, weights=products, minlength=len(candidates))
+
+    def similar(self, video_id: str, limit: int = 10) -> Optional[List[Tuple[str, float]]]:
+        """Up to `limit` (video_id, cosine) most like `video_id`, best first; None if it isn't indexed."""
+        with self._lock:
+            slot = self.slot.get(video_id)
+            if slot is None:
+                return None
+            start, length = self.starts[slot], self.lengths[slot]
+            if not length:
+                return []
+            features = np.asarray(self.features[start:start + length])
+            weights = np.asarray(self.weights[start:start + length])
+            candidates = self._closest(slot)
+            if not len(candidates):
+                return []
+            scores = self._cosines(features, weights, candidates)
+            best = np.argsort(-scores, kind="stable")[:limit]
+            best = best[scores[best] > 0]
+            return list(zip(self.ids[candidates[best]].tolist(), scores[best].tolist()))
+
+    # Persistence
+
+    def _meta(self) -> Dict[str, int]:
+        return {"dims": self.dims, "words": self.words, "seed": self.seed}
+
+    def save(self, path: str) -> None:
+        """Write the index to directory `path`, replacing what was there."""
+        with self._lock:
+            live = np.flatnonzero(self.alive[:self.n])
+            positions, _ = self._positions(live)
+            arrays = {  # compacted copies, so adds during the write can't tear them
+                "ids": np.array(self.ids[live].tolist(), dtype=np.str_) if len(live) else np.zeros(0, "U1"),
+                "lengths": self.lengths[live],
+                "features": self.features[positions],
+                "weights": self.weights[positions],
+                "signatures": self.signatures[:, live],
+                "df": self.df.copy(),
+            }
+            meta = dict(self._meta(), docs=self.docs, watermark=self.watermark)
+            version = self.version
+        os.makedirs(path, exist_ok=True)
+        with self._save_lock:
+            # Every file gets a name unique to this save, and meta.json (which names the
+            # arrays) is swapped in last with one atomic replace: concurrent saves from
+            # other threads or processes never write the same file, and a reader sees
+            # one complete save or another
+            written = []
+            try:
+                files = {}
+                for name, array in arrays.items():
+                    with tempfile.NamedTemporaryFile(dir=path, prefix=f"{name}.", suffix=".npy", delete=False) as f:
+                        written.append(f.name)
+                        np.save(f, array)
+                    files[name] = os.path.basename(f.name)
+                with tempfile.NamedTemporaryFile(
+                    "w", dir=path, prefix="meta.", suffix=".tmp", delete=False, encoding="utf-8"
+                ) as f:
+                    written.append(f.name)
+                    json.dump(dict(meta, files=files), f)
+                previous = _saved_files(path)
+                os.replace(f.name, os.path.join(path, "meta.json"))
+            except BaseException:
+                for name in written:
+                    with contextlib.suppress(OSError):
+                        os.remove(name)
+                raise
+            _remove_unused(path, previous, set(files.values()))
+        with self._lock:
+            # Changes made while writing stay dirty
+            self.saved_version = max(self.saved_version, version)
+
+    def load(self, path: str) -> int:
+        """Map the index saved at `path`, replacing this one; returns the videos in it."""
+        for attempt in range(LOAD_ATTEMPTS):
+            with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+                meta = json.load(f)
+            if {key: meta[key] for key in self._meta()} != self._meta():
+                raise ValueError(f"{path} was built with different settings: {meta}")
+            files = meta.get("files") or {name: f"{name}.npy" for name in ARRAYS}  # saved before files were named
+
+            def array(name: str) -> np.ndarray:
+                return np.load(os.path.join(path, files[name]), mmap_mode="r")
+
+            try:
+                ids = np.load(os.path.join(path, files["ids"]))
+                mapped = {name: array(name) for name in ARRAYS if name != "ids"}
+            except FileNotFoundError:
+                if attempt == LOAD_ATTEMPTS - 1:
+                    raise
+                continue  # another process saved in between and removed these: read its meta.json
+            break
+        with self._lock:
+            self._clear()
+            self.ids = ids.astype(object)
+            self.n = self.docs = len(ids)
+            self.alive = np.ones(self.n, bool)
+            self.lengths = mapped["lengths"]
+            self.starts = _offsets(self.lengths)
+            self.features, self.weights = mapped["features"], mapped["weights"]
+            self.nnz = len(self.features)
+            self.signatures, self.df = mapped["signatures"], mapped["df"]
+            self.slot = {video_id: i for i, video_id in enumerate(self.ids.tolist())}
+            self.watermark = meta.get("watermark", 0.0)
+        return self.docs
+
+    def stats(self) -> Dict[str, int]:
+        return {"videos": self.docs, "slots": self.n, "features": self.nnz}
+
+
+class RelatedVideos:
+    """The process-wide index: loaded from disk or built from the videos table, saved when changed."""
+
+    def __init__(self, session_factory: sessionmaker, index: RelatedVideoIndex, path: str):
+        self.session_factory = session_factory
+        self.index = index
+        self.path = path
+        self._started = False
+        self._early: List[Tuple[str, Optional[Tuple[str, Optional[str]]]]] = []  # changes before start()
+        self._lock = threading.Lock()
+
+    def add(self, video_id: str, title: str, description: Optional[str] = None) -> None:
+        with self._lock:
+            if not self._started:
+                self._early.append((video_id, (title, description)))
+                return
+        self.index.add(video_id, title, description)
+
+    def remove(self, video_id: str) -> None:
+        with self._lock:
+            if not self._started:
+                self._early.append((video_id, None))
+                return
+        self.index.remove(video_id)
+
+    def similar(self, video_id: str, limit: int = 10) -> Optional[List[Tuple[str, float]]]:
+        return self.index.similar(video_id, limit)
+
+    def build(self) -> int:
+        """Index every video in one batch, so all are weighted with the same document frequencies."""
+        watermark = time.time() - SYNC_SLACK_SECONDS
+        with self.session_factory() as db:
+            rows = db.execute(
+                select(Video.id, Video.title, Video.description).execution_options(yield_per=50_000)
+            )
+            self.index.add_many(tuple(row) for row in rows)
+        self.index.watermark = watermark
+        return self.index.docs
+
+    def sync(self) -> int:
+        """
+        Index videos created since the watermark that aren't indexed yet, and drop
+        indexed videos that were deleted from the table; returns how many were added.
+        """
+        watermark = time.time() - SYNC_SLACK_SECONDS
+        since = datetime.fromtimestamp(self.index.watermark, timezone.utc)
+        indexed = self.index.video_ids()
+        deleted = []
+        with self.session_factory() as db:
+            rows = db.execute(
+                select(Video.id, Video.title, Video.description).where(Video.created_at >= since)
+            ).all()
+            for start in range(0, len(indexed), LOOKUP_BATCH):
+                batch = indexed[start:start + LOOKUP_BATCH]
+                present = set(db.scalars(select(Video.id).where(Video.id.in_(batch))))
+                deleted.extend(video_id for video_id in batch if video_id not in present)
+        added = self.index.add_many(tuple(row) for row in rows if row[0] not in self.index.slot)
+        if deleted and self.index.remove_many(deleted):
+            logger.info("Related videos index: dropped %d deleted videos", len(deleted))
+        self.index.watermark = max(self.index.watermark, watermark)
+        return added
+
+    def start(self) -> int:
+        """Load the saved index and catch up with the database, else build (and save) it."""
+        try:
+            loaded = False
+            if os.path.exists(os.path.join(self.path, "meta.json")):
+                try:
+                    self.index.load(self.path)
+                    loaded = True
+                except Exception:  # rebuilt below
+                    logger.exception("Loading the related videos index from %s failed", self.path)
+            if loaded:
+                added = self.sync()
+                if added:
+                    logger.info("Related videos index: %d videos created since the last save", added)
+            else:
+                self.build()
+                self.index.save(self.path)
+        finally:
+            with self._lock:
+                early, self._early, self._started = self._early, [], True
+        for video_id, text in early:
+            if text is None:
+                self.index.remove(video_id)
+            else:
+                self.index.add(video_id, *text)
+        return self.index.docs
+
+    def save_if_changed(self) -> None:
+        if self.index.dirty:
+            self.index.save(self.path)
+
+    async def run(self, save_interval: float, sync_interval: Optional[float] = None) -> None:
+        """
+        Start, then re-sync from the database every `sync_interval` seconds and
+        save every `save_interval` seconds if videos were added or removed.
+        """
+        sync_interval = sync_interval or save_interval
+        try:
+            docs = await asyncio.to_thread(self.start)
+            logger.info("Related videos index: %d videos", docs)
+        except Exception:  # the syncs below fill the index in from the database
+            logger.exception("Starting the related videos index failed")
+        next_save = time.monotonic() + save_interval
+        while True:
+            await asyncio.sleep(min(sync_interval, save_interval))
+            try:
+                await asyncio.to_thread(self.sync)
+            except Exception:  # retried on the next tick
+                logger.exception("Syncing the related videos index failed")
+            if time.monotonic() < next_save:
+                continue
+            next_save = time.monotonic() + save_interval
+            try:
+                await asyncio.to_thread(self.save_if_changed)
+            except Exception:  # retried on the next tick
+                logger.exception("Saving the related videos index failed")
+
+
+related_videos = RelatedVideos(
+    SessionLocal,
+    RelatedVideoIndex(
+        feature_bits=video_settings.related_feature_bits,
+        signature_bits=video_settings.related_signature_bits,
+        max_candidates=video_settings.related_max_candidates,
+    ),
+    video_settings.related_index_path,
+)
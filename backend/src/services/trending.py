@@ -0,0 +1,349 @@
+# src/services/trending.py
+"""
+Trending videos: exponentially time-decayed views and likes, kept in memory.
+
+A video's score is sum(weight * 2 ** (-(now - t) / half_life)) over its
+events. Decaying every stored score as time passes would mean rescanning all
+of them; instead each event is scaled *up* to a fixed reference time,
+weight * 2 ** ((t - REFERENCE) / half_life), and the sum is kept as its log
+(logaddexp, so it never overflows). All scores share the same decay factor,
+so ordering by the stored log score is ordering by the decayed score, and a
+stored score only ever grows.
+
+Because scores only grow, top-K per scope (global, and per channel) is a
+min-heap with lazy deletion: a bumped member is pushed again and its stale
+entries are skipped when they surface. Reads take a sorted copy of the K
+members that is rebuilt only after the heap changes.
+
+Every snapshot adds what this process recorded since its last one to
+trending_scores, merged in log space (logaddexp in SQL), so several workers
+add up instead of overwriting each other. A restart warm-starts from the
+table. The log scores share the fixed reference, so they merge and load as
+they are. The merged scores come back with RETURNING, so a worker also picks
+up, for its active videos, what the other workers recorded.
+"""
+import asyncio
+import heapq
+import logging
+import math
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import sessionmaker
+from src.config.database import SessionLocal
+from src.config.videos import video_settings
+from src.models.videos.trending_score import TrendingScore
+from src.models.videos.video import Video
+from src.utils.ids import EPOCH_MS
+
+logger = logging.getLogger(__name__)
+
+REFERENCE = EPOCH_MS / 1000  # scores are scaled to this instant
+LOOKUP_BATCH = 500
+
+
+def _logaddexp(a: float, b: float) -> float:
+    high, low = (a, b) if a >= b else (b, a)
+    return high + math.log1p(math.exp(low - high))
+
+
+def _upsert(insert, greatest, least):
+    scores = TrendingScore.__table__
+    stmt = insert(scores)
+    high = greatest(scores.c.log_score, stmt.excluded.log_score)
+    low = least(scores.c.log_score, stmt.excluded.log_score)
+    return stmt.on_conflict_do_update(
+        index_elements=[scores.c.video_id],
+        set_={
+            "log_score": high + func.ln(1 + func.exp(low - high)),  # logaddexp
+            "channel_id": func.coalesce(stmt.excluded.channel_id, scores.c.channel_id),
+            "updated_at": func.now(),  # pylint: disable=not-callable
+        },
+    ).returning(scores.c.video_id, scores.c.log_score)
+
+
+# SQLite's two-argument max() / min() are PostgreSQL's greatest() / least()
+_UPSERTS = {
+    "postgresql": _upsert(postgresql.insert, func.greatest, func.least),
+    "sqlite": _upsert(sqlite.insert, func.max, func.min),
+}
+
+
+class TopK:
+    """The `k` highest-scoring keys, for scores that only increase."""
+
+    def __init__(self, k: int):
+        self.k = k
+        self._heap: List[Tuple[float, str]] = []
+        self._members: Dict[str, float] = {}
+        self._sorted: Optional[List[Tuple[str, float]]] = None
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._members
+
+    def __len__(self) -> int:
+        return len(self._members)
+
+    def _min(self) -> float:
+        heap, members = self._heap, self._members
+        while members.get(heap[0][1]) != heap[0][0]:
+            heapq.heappop(heap)  # stale: the key was bumped or evicted since
+        return heap[0][0]
+
+    def offer(self, key: str, score: float) -> None:
+        """Record `key`'s new score; it joins if it beats the current minimum."""
+        if key not in self._members:
+            if len(self._members) >= self.k:
+                if self.k <= 0 or score <= self._min():
+                    return
+                _, evicted = heapq.heappop(self._heap)
+                del self._members[evicted]
+        self._members[key] = score
+        heapq.heappush(self._heap, (score, key))
+        self._sorted = None
+        if len(self._heap) > 2 * self.k + 64:
+            self._heap = [(value, member) for member, value in self._members.items()]
+            heapq.heapify(self._heap)
+
+    def discard(self, key: str) -> None:
+        if self._members.pop(key, None) is not None:
+            self._sorted = None
+
+    def items(self) -> List[Tuple[str, float]]:
+        """(key, score), best first."""
+        if self._sorted is None:
+            self._sorted = sorted(self._members.items(), key=lambda item: item[1], reverse=True)
+        return self._sorted
+
+
+class TrendingFeed:
+    """Decayed scores of every recently active video, and their global and per-channel top-K."""
+
+    def __init__(
+        self,
+        session_factory: sessionmaker,
+        k: int = 100,
+        half_life_hours: float = 6.0,
+        view_weight: float = 1.0,
+        like_weight: float = 3.0,
+        min_score: float = 0.01,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.session_factory = session_factory
+        self.k = k
+        self.rate = math.log(2) / (half_life_hours * 3600)
+        self.view_weight = view_weight
+        self.like_weight = like_weight
+        self.min_score = min_score
+        self.clock = clock
+        self._lock = threading.Lock()
+        self.scores: Dict[str, float] = {}  # video_id -> log score at REFERENCE
+        self.channels: Dict[str, int] = {}
+        self.global_top = TopK(k)
+        self.channel_top: Dict[int, TopK] = {}
+        self._unsaved: Dict[str, float] = {}  # video_id -> log of increments since the last snapshot
+        self._unresolved: Set[str] = set()
+        self._forgotten: Set[str] = set()
+
+        # Metrics
+        self.events = 0
+        self.snapshots = 0
+        self.rows_written = 0
+
+    def _offer(self, video_id: str, score: float) -> None:
+        self.global_top.offer(video_id, score)
+        channel_id = self.channels.get(video_id)
+        if channel_id is None:
+            self._unresolved.add(video_id)
+            return
+        top = self.channel_top.get(channel_id)
+        if top is None:
+            top = self.channel_top[channel_id] = TopK(self.k)
+        top.offer(video_id, score)
+
+    def record(self, video_id: str, weight: float, at: Optional[float] = None, channel_id: Optional[int] = None) -> None:
+        """Add an event of `weight` at unix time `at` (default: now)."""
+        if weight <= 0:
+            return
+        at = self.clock() if at is None else at
+        increment = math.log(weight) + self.rate * (at - REFERENCE)
+        with self._lock:
+            current = self.scores.get(video_id)
+            score = increment if current is None else _logaddexp(current, increment)
+            self.scores[video_id] = score
+            if channel_id is not None:
+                self.channels[video_id] = channel_id
+            unsaved = self._unsaved.get(video_id)
+            self._unsaved[video_id] = increment if unsaved is None else _logaddexp(unsaved, increment)
+            self._offer(video_id, score)
+            self.events += 1
+
+    def observe(self, video_id: str, views: int, likes: int, dislikes: int) -> None:
+        """VideoCounterBuffer listener: views and new likes count, dislikes and undone likes don't."""
+        weight = views * self.view_weight + max(likes, 0) * self.like_weight
+        if weight > 0:
+            self.record(video_id, weight)
+
+    def top(self, limit: int, channel_id: Optional[int] = None, now: Optional[float] = None) -> List[Tuple[str, float]]:
+        """Up to `limit` (video_id, decayed score), best first, from global or one channel's top-K."""
+        offset = self.rate * ((self.clock() if now is None else now) - REFERENCE)
+        with self._lock:
+            top = self.global_top if channel_id is None else self.channel_top.get(channel_id)
+            items = top.items()[:limit] if top is not None else []
+        return [(video_id, math.exp(score - offset)) for video_id, score in items]
+
+    def _forget(self, video_ids: Iterable[str]) -> None:
+        refill = False
+        for video_id in video_ids:
+            self.scores.pop(video_id, None)
+            refill |= video_id in self.global_top
+            self.global_top.discard(video_id)
+            channel_id = self.channels.pop(video_id, None)
+            if channel_id is not None and channel_id in self.channel_top:
+                self.channel_top[channel_id].discard(video_id)
+            self._unsaved.pop(video_id, None)
+            self._unresolved.discard(video_id)
+            self._forgotten.add(video_id)
+        if refill:
+            # Videos evicted earlier by the ones just dropped move back up; rare, so a full pass is fine
+            for video_id, score in heapq.nlargest(self.k, self.scores.items(), key=lambda item: item[1]):
+                self.global_top.offer(video_id, score)
+
+    def resolve_channels(self) -> int:
+        """Look up the channel of videos recorded without one; unknown videos are dropped."""
+        with self._lock:
+            pending = list(self._unresolved)
+        if not pending:
+            return 0
+        found: Dict[str, int] = {}
+        with self.session_factory() as db:
+            for start in range(0, len(pending), LOOKUP_BATCH):
+                batch = pending[start:start + LOOKUP_BATCH]
+                found.update(db.execute(select(Video.id, Video.channel_id).where(Video.id.in_(batch))).all())
+        with self._lock:
+            for video_id in pending:
+                if video_id not in self.scores:
+                    continue
+                if video_id not in found:
+                    self._forget([video_id])
+                    self._forgotten.discard(video_id)  # never stored
+                    continue
+                self.channels[video_id] = found[video_id]
+                self._unresolved.discard(video_id)
+                self._offer(video_id, self.scores[video_id])
+        return len(found)
+
+    def _floor(self, now: Optional[float] = None) -> float:
+        """Log score at REFERENCE that decays to `min_score` at `now`."""
+        return math.log(self.min_score) + self.rate * ((self.clock() if now is None else now) - REFERENCE)
+
+    def prune(self, now: Optional[float] = None) -> int:
+        """Forget videos whose decayed score fell below `min_score` (memory housekeeping only)."""
+        floor = self._floor(now)
+        with self._lock:
+            stale = [
+                video_id for video_id, score in self.scores.items()
+                if score < floor and video_id not in self.global_top
+                and video_id not in self.channel_top.get(self.channels.get(video_id), ())
+            ]
+            self._forget(stale)
+        return len(stale)
+
+    def snapshot(self) -> int:
+        """Resolve channels, prune, and add the unsaved increments to the table; returns rows written."""
+        self.resolve_channels()
+        self.prune()
+        floor = self._floor()
+        with self._lock:
+            rows = [
+                {"video_id": video_id, "channel_id": self.channels.get(video_id), "log_score": increment}
+                for video_id, increment in self._unsaved.items()
+            ]
+            forgotten = list(self._forgotten)
+            self._unsaved, self._forgotten = {}, set()
+        try:
+            with self.session_factory() as db:
+                merged = db.execute(_UPSERTS[db.get_bind().dialect.name], rows).all() if rows else []
+                for start in range(0, len(forgotten), LOOKUP_BATCH):
+                    # Rows other workers kept above the floor stay
+                    db.execute(delete(TrendingScore).where(
+                        TrendingScore.video_id.in_(forgotten[start:start + LOOKUP_BATCH]),
+                        TrendingScore.log_score < floor,
+                    ))
+                db.commit()
+        except Exception:
+            with self._lock:  # retried next snapshot
+                for row in rows:
+                    video_id = row["video_id"]
+                    if video_id in self.scores:
+                        unsaved = self._unsaved.get(video_id)
+                        self._unsaved[video_id] = (
+                            row["log_score"] if unsaved is None else _logaddexp(unsaved, row["log_score"])
+                        )
+                self._forgotten.update(forgotten)
+            raise
+        with self._lock:
+            for video_id, stored in merged:
+                if video_id not in self.scores:
+                    continue  # forgotten meanwhile
+                unsaved = self._unsaved.get(video_id)
+                score = stored if unsaved is None else _logaddexp(stored, unsaved)
+                if score > self.scores[video_id]:
+                    self.scores[video_id] = score
+                    self._offer(video_id, score)
+        self.snapshots += 1
+        self.rows_written += len(rows)
+        return len(rows)
+
+    def load(self) -> int:
+        """Warm-start from the last snapshot, merged with anything recorded since startup."""
+        floor = self._floor()
+        with self.session_factory() as db:
+            rows = db.execute(
+                select(TrendingScore.video_id, TrendingScore.channel_id, TrendingScore.log_score)
+                .where(TrendingScore.log_score >= floor)
+            ).all()
+        with self._lock:
+            for video_id, channel_id, stored in rows:
+                current = self.scores.get(video_id)
+                score = stored if current is None else _logaddexp(current, stored)
+                self.scores[video_id] = score
+                if channel_id is not None:
+                    self.channels[video_id] = channel_id
+                self._offer(video_id, score)
+        return len(rows)
+
+    async def run(self, interval: float) -> None:
+        """Warm-start, then snapshot every `interval` seconds."""
+        try:
+            loaded = await asyncio.to_thread(self.load)
+            logger.info("Trending warm start: %d videos", loaded)
+        except Exception:  # start cold
+            logger.exception("Loading trending scores failed")
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await asyncio.to_thread(self.snapshot)
+            except Exception:  # retried on the next tick
+                logger.exception("Trending snapshot failed")
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "videos": len(self.scores),
+            "channels": len(self.channel_top),
+            "events": self.events,
+            "snapshots": self.snapshots,
+            "rows_written": self.rows_written,
+        }
+
+
+trending_feed = TrendingFeed(
+    SessionLocal,
+    k=video_settings.trending_top_k,
+    half_life_hours=video_settings.trending_half_life_hours,
+    view_weight=video_settings.trending_view_weight,
+    like_weight=video_settings.trending_like_weight,
+    min_score=video_settings.trending_min_score,
+)
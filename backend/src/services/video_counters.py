@@ -0,0 +1,233 @@
+# src/services/video_counters.py
+import asyncio
+import logging
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional
+from sqlalchemy import bindparam, false, func, or_, select, true, update
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.orm.attributes import set_committed_value
+from src.config.database import SessionLocal
+from src.config.videos import video_settings
+from src.models.videos.video import Video
+from src.models.videos.video_like import VideoLike
+from src.models.videos.video_view import VideoView
+
+logger = logging.getLogger(__name__)
+
+COUNTERS = ("view_count", "like_count", "dislike_count")
+
+_videos = Video.__table__
+# One additive UPDATE per video, executed as a single executemany
+_apply_deltas = (
+    update(_videos)
+    .where(_videos.c.id == bindparam("video_id"))
+    .values(
+        view_count=_videos.c.view_count + bindparam("views"),
+        like_count=_videos.c.like_count + bindparam("likes"),
+        dislike_count=_videos.c.dislike_count + bindparam("dislikes"),
+    )
+)
+
+
+class _Shard:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.deltas: Dict[str, List[int]] = {}
+
+
+class VideoCounterBuffer:
+    """
+    In-memory view / like / dislike increments, flushed as deltas.
+
+    Increments land in one of `shards` lock-striped dicts, picked by video id,
+    so a viral video costs a dict update per event instead of a row lock per
+    event, and requests for different videos rarely share a lock.
+    flush() writes `x = x + delta` once per video; deltas add up, so several
+    workers can flush into the same rows. Reads add this worker's unflushed
+    deltas to the stored counts. Anything buffered when the process dies is
+    lost; reconcile() recounts from video_views / video_likes.
+    """
+
+    def __init__(self, session_factory: sessionmaker, shards: int = 16, max_pending: int = 10_000):
+        self.session_factory = session_factory
+        self.max_pending = max_pending
+        self._shards = [_Shard() for _ in range(max(1, shards))]
+        self._overflow: Optional[asyncio.Event] = None
+        # Called with every increment, e.g. to feed trending scores
+        self.listeners: List[Callable[[str, int, int, int], None]] = []
+
+        # Metrics
+        self.recorded = 0  # approximate: bumped outside the shard locks
+        self.flushes = 0
+        self.rows_written = 0
+        self.last_flush_rows = 0
+
+    def _shard(self, video_id: str) -> _Shard:
+        return self._shards[hash(video_id) % len(self._shards)]
+
+    @property
+    def pending(self) -> int:
+        """Videos with unflushed deltas."""
+        return sum(len(shard.deltas) for shard in self._shards)
+
+    def add(self, video_id: str, views: int = 0, likes: int = 0, dislikes: int = 0) -> None:
+        """Buffer counter deltas for `video_id` (negative to undo a like)."""
+        shard = self._shard(video_id)
+        with shard.lock:
+            delta = shard.deltas.get(video_id)
+            if delta is None:
+                shard.deltas[video_id] = [views, likes, dislikes]
+                overflowing = len(shard.deltas) * len(self._shards) >= self.max_pending
+            else:
+                delta[0] += views
+                delta[1] += likes
+                delta[2] += dislikes
+                overflowing = False
+        self.recorded += 1
+        if overflowing and self._overflow is not None:
+            self._overflow.set()
+        for listener in self.listeners:
+            listener(video_id, views, likes, dislikes)
+
+    def subscribe(self, listener: Callable[[str, int, int, int], None]) -> None:
+        """Call `listener(video_id, views, likes, dislikes)` on every add()."""
+        if listener not in self.listeners:
+            self.listeners.append(listener)
+
+    def record_view(self, video_id: str) -> None:
+        self.add(video_id, views=1)
+
+    def record_like(self, video_id: str, liked: Optional[bool] = True, previous: Optional[bool] = None) -> None:
+        """
+        A (dis)like, or its removal with `liked=None`; `previous` is the user's
+        earlier vote on the video, if any.
+        """
+        likes = (liked is True) - (previous is True)
+        dislikes = (liked is False) - (previous is False)
+        if likes or dislikes:
+            self.add(video_id, likes=likes, dislikes=dislikes)
+
+    def pending_deltas(self, video_id: str) -> Dict[str, int]:
+        """Unflushed deltas of one video."""
+        shard = self._shard(video_id)
+        with shard.lock:
+            delta = list(shard.deltas.get(video_id, (0, 0, 0)))
+        return dict(zip(COUNTERS, delta))
+
+    def counts(self, db: Session, video_id: str) -> Optional[Dict[str, int]]:
+        """Stored counts plus unflushed deltas; None if the video doesn't exist."""
+        row = db.execute(
+            select(Video.view_count, Video.like_count, Video.dislike_count).where(Video.id == video_id)
+        ).first()
+        if row is None:
+            return None
+        pending = self.pending_deltas(video_id)
+        return {name: (stored or 0) + pending[name] for name, stored in zip(COUNTERS, row)}
+
+    def apply_pending(self, videos: Iterable[Video]) -> None:
+        """Add unflushed deltas to loaded Video rows (for responses; never flushed back)."""
+        for video in videos:
+            for name, value in self.pending_deltas(video.id).items():
+                if value:
+                    # Display only: must not become a pending UPDATE of the absolute value
+                    set_committed_value(video, name, (getattr(video, name) or 0) + value)
+
+    def _take(self) -> Dict[str, List[int]]:
+        merged: Dict[str, List[int]] = {}
+        for shard in self._shards:
+            with shard.lock:
+                deltas, shard.deltas = shard.deltas, {}
+            merged.update(deltas)  # a video only ever lives in one shard
+        return merged
+
+    def _restore(self, batch: Dict[str, List[int]]) -> None:
+        for video_id, delta in batch.items():
+            shard = self._shard(video_id)
+            with shard.lock:
+                current = shard.deltas.setdefault(video_id, [0, 0, 0])
+                for i, value in enumerate(delta):
+                    current[i] += value
+
+    def flush(self) -> int:
+        """Write every buffered delta; returns the number of videos updated."""
+        batch = self._take()
+        rows = [
+            {"video_id": video_id, "views": views, "likes": likes, "dislikes": dislikes}
+            for video_id, (views, likes, dislikes) in batch.items()
+            if views or likes or dislikes
+        ]
+        if not rows:
+            return 0
+        try:
+            with self.session_factory() as db:
+                db.execute(_apply_deltas, rows)
+                db.commit()
+        except Exception:
+            # Deltas are additive: putting them back alongside newer ones loses nothing
+            self._restore(batch)
+            raise
+
+        self.flushes += 1
+        self.rows_written += len(rows)
+        self.last_flush_rows = len(rows)
+        logger.debug("Flushed counter deltas for %d videos", len(rows))
+        return len(rows)
+
+    def reconcile(self, db: Session, video_ids: Optional[Iterable[str]] = None) -> int:
+        """
+        Flush, then reset the counters of `video_ids` (default: all videos) to
+        the counts of their video_views / video_likes rows. Returns how many
+        videos had drifted. Events buffered while this runs may be counted twice
+        until the next reconcile, so run it as a repair job, not per request.
+        """
+        self.flush()
+        views = select(func.count()).where(VideoView.video_id == Video.id).scalar_subquery()
+        likes = select(func.count()).where(VideoLike.video_id == Video.id, VideoLike.is_liked == true()).scalar_subquery()
+        dislikes = select(func.count()).where(VideoLike.video_id == Video.id, VideoLike.is_liked == false()).scalar_subquery()
+        stmt = (
+            update(Video)
+            .where(or_(
+                Video.view_count.is_distinct_from(views),
+                Video.like_count.is_distinct_from(likes),
+                Video.dislike_count.is_distinct_from(dislikes),
+            ))
+            .values(view_count=views, like_count=likes, dislike_count=dislikes)
+            .execution_options(synchronize_session=False)
+        )
+        if video_ids is not None:
+            stmt = stmt.where(Video.id.in_(list(video_ids)))
+        drifted = db.execute(stmt).rowcount
+        db.commit()
+        if drifted:
+            logger.warning("Reconciled counters of %d videos", drifted)
+        return drifted
+
+    async def run(self, interval: float) -> None:
+        """Flush every `interval` seconds, or early when `max_pending` videos are buffered."""
+        self._overflow = asyncio.Event()
+        while True:
+            try:
+                await asyncio.wait_for(self._overflow.wait(), timeout=interval)
+            except asyncio.TimeoutError:
+                pass
+            self._overflow.clear()
+            try:
+                await asyncio.to_thread(self.flush)
+            except Exception:  # retried on the next tick
+                logger.exception("Video counter flush failed")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pending": self.pending,
+            "recorded": self.recorded,
+            "flushes": self.flushes,
+            "rows_written": self.rows_written,
+            "last_flush_rows": self.last_flush_rows,
+        }
+
+
+video_counters = VideoCounterBuffer(
+    SessionLocal,
+    shards=video_settings.counter_shards,
+    max_pending=video_settings.counter_max_pending,
+)
@@ -1,21 +1,52 @@
-import uuid, datetime, os
-from sqlalchemy.orm import Session
+import asyncio, datetime, os
+from typing import Optional
+from sqlalchemy import and_, delete, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
 from google.cloud import storage
-from fastapi import UploadFile, File
+from fastapi import HTTPException, status
 from dotenv import load_dotenv
-from models.videos.video import Video
-from src.schemas.video import VideoCreate, VideoInDb
+from src.models.channel import Channel
+from src.models.loaders import VIDEO_WITH_CHANNEL_AND_COUNTS
+from src.models.user import User
+from src.models.videos.video import Video
+from src.models.videos.video_like import VideoLike
+from src.schemas.video import VideoCreate, VideoInDb, VideoRating
+from src.services.related_videos import RelatedVideos, related_videos
+from src.services.video_counters import VideoCounterBuffer, video_counters
+from src.utils.ids import fits_uuid_column, snowflake_ids, uuid7
+from src.utils.pagination import DEFAULT_PAGE_SIZE, Page, paginate_async
 
 load_dotenv()
 
 BUCKET_NAME = os.getenv("GCS_BUCKET")
 
+# Reads of the previous vote and conditional writes tried before answering 409
+VOTE_ATTEMPTS = 3
+
+
+def _insert_vote(insert):
+    """Insert a first vote; a vote another request inserted first makes it a no-op."""
+    votes = VideoLike.__table__
+    return insert(votes).on_conflict_do_nothing(index_elements=[votes.c.video_id, votes.c.user_id])
+
+
+_INSERT_VOTES = {"postgresql": _insert_vote(postgresql.insert), "sqlite": _insert_vote(sqlite.insert)}
+
 class VideoService:
-    def __init__(self, db: Session):
+    def __init__(
+        self, db: AsyncSession, counters: Optional[VideoCounterBuffer] = None, related: Optional[RelatedVideos] = None
+    ):
         self.db = db
+        self.counters = counters or video_counters
+        self.related = related or related_videos
+
+    def _could_exist(self, video_id: str) -> bool:
+        """False for ids a native UUID column would reject (the query would fail, not miss)."""
+        return fits_uuid_column(self.db.get_bind().dialect, video_id)
 
-    async def get_signed_url(self, blob_name: str, expiration_minutes: int = 60) -> str:
-        """Generate a signed URL for uploading a video."""
+    def get_signed_url(self, blob_name: str, expiration_minutes: int = 60) -> str:
+        """Generate a signed URL for uploading a video (blocking; run it in a thread)."""
         client = storage.Client()
         bucket = client.bucket(BUCKET_NAME)
         blob = bucket.blob(blob_name)
@@ -27,17 +58,124 @@ class VideoService:
         )
         return signed_url
 
-    async def add_new_video(self, video_data: VideoCreate) -> VideoInDb:
-        id = str(uuid.uuid4())
+    async def create_video(self, video_data: VideoCreate, uploader: User) -> VideoInDb:
+        """Store a new video on the uploader's channel and return its upload URL."""
+        video_id = uuid7()
+        blob_name = f"videos/{video_id}.mp4"
+        # Signing doesn't touch the database: overlap it with the channel lookup.
+        # Both finish before either error is raised, so the session is idle again.
+        results = await asyncio.gather(
+            self.db.scalar(select(Channel.id).where(Channel.owner_id == uploader.id).order_by(Channel.id).limit(1)),
+            asyncio.to_thread(self.get_signed_url, blob_name),
+            return_exceptions=True,
+        )
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+        channel_id, signed_url = results
+        if channel_id is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Create a channel before uploading videos"
+            )
         video = Video(
-            id=id,
-            **video_data.model_dump()
+            id=video_id,
+            title=video_data.title,
+            description=video_data.description,
+            video_url=f"gs://{BUCKET_NAME}/{blob_name}",
+            signed_url=signed_url,
+            uploader_id=uploader.id,
+            channel_id=channel_id,
         )
         self.db.add(video)
-        self.db.commit()
-        self.db.refresh(video)
-        signed_url = await self.get_signed_url(f"videos/{video.id}.mp4")
-        video.signed_url = signed_url
-        self.db.commit()
-        self.db.refresh(video)
-        return VideoInDb.model_validate(video)
+        await self.db.commit()
+        await asyncio.to_thread(self.related.add, video.id, video.title, video.description)
+        return VideoInDb(id=video.id, title=video.title, description=video.description, signed_url=signed_url)
+
+    async def get_video(self, video_id: str) -> Video | None:
+        """A video with its channel and counts, including counter deltas not yet flushed."""
+        if not self._could_exist(video_id):
+            return None
+        video = await self.db.scalar(select(Video).options(*VIDEO_WITH_CHANNEL_AND_COUNTS).where(Video.id == video_id))
+        if video is not None:
+            self.counters.apply_pending([video])
+        return video
+
+    async def get_videos(
+        self, channel_id: Optional[int] = None, cursor: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE
+    ) -> Page:
+        """Videos newest first, optionally of one channel, one keyset page at a time."""
+        stmt = select(Video)
+        if channel_id is not None:
+            stmt = stmt.where(Video.channel_id == channel_id)
+        page = await paginate_async(self.db, stmt, Video.created_at, Video.id, cursor, limit)
+        self.counters.apply_pending(page.items)
+        return page
+
+    async def get_related(self, video_id: str, limit: int = DEFAULT_PAGE_SIZE) -> Page:
+        """Videos with titles and descriptions most like `video_id`'s, most similar first."""
+        if not self._could_exist(video_id):
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Video not found")
+        # A scan of every signature: keep it (and the index lock) off the event loop
+        similar = await asyncio.to_thread(self.related.similar, video_id, limit)
+        if similar is None:
+            if await self.db.scalar(select(Video.id).where(Video.id == video_id)) is None:
+                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Video not found")
+            return Page(items=[])  # not indexed yet
+        rank = {related_id: i for i, (related_id, _) in enumerate(similar)}
+        videos = (await self.db.scalars(
+            select(Video).options(*VIDEO_WITH_CHANNEL_AND_COUNTS).where(Video.id.in_(rank))
+        )).all()
+        videos = sorted(videos, key=lambda video: rank[video.id])
+        self.counters.apply_pending(videos)
+        return Page(items=videos)
+
+    async def rate_video(self, video_id: str, user_id: int, liked: Optional[bool]) -> VideoRating:
+        """
+        Store the user's like / dislike of a video, or clear it with `liked=None`.
+        The vote row is written now; the video's counters move by the change
+        from the previous vote through the counter buffer.
+        """
+        if not self._could_exist(video_id):
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Video not found")
+        for _ in range(VOTE_ATTEMPTS):
+            row = (await self.db.execute(
+                select(Video.like_count, Video.dislike_count, VideoLike.is_liked)
+                .outerjoin(VideoLike, and_(VideoLike.video_id == Video.id, VideoLike.user_id == user_id))
+                .where(Video.id == video_id)
+            )).first()
+            if row is None:
+                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Video not found")
+            like_count, dislike_count, previous = row
+            if liked == previous:
+                break
+
+            # Each write only applies on top of the vote just read, so the counter
+            # delta below is exact even when requests of this user race
+            if previous is None:
+                stmt = _INSERT_VOTES[self.db.get_bind().dialect.name].values(
+                    id=snowflake_ids.next_id(), video_id=video_id, user_id=user_id, is_liked=liked
+                )
+            else:
+                votes = and_(
+                    VideoLike.video_id == video_id, VideoLike.user_id == user_id, VideoLike.is_liked == previous
+                )
+                if liked is None:
+                    stmt = delete(VideoLike).where(votes)
+                else:
+                    stmt = update(VideoLike).where(votes).values(is_liked=liked)
+            if (await self.db.execute(stmt)).rowcount == 1:
+                await self.db.commit()
+                self.counters.record_like(video_id, liked, previous)
+                break
+            await self.db.rollback()  # another request of this user voted in between: read again
+        else:
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Vote changed concurrently, retry")
+
+        pending = self.counters.pending_deltas(video_id)
+        return VideoRating(
+            video_id=video_id,
+            liked=liked,
+            like_count=(like_count or 0) + pending["like_count"],
+            dislike_count=(dislike_count or 0) + pending["dislike_count"],
+        )
@@ -0,0 +1,180 @@
+# src/services/watch_time.py
+import asyncio
+import logging
+from collections import Counter
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import func, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session, sessionmaker
+from src.config.database import SessionLocal
+from src.config.videos import video_settings
+from src.models.videos.video import Video
+from src.models.videos.video_view import VideoView
+from src.services.video_counters import VideoCounterBuffer, video_counters
+from src.utils.ids import is_uuid, snowflake_ids
+
+logger = logging.getLogger(__name__)
+
+# (video_id, user_id) -> furthest watch time seen
+WatchTimes = Dict[Tuple[str, int], int]
+
+
+def _upsert(insert):
+    """Insert a view or raise its watch time; RETURNING reports what changed."""
+    views = VideoView.__table__
+    stmt = insert(views)
+    return stmt.on_conflict_do_update(
+        index_elements=[views.c.video_id, views.c.user_id],
+        set_={"watch_time": stmt.excluded.watch_time, "updated_at": func.now()},  # pylint: disable=not-callable
+        where=stmt.excluded.watch_time > views.c.watch_time,
+    ).returning(views.c.video_id, views.c.user_id, views.c.updated_at)
+
+
+# Compiled once; an executemany of it is sent as multi-row INSERT ... VALUES pages
+# ("insertmanyvalues"), so the SQL for a large batch is never rebuilt per call
+_UPSERTS = {"postgresql": _upsert(postgresql.insert), "sqlite": _upsert(sqlite.insert)}
+
+
+def merge_heartbeats(into: WatchTimes, user_id: int, heartbeats: Iterable[Tuple[str, int]]) -> None:
+    """Keep only the maximum watch time per (video, user)."""
+    for video_id, watch_time in heartbeats:
+        key = (video_id, user_id)
+        if watch_time > into.get(key, -1):
+            into[key] = watch_time
+
+
+def upsert_watch_times(db: Session, watch_times: WatchTimes) -> List[Tuple[str, int]]:
+    """
+    Store `watch_times` with multi-row INSERT ... ON CONFLICT DO UPDATE
+    statements; a stored watch time only ever grows. Heartbeats for unknown videos
+    are dropped. Returns (video_id, user_id) of every newly created view.
+    Does not commit.
+    """
+    dialect = db.get_bind().dialect
+    video_ids = {video_id for video_id, _ in watch_times}
+    if dialect.supports_native_uuid:
+        # One malformed id would fail the cast, and with it everyone's heartbeats in the batch
+        video_ids = {video_id for video_id in video_ids if is_uuid(video_id)}
+    known = set(db.scalars(select(Video.id).where(Video.id.in_(video_ids))))
+    rows = [
+        {"id": snowflake_ids.next_id(), "video_id": video_id, "user_id": user_id, "watch_time": watch_time}
+        for (video_id, user_id), watch_time in watch_times.items()
+        if video_id in known
+    ]
+    if not rows:
+        return []
+    result = db.execute(_UPSERTS[dialect.name], rows)
+    # Only inserted rows come back without updated_at
+    return [(video_id, user_id) for video_id, user_id, updated_at in result if updated_at is None]
+
+
+class HeartbeatBatcher:
+    """
+    Group commit for watch-time heartbeats.
+
+    Requests merge their heartbeats into the pending batch and wait for it to be
+    written; the batch is written `max_delay` seconds after its first heartbeat
+    (sooner once `max_batch` keys are pending) as one upsert. While a batch is
+    being written the next one keeps filling, so under load each write covers
+    every request that arrived during the previous one.
+    """
+
+    def __init__(
+        self,
+        session_factory: sessionmaker,
+        max_delay: float = 0.02,
+        max_batch: int = 5000,
+        counters: Optional[VideoCounterBuffer] = None,
+    ):
+        self.session_factory = session_factory
+        self.max_delay = max_delay
+        self.max_batch = max_batch
+        self.counters = counters or video_counters
+        self._pending: WatchTimes = {}
+        self._batch: Optional[asyncio.Future] = None
+        self._full: Optional[asyncio.Event] = None
+        self._writer: Optional[asyncio.Task] = None
+        self._write_lock: Optional[asyncio.Lock] = None
+        self.listeners: List[Callable[[int, int], None]] = []
+
+        # Metrics
+        self.heartbeats = 0
+        self.writes = 0
+        self.rows_written = 0
+
+    async def submit(self, user_id: int, heartbeats: Iterable[Tuple[str, int]]) -> None:
+        """Add `heartbeats` to the pending batch and wait until it is stored."""
+        heartbeats = list(heartbeats)
+        self.heartbeats += len(heartbeats)
+        merge_heartbeats(self._pending, user_id, heartbeats)
+        if self._batch is None:
+            if self._write_lock is None:
+                self._write_lock = asyncio.Lock()
+            self._batch = asyncio.get_running_loop().create_future()
+            self._full = asyncio.Event()
+            self._writer = asyncio.create_task(self._write_batch(self._full))
+        if len(self._pending) >= self.max_batch:
+            self._full.set()
+        # shield: one cancelled request must not cancel the batch for everyone else
+        await asyncio.shield(self._batch)
+
+    async def _write_batch(self, full: asyncio.Event) -> None:
+        try:
+            await asyncio.wait_for(full.wait(), timeout=self.max_delay)
+        except asyncio.TimeoutError:
+            pass
+        async with self._write_lock:
+            pending, self._pending = self._pending, {}
+            batch, self._batch = self._batch, None
+            try:
+                await asyncio.to_thread(self.write, pending)
+            except Exception as e:
+                logger.exception("Writing %d watch times failed", len(pending))
+                batch.set_exception(e)
+            else:
+                batch.set_result(None)
+
+    def write(self, watch_times: WatchTimes) -> int:
+        """Upsert `watch_times` and count the new views; returns rows sent."""
+        if not watch_times:
+            return 0
+        with self.session_factory() as db:
+            new_views = upsert_watch_times(db, watch_times)
+            db.commit()
+        for video_id, _ in new_views:
+            self.counters.record_view(video_id)
+        if self.listeners:
+            # Only new views: a longer watch of a video already seen doesn't change the user's history
+            for user_id, videos in Counter(user_id for _, user_id in new_views).items():
+                for listener in self.listeners:
+                    listener(user_id, videos)
+        self.writes += 1
+        self.rows_written += len(watch_times)
+        return len(watch_times)
+
+    def subscribe(self, listener: Callable[[int, int], None]) -> None:
+        """Call `listener(user_id, videos)` after each write, per user it created new views for."""
+        if listener not in self.listeners:
+            self.listeners.append(listener)
+
+    async def drain(self) -> None:
+        """Wait for the batch in flight (at shutdown)."""
+        if self._writer is not None:
+            if self._full is not None:
+                self._full.set()
+            await asyncio.gather(self._writer, return_exceptions=True)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "pending": len(self._pending),
+            "heartbeats": self.heartbeats,
+            "writes": self.writes,
+            "rows_written": self.rows_written,
+        }
+
+
+heartbeat_batcher = HeartbeatBatcher(
+    SessionLocal,
+    max_delay=video_settings.heartbeat_flush_seconds,
+    max_batch=video_settings.heartbeat_max_batch,
+)
@@ -0,0 +1,182 @@
+# src/services/write_behind.py
+import asyncio
+import logging
+import time
+from threading import Lock
+from typing import Any, Callable, Dict, Iterable, Optional
+from sqlalchemy import update
+from sqlalchemy.orm import sessionmaker
+from src.config.auth import auth_settings
+from src.config.database import SessionLocal
+from src.models.user import User
+from src.services.auth.user_cache import user_cache
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBehindBuffer:
+    """
+    Coalesces non-critical column updates per primary key and writes them later
+    as one batched UPDATE (executemany by primary key).
+
+    Updates for the same row merge (last value wins), so ten logins of one user
+    inside a flush window cost one row update. Anything still buffered when the
+    process dies is lost: the loss window is the flush interval.
+    """
+
+    def __init__(
+        self,
+        model: Any,
+        session_factory: sessionmaker,
+        max_pending: int = 10_000,
+        on_flush: Optional[Callable[[Iterable[Any]], None]] = None,
+        timer: Callable[[], float] = time.monotonic,
+    ):
+        self.model = model
+        self.session_factory = session_factory
+        self.max_pending = max_pending
+        self.on_flush = on_flush
+        self.timer = timer
+        self._pending: Dict[Any, Dict[str, Any]] = {}
+        self._flushing: Dict[Any, Dict[str, Any]] = {}  # the batch a flush has taken but not committed
+        self._flushing_changed = False
+        self._oldest: Optional[float] = None  # when the oldest buffered update was recorded
+        self._lock = Lock()
+        self._overflow: Optional[asyncio.Event] = None
+
+        # Metrics
+        self.recorded = 0
+        self.flushes = 0
+        self.failed_flushes = 0
+        self.rows_written = 0
+        self.last_flush_rows = 0
+        self.last_flush_coalesced = 0
+        self._recorded_since_flush = 0
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def record(self, pk: Any, **values: Any) -> None:
+        """Buffer `values` for the row `pk`."""
+        with self._lock:
+            if not self._pending:
+                self._oldest = self.timer()
+            self._pending.setdefault(pk, {}).update(values)
+            self.recorded += 1
+            self._recorded_since_flush += 1
+            overflowing = len(self._pending) >= self.max_pending
+        if overflowing and self._overflow is not None:
+            self._overflow.set()
+
+    def discard(self, pk: Any, *fields: str) -> None:
+        """Drop buffered values, also from a batch being flushed (e.g. before the row is written synchronously)."""
+        with self._lock:
+            for buffer in (self._pending, self._flushing):
+                values = buffer.get(pk)
+                if values is None:
+                    continue
+                dropped = [field for field in fields or list(values) if field in values]
+                for field in dropped:
+                    del values[field]
+                if dropped and buffer is self._flushing:
+                    self._flushing_changed = True
+                if not values:
+                    del buffer[pk]
+            if not self._pending:
+                self._oldest = None
+
+    def flush(self) -> int:
+        """Write everything buffered; returns the number of rows updated."""
+        with self._lock:
+            batch, self._pending = self._pending, {}
+            self._flushing = batch
+            recorded, self._recorded_since_flush = self._recorded_since_flush, 0
+            oldest, self._oldest = self._oldest, None
+        if not batch:
+            return 0
+
+        try:
+            with self.session_factory() as db:
+                while True:
+                    with self._lock:
+                        rows = [{"id": pk, **values} for pk, values in batch.items()]
+                        self._flushing_changed = False
+                    if rows:
+                        db.execute(update(self.model), rows)
+                    # A discard while the UPDATE ran may have come too late for it: write the
+                    # batch again without the dropped values. After this check the UPDATE holds
+                    # the row locks, so the discarding caller's own write lands after our commit.
+                    with self._lock:
+                        if not self._flushing_changed:
+                            break
+                    db.rollback()
+                db.commit()
+        except Exception:
+            # Put the batch back under anything recorded meanwhile, then surface the error
+            with self._lock:
+                for pk, values in batch.items():
+                    self._pending[pk] = {**values, **self._pending.get(pk, {})}
+                self._flushing = {}
+                self._recorded_since_flush += recorded
+                self._oldest = oldest
+                self.failed_flushes += 1
+            raise
+        with self._lock:
+            self._flushing = {}
+        if not rows:
+            return 0
+
+        self.flushes += 1
+        self.rows_written += len(rows)
+        self.last_flush_rows = len(rows)
+        self.last_flush_coalesced = recorded - len(rows)
+        logger.debug(
+            "Write-behind flushed %d %s rows (%d updates coalesced)",
+            len(rows), self.model.__tablename__, self.last_flush_coalesced,
+        )
+        if self.on_flush is not None:
+            self.on_flush(batch.keys())
+        return len(rows)
+
+    async def run(self, interval: float) -> None:
+        """Flush every `interval` seconds, or early when `max_pending` rows are buffered."""
+        self._overflow = asyncio.Event()
+        while True:
+            try:
+                await asyncio.wait_for(self._overflow.wait(), timeout=interval)
+            except asyncio.TimeoutError:
+                pass
+            self._overflow.clear()
+            try:
+                await asyncio.to_thread(self.flush)
+            except Exception:  # retried on the next tick
+                logger.exception("Write-behind flush of %s failed", self.model.__tablename__)
+
+    def stats(self) -> Dict[str, Any]:
+        """Buffer depth and lag, and counters for monitoring coalescing."""
+        oldest = self._oldest
+        return {
+            "pending": self.pending,
+            "lag_seconds": self.timer() - oldest if oldest is not None else 0.0,  # age of the oldest buffered update
+            "failed_flushes": self.failed_flushes,
+            "recorded": self.recorded,
+            "flushes": self.flushes,
+            "rows_written": self.rows_written,
+            "coalesced": self.recorded - self.rows_written - self._recorded_since_flush,
+            "last_flush_rows": self.last_flush_rows,
+            "last_flush_coalesced": self.last_flush_coalesced,
+        }
+
+
+def _invalidate_cached_users(user_ids: Iterable[int]) -> None:
+    for user_id in user_ids:
+        user_cache.invalidate(user_id)
+
+
+user_write_behind = WriteBehindBuffer(
+    User,
+    SessionLocal,
+    max_pending=auth_settings.login_write_max_pending,
+    on_flush=_invalidate_cached_users,
+)
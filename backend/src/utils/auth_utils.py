@@ -3,10 +3,12 @@ from typing import Optional
 from datetime import datetime, timedelta
 from jose import JWTError, jwt
 from passlib.context import CryptContext
-from passlib.hash import bcrypt
+import hashlib
+import hmac
 import secrets
 import string
 from src.config.auth import auth_settings
+from src.utils.hashing import hashing_executor
 
 # Password hashing
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -19,11 +21,29 @@ def get_password_hash(password: str) -> str:
     """Generate password hash."""
     return pwd_context.hash(password)
 
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password on the hashing executor."""
+    return await hashing_executor.run(verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    """Hash a password on the hashing executor."""
+    return await hashing_executor.run(get_password_hash, password)
+
 def generate_secure_token(length: int = 32) -> str:
     """Generate a secure random token."""
     alphabet = string.ascii_letters + string.digits
     return ''.join(secrets.choice(alphabet) for _ in range(length))
 
+def user_token_data(user) -> dict:
+    """Claims put in tokens for a user (status flags let routes skip the users table)."""
+    return {
+        "user_id": user.id,
+        "email": user.email,
+        "ver": user.token_version or 0,
+        "active": user.is_active,
+        "verified": user.is_verified,
+    }
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create JWT access token."""
     to_encode = data.copy()
@@ -63,10 +83,11 @@ def verify_token(token: str, token_type: str = "access") -> Optional[dict]:
     except JWTError:
         return None
 
-def hash_refresh_token(refresh_token: str) -> str:
-    """Hash refresh token for storage."""
-    return bcrypt.hash(refresh_token)
+def fingerprint_refresh_token(refresh_token: str) -> str:
+    """Keyed HMAC-SHA256 fingerprint of a refresh token for storage."""
+    key = f"refresh-token:{auth_settings.secret_key}".encode()
+    return hmac.new(key, refresh_token.encode(), hashlib.sha256).hexdigest()
 
-def verify_refresh_token_hash(refresh_token: str, hashed_token: str) -> bool:
-    """Verify refresh token against its hash."""
-    return bcrypt.verify(refresh_token, hashed_token)
\ No newline at end of file
+def verify_refresh_token_fingerprint(refresh_token: str, fingerprint: str) -> bool:
+    """Constant-time check of a refresh token against its stored fingerprint."""
+    return hmac.compare_digest(fingerprint_refresh_token(refresh_token), fingerprint)
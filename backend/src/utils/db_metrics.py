@@ -0,0 +1,239 @@
+# src/utils/db_metrics.py
+"""
+Connection pool and query instrumentation.
+
+Engines built from src.config.database use an instrumented QueuePool that
+times how long each checkout waited for a connection; pool events count
+connects, checkouts and invalidations. `pool_stats()` is what /health/db
+reports and what pool sizing should be based on.
+
+`instrument_queries(engine)` times every cursor execution and charges it to
+the QueryStats of the current request (a context variable, so it follows the
+request into threadpool workers and the async engine's greenlets) and to any
+open `query_budget()` block.
+"""
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+from threading import Lock
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Type
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import Pool, QueuePool
+
+
+class PoolMetrics:
+    """Counters for one connection pool."""
+
+    def __init__(self):
+        self._lock = Lock()
+        self.connects = 0
+        self.checkouts = 0
+        self.waits = 0  # checkouts that had to wait for a free connection
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.timeouts = 0
+        self.invalidations = 0
+        self.soft_invalidations = 0
+
+    def record_wait(self, seconds: float, timed_out: bool = False) -> None:
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            # Anything under 1ms is a free connection, not a wait
+            if seconds >= 0.001:
+                self.waits += 1
+                self.wait_seconds += seconds
+                self.max_wait_seconds = max(self.max_wait_seconds, seconds)
+
+    def count(self, attribute: str) -> None:
+        with self._lock:
+            setattr(self, attribute, getattr(self, attribute) + 1)
+
+    def snapshot(self, pool: Pool) -> Dict[str, Any]:
+        stats: Dict[str, Any] = {
+            "pool": type(pool).__name__,
+            "connects": self.connects,
+            "checkouts": self.checkouts,
+            "waits": self.waits,
+            "wait_seconds_total": round(self.wait_seconds, 6),
+            "wait_seconds_max": round(self.max_wait_seconds, 6),
+            "timeouts": self.timeouts,
+            "invalidations": self.invalidations,
+            "soft_invalidations": self.soft_invalidations,
+        }
+        if isinstance(pool, QueuePool):
+            stats.update(
+                size=pool.size(),
+                checked_out=pool.checkedout(),
+                checked_in=pool.checkedin(),
+                # Negative while the base pool isn't full yet
+                overflow=pool.overflow(),
+            )
+        return stats
+
+
+@lru_cache(maxsize=None)
+def instrumented_pool_class(base: Type[QueuePool]) -> Type[QueuePool]:
+    """Subclass of `base` that times every checkout wait."""
+
+    class InstrumentedPool(base):  # type: ignore[valid-type, misc]
+        def _do_get(self):
+            start = time.perf_counter()
+            try:
+                record = super()._do_get()
+            except exc.TimeoutError:
+                pool_metrics(self).record_wait(time.perf_counter() - start, timed_out=True)
+                raise
+            pool_metrics(self).record_wait(time.perf_counter() - start)
+            return record
+
+        def recreate(self):
+            # engine.dispose() swaps in a fresh pool; keep counting into the same metrics
+            pool = super().recreate()
+            pool._pool_metrics = pool_metrics(self)
+            return pool
+
+    InstrumentedPool.__name__ = f"Instrumented{base.__name__}"
+    return InstrumentedPool
+
+
+def pool_metrics(pool: Pool) -> PoolMetrics:
+    """The metrics object attached to `pool` (created on first use)."""
+    metrics = getattr(pool, "_pool_metrics", None)
+    if metrics is None:
+        metrics = PoolMetrics()
+        pool._pool_metrics = metrics
+    return metrics
+
+
+def instrument_pool(pool: Pool) -> PoolMetrics:
+    """Attach event counters to `pool`; safe to call once per pool."""
+    metrics = pool_metrics(pool)
+    event.listen(pool, "connect", lambda *args: metrics.count("connects"))
+    event.listen(pool, "checkout", lambda *args: metrics.count("checkouts"))
+    event.listen(pool, "invalidate", lambda *args: metrics.count("invalidations"))
+    event.listen(pool, "soft_invalidate", lambda *args: metrics.count("soft_invalidations"))
+    return metrics
+
+
+# Placeholders in every paramstyle, and literal numbers, become "?"
+_PLACEHOLDER = re.compile(r"%\(\w+\)s|\$\d+|:\w+|\b\d+\b")
+# Expanded IN lists / multi-row VALUES collapse to one item
+_REPEATED = re.compile(r"\?(?:\s*,\s*\?)+")
+
+
+@lru_cache(maxsize=4096)
+def statement_shape(statement: str) -> str:
+    """`statement` with parameters and literal numbers normalised away."""
+    return _REPEATED.sub("?", _PLACEHOLDER.sub("?", " ".join(statement.split())))
+
+
+class QueryStats:
+    """Queries issued within one request (or one query_budget block)."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.statements: Counter = Counter()
+
+    def record(self, statement: str, seconds: float) -> None:
+        self.count += 1
+        self.seconds += seconds
+        self.statements[statement] += 1
+
+    def repeated(self, threshold: int) -> List[Tuple[str, int]]:
+        """Statement shapes executed more than `threshold` times (N+1 suspects)."""
+        shapes: Counter = Counter()
+        for statement, count in self.statements.items():
+            shapes[statement_shape(statement)] += count
+        return [(shape, count) for shape, count in shapes.most_common() if count > threshold]
+
+
+class QueryMetrics:
+    """Per-route totals of QueryStats, for /health/db."""
+
+    def __init__(self):
+        self._lock = Lock()
+        self._routes: Dict[str, Dict[str, Any]] = {}
+
+    def observe(self, route: str, stats: QueryStats, n_plus_one: int) -> None:
+        with self._lock:
+            totals = self._routes.setdefault(
+                route, {"requests": 0, "queries": 0, "db_seconds": 0.0, "max_queries": 0, "n_plus_one": 0}
+            )
+            totals["requests"] += 1
+            totals["queries"] += stats.count
+            totals["db_seconds"] += stats.seconds
+            totals["max_queries"] = max(totals["max_queries"], stats.count)
+            totals["n_plus_one"] += n_plus_one
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {
+                route: {
+                    **totals,
+                    "db_seconds": round(totals["db_seconds"], 6),
+                    "avg_queries": round(totals["queries"] / totals["requests"], 2),
+                }
+                for route, totals in self._routes.items()
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._routes.clear()
+
+
+query_metrics = QueryMetrics()
+current_query_stats: ContextVar[Optional[QueryStats]] = ContextVar("current_query_stats", default=None)
+_budgets: List[QueryStats] = []
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_started"].pop()
+    stats = current_query_stats.get()
+    if stats is not None:
+        stats.record(statement, elapsed)
+    for budget in _budgets:
+        budget.record(statement, elapsed)
+
+
+def instrument_queries(engine: Engine) -> None:
+    """Charge every query on `engine` (a sync Engine or AsyncEngine.sync_engine) to the current request."""
+    if not event.contains(engine, "after_cursor_execute", _after_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+@contextmanager
+def query_budget(max_queries: int, max_repeats: Optional[int] = None) -> Iterator[QueryStats]:
+    """
+    Test helper: fail if the block issues more than `max_queries` queries on any
+    instrumented engine, or runs one statement shape more than `max_repeats` times.
+
+        with query_budget(3):
+            client.get("/auth/me", headers=headers)
+    """
+    stats = QueryStats()
+    _budgets.append(stats)
+    try:
+        yield stats
+    finally:
+        _budgets.remove(stats)
+    if stats.count > max_queries:
+        listing = "\n".join(f"  {count} x {statement}" for statement, count in stats.statements.most_common())
+        raise QueryBudgetExceeded(f"{stats.count} queries, budget {max_queries}:\n{listing}")
+    if max_repeats is not None and stats.repeated(max_repeats):
+        shape, count = stats.repeated(max_repeats)[0]
+        raise QueryBudgetExceeded(f"N+1: {count} x {shape}")
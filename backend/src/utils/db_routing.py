@@ -0,0 +1,168 @@
+# src/utils/db_routing.py
+"""
+Read-replica routing.
+
+Sessions made by `RoutingSession` send plain SELECTs to a replica and
+everything else (flushes, INSERT / UPDATE / DELETE, SELECT ... FOR UPDATE,
+raw text()) to the primary. A session that has written stays on the primary
+for the rest of its life, so it reads its own writes; `pin_primary()` does the
+same for every session used inside a block.
+
+Replicas that fail a health check or drop a connection leave the rotation
+until their next successful check. With no healthy replica, reads go to the
+primary.
+"""
+import itertools
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from threading import Lock
+from typing import Any, Dict, Iterator, Optional, Sequence
+from sqlalchemy import event, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import CompoundSelect, Select
+
+logger = logging.getLogger(__name__)
+
+_primary_pinned: ContextVar[bool] = ContextVar("primary_pinned", default=False)
+
+
+@contextmanager
+def pin_primary() -> Iterator[None]:
+    """Route every session used inside the block to the primary."""
+    token = _primary_pinned.set(True)
+    try:
+        yield
+    finally:
+        _primary_pinned.reset(token)
+
+
+class Replica:
+    """One read replica: its sync engine (used for health checks) and optional async engine."""
+
+    def __init__(self, name: str, engine: Engine, async_engine: Optional[AsyncEngine] = None):
+        self.name = name
+        self.engine = engine
+        self.async_engine = async_engine
+        self.healthy = True
+        self.failures = 0
+        self.last_error: Optional[str] = None
+        self.checked_at: Optional[float] = None
+        event.listen(engine, "handle_error", self._on_error)
+        if async_engine is not None:
+            event.listen(async_engine.sync_engine, "handle_error", self._on_error)
+
+    def _on_error(self, context) -> None:
+        if context.is_disconnect:
+            self.mark_down(str(context.original_exception))
+
+    def mark_down(self, error: str) -> None:
+        if self.healthy:
+            logger.warning("Replica %s out of rotation: %s", self.name, error)
+        self.healthy = False
+        self.failures += 1
+        self.last_error = error
+
+    def check(self) -> bool:
+        """SELECT 1 on a fresh checkout; puts the replica back in rotation on success."""
+        try:
+            with self.engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+        except Exception as e:  # any failure keeps it out until the next check
+            self.mark_down(str(e))
+        else:
+            if not self.healthy:
+                logger.info("Replica %s back in rotation", self.name)
+            self.healthy = True
+        self.checked_at = time.time()
+        return self.healthy
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "healthy": self.healthy,
+            "failures": self.failures,
+            "last_error": self.last_error,
+            "checked_at": self.checked_at,
+        }
+
+
+class ReplicaRouter:
+    """The primary engines plus a round-robin over healthy replicas."""
+
+    def __init__(self, primary: Engine, replicas: Sequence[Replica], async_primary: Optional[AsyncEngine] = None):
+        self.primary = primary
+        self.async_primary = async_primary
+        self.replicas = list(replicas)
+        self._next = itertools.count()
+        self._lock = Lock()
+        self.reads = 0
+        self.primary_reads = 0
+
+    def choose(self) -> Optional[Replica]:
+        """Next healthy replica, or None to read from the primary."""
+        healthy = [replica for replica in self.replicas if replica.healthy]
+        if not healthy:
+            return None
+        with self._lock:
+            return healthy[next(self._next) % len(healthy)]
+
+    def primary_engine(self, is_async: bool) -> Engine:
+        return self.async_primary.sync_engine if is_async else self.primary
+
+    def check(self) -> Dict[str, bool]:
+        """Health-check every replica (blocking; run off the event loop)."""
+        return {replica.name: replica.check() for replica in self.replicas}
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "reads": self.reads,
+            "primary_reads": self.primary_reads,
+            "replicas": {replica.name: replica.stats() for replica in self.replicas},
+        }
+
+
+def _is_read(clause: Any) -> bool:
+    if isinstance(clause, Select):
+        return clause._for_update_arg is None
+    return isinstance(clause, CompoundSelect)
+
+
+class RoutingSession(Session):
+    """
+    Session that picks an engine per statement through `router`.
+    With is_async=True it is the sync_session_class of an AsyncSession and
+    returns the async engines' sync facades.
+    """
+
+    def __init__(self, router: ReplicaRouter, is_async: bool = False, **kw: Any):
+        super().__init__(**kw)
+        self.router = router
+        self.is_async = is_async
+        self.wrote = False
+        self._replica: Optional[Replica] = None
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if self.wrote or self._flushing or not _is_read(clause):
+            # Pinned from here on: later reads in this session see the write
+            self.wrote = True
+            return self.router.primary_engine(self.is_async)
+        self.router.reads += 1
+        if _primary_pinned.get():
+            self.router.primary_reads += 1
+            return self.router.primary_engine(self.is_async)
+        # One replica per session, so all of its reads come from one snapshot
+        if self._replica is None or not self._replica.healthy:
+            self._replica = self.router.choose()
+        if self._replica is None:
+            self.router.primary_reads += 1
+            return self.router.primary_engine(self.is_async)
+        replica = self._replica
+        return replica.async_engine.sync_engine if self.is_async else replica.engine
+
+    def use_primary(self) -> None:
+        """Send every later statement of this session to the primary."""
+        self.wrote = True
+
@@ -0,0 +1,80 @@
+# src/utils/hashing.py
+import asyncio
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Optional
+from fastapi import HTTPException, status
+from src.config.auth import auth_settings
+
+
+class HashingQueueFull(HTTPException):
+    """Raised when the hashing executor has no room for more work."""
+
+    def __init__(self):
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Authentication service busy, try again shortly",
+            headers={"Retry-After": "1"},
+        )
+
+
+class HashingExecutor:
+    """
+    Bounded pool for slow password / token hashing.
+    bcrypt releases the GIL, so the default thread pool runs hashes in parallel
+    while the event loop keeps serving other requests. At most
+    `max_workers + max_queue` jobs are admitted; anything beyond that is rejected.
+    `max_workers=0` runs the hash inline on the event loop (the old behaviour).
+    """
+
+    def __init__(self, max_workers: int = 4, max_queue: int = 64, kind: str = "thread"):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unknown hashing executor kind: {kind}")
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.kind = kind
+        self.pending = 0
+        self.rejected = 0
+        self._executor: Optional[Executor] = None
+
+    @property
+    def capacity(self) -> int:
+        return self.max_workers + self.max_queue
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="hashing"
+                )
+        return self._executor
+
+    async def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        """Run `func(*args)` in the pool, rejecting when the queue is full."""
+        if self.max_workers == 0:
+            return func(*args)
+
+        if self.pending >= self.capacity:
+            self.rejected += 1
+            raise HashingQueueFull()
+
+        self.pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), partial(func, *args))
+        finally:
+            self.pending -= 1
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+hashing_executor = HashingExecutor(
+    max_workers=auth_settings.hashing_workers,
+    max_queue=auth_settings.hashing_max_queue,
+    kind=auth_settings.hashing_executor_kind,
+)
@@ -0,0 +1,131 @@
+# src/utils/ids.py
+"""
+Time-ordered primary keys.
+
+Random uuid4 keys land anywhere in a B-tree, so every insert dirties a random
+leaf page and indexes stay half full. Keys that grow with time append to the
+right-hand edge instead.
+
+- `uuid7()`: RFC 9562 UUIDv7 strings for public ids (videos), stored as a
+  native 16-byte UUID on PostgreSQL (`UUID_STR`).
+- `SnowflakeIds`: 64-bit ints for internal row ids, stored as BIGINT:
+  41 bits of milliseconds since `EPOCH_MS`, 10 bits of worker id, 12 bits of
+  per-millisecond sequence. Processes writing to one database need distinct
+  worker ids (ID_WORKER_ID).
+"""
+import os
+import secrets
+import time
+import uuid
+from datetime import datetime, timezone
+from threading import Lock
+from typing import Optional
+from sqlalchemy import String, Uuid
+from sqlalchemy.engine import Dialect
+from src.config.database import db_settings
+
+EPOCH_MS = 1_735_689_600_000  # 2025-01-01T00:00:00Z
+WORKER_BITS = 10
+SEQUENCE_BITS = 12
+MAX_WORKER_ID = (1 << WORKER_BITS) - 1
+MAX_SEQUENCE = (1 << SEQUENCE_BITS) - 1
+
+# Column type for uuid7() ids: native UUID where the dialect has one. SQLite
+# keeps them as text, so ids written before this type existed still load.
+UUID_STR = Uuid(as_uuid=False).with_variant(String(), "sqlite")
+
+
+def _now_ms() -> int:
+    return time.time_ns() // 1_000_000
+
+
+def is_uuid(value: str) -> bool:
+    """Whether `value` parses as a UUID (a native UUID column rejects anything else)."""
+    try:
+        uuid.UUID(value)
+    except ValueError:
+        return False
+    return True
+
+
+def fits_uuid_column(dialect: Dialect, value: str) -> bool:
+    """
+    Whether `value` can be compared with a `UUID_STR` column on `dialect`. A
+    native UUID column fails the whole statement on a malformed id, so check
+    path ids with this first and answer 404 instead.
+    """
+    return not dialect.supports_native_uuid or is_uuid(value)
+
+
+class _UUID7:
+    """
+    UUIDv7 with a 12-bit counter after the timestamp (RFC 9562, method 1), so
+    ids from one process are strictly increasing even within a millisecond.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._last_ms = 0
+        self._counter = 0
+
+    def __call__(self) -> str:
+        with self._lock:
+            ms = _now_ms()
+            if ms > self._last_ms:
+                # Random start, leaving room to count up within the millisecond
+                self._last_ms, self._counter = ms, secrets.randbits(SEQUENCE_BITS - 1)
+            else:
+                self._counter += 1
+                if self._counter > MAX_SEQUENCE:
+                    self._last_ms, self._counter = self._last_ms + 1, 0
+            ms, counter = self._last_ms, self._counter
+        value = (ms << 80) | (0x7 << 76) | (counter << 64) | (0b10 << 62) | secrets.randbits(62)
+        return str(uuid.UUID(int=value))
+
+
+uuid7 = _UUID7()
+
+
+class SnowflakeIds:
+    """Thread-safe generator of time-ordered 64-bit ids for one worker."""
+
+    def __init__(self, worker_id: int = 0):
+        if not 0 <= worker_id <= MAX_WORKER_ID:
+            raise ValueError(f"worker_id must be between 0 and {MAX_WORKER_ID}")
+        self.worker_id = worker_id
+        self._lock = Lock()
+        self._last_ms = 0
+        self._sequence = 0
+
+    def next_id(self) -> int:
+        with self._lock:
+            # Never step back with the wall clock: keep counting from the last millisecond
+            ms = max(_now_ms(), self._last_ms)
+            if ms == self._last_ms:
+                self._sequence += 1
+                if self._sequence > MAX_SEQUENCE:
+                    ms, self._sequence = ms + 1, 0
+            else:
+                self._sequence = 0
+            self._last_ms = ms
+            return compose_snowflake(ms, self.worker_id, self._sequence)
+
+    __call__ = next_id
+
+
+def compose_snowflake(ms: int, worker_id: int, sequence: int) -> int:
+    return ((ms - EPOCH_MS) << (WORKER_BITS + SEQUENCE_BITS)) | (worker_id << SEQUENCE_BITS) | sequence
+
+
+def snowflake_time(snowflake: int) -> datetime:
+    """When a snowflake id was generated."""
+    ms = (snowflake >> (WORKER_BITS + SEQUENCE_BITS)) + EPOCH_MS
+    return datetime.fromtimestamp(ms / 1000, tz=timezone.utc)
+
+
+def _default_worker_id(configured: Optional[int]) -> int:
+    # Unset: the pid, good enough to keep one host's workers apart
+    return configured if configured is not None else os.getpid() % (MAX_WORKER_ID + 1)
+
+
+snowflake_ids = SnowflakeIds(_default_worker_id(db_settings.id_worker_id))
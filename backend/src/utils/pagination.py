@@ -0,0 +1,147 @@
+# src/utils/pagination.py
+"""
+Keyset pagination on (created_at, id), newest first.
+
+A page query asks for rows strictly after the last row of the previous page,
+`(created_at, id) < (:created_at, :id)`, so every page costs one index range
+scan no matter how deep it is (OFFSET would read and discard all earlier rows).
+Cursors are opaque url-safe strings; clients just echo `next_cursor` back.
+
+Short ranked lists (recommendations) page by offset instead: their cursors
+name the list they walk, so a client keeps the list its first page came from.
+"""
+import base64
+from datetime import datetime
+from typing import Any, Generic, List, Optional, Tuple, TypeVar
+import orjson
+from fastapi import HTTPException, status
+from pydantic import BaseModel
+from sqlalchemy import DateTime, String, Select, literal, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from sqlalchemy.types import TypeDecorator
+
+T = TypeVar("T")
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+class Page(BaseModel, Generic[T]):
+    """One page of results; `next_cursor` is None on the last page."""
+    items: List[T]
+    next_cursor: Optional[str] = None
+
+
+class _CursorTimestamp(TypeDecorator):
+    """
+    Binds a cursor timestamp the way the column stores it. SQLite keeps
+    `func.now()` defaults as 'YYYY-MM-DD HH:MM:SS' text, which must not be
+    compared against SQLAlchemy's '.ffffff' rendering.
+    """
+    impl = DateTime
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect):
+        if dialect.name == "sqlite":
+            return dialect.type_descriptor(String())
+        return dialect.type_descriptor(DateTime(timezone=True))
+
+    def process_bind_param(self, value, dialect):
+        if value is None or dialect.name != "sqlite":
+            return value
+        text = value.replace(tzinfo=None).strftime("%Y-%m-%d %H:%M:%S")
+        return f"{text}.{value.microsecond:06d}" if value.microsecond else text
+
+
+def _encode(payload: Any) -> str:
+    return base64.urlsafe_b64encode(orjson.dumps(payload)).rstrip(b"=").decode()
+
+
+def _decode(cursor: str) -> Any:
+    padded = cursor + "=" * (-len(cursor) % 4)
+    return orjson.loads(base64.urlsafe_b64decode(padded))
+
+
+def _invalid_cursor() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail="Invalid pagination cursor"
+    )
+
+
+def encode_cursor(created_at: datetime, row_id: Any) -> str:
+    return _encode([created_at.isoformat(), row_id])
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, Any]:
+    """Inverse of encode_cursor; a tampered cursor is a 400."""
+    try:
+        created_at, row_id = _decode(cursor)
+        return datetime.fromisoformat(created_at), row_id
+    except (ValueError, TypeError, orjson.JSONDecodeError):
+        raise _invalid_cursor()
+
+
+def encode_offset_cursor(source: str, offset: int) -> str:
+    """Cursor for position `offset` of the ranked list `source`."""
+    return _encode({"source": source, "offset": offset})
+
+
+def decode_offset_cursor(cursor: str) -> Optional[Tuple[str, int]]:
+    """(source, offset) of an offset cursor; None for a keyset cursor."""
+    try:
+        payload = _decode(cursor)
+    except (ValueError, TypeError, orjson.JSONDecodeError):
+        raise _invalid_cursor()
+    if not isinstance(payload, dict):
+        return None
+    source, offset = payload.get("source"), payload.get("offset")
+    if not isinstance(source, str) or not isinstance(offset, int) or offset < 0:
+        raise _invalid_cursor()
+    return source, offset
+
+
+def offset_page(items: List[Any], source: str, offset: int, limit: int) -> Page:
+    """
+    One page of a ranked list, from `items` = the list's entries starting at
+    `offset`, fetched with one extra to detect the last page.
+    """
+    next_cursor = encode_offset_cursor(source, offset + limit) if len(items) > limit else None
+    return Page(items=items[:limit], next_cursor=next_cursor)
+
+
+def keyset_query(stmt: Select, created_col, id_col, cursor: Optional[str], limit: int) -> Select:
+    """
+    `stmt` ordered newest first, starting after `cursor`, fetching one extra row
+    to detect the last page. The key columns are appended to each result row.
+    """
+    stmt = stmt.add_columns(created_col, id_col)
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        stmt = stmt.where(
+            tuple_(created_col, id_col) < tuple_(literal(created_at, _CursorTimestamp()), literal(row_id))
+        )
+    return stmt.order_by(created_col.desc(), id_col.desc()).limit(limit + 1)
+
+
+def keyset_page(rows: List[Any], limit: int) -> Page:
+    """Build the Page from rows returned by keyset_query."""
+    items = [row[0] for row in rows[:limit]]
+    next_cursor = None
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        next_cursor = encode_cursor(last[-2], last[-1])
+    return Page(items=items, next_cursor=next_cursor)
+
+
+def paginate(db: Session, stmt: Select, created_col, id_col, cursor: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE) -> Page:
+    """Run one keyset page of `stmt` (a select of a single entity) on a Session."""
+    rows = db.execute(keyset_query(stmt, created_col, id_col, cursor, limit)).all()
+    return keyset_page(rows, limit)
+
+
+async def paginate_async(db: AsyncSession, stmt: Select, created_col, id_col, cursor: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE) -> Page:
+    """paginate() on an AsyncSession."""
+    rows = (await db.execute(keyset_query(stmt, created_col, id_col, cursor, limit))).all()
+    return keyset_page(rows, limit)
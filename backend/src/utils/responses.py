@@ -0,0 +1,89 @@
+# src/utils/responses.py
+"""
+orjson response rendering.
+
+`ORJSONResponse` is the app-wide default response class. `trusted_response`
+(a list) and `trusted_page` (a Page) are the opt-in fast path for list
+endpoints whose service output already has the response schema's shape: the
+fields are picked straight off the objects and dumped to bytes, skipping
+FastAPI's response_model validation pass. Fields the objects don't have get
+the schema's default, as with validation. Keep `response_model` on the route
+for the OpenAPI docs.
+"""
+from functools import lru_cache
+from operator import attrgetter, itemgetter
+from typing import Any, Callable, Iterable, Tuple, Type
+import orjson
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel
+from src.utils.pagination import Page
+
+__all__ = ["ORJSONResponse", "trusted_content", "trusted_json", "trusted_page", "trusted_response"]
+
+# Aware UTC datetimes as "...Z", like pydantic renders them on the validated path
+_OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+
+
+class _TrustedResponse(ORJSONResponse):
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=_OPTIONS)
+
+
+@lru_cache(maxsize=None)
+def _field_names(schema: Type[BaseModel]) -> Tuple[str, ...]:
+    return tuple(schema.model_fields)
+
+
+def _row_builder(item: Any, schema: Type[BaseModel]) -> Callable[[Any], dict]:
+    fields = _field_names(schema)
+    if isinstance(item, dict):
+        present = tuple(field for field in fields if field in item)
+    else:
+        present = tuple(field for field in fields if hasattr(item, field))
+    template = {}  # schema field order, with defaults for fields the items don't carry
+    for field in fields:
+        info = schema.model_fields[field]
+        if field not in present:
+            if info.is_required():
+                raise AttributeError(f"{type(item).__name__} has no field {field!r} required by {schema.__name__}")
+            template[field] = info.get_default(call_default_factory=True)
+        else:
+            template[field] = None
+    getter = (itemgetter if isinstance(item, dict) else attrgetter)(*present)
+    if len(present) == 1:
+        return lambda row: {**template, present[0]: getter(row)}
+
+    def build(row: Any) -> dict:
+        out = template.copy()
+        out.update(zip(present, getter(row)))
+        return out
+    return build
+
+
+def trusted_content(items: Iterable[Any], schema: Type[BaseModel]) -> list[dict]:
+    """Plain dicts holding `schema`'s fields, read from ORM objects or dicts without validation."""
+    items = list(items)
+    if not items:
+        return []
+    build = _row_builder(items[0], schema)
+    return [build(item) for item in items]
+
+
+def trusted_json(items: Iterable[Any], schema: Type[BaseModel]) -> bytes:
+    """`trusted_content` serialized to JSON bytes."""
+    return orjson.dumps(trusted_content(items, schema), option=_OPTIONS)
+
+
+def trusted_response(items: Iterable[Any], schema: Type[BaseModel], status_code: int = 200) -> ORJSONResponse:
+    """
+    Response for trusted service output, bypassing response_model validation.
+    Only use it where the service guarantees the schema's shape and types.
+    """
+    return _TrustedResponse(trusted_content(items, schema), status_code=status_code)
+
+
+def trusted_page(page: Page, schema: Type[BaseModel], status_code: int = 200) -> ORJSONResponse:
+    """`trusted_response` for a Page of items: {"items": [...], "next_cursor": ...}."""
+    return _TrustedResponse(
+        {"items": trusted_content(page.items, schema), "next_cursor": page.next_cursor}, status_code=status_code
+    )
@@ -0,0 +1,102 @@
+# src/utils/schema_lint.py
+"""
+Foreign-key checks over SQLAlchemy metadata.
+
+- type: an FK column whose type differs from the column it references. Joins
+  on it compare across types, which on PostgreSQL means a cast on one side
+  and no index on that side.
+- index: an FK column that doesn't lead any index, unique constraint or
+  primary key. Joining from the parent and deleting parent rows then scan the
+  child table.
+
+Run from backend/ (exits 1 when there are problems):
+    python -m src.utils.schema_lint
+"""
+import re
+import sys
+from dataclasses import dataclass
+from typing import Iterable, List, Sequence
+from sqlalchemy import Column, MetaData, Table
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Dialect
+
+DIALECTS: Sequence[Dialect] = (postgresql.dialect(), sqlite.dialect())
+
+
+@dataclass(frozen=True)
+class SchemaProblem:
+    kind: str  # "type" or "index"
+    table: str
+    columns: tuple
+    detail: str
+
+    def __str__(self) -> str:
+        return f"{self.table}({', '.join(self.columns)}): {self.detail}"
+
+
+def _type_name(column: Column, dialect: Dialect) -> str:
+    """The column's DDL type on `dialect`, without length (VARCHAR(36) joins VARCHAR fine)."""
+    compiled = column.type.dialect_impl(dialect).compile(dialect=dialect)
+    return re.sub(r"\(.*\)", "", compiled).strip().upper()
+
+
+def _leading_columns(table: Table) -> List[tuple]:
+    """Column-name tuples that some index on `table` starts with."""
+    keys = [tuple(column.name for column in index.columns) for index in table.indexes]
+    keys += [
+        tuple(column.name for column in constraint.columns)
+        for constraint in table.constraints
+        if constraint.__visit_name__ in ("unique_constraint", "primary_key_constraint")
+    ]
+    keys += [(column.name,) for column in table.columns if column.index or column.unique]
+    return [key for key in keys if key]
+
+
+def _is_indexed(columns: tuple, table: Table) -> bool:
+    return any(key[:len(columns)] == columns for key in _leading_columns(table))
+
+
+def check_metadata(metadata: MetaData, dialects: Iterable[Dialect] = DIALECTS) -> List[SchemaProblem]:
+    """Every FK type mismatch and unindexed FK in `metadata`."""
+    dialects = list(dialects)
+    problems: List[SchemaProblem] = []
+    for table in metadata.sorted_tables:
+        for constraint in sorted(table.foreign_key_constraints, key=lambda c: c.column_keys):
+            columns = tuple(constraint.column_keys)
+            for element in constraint.elements:
+                for dialect in dialects:
+                    local, remote = _type_name(element.parent, dialect), _type_name(element.column, dialect)
+                    if local != remote:
+                        problems.append(SchemaProblem(
+                            "type", table.name, (element.parent.name,),
+                            f"{local} references {element.column.table.name}.{element.column.name} "
+                            f"{remote} on {dialect.name}",
+                        ))
+                        break
+            if not _is_indexed(columns, table):
+                problems.append(SchemaProblem("index", table.name, columns, "foreign key has no index"))
+    return problems
+
+
+def main() -> int:
+    # pylint: disable=import-outside-toplevel,unused-import
+    from src.config.database import Base
+    from src.models.user import User  # noqa: F401
+    from src.models.refresh_token import RefreshToken  # noqa: F401
+    from src.models.channel import Channel  # noqa: F401
+    from src.models.recommendation import Recommendation  # noqa: F401
+    from src.models.videos.video import Video  # noqa: F401
+    from src.models.videos.video_view import VideoView  # noqa: F401
+    from src.models.videos.video_like import VideoLike  # noqa: F401
+    from src.models.videos.video_comment import VideoComment  # noqa: F401
+    from src.models.videos.trending_score import TrendingScore  # noqa: F401
+
+    problems = check_metadata(Base.metadata)
+    for problem in problems:
+        print(f"{problem.kind:5} {problem}")
+    print(f"{len(problems)} problem(s) in {len(Base.metadata.tables)} tables")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
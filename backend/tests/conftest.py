@@ -0,0 +1,84 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool, StaticPool
+from src.config.database import Base
+from src.services.auth.token_versions import token_versions
+from src.utils.db_metrics import instrument_queries
+# Register every model so relationships resolve
+from src.models.user import User  # noqa: F401
+from src.models.refresh_token import RefreshToken  # noqa: F401
+from src.models.channel import Channel  # noqa: F401
+from src.models.recommendation import Recommendation  # noqa: F401
+from src.models.videos.video import Video  # noqa: F401
+from src.models.videos.video_view import VideoView  # noqa: F401
+from src.models.videos.video_like import VideoLike  # noqa: F401
+from src.models.videos.video_comment import VideoComment  # noqa: F401
+from src.models.videos.trending_score import TrendingScore  # noqa: F401
+
+
+@pytest.fixture(autouse=True)
+def reset_token_versions():
+    """The version map mirrors the users table, and every test starts with a fresh one."""
+    token_versions.clear()
+    yield
+    token_versions.clear()
+
+
+@pytest.fixture
+def engine():
+    test_engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=test_engine)
+    instrument_queries(test_engine)
+    yield test_engine
+    test_engine.dispose()
+
+
+@pytest.fixture
+def session_factory(engine):
+    return sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+@pytest.fixture
+def db(session_factory):
+    session = session_factory()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def override_get_db(session_factory):
+    def _get_db():
+        session = session_factory()
+        try:
+            yield session
+        finally:
+            session.close()
+    return _get_db
+
+
+@pytest.fixture
+def async_session_factory(tmp_path):
+    """Async sessions on a SQLite file (NullPool: connections never outlive a loop)."""
+    path = tmp_path / "async.db"
+    sync_engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=sync_engine)
+    sync_engine.dispose()
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}", poolclass=NullPool)
+    instrument_queries(async_engine.sync_engine)
+    return async_sessionmaker(async_engine, expire_on_commit=False)
+
+
+@pytest.fixture
+def override_get_async_db(async_session_factory):
+    async def _get_async_db():
+        async with async_session_factory() as session:
+            yield session
+    return _get_async_db
@@ -0,0 +1,66 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from src.api.auth import router as auth_router
+from src.config.database import get_async_db
+from src.services.auth.async_auth_service import AsyncAuthService
+from src.services.auth.user_cache import UserCache, MemoryUserCacheBackend
+from src.services.dependencies import get_async_auth_service
+
+
+@pytest.fixture
+def client(override_get_async_db):
+    cache = UserCache(MemoryUserCacheBackend())
+    app = FastAPI()
+    app.include_router(auth_router)
+
+    async def _get_auth_service():
+        async for db in override_get_async_db():
+            yield AsyncAuthService(db, cache)
+
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    app.dependency_overrides[get_async_auth_service] = _get_auth_service
+    return TestClient(app)
+
+
+def test_register_login_refresh_logout(client):
+    response = client.post("/auth/register", json={
+        "email": "async@example.com", "username": "asyncuser", "password": "secret-pw"
+    })
+    assert response.status_code == 200
+    assert response.json()["username"] == "asyncuser"
+
+    response = client.post("/auth/login", json={
+        "email": "async@example.com", "password": "secret-pw", "device": "phone"
+    })
+    assert response.status_code == 200
+    tokens = response.json()
+    headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+
+    response = client.get("/auth/verify-token", headers=headers)
+    assert response.status_code == 200
+    assert response.json()["email"] == "async@example.com"
+
+    response = client.post("/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert response.status_code == 200
+    rotated = response.json()
+
+    response = client.post("/auth/logout", headers=headers, json={"refresh_token": rotated["refresh_token"]})
+    assert response.status_code == 200
+    response = client.post("/auth/refresh", json={"refresh_token": rotated["refresh_token"]})
+    assert response.status_code == 401
+
+
+def test_login_wrong_password(client):
+    client.post("/auth/register", json={
+        "email": "wrong@example.com", "username": "wronguser", "password": "right-pw"
+    })
+    response = client.post("/auth/login", json={"email": "wrong@example.com", "password": "nope"})
+    assert response.status_code == 401
+    assert response.json()["detail"] == "Incorrect email or password"
+
+
+def test_requires_token(client):
+    assert client.get("/auth/me").status_code == 401
+    response = client.get("/auth/me", headers={"Authorization": "Bearer not-a-jwt"})
+    assert response.status_code == 401
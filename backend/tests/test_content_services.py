@@ -0,0 +1,203 @@
+import asyncio
+import pytest
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event, insert, update
+from src.api import channels, recommendations, videos
+from src.schemas.user import TokenData
+from src.config.database import get_async_db
+from src.models.channel import Channel
+from src.models.user import User
+from src.models.videos.video import Video
+from src.models.videos.video_like import VideoLike
+from src.schemas.channel import ChannelDetails
+from src.schemas.video import VideoCreate, VideoOut
+from src.services import video_service
+from src.services.channel_service import ChannelService
+from src.services.dependencies import get_token_claims
+from src.services.recommendation_cache import RecommendationCache, get_recommendation_cache
+from src.services.recommendation_service import RecommendationService
+from src.services.video_counters import VideoCounterBuffer
+from src.services.video_service import VideoService
+from src.utils.db_metrics import query_budget
+from src.utils.pagination import Page
+
+
+@pytest.fixture
+def seeded(async_session_factory):
+    async def seed():
+        async with async_session_factory() as session:
+            owner, viewer = User(email="owner@example.com", username="owner"), User(email="viewer@example.com", username="viewer")
+            session.add_all([owner, viewer])
+            await session.flush()
+            channel = Channel(name="content", owner_id=owner.id)
+            session.add(channel)
+            await session.flush()
+            session.add_all(
+                Video(id=f"cv{i}", title=f"v{i}", video_url="u", uploader_id=owner.id, channel_id=channel.id)
+                for i in range(3)
+            )
+            await session.commit()
+            return owner, viewer, channel.id
+
+    return asyncio.run(seed())
+
+
+@pytest.fixture
+def client(override_get_async_db):
+    app = FastAPI()
+    for module in (channels, recommendations, videos):
+        app.include_router(module.router)
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    # Pages cached by one test must not be served to the next
+    cache = RecommendationCache()
+    app.dependency_overrides[get_recommendation_cache] = lambda: cache
+    return TestClient(app)
+
+
+def test_channel_route_is_one_async_query(client, seeded):
+    _, _, channel_id = seeded
+    with query_budget(1):
+        response = client.get(f"/channels/{channel_id}")
+    assert response.status_code == 200
+    assert response.json()["videos_count"] == 3
+    assert client.get("/channels/999").status_code == 404
+
+
+def test_video_routes(client, seeded):
+    _, _, channel_id = seeded
+    video = client.get("/video/cv1").json()
+    assert video["title"] == "v1" and video["channel_id"] == channel_id
+    assert client.get("/video/missing").status_code == 404
+
+    page = client.get("/video/", params={"channel_id": channel_id, "limit": 2}).json()
+    rest = client.get("/video/", params={"channel_id": channel_id, "cursor": page["next_cursor"]}).json()
+    assert len(page["items"]) == 2 and len(rest["items"]) == 1 and rest["next_cursor"] is None
+    assert client.get("/video/", params={"channel_id": 999}).json()["items"] == []
+
+
+def test_recommendation_routes(client, seeded):
+    owner, viewer, _ = seeded
+    response = client.post("/recommendations/", json={"user_id": viewer.id, "video_id": "missing", "score": 0.5})
+    assert response.status_code == 404
+    response = client.post("/recommendations/", json={"user_id": viewer.id, "video_id": "cv2", "score": 0.5})
+    assert response.status_code == 200
+    assert response.json()["video_id"] == "cv2"
+
+    assert len(client.get("/recommendations/", params={"user_id": viewer.id}).json()["items"]) == 3
+    assert client.get("/recommendations/", params={"user_id": owner.id}).status_code == 404
+
+
+def test_create_video_overlaps_signing_with_the_channel_lookup(seeded, async_session_factory, monkeypatch):
+    owner, viewer, channel_id = seeded
+    signed = []
+    monkeypatch.setattr(VideoService, "get_signed_url", lambda self, blob_name: signed.append(blob_name) or f"https://signed/{blob_name}")
+
+    async def create(user):
+        async with async_session_factory() as session:
+            return await VideoService(session).create_video(VideoCreate(title="new"), user)
+
+    created = asyncio.run(create(owner))
+    assert created.signed_url == f"https://signed/videos/{created.id}.mp4"
+
+    async def stored():
+        async with async_session_factory() as session:
+            return await session.get(Video, created.id)
+
+    assert asyncio.run(stored()).channel_id == channel_id
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(create(viewer))  # no channel to upload to
+    assert error.value.status_code == 400
+    assert len(signed) == 2
+
+
+def test_list_routes_take_the_trusted_fast_path(client, seeded, async_session_factory, monkeypatch):
+    _, viewer, _ = seeded
+    rendered = []
+    for module in (channels, recommendations):
+        def spy(page, schema, _trusted_page=module.trusted_page):
+            rendered.append(schema.__name__)
+            return _trusted_page(page, schema)
+        monkeypatch.setattr(module, "trusted_page", spy)
+
+    async def validated():
+        async with async_session_factory() as session:
+            channel_page = await ChannelService(session).get_all_channels()
+            recommendation_page = await RecommendationService(session).get_recommendations(viewer.id)
+            return (
+                Page[ChannelDetails].model_validate(channel_page, from_attributes=True).model_dump(mode="json"),
+                Page[VideoOut].model_validate(recommendation_page, from_attributes=True).model_dump(mode="json"),
+            )
+
+    expected_channels, expected_recommendations = asyncio.run(validated())
+    assert client.get("/channels/").json() == expected_channels
+    assert client.get("/recommendations/", params={"user_id": viewer.id}).json() == expected_recommendations
+    assert rendered == ["ChannelDetails", "VideoOut"]
+
+
+def test_like_route_buffers_the_vote_change(client, seeded, monkeypatch):
+    _, viewer, _ = seeded
+    counters = VideoCounterBuffer(session_factory=None)
+    monkeypatch.setattr(video_service, "video_counters", counters)
+    client.app.dependency_overrides[get_token_claims] = lambda: TokenData(user_id=viewer.id)
+
+    def rating(response):
+        assert response.status_code == 200
+        body = response.json()
+        return body["liked"], body["like_count"], body["dislike_count"]
+
+    assert rating(client.put("/video/cv0/like", json={"liked": True})) == (True, 1, 0)
+    assert rating(client.put("/video/cv0/like", json={"liked": True})) == (True, 1, 0)  # same vote again
+    assert rating(client.put("/video/cv0/like", json={"liked": False})) == (False, 0, 1)
+    assert rating(client.delete("/video/cv0/like")) == (None, 0, 0)
+    assert client.put("/video/missing/like", json={"liked": True}).status_code == 404
+    assert counters.recorded == 3
+
+
+def test_vote_raced_by_another_request_is_counted_once(async_session_factory, seeded):
+    _, viewer, _ = seeded
+    counters = VideoCounterBuffer(session_factory=None)
+    engine = async_session_factory.kw["bind"].sync_engine
+    other = create_engine(engine.url.set(drivername="sqlite"))
+    raced = []
+
+    def other_request_votes_first(conn, cursor, statement, *args):
+        # Another request of the same user changes the vote between our read and our write
+        if statement.startswith(("INSERT INTO video_likes", "UPDATE video_likes")) and not raced:
+            raced.append(statement)
+            with other.begin() as race:
+                if statement.startswith("INSERT"):
+                    race.execute(insert(VideoLike).values(id=1, video_id="cv0", user_id=viewer.id, is_liked=True))
+                else:
+                    race.execute(update(VideoLike).values(is_liked=False))
+
+    async def vote(liked):
+        async with async_session_factory() as db:
+            return await VideoService(db, counters=counters).rate_video("cv0", viewer.id, liked)
+
+    event.listen(engine, "before_cursor_execute", other_request_votes_first)
+    try:
+        assert asyncio.run(vote(True)).liked is True  # the other request already liked it
+        assert counters.recorded == 0
+        raced.clear()
+        assert asyncio.run(vote(False)).liked is False  # ... and already switched it to a dislike
+        assert counters.recorded == 0
+        assert asyncio.run(vote(None)).liked is None
+        assert counters.recorded == 1 and counters.pending_deltas("cv0")["dislike_count"] == -1
+    finally:
+        event.remove(engine, "before_cursor_execute", other_request_votes_first)
+        other.dispose()
+
+
+def test_malformed_ids_are_404_on_native_uuid_columns(client, seeded, async_session_factory, monkeypatch):
+    _, viewer, _ = seeded
+    # PostgreSQL would fail the whole query casting these; SQLite only pretends here
+    monkeypatch.setattr(async_session_factory.kw["bind"].sync_engine.dialect, "supports_native_uuid", True)
+    client.app.dependency_overrides[get_token_claims] = lambda: TokenData(user_id=viewer.id)
+
+    with query_budget(0):
+        assert client.get("/video/not-a-uuid").status_code == 404
+        assert client.get("/video/not-a-uuid/related").status_code == 404
+        assert client.put("/video/not-a-uuid/like", json={"liked": True}).status_code == 404
+        response = client.post("/recommendations/", json={"user_id": viewer.id, "video_id": "not-a-uuid", "score": 1.0})
+        assert response.status_code == 404
@@ -0,0 +1,76 @@
+import threading
+import pytest
+from sqlalchemy import create_engine, exc, text
+from sqlalchemy.ext.asyncio import create_async_engine
+from src.config.database import (
+    ENGINE_PROFILES, DatabaseSettings, async_database_url, engine_options
+)
+from src.utils.db_metrics import instrument_pool, pool_metrics
+
+
+def test_profile_overrides_and_validation():
+    settings = DatabaseSettings(database_url="sqlite://", db_profile="prod", db_pool_size=3, db_echo=True)
+    profile = settings.engine_profile()
+    assert profile.pool_size == 3
+    assert profile.echo is True
+    assert profile.max_overflow == ENGINE_PROFILES["prod"].max_overflow
+
+    with pytest.raises(ValueError):
+        DatabaseSettings(database_url="sqlite://", db_profile="staging").engine_profile()
+
+
+def test_engine_options_per_driver():
+    prod = ENGINE_PROFILES["prod"]
+    asyncpg = engine_options("postgresql+asyncpg://u@h/db", prod, is_async=True)
+    assert asyncpg["echo"] is False
+    assert asyncpg["pool_size"] == prod.pool_size
+    assert asyncpg["connect_args"]["prepared_statement_cache_size"] == prod.prepared_statement_cache_size
+    assert asyncpg["connect_args"]["server_settings"] == {"statement_timeout": str(prod.statement_timeout_ms)}
+
+    psycopg = engine_options("postgresql://u@h/db", prod)
+    assert psycopg["connect_args"] == {"options": f"-c statement_timeout={prod.statement_timeout_ms}"}
+
+    no_cache = engine_options("postgresql+asyncpg://u@h/db", ENGINE_PROFILES["test"], is_async=True)
+    assert no_cache["connect_args"]["statement_cache_size"] == 0
+
+    memory = engine_options("sqlite://", prod)
+    assert "pool_size" not in memory
+    assert async_database_url("sqlite:///./x.db") == "sqlite+aiosqlite:///./x.db"
+
+
+def test_async_engine_gets_pool_sizing(tmp_path):
+    url = f"sqlite+aiosqlite:///{tmp_path / 'a.db'}"
+    async_engine = create_async_engine(url, **engine_options(url, ENGINE_PROFILES["prod"], is_async=True))
+    assert async_engine.pool.size() == ENGINE_PROFILES["prod"].pool_size
+    assert async_engine.echo is False
+
+
+def test_pool_metrics_track_waits_timeouts_and_invalidations(tmp_path):
+    url = f"sqlite:///{tmp_path / 'p.db'}"
+    options = engine_options(url, ENGINE_PROFILES["test"])
+    options.update(pool_size=1, max_overflow=0, pool_timeout=0.2)
+    engine = create_engine(url, **options)
+    metrics = instrument_pool(engine.pool)
+
+    held = engine.connect()
+    with pytest.raises(exc.TimeoutError):
+        engine.connect()
+
+    # A waiter gets the connection once it is returned
+    release = threading.Timer(0.05, held.close)
+    release.start()
+    with engine.connect() as conn:
+        conn.execute(text("select 1"))
+        conn.invalidate()
+    release.join()
+
+    stats = metrics.snapshot(engine.pool)
+    assert stats["timeouts"] == 1
+    assert stats["waits"] == 2
+    assert stats["wait_seconds_max"] >= 0.05
+    assert stats["invalidations"] == 1
+    assert stats["checked_out"] == 0
+    assert stats["overflow"] <= 0
+
+    engine.dispose()
+    assert pool_metrics(engine.pool) is metrics
@@ -0,0 +1,54 @@
+import asyncio
+import threading
+import pytest
+from fastapi import HTTPException
+from src.utils.hashing import HashingExecutor, HashingQueueFull
+
+
+def test_runs_off_event_loop_thread():
+    executor = HashingExecutor(max_workers=2, max_queue=0)
+
+    async def main():
+        return await executor.run(threading.get_ident)
+
+    try:
+        assert asyncio.run(main()) != threading.get_ident()
+    finally:
+        executor.shutdown()
+
+
+def test_inline_mode_runs_on_event_loop_thread():
+    executor = HashingExecutor(max_workers=0)
+
+    async def main():
+        return await executor.run(threading.get_ident)
+
+    assert asyncio.run(main()) == threading.get_ident()
+
+
+def test_rejects_when_queue_full():
+    executor = HashingExecutor(max_workers=1, max_queue=1)
+    release = threading.Event()
+
+    async def main():
+        jobs = [asyncio.create_task(executor.run(release.wait)) for _ in range(2)]
+        await asyncio.sleep(0)
+        with pytest.raises(HashingQueueFull) as exc_info:
+            await executor.run(release.wait)
+        release.set()
+        await asyncio.gather(*jobs)
+        return exc_info.value
+
+    try:
+        error = asyncio.run(main())
+    finally:
+        executor.shutdown()
+    assert isinstance(error, HTTPException)
+    assert error.status_code == 503
+    assert executor.rejected == 1
+    assert executor.pending == 0
+
+
+def test_unknown_kind():
+    with pytest.raises(ValueError):
+        HashingExecutor(kind="fiber")
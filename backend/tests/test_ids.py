@@ -0,0 +1,50 @@
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+import pytest
+from sqlalchemy.dialects import postgresql, sqlite
+from src.utils import ids
+from src.utils.ids import SnowflakeIds, compose_snowflake, fits_uuid_column, snowflake_time, uuid7
+
+
+def test_uuid7_is_version_7_and_increasing():
+    values = [uuid7() for _ in range(5000)]
+    assert values == sorted(values) and len(set(values)) == len(values)
+    parsed = uuid.UUID(values[0])
+    assert parsed.version == 7 and parsed.variant == uuid.RFC_4122
+    ms = parsed.int >> 80
+    assert abs(ms / 1000 - datetime.now(timezone.utc).timestamp()) < 5
+
+
+def test_fits_uuid_column_only_checks_native_uuid_dialects():
+    assert fits_uuid_column(postgresql.dialect(), uuid7())
+    assert not fits_uuid_column(postgresql.dialect(), "cv1")
+    assert fits_uuid_column(sqlite.dialect(), "cv1")  # text column: a miss, not an error
+
+
+def test_snowflakes_are_unique_and_increasing_across_threads():
+    generator = SnowflakeIds(worker_id=7)
+    with ThreadPoolExecutor(8) as pool:
+        batches = list(pool.map(lambda _: [generator.next_id() for _ in range(2000)], range(8)))
+    for batch in batches:
+        assert batch == sorted(batch)
+    everything = [value for batch in batches for value in batch]
+    assert len(set(everything)) == len(everything)
+    assert all(0 < value < 2**63 for value in everything)
+    assert {(value >> 12) & 1023 for value in everything} == {7}
+    assert abs(snowflake_time(everything[0]) - datetime.now(timezone.utc)) < timedelta(seconds=5)
+
+
+def test_snowflake_sequence_overflow_and_clock_going_back(monkeypatch):
+    now = ids.EPOCH_MS + 10_000
+    monkeypatch.setattr(ids, "_now_ms", lambda: now)
+    generator = SnowflakeIds()
+    values = [generator.next_id() for _ in range(4097)]
+    assert values[0] == compose_snowflake(now, 0, 0)
+    assert values[-1] == compose_snowflake(now + 1, 0, 0)  # borrowed the next millisecond
+
+    now -= 5000  # clock stepped back
+    assert generator.next_id() == compose_snowflake(now + 5001, 0, 1)
+
+    with pytest.raises(ValueError):
+        SnowflakeIds(worker_id=1024)
@@ -0,0 +1,65 @@
+import pytest
+from sqlalchemy import select
+from sqlalchemy.exc import InvalidRequestError
+from src.models.channel import Channel
+from src.models.loaders import (
+    CHANNEL_WITH_OWNER_AND_COUNTS, RECOMMENDATION_WITH_VIDEO, USER_ONLY, VIDEO_WITH_CHANNEL_AND_COUNTS
+)
+from src.models.recommendation import Recommendation
+from src.models.user import User
+from src.models.videos.video import Video
+from src.models.videos.video_comment import VideoComment
+from src.models.videos.video_view import VideoView
+from src.utils.db_metrics import query_budget
+
+
+@pytest.fixture
+def seeded(db):
+    user = User(email="loader@example.com", username="loader")
+    db.add(user)
+    db.flush()
+    channel = Channel(name="loaders", owner_id=user.id)
+    db.add(channel)
+    db.flush()
+    db.add_all(
+        Video(id=f"lv{i}", title=f"v{i}", video_url="u", uploader_id=user.id, channel_id=channel.id)
+        for i in range(3)
+    )
+    db.add_all(VideoView(video_id=f"lv{i}", user_id=user.id) for i in range(3))
+    db.add_all(VideoComment(video_id="lv0", user_id=user.id, content=str(i)) for i in range(2))
+    db.add(Recommendation(user_id=user.id, video_id="lv1", channel_id=channel.id, score=0.5))
+    db.commit()
+    ids = user.id, channel.id
+    db.expunge_all()
+    return ids
+
+
+def test_user_load_is_one_query_and_collections_raise(db, seeded):
+    user_id, _ = seeded
+    with query_budget(1):
+        user = db.scalars(select(User).options(*USER_ONLY).where(User.id == user_id)).one()
+    with pytest.raises(InvalidRequestError):
+        user.video_views
+    with pytest.raises(InvalidRequestError):
+        db.scalars(select(User).options(*USER_ONLY)).one().videos
+
+
+def test_channel_bundle_loads_owner_and_counts_in_one_query(db, seeded):
+    _, channel_id = seeded
+    with query_budget(1):
+        channel = db.scalars(select(Channel).options(*CHANNEL_WITH_OWNER_AND_COUNTS).where(Channel.id == channel_id)).one()
+        assert channel.owner.email == "loader@example.com"
+        assert channel.videos_count == 3
+    with pytest.raises(InvalidRequestError):
+        channel.videos
+
+
+def test_video_and_recommendation_bundles(db, seeded):
+    with query_budget(1):
+        videos = db.scalars(select(Video).options(*VIDEO_WITH_CHANNEL_AND_COUNTS).order_by(Video.id)).all()
+        assert [video.comment_count for video in videos] == [2, 0, 0]
+        assert {video.channel.name for video in videos} == {"loaders"}
+
+    with query_budget(1):
+        recommendation = db.scalars(select(Recommendation).options(*RECOMMENDATION_WITH_VIDEO)).one()
+        assert recommendation.video.channel.name == "loaders"
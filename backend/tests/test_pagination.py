@@ -0,0 +1,162 @@
+import asyncio
+from datetime import datetime, timedelta
+import pytest
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+from src.api.channels import router as channels_router
+from src.config.database import get_async_db
+from src.models.channel import Channel
+from src.models.user import User
+from src.models.videos.video import Video
+from src.services.recommendation_service import RecommendationService
+from src.utils.pagination import decode_cursor, encode_cursor, encode_offset_cursor, paginate, paginate_async
+
+
+@pytest.fixture
+def owner(db):
+    user = User(email="pager@example.com", username="pager")
+    db.add(user)
+    db.commit()
+    return user
+
+
+def collect(fetch, limit):
+    pages, cursor = [], None
+    for _ in range(20):  # a cursor that doesn't advance must fail, not hang
+        page = fetch(cursor, limit)
+        pages.append([item.id for item in page.items])
+        cursor = page.next_cursor
+        if cursor is None:
+            return pages
+    pytest.fail("pagination did not terminate")
+
+
+def test_pages_are_complete_without_duplicates_on_timestamp_ties(db, owner):
+    # server_default timestamps have one-second resolution: all rows tie on created_at
+    db.add_all(Channel(name=f"c{i}", owner_id=owner.id) for i in range(25))
+    db.commit()
+
+    stmt = select(Channel)
+    pages = collect(lambda cursor, limit: paginate(db, stmt, Channel.created_at, Channel.id, cursor, limit), 10)
+    assert [len(page) for page in pages] == [10, 10, 5]
+    ids = [channel_id for page in pages for channel_id in page]
+    assert ids == sorted(ids, reverse=True) and len(set(ids)) == 25
+
+
+def test_pages_follow_created_at_then_id(async_session_factory):
+    start = datetime(2026, 1, 1, 12, 0, 0, 500)
+
+    async def seed():
+        async with async_session_factory() as session:
+            owner = User(email="pager@example.com", username="pager")
+            session.add(owner)
+            await session.flush()
+            channel = Channel(name="videos", owner_id=owner.id)
+            session.add(channel)
+            await session.flush()
+            session.add_all(
+                Video(id=f"p{i:02d}", title="t", video_url="u", uploader_id=owner.id + 1, channel_id=channel.id,
+                      created_at=start + timedelta(seconds=i // 2))
+                for i in range(7)
+            )
+            await session.commit()
+            return owner.id
+
+    async def fetch(owner_id, cursor, limit):
+        async with async_session_factory() as session:
+            return await RecommendationService(session).get_recommendations(owner_id, cursor, limit)
+
+    owner_id = asyncio.run(seed())
+    pages = collect(lambda cursor, limit: asyncio.run(fetch(owner_id, cursor, limit)), 3)
+    assert pages == [["p06", "p05", "p04"], ["p03", "p02", "p01"], ["p00"]]
+
+
+class RankedEngine:
+    """Item-item ranking stub: the same fixed list for every user."""
+    def __init__(self, video_ids):
+        self.video_ids = video_ids
+
+    async def recommend_for_user(self, db, user_id, limit):
+        return [(video_id, 1.0) for video_id in self.video_ids[:limit]]
+
+
+def test_item_item_recommendations_page_by_offset(async_session_factory):
+    async def seed():
+        async with async_session_factory() as session:
+            owner, viewer = User(email="owner@example.com", username="owner"), User(email="viewer@example.com", username="viewer")
+            session.add_all([owner, viewer])
+            await session.flush()
+            channel = Channel(name="ranked", owner_id=owner.id)
+            session.add(channel)
+            await session.flush()
+            session.add_all(
+                Video(id=f"r{i}", title="t", video_url="u", uploader_id=owner.id, channel_id=channel.id)
+                for i in range(7)
+            )
+            await session.commit()
+            return viewer.id
+
+    engine = RankedEngine([f"r{i}" for i in (6, 2, 4, 0, 5, 1, 3)])
+
+    async def fetch(viewer_id, cursor, limit):
+        async with async_session_factory() as session:
+            return await RecommendationService(session, engine).get_recommendations(viewer_id, cursor, limit)
+
+    viewer_id = asyncio.run(seed())
+    pages = collect(lambda cursor, limit: asyncio.run(fetch(viewer_id, cursor, limit)), 3)
+    assert pages == [["r6", "r2", "r4"], ["r0", "r5", "r1"], ["r3"]]
+    for cursor in (encode_offset_cursor("elsewhere", 3), encode_offset_cursor("item_item", -1)):
+        with pytest.raises(HTTPException) as error:
+            asyncio.run(fetch(viewer_id, cursor, 3))
+        assert error.value.status_code == 400
+
+
+def test_async_paginate_matches_sync(async_session_factory):
+    async def run():
+        async with async_session_factory() as session:
+            session.add(User(email="async-pager@example.com", username="async-pager"))
+            await session.flush()
+            owner_id = (await session.scalars(select(User.id))).one()
+            session.add_all(Channel(name=f"a{i}", owner_id=owner_id) for i in range(5))
+            await session.commit()
+
+            first = await paginate_async(session, select(Channel), Channel.created_at, Channel.id, limit=3)
+            second = await paginate_async(session, select(Channel), Channel.created_at, Channel.id, first.next_cursor, 3)
+            return [c.id for c in first.items], [c.id for c in second.items], second.next_cursor
+
+    first, second, last = asyncio.run(run())
+    assert first == [5, 4, 3] and second == [2, 1] and last is None
+
+
+def test_cursor_round_trip_and_tampering():
+    created_at = datetime(2026, 3, 1, 8, 30, 15, 123)
+    assert decode_cursor(encode_cursor(created_at, "abc")) == (created_at, "abc")
+    with pytest.raises(HTTPException) as error:
+        decode_cursor("not-a-cursor")
+    assert error.value.status_code == 400
+
+
+def test_channels_route_pages(async_session_factory, override_get_async_db):
+    async def seed():
+        async with async_session_factory() as session:
+            owner = User(email="pager@example.com", username="pager")
+            session.add(owner)
+            await session.flush()
+            session.add_all(Channel(name=f"r{i}", owner_id=owner.id) for i in range(3))
+            await session.commit()
+
+    asyncio.run(seed())
+    app = FastAPI()
+    app.include_router(channels_router)
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    client = TestClient(app)
+
+    first = client.get("/channels/", params={"limit": 2}).json()
+    assert [c["name"] for c in first["items"]] == ["r2", "r1"]
+    assert first["items"][0]["videos_count"] == 0
+    second = client.get("/channels/", params={"limit": 2, "cursor": first["next_cursor"]}).json()
+    assert [c["name"] for c in second["items"]] == ["r0"] and second["next_cursor"] is None
+
+    assert client.get("/channels/", params={"cursor": "garbage"}).status_code == 400
+    assert client.get("/channels/", params={"limit": 1000}).status_code == 422
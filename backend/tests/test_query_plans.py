@@ -0,0 +1,246 @@
+"""
+Hot-path queries must be index lookups on the migrated schema.
+
+The database is built by `alembic upgrade head` (not create_all), so a model
+index that never made it into a migration shows up here as a full scan. Each
+statement is captured from the real service call and run through EXPLAIN.
+Set TEST_POSTGRES_URL to a throwaway database to check PostgreSQL plans too.
+"""
+import asyncio
+import os
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+import pytest
+from alembic import command
+from alembic.autogenerate import compare_metadata
+from alembic.config import Config
+from alembic.migration import MigrationContext
+from sqlalchemy import create_engine, event, func, inspect, select, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import NullPool
+from src.config.database import Base, async_database_url
+from src.models.channel import Channel
+from src.models.recommendation import Recommendation
+from src.models.user import User
+from src.models.videos.video import Video
+from src.models.videos.video_comment import VideoComment
+from src.models.videos.video_like import VideoLike
+from src.models.videos.video_view import VideoView
+from src.services.auth.async_auth_service import AsyncAuthService
+from src.services.auth.token_versions import TokenVersionMap
+from src.services.channel_service import ChannelService
+from src.services.recommendation_service import RecommendationService
+from src.services.video_service import VideoService
+from src.utils.ids import snowflake_time, uuid7
+from src.utils.pagination import keyset_query
+
+ALEMBIC_DIR = Path(__file__).resolve().parents[1] / "alembic"
+HOT_TABLES = {"users", "refresh_tokens", "channels", "videos", "recommendations",
+              "video_views", "video_likes", "video_comments", "recommendation_generations"}
+# Real UUIDs: video ids are a native UUID column on PostgreSQL
+VIDEO_IDS = [uuid7() for _ in range(5)]
+
+
+def alembic_config(monkeypatch, url: str) -> Config:
+    # No ini file: env.py then leaves the test run's logging alone
+    config = Config()
+    config.set_main_option("script_location", str(ALEMBIC_DIR))
+    monkeypatch.setenv("DATABASE_URL", url)
+    return config
+
+
+@pytest.fixture
+def migrated_engine(tmp_path, monkeypatch):
+    url = f"sqlite:///{tmp_path / 'migrated.db'}"
+    command.upgrade(alembic_config(monkeypatch, url), "head")
+    engine = create_engine(url)
+    yield engine
+    engine.dispose()
+
+
+def seed(session: Session) -> int:
+    user = User(email="plans@example.com", username="plans")
+    other = User(email="other@example.com", username="other")
+    session.add_all([user, other])
+    session.flush()
+    channel = Channel(name="plans", owner_id=other.id)
+    session.add(channel)
+    session.flush()
+    start = datetime(2026, 1, 1)
+    for i in range(5):
+        session.add(Video(
+            id=VIDEO_IDS[i], title=f"v{i}", video_url="u", uploader_id=other.id,
+            channel_id=channel.id, created_at=start + timedelta(minutes=i)
+        ))
+    session.flush()
+    for i in range(5):
+        session.add(VideoView(video_id=VIDEO_IDS[i], user_id=user.id, watch_time=i))
+        session.add(VideoLike(video_id=VIDEO_IDS[i], user_id=user.id, is_liked=i % 2 == 0))
+        session.add(VideoComment(video_id=VIDEO_IDS[0], user_id=user.id, content=str(i), created_at=start + timedelta(minutes=i)))
+        session.add(Recommendation(user_id=user.id, video_id=VIDEO_IDS[i], channel_id=channel.id, score=i / 5))
+    session.commit()
+    return user.id
+
+
+def hot_path_statements(engine):
+    """(statement, parameters) of every query the hot paths issue, in order."""
+    with Session(engine) as session:
+        user_id = seed(session)
+        channel_id = session.scalar(select(Channel.id))
+
+    captured = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE")):
+            captured.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        with Session(engine) as session:
+            TokenVersionMap(window_seconds=1860).refresh(session)
+
+            # Video page queries without a service yet
+            comments = select(VideoComment).where(VideoComment.video_id == VIDEO_IDS[0])
+            session.execute(keyset_query(comments, VideoComment.created_at, VideoComment.id, None, 20)).all()
+            session.scalar(select(func.count()).select_from(VideoLike).where(VideoLike.video_id == VIDEO_IDS[0], VideoLike.is_liked))
+            session.scalars(select(VideoView).where(VideoView.user_id == user_id).order_by(VideoView.created_at.desc()).limit(20)).all()
+            session.scalars(select(Recommendation).where(Recommendation.user_id == user_id).order_by(Recommendation.score.desc()).limit(20)).all()
+        asyncio.run(async_hot_paths(engine, capture, user_id, channel_id))
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+    return captured
+
+
+async def async_hot_paths(engine, capture, user_id: int, channel_id: int) -> None:
+    """The AsyncSession services, on an async engine over the same database."""
+    async_engine = create_async_engine(async_database_url(str(engine.url)), poolclass=NullPool)
+    event.listen(async_engine.sync_engine, "before_cursor_execute", capture)
+    try:
+        async with AsyncSession(async_engine) as session:
+            auth = AsyncAuthService(session)
+            await auth.get_user_by_id(user_id)
+            await auth.get_user_by_email("plans@example.com")
+            await auth.revoke_token_family("family")
+            await auth.revoke_user_tokens(user_id)
+            await auth.purge_expired_tokens()
+
+            channels = ChannelService(session)
+            page = await channels.get_all_channels(limit=1)
+            await channels.get_all_channels(cursor=page.next_cursor, limit=1)
+            await channels.get_channel(channel_id)
+
+            recommendations = RecommendationService(session)
+            page = await recommendations.get_recommendations(user_id, limit=2)
+            await recommendations.get_recommendations(user_id, cursor=page.next_cursor, limit=2)
+            page = await recommendations.get_user_preferences(user_id, limit=2)
+            await recommendations.get_user_preferences(user_id, cursor=page.next_cursor, limit=2)
+
+            videos = VideoService(session)
+            await videos.get_video(VIDEO_IDS[0])
+            page = await videos.get_videos(channel_id, limit=2)
+            await videos.get_videos(channel_id, cursor=page.next_cursor, limit=2)
+            await videos.get_videos(limit=2)
+    finally:
+        await async_engine.dispose()
+
+
+def sqlite_plan_problems(conn, statement, parameters):
+    rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).all()
+    problems = []
+    for row in rows:
+        detail = row[-1]
+        words = detail.split()
+        # "SCAN videos USING INDEX ..." walks an index in order; a bare "SCAN videos" reads the table
+        if words[0] == "SCAN" and words[1] in HOT_TABLES and "USING" not in words:
+            problems.append(detail)
+        if "USE TEMP B-TREE FOR ORDER BY" in detail:
+            problems.append(detail)
+    return problems
+
+
+def test_migrations_match_models(migrated_engine):
+    with migrated_engine.connect() as conn:
+        diff = compare_metadata(MigrationContext.configure(conn), Base.metadata)
+    assert diff == []
+
+
+def test_migration_downgrades_cleanly(migrated_engine, monkeypatch):
+    command.downgrade(alembic_config(monkeypatch, str(migrated_engine.url)), "7d2a9e4b1c56")
+    tables = inspect(migrated_engine).get_table_names()
+    assert "video_views" not in tables and "video_comments" not in tables
+    assert "signed_url" not in {column["name"] for column in inspect(migrated_engine).get_columns("videos")}
+
+
+def test_time_ordered_id_migration_renumbers_existing_rows(tmp_path, monkeypatch):
+    url = f"sqlite:///{tmp_path / 'ids.db'}"
+    config = alembic_config(monkeypatch, url)
+    command.upgrade(config, "9e3b5d7f2a14")
+    engine = create_engine(url)
+    # Random uuid4 ids whose order has nothing to do with created_at
+    rows = [(str(uuid.uuid4()), f"2026-01-0{1 + i // 3} 10:00:00") for i in range(7)]
+    with engine.begin() as conn:
+        for row_id, created_at in rows:
+            conn.execute(text(
+                "INSERT INTO video_views (id, video_id, user_id, watch_time, created_at) "
+                "VALUES (:id, :video, 1, 0, :created_at)"
+            ), {"id": row_id, "video": row_id, "created_at": created_at})
+
+    command.upgrade(config, "head")
+    with engine.connect() as conn:
+        migrated = conn.execute(text("SELECT id, typeof(id), video_id FROM video_views ORDER BY created_at, video_id")).all()
+    engine.dispose()
+    assert {kind for _, kind, _ in migrated} == {"integer"}
+    new_ids = [row_id for row_id, _, _ in migrated]
+    assert new_ids == sorted(new_ids) and len(set(new_ids)) == len(rows)
+    assert snowflake_time(new_ids[0]) == datetime(2026, 1, 1, 10, tzinfo=timezone.utc)
+    assert snowflake_time(new_ids[-1]) == datetime(2026, 1, 3, 10, tzinfo=timezone.utc)
+
+
+def test_hot_paths_use_indexes_on_sqlite(migrated_engine):
+    statements = hot_path_statements(migrated_engine)
+    assert len(statements) >= 15
+    with migrated_engine.connect() as conn:
+        failures = {
+            statement: problems
+            for statement, parameters in statements
+            if (problems := sqlite_plan_problems(conn, statement, parameters))
+        }
+    assert failures == {}
+
+
+def postgres_plan_problems(conn, statement, parameters):
+    plan = conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters).scalar()
+    problems = []
+    nodes = [plan[0]["Plan"]]
+    while nodes:
+        node = nodes.pop()
+        nodes.extend(node.get("Plans", ()))
+        if node["Node Type"] == "Seq Scan" and node.get("Relation Name") in HOT_TABLES:
+            problems.append(f"Seq Scan on {node['Relation Name']}")
+        if node["Node Type"] == "Sort":
+            problems.append(f"Sort by {node.get('Sort Key')}")
+    return problems
+
+
+@pytest.mark.skipif(not os.getenv("TEST_POSTGRES_URL"), reason="TEST_POSTGRES_URL not set")
+def test_hot_paths_use_indexes_on_postgres(monkeypatch):
+    url = os.environ["TEST_POSTGRES_URL"]
+    config = alembic_config(monkeypatch, url)
+    command.upgrade(config, "head")
+    engine = create_engine(url)
+    try:
+        statements = hot_path_statements(engine)
+        with engine.connect() as conn:
+            # Tiny tables would otherwise be seq scanned regardless of indexes
+            conn.execute(text("SET enable_seqscan = off"))
+            failures = {
+                statement: problems
+                for statement, parameters in statements
+                if (problems := postgres_plan_problems(conn, statement, parameters))
+            }
+        assert failures == {}
+    finally:
+        engine.dispose()
+        command.downgrade(config, "base")
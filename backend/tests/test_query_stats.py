@@ -0,0 +1,88 @@
+import logging
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import select, text
+from src.config.database import get_async_db, get_db
+from src.middleware import QueryStatsMiddleware
+from src.models.user import User
+from src.utils.db_metrics import QueryBudgetExceeded, QueryMetrics, query_budget, statement_shape
+
+
+@pytest.fixture
+def metrics():
+    return QueryMetrics()
+
+
+@pytest.fixture
+def client(override_get_db, override_get_async_db, metrics, db):
+    db.add_all(User(email=f"q{i}@example.com", username=f"q{i}") for i in range(12))
+    db.commit()
+    app = FastAPI()
+
+    @app.get("/three")
+    def three(db=Depends(get_db)):
+        for _ in range(3):
+            db.execute(text("SELECT 1"))
+        return {}
+
+    @app.get("/users/{limit}")
+    def users_one_by_one(limit: int, db=Depends(get_db)):
+        ids = db.scalars(select(User.id).limit(limit)).all()
+        return [db.scalar(select(User.email).where(User.id == user_id)) for user_id in ids]
+
+    @app.get("/async")
+    async def async_route(db=Depends(get_async_db)):
+        await db.execute(text("SELECT 1"))
+        await db.execute(text("SELECT 2"))
+        return {}
+
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    app.add_middleware(QueryStatsMiddleware, n_plus_one_threshold=5, metrics=metrics)
+    return TestClient(app)
+
+
+def test_headers_count_sync_and_async_queries(client):
+    response = client.get("/three")
+    assert response.headers["X-DB-Query-Count"] == "3"
+    assert float(response.headers["X-DB-Time-Ms"]) >= 0
+    assert response.headers["Server-Timing"].startswith("db;dur=")
+    assert "X-DB-N-Plus-One" not in response.headers
+
+    assert client.get("/async").headers["X-DB-Query-Count"] == "2"
+
+
+def test_repeated_statement_shapes_are_flagged(client, metrics, caplog):
+    assert "X-DB-N-Plus-One" not in client.get("/users/3").headers
+    with caplog.at_level(logging.WARNING):
+        response = client.get("/users/12")
+    assert response.headers["X-DB-Query-Count"] == "13"
+    assert response.headers["X-DB-N-Plus-One"] == "1"
+    assert "Possible N+1 on GET /users/{limit}: 12 x SELECT users.email FROM users WHERE users.id = ?" in caplog.text
+
+    totals = metrics.snapshot()["/users/{limit}"]
+    assert totals["requests"] == 2
+    assert totals["queries"] == 17
+    assert totals["max_queries"] == 13
+    assert totals["n_plus_one"] == 1
+
+
+def test_query_budget(client):
+    with query_budget(3) as stats:
+        client.get("/three")
+    assert stats.count == 3
+
+    with pytest.raises(QueryBudgetExceeded, match="4 queries, budget 3"):
+        with query_budget(3):
+            client.get("/users/3")
+    with pytest.raises(QueryBudgetExceeded, match="N\\+1: 12 x"):
+        with query_budget(50, max_repeats=5):
+            client.get("/users/12")
+
+
+def test_statement_shape_normalises_parameters():
+    assert statement_shape("SELECT * FROM t WHERE id IN (?, ?, ?)  AND x = :x_1 LIMIT 10") == (
+        "SELECT * FROM t WHERE id IN (?) AND x = ? LIMIT ?"
+    )
+    assert statement_shape("SELECT * FROM t WHERE id = $1") == statement_shape("SELECT * FROM t WHERE id = %(id_1)s")
@@ -0,0 +1,111 @@
+import asyncio
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from src.middleware import (
+    MemoryRateLimitBackend, RateLimit, RateLimitMiddleware, SQLiteRateLimitBackend
+)
+
+
+def test_sliding_window_allows_then_blocks():
+    backend = MemoryRateLimitBackend()
+    limit = RateLimit(calls=3, period=10)
+    results = [backend.hit("a", limit, now=100.0) for _ in range(4)]
+    assert [r.allowed for r in results] == [True, True, True, False]
+    assert results[0].remaining == 2
+    assert results[3].retry_after >= 1
+
+    # Halfway into the next window the three accepted requests still weigh 1.5
+    assert [backend.hit("a", limit, now=115.0).allowed for _ in range(3)] == [True, True, False]
+    # Two windows later the client starts fresh
+    assert backend.hit("a", limit, now=130.0).remaining == 2
+
+
+def test_memory_backend_is_bounded_and_evicts_idle_clients():
+    limit = RateLimit(calls=5, period=10)
+    backend = MemoryRateLimitBackend(max_clients=100)
+    for i in range(1000):
+        backend.hit(f"client-{i}", limit, now=100.0)
+    assert len(backend) == 100
+
+    # Clients idle for two windows are dropped as soon as someone else arrives
+    backend.hit("late", limit, now=125.0)
+    assert len(backend) == 1
+
+
+def test_sqlite_backend_is_shared_between_instances(tmp_path):
+    path = str(tmp_path / "limits.db")
+    first, second = SQLiteRateLimitBackend(path), SQLiteRateLimitBackend(path)
+    limit = RateLimit(calls=2, period=60)
+    assert first.hit("ip", limit, now=60.0).allowed
+    assert second.hit("ip", limit, now=60.0).allowed
+    assert not first.hit("ip", limit, now=60.0).allowed
+    assert second.hit("other", limit, now=60.0).allowed
+
+
+def test_middleware_applies_route_limits():
+    app = FastAPI()
+
+    @app.get("/auth/login")
+    def login():
+        return {"ok": True}
+
+    @app.get("/health")
+    def health():
+        return {"ok": True}
+
+    app.add_middleware(
+        RateLimitMiddleware,
+        calls=5,
+        period=60,
+        route_limits={"/auth/login": RateLimit(calls=2, period=60)},
+    )
+    client = TestClient(app)
+
+    assert [client.get("/auth/login").status_code for _ in range(3)] == [200, 200, 429]
+    blocked = client.get("/auth/login")
+    assert "Retry-After" in blocked.headers
+    assert "Max 2 requests per 60 seconds" in blocked.json()["detail"]
+
+    # The default limit is counted separately, and per client; an untrusted peer can't pose as another one
+    assert [client.get("/health").status_code for _ in range(6)] == [200] * 5 + [429]
+    assert client.get("/health", headers={"X-Forwarded-For": "10.0.0.2, 10.0.0.1"}).status_code == 429
+
+
+def test_forwarded_for_is_only_believed_from_trusted_proxies():
+    middleware = RateLimitMiddleware(None, trusted_proxies=["10.0.0.0/8", "192.168.1.5"])
+
+    def scope(peer, forwarded=None):
+        headers = [(b"x-forwarded-for", forwarded.encode())] if forwarded else []
+        return {"client": (peer, 1234), "headers": headers}
+
+    assert middleware.client_ip(scope("203.0.113.9", "1.2.3.4")) == "203.0.113.9"
+    assert middleware.client_ip(scope("10.1.2.3", "1.2.3.4")) == "1.2.3.4"
+    # Hops left of the nearest untrusted one were written by the client
+    assert middleware.client_ip(scope("10.1.2.3", "6.6.6.6, 1.2.3.4, 192.168.1.5")) == "1.2.3.4"
+    assert middleware.client_ip(scope("10.1.2.3")) == "10.1.2.3"
+    assert RateLimitMiddleware(None).client_ip(scope("10.1.2.3", "1.2.3.4")) == "10.1.2.3"
+
+
+def test_shared_backend_hits_run_off_the_event_loop(tmp_path):
+    on_loop = []
+
+    class Recording(SQLiteRateLimitBackend):
+        def hit(self, key, limit, now=None):
+            try:
+                asyncio.get_running_loop()
+                on_loop.append(True)
+            except RuntimeError:  # a worker thread
+                on_loop.append(False)
+            return super().hit(key, limit, now)
+
+    app = FastAPI()
+
+    @app.get("/health")
+    async def health():
+        return {"ok": True}
+
+    app.add_middleware(RateLimitMiddleware, calls=2, period=60, backend=Recording(str(tmp_path / "limits.db")))
+    client = TestClient(app)
+
+    assert [client.get("/health").status_code for _ in range(3)] == [200, 200, 429]
+    assert on_loop == [False] * 3
@@ -0,0 +1,190 @@
+import asyncio
+import pytest
+from fastapi import HTTPException
+from src.models.channel import Channel
+from src.models.user import User
+from src.models.videos.video import Video
+from src.services.recommendation_cache import RecommendationCache
+from src.services.recommendation_service import RecommendationService
+from src.services.video_counters import VideoCounterBuffer
+from src.services.watch_time import HeartbeatBatcher
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def constant(value):
+    async def compute():
+        return value
+    return compute
+
+
+def test_pages_expire_and_are_bounded():
+    clock = Clock()
+    cache = RecommendationCache(ttl=10, max_users=2, pages_per_user=2, timer=clock)
+
+    async def run():
+        assert await cache.get(1, None, 20, constant("a")) == "a"
+        assert await cache.get(1, None, 20, constant("changed")) == "a"
+        assert await cache.get(1, None, 5, constant("b")) == "b"  # the limit is part of the key
+        await cache.get(1, "c1", 20, constant("c"))  # third page of user 1: evicts their oldest
+        assert await cache.get(1, None, 20, constant("a2")) == "a2"
+        await cache.get(2, None, 20, constant("x"))
+        await cache.get(3, None, 20, constant("y"))  # third user: evicts the least recently used
+        assert await cache.get(1, "c1", 20, constant("c2")) == "c2"
+        clock.now += 11
+        assert await cache.get(3, None, 20, constant("y2")) == "y2"
+
+    asyncio.run(run())
+    assert cache.hits == 1 and cache.recomputes == 8
+
+
+def test_concurrent_misses_compute_once():
+    cache = RecommendationCache()
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return ["v1"]
+
+    async def run():
+        pages = await asyncio.gather(*(cache.get(1, None, 20, compute) for _ in range(50)))
+        return pages + [await cache.get(1, None, 20, compute)]
+
+    pages = asyncio.run(run())
+    assert len(calls) == 1 and all(page == ["v1"] for page in pages)
+    stats = cache.stats()
+    assert (stats["misses"], stats["coalesced"], stats["hits"]) == (1, 49, 1)
+    assert stats["hit_rate"] == pytest.approx(50 / 51)
+    assert stats["recompute_avg_ms"] >= 10 * 0.9
+
+
+def test_failures_and_invalidation_while_computing_are_not_cached():
+    cache = RecommendationCache()
+
+    async def failing():
+        await asyncio.sleep(0.01)
+        raise HTTPException(status_code=503)
+
+    async def invalidated():
+        cache.invalidate(1)  # e.g. a preference added meanwhile
+        return "stale"
+
+    async def run():
+        results = await asyncio.gather(*(cache.get(1, None, 20, failing) for _ in range(3)), return_exceptions=True)
+        assert all(isinstance(result, HTTPException) for result in results)
+        assert await cache.get(1, None, 20, invalidated) == "stale"  # served to this request only
+        assert await cache.get(1, None, 20, constant("fresh")) == "fresh"
+
+    asyncio.run(run())
+
+
+def test_interaction_changes_invalidate_at_threshold(session_factory, db):
+    owner = User(email="cache@example.com", username="cache")
+    db.add(owner)
+    db.flush()
+    channel = Channel(name="cache", owner_id=owner.id)
+    db.add(channel)
+    db.flush()
+    db.add_all(Video(id=f"cv{i}", title="t", video_url="u", uploader_id=owner.id, channel_id=channel.id)
+               for i in range(3))
+    db.commit()
+
+    cache = RecommendationCache(change_threshold=3)
+    batcher = HeartbeatBatcher(session_factory, counters=VideoCounterBuffer(session_factory))
+    batcher.subscribe(cache.record_interactions)
+    asyncio.run(cache.get(owner.id, None, 20, constant("page")))
+
+    batcher.write({("cv0", owner.id): 10, ("cv1", owner.id): 10})
+    for watch_time in (20, 30, 40):  # watching on doesn't change the history
+        batcher.write({("cv0", owner.id): watch_time, ("cv1", owner.id): watch_time})
+    assert asyncio.run(cache.get(owner.id, None, 20, constant("new"))) == "page"
+    batcher.write({("cv2", owner.id): 10, ("cv0", owner.id + 1): 10})
+    assert asyncio.run(cache.get(owner.id, None, 20, constant("new"))) == "new"
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_service_caches_snapshots_and_preferences_invalidate(async_session_factory):
+    cache = RecommendationCache()
+
+    async def run():
+        async with async_session_factory() as session:
+            viewer = User(email="viewer@example.com", username="viewer")
+            owner = User(email="owner@example.com", username="owner")
+            session.add_all([viewer, owner])
+            await session.flush()
+            channel = Channel(name="served", owner_id=owner.id)
+            session.add(channel)
+            await session.flush()
+            session.add(Video(id="sv0", title="t", video_url="u", uploader_id=owner.id, channel_id=channel.id))
+            await session.commit()
+            viewer_id = viewer.id
+
+        async with async_session_factory() as session:
+            service = RecommendationService(session, cache=cache)
+            first = await service.get_recommendations(viewer_id)
+            session.add(Video(id="sv1", title="t", video_url="u", uploader_id=owner.id, channel_id=channel.id))
+            await session.commit()
+            cached = await service.get_recommendations(viewer_id)
+            await service.add_user_preference(viewer_id, "sv0")
+            fresh = await service.get_recommendations(viewer_id)
+        return first, cached, fresh
+
+    first, cached, fresh = asyncio.run(run())
+    assert cached is first and [video.id for video in first.items] == ["sv0"]
+    assert type(first.items[0]).__name__ == "VideoOut"
+    assert [video.id for video in fresh.items] == ["sv1", "sv0"]
+
+
+class GuardedDict(dict):
+    """A dict that fails every access made without `lock` held."""
+    def __init__(self, lock):
+        super().__init__()
+        self.lock = lock
+
+    def _check(self):
+        assert self.lock.locked(), "_inflight accessed without the cache lock"
+
+    def get(self, *args):
+        self._check()
+        return super().get(*args)
+
+    def __setitem__(self, key, value):
+        self._check()
+        super().__setitem__(key, value)
+
+    def __delitem__(self, key):
+        self._check()
+        super().__delitem__(key)
+
+    def __iter__(self):
+        self._check()
+        return super().__iter__()
+
+
+def test_inflight_requests_are_tracked_under_the_lock():
+    cache = RecommendationCache()
+    cache._inflight = GuardedDict(cache._lock)
+
+    async def run():
+        release = asyncio.Event()
+
+        async def slow():
+            await release.wait()
+            return "page"
+
+        requests = [asyncio.create_task(cache.get(1, None, 20, slow)) for _ in range(3)]
+        await asyncio.sleep(0)
+        # Reported from a worker thread while the page is being computed
+        await asyncio.to_thread(cache.invalidate, 1)
+        release.set()
+        return await asyncio.gather(*requests)
+
+    assert asyncio.run(run()) == ["page"] * 3
+    assert cache.stats()["coalesced"] == 2 and cache.stats()["users"] == 0
@@ -0,0 +1,101 @@
+import asyncio
+import numpy as np
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from src.models.channel import Channel
+from src.models.user import User
+from src.models.videos.video import Video
+from src.models.videos.video_like import VideoLike
+from src.models.videos.video_view import VideoView
+from src.services.recommendation_engine import (
+    InteractionLoader, InteractionMatrix, ItemNeighbours, RecommendationEngine, item_neighbours,
+)
+from src.services.recommendation_service import RecommendationService
+
+
+def interactions(rows):
+    """rows: (user_id, video_id, weight); later rows are more recent."""
+    loader = InteractionLoader()
+    user_ids, video_ids, weights = zip(*rows)
+    loader.add(user_ids, video_ids, np.array(weights, float), range(len(rows)))
+    return loader.interactions()
+
+
+def test_neighbours_match_dense_cosine():
+    rng = np.random.default_rng(0)
+    rows = [(int(u), f"v{v}", float(w)) for u, v, w in zip(
+        rng.integers(0, 200, 2000), rng.integers(0, 60, 2000), rng.random(2000) + 0.1
+    )]
+    matrix = InteractionMatrix.from_interactions(interactions(rows), max_items_per_user=1000)
+    dense = np.zeros((matrix.n_users, matrix.n_items))
+    dense[np.repeat(np.arange(matrix.n_users), np.diff(matrix.user_ptr)), matrix.user_items] = matrix.user_values
+    norms = np.linalg.norm(dense, axis=0)
+    cosine = dense.T @ dense / np.outer(norms, norms)
+    np.fill_diagonal(cosine, 0)
+
+    # Tiny blocks exercise the block splitting; results must not depend on it
+    for block_cells, block_pairs in ((1 << 22, 1 << 23), (100, 50)):
+        neighbours, scores = item_neighbours(matrix, 5, block_cells, block_pairs)
+        assert np.allclose(scores, -np.sort(-cosine, axis=1)[:, :5], atol=1e-6)
+        assert np.allclose(np.take_along_axis(cosine, neighbours, axis=1), scores, atol=1e-6)
+
+
+def test_dislikes_veto_and_heavy_users_keep_recent_items():
+    rows = [
+        (1, "a", 1.0), (1, "b", 1.0), (2, "a", 1.0), (2, "b", 1.0),
+        (3, "a", 1.0), (3, "c", 1.0), (3, "c", -np.inf),  # user 3 disliked c
+        (4, "d", 1.0), (4, "e", 1.0), (4, "a", 1.0),  # capped to e, a
+    ]
+    model = ItemNeighbours.build(interactions(rows), neighbours=3, max_items_per_user=2)
+    assert [video_id for video_id, _ in model.similar("a", 3)] == ["b", "e"]
+    assert model.similar("c", 3) == [] and model.similar("d", 3) == []
+
+    # Seeds and excluded videos never come back
+    assert model.recommend({"a": 1.0, "e": 2.0}, exclude=["b"], limit=5) == []
+    assert [video_id for video_id, _ in model.recommend({"b": 1.0}, exclude=[], limit=5)] == ["a"]
+
+
+def test_service_ranks_from_history_and_falls_back_to_newest(async_session_factory, tmp_path):
+    async def seed():
+        async with async_session_factory() as session:
+            users = [User(email=f"u{i}@example.com", username=f"u{i}") for i in range(4)]
+            session.add_all(users)
+            await session.flush()
+            channel = Channel(name="rec", owner_id=users[0].id)
+            session.add(channel)
+            await session.flush()
+            session.add_all(
+                Video(id=f"rv{i}", title=f"v{i}", video_url="u", uploader_id=users[0].id, channel_id=channel.id)
+                for i in range(4)
+            )
+            # u1 and u2 watch rv0 + rv1, u2 also likes rv2; u3 watched rv0 and disliked rv2
+            session.add_all([
+                VideoView(user_id=users[1].id, video_id="rv0", watch_time=300),
+                VideoView(user_id=users[1].id, video_id="rv1", watch_time=300),
+                VideoView(user_id=users[2].id, video_id="rv0", watch_time=300),
+                VideoView(user_id=users[2].id, video_id="rv1", watch_time=120),
+                VideoLike(user_id=users[2].id, video_id="rv2", is_liked=True),
+                VideoView(user_id=users[3].id, video_id="rv0", watch_time=60),
+                VideoLike(user_id=users[3].id, video_id="rv2", is_liked=False),
+            ])
+            await session.commit()
+            return [user.id for user in users]
+
+    user_ids = asyncio.run(seed())
+    sync_engine = create_engine(f"sqlite:///{tmp_path / 'async.db'}")
+    engine = RecommendationEngine(sessionmaker(bind=sync_engine))
+
+    async def recommend(user_id):
+        async with async_session_factory() as session:
+            page = await RecommendationService(session, engine).get_recommendations(user_id, limit=10)
+            return [video.id for video in page.items]
+
+    before = asyncio.run(recommend(user_ids[3]))
+    assert before[0] == "rv3"  # no model yet: newest first
+    engine.rebuild()
+    sync_engine.dispose()
+    assert engine.stats()["videos"] == 3
+    # Seen and disliked videos are excluded; rv1 co-occurs with rv0
+    assert asyncio.run(recommend(user_ids[3])) == ["rv1"]
+    # The uploader's own videos never come back; no history falls back to the feed
+    assert asyncio.run(recommend(user_ids[0])) == []
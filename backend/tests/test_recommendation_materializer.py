@@ -0,0 +1,224 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+import pytest
+from sqlalchemy import create_engine, func, select, update
+from sqlalchemy.orm import sessionmaker
+from src.config.recommendations import RecommendationSettings
+from src.models.channel import Channel
+from src.models.recommendation import (
+    Recommendation, RecommendationGeneration, RecommendationLease, RecommendationRun,
+)
+from src.models.user import User
+from src.models.videos.video import Video
+from src.models.videos.video_like import VideoLike
+from src.models.videos.video_view import VideoView
+from src.services.recommendation_materializer import LeaseLost, RecommendationMaterializer
+from src.services.recommendation_service import RecommendationService
+from src.utils.ids import snowflake_ids
+
+SETTINGS = RecommendationSettings(rec_materialize_top_n=2, rec_materialize_chunk_users=2)
+
+
+@pytest.fixture
+def sync_factory(async_session_factory, tmp_path):
+    """Sync sessions on the async fixture's database file."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'async.db'}")
+    yield sessionmaker(bind=engine)
+    engine.dispose()
+
+
+@pytest.fixture
+def users(sync_factory):
+    with sync_factory() as db:
+        users = [User(email=f"m{i}@example.com", username=f"m{i}") for i in range(5)]
+        db.add_all(users)
+        db.flush()
+        channel = Channel(name="mat", owner_id=users[0].id)
+        db.add(channel)
+        db.flush()
+        db.add_all(
+            Video(id=f"mv{i}", title=f"v{i}", video_url="u", uploader_id=users[i % 2].id, channel_id=channel.id)
+            for i in range(5)
+        )
+        # Everyone watches mv2 with mv3; m1..m3 also watch mv1 (uploaded by m1), m4 disliked mv4
+        for user in users[1:]:
+            db.add_all([
+                VideoView(user_id=user.id, video_id="mv2", watch_time=300),
+                VideoView(user_id=user.id, video_id="mv3", watch_time=300),
+            ])
+        for user in users[1:4]:
+            db.add(VideoView(user_id=user.id, video_id="mv1", watch_time=100))
+        db.add_all([
+            VideoLike(user_id=users[2].id, video_id="mv4", is_liked=True),
+            VideoLike(user_id=users[4].id, video_id="mv4", is_liked=False),
+            VideoView(user_id=users[0].id, video_id="mv2", watch_time=60),
+            Recommendation(user_id=users[0].id, video_id="mv0", channel_id=channel.id, score=1.0),
+        ])
+        db.commit()
+        return [user.id for user in users]
+
+
+def live_rows(db):
+    stmt = (
+        select(Recommendation.user_id, Recommendation.video_id)
+        .join(RecommendationGeneration, (RecommendationGeneration.user_id == Recommendation.user_id)
+              & (RecommendationGeneration.generation == Recommendation.generation))
+        .order_by(Recommendation.user_id, Recommendation.score.desc())
+    )
+    rows = {}
+    for user_id, video_id in db.execute(stmt):
+        rows.setdefault(user_id, []).append(video_id)
+    return rows
+
+
+def test_full_run_swaps_generations_and_keeps_preferences(sync_factory, async_session_factory, users):
+    materializer = RecommendationMaterializer(sync_factory, SETTINGS)
+    first = materializer.run(workers=1)
+    assert first["mode"] == "full" and first["users"] == 5
+    with sync_factory() as db:
+        rows = live_rows(db)
+        # Seen, disliked and self-uploaded videos are never recommended
+        assert rows[users[0]] == ["mv3", "mv1"]
+        assert rows[users[4]] == ["mv1"]
+        assert rows[users[1]] == ["mv4"]
+        assert users[2] not in rows  # has seen everything
+        assert db.scalar(select(func.count()).select_from(Recommendation)) == first["rows"] + 1
+
+    second = materializer.run(workers=1)
+    with sync_factory() as db:
+        assert live_rows(db) == rows
+        generations = set(db.scalars(select(Recommendation.generation)))
+        assert generations == {0, second["generation"]}
+
+    async def read():
+        async with async_session_factory() as session:
+            service = RecommendationService(session)
+            page = await service.get_recommendations(users[0], limit=10)
+            preferences = await service.get_user_preferences(users[0])
+            return [video.id for video in page.items], [video.id for video in preferences.items]
+
+    assert asyncio.run(read()) == (["mv3", "mv1"], ["mv0"])
+
+    async def read_pages():
+        async with async_session_factory() as session:
+            service = RecommendationService(session)
+            first = await service.get_recommendations(users[0], limit=1)
+            second = await service.get_recommendations(users[0], first.next_cursor, limit=1)
+            return [video.id for video in first.items + second.items], second.next_cursor
+
+    assert asyncio.run(read_pages()) == (["mv3", "mv1"], None)
+
+
+def test_incremental_run_only_recomputes_users_with_new_interactions(sync_factory, users):
+    materializer = RecommendationMaterializer(sync_factory, SETTINGS)
+    full = materializer.run(workers=1)
+    with sync_factory() as db:
+        # The run's watermark lags the clock by a minute; pin it between the old and new interactions
+        db.execute(update(RecommendationRun).values(watermark=snowflake_ids.next_id()))
+        db.add(VideoView(user_id=users[4], video_id="mv1", watch_time=30))
+        db.commit()
+
+    incremental = materializer.run(incremental=True, workers=1)
+    assert incremental["mode"] == "incremental" and incremental["users"] == 1
+    with sync_factory() as db:
+        generations = dict(db.execute(select(RecommendationGeneration.user_id, RecommendationGeneration.generation)).all())
+        assert generations[users[4]] == incremental["generation"]
+        assert {generations[user_id] for user_id in users[:4]} == {full["generation"]}
+        assert users[4] not in live_rows(db)  # nothing left they haven't seen or disliked
+        assert db.scalar(select(func.count()).select_from(RecommendationRun)) == 2
+
+
+def test_process_pool_matches_in_process_scoring(sync_factory, users):
+    materializer = RecommendationMaterializer(sync_factory, SETTINGS)
+    materializer.run(workers=1)
+    with sync_factory() as db:
+        in_process = live_rows(db)
+    materializer.run(workers=2)
+    with sync_factory() as db:
+        assert live_rows(db) == in_process
+
+
+def test_one_run_at_a_time_per_database(sync_factory, users, monkeypatch):
+    materializer = RecommendationMaterializer(sync_factory, SETTINGS)
+    with sync_factory() as db:
+        db.add(RecommendationLease(
+            name="materializer", holder="other-worker", expires_at=datetime.now(timezone.utc) + timedelta(minutes=5)
+        ))
+        db.commit()
+    assert materializer.run(workers=1) is None
+    with sync_factory() as db:
+        assert db.scalar(select(func.count()).select_from(RecommendationRun)) == 0
+        db.execute(update(RecommendationLease).values(expires_at=datetime.now(timezone.utc) - timedelta(seconds=1)))
+        db.commit()
+
+    # The other worker died: its lease ran out and this run takes it over
+    assert materializer.run(workers=1)["users"] == 5
+    with sync_factory() as db:
+        lease = db.get(RecommendationLease, "materializer")
+        assert lease.holder != "other-worker"
+        assert lease.expires_at.replace(tzinfo=timezone.utc) <= datetime.now(timezone.utc)  # released
+    assert materializer.run(workers=1) is not None
+
+    # A run whose lease is taken over mid-run stops writing
+    def steal(holder):
+        with sync_factory() as db:
+            db.execute(update(RecommendationLease).values(holder="thief"))
+            db.commit()
+        raise LeaseLost("Materializer lease was taken over by another run")
+
+    monkeypatch.setattr(materializer, "_renew", steal)
+    with pytest.raises(LeaseLost):
+        materializer.run(workers=1)
+    with sync_factory() as db:
+        assert db.get(RecommendationLease, "materializer").holder == "thief"
+
+
+@pytest.mark.parametrize("lose", ["taken_over", "expired"])
+def test_chunk_is_not_written_without_the_lease(sync_factory, users, monkeypatch, lose):
+    materializer = RecommendationMaterializer(sync_factory, SETTINGS)
+    renew = materializer._renew
+
+    def lose_lease_while_scoring(holder):
+        renew(holder)
+        with sync_factory() as db:
+            if lose == "taken_over":
+                db.execute(update(RecommendationLease).values(holder="thief"))
+            else:  # ran out, not yet claimed by anyone
+                db.execute(update(RecommendationLease).values(expires_at=datetime.now(timezone.utc) - timedelta(seconds=1)))
+            db.commit()
+
+    monkeypatch.setattr(materializer, "_renew", lose_lease_while_scoring)
+    with pytest.raises(LeaseLost):
+        materializer.run(workers=1)
+    with sync_factory() as db:
+        assert db.scalar(select(func.count()).select_from(RecommendationGeneration)) == 0
+        assert db.scalar(select(func.count()).select_from(Recommendation).where(Recommendation.generation > 0)) == 0
+
+
+def test_run_cleans_up_after_a_dead_run(sync_factory, users):
+    materializer = RecommendationMaterializer(sync_factory, SETTINGS)
+    full = materializer.run(workers=1)
+    with sync_factory() as db:
+        rows = live_rows(db)
+        # A run that died between switching users[0] and deleting their old rows
+        dead = RecommendationRun(mode="full", watermark=0)
+        db.add(dead)
+        db.flush()
+        channel_id = db.scalar(select(Channel.id))
+        db.add(Recommendation(user_id=users[0], video_id="mv4", channel_id=channel_id, score=1.0, generation=dead.id))
+        db.execute(update(RecommendationGeneration).where(RecommendationGeneration.user_id == users[0])
+                   .values(generation=dead.id))
+        db.execute(update(RecommendationLease).values(run_id=dead.id))
+        # Nothing new since the full run: the incremental run only cleans up
+        db.execute(update(RecommendationRun).where(RecommendationRun.id == full["generation"])
+                   .values(watermark=snowflake_ids.next_id()))
+        db.commit()
+
+    assert materializer.run(incremental=True, workers=1)["users"] == 0
+    with sync_factory() as db:
+        assert live_rows(db) == {**rows, users[0]: ["mv4"]}
+        # The superseded rows of users[0] are gone; other users keep their live ones
+        stale = db.scalars(select(Recommendation.user_id).where(
+            Recommendation.generation == full["generation"], Recommendation.user_id == users[0]
+        )).all()
+        assert stale == []
@@ -0,0 +1,114 @@
+import asyncio
+from datetime import datetime, timedelta
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import func, select, update
+from src.models.refresh_token import RefreshToken
+from src.models.user import User
+from src.services.auth.async_auth_service import AsyncAuthService, purge_expired_refresh_tokens
+from src.services.auth.user_cache import UserCache, MemoryUserCacheBackend
+
+
+def run_with_service(async_session_factory, test):
+    """Run `test(service, user, db)` against a fresh user in one async session."""
+    async def run():
+        async with async_session_factory() as db:
+            user = User(email="tokens@example.com", username="tokens", provider="email")
+            db.add(user)
+            await db.commit()
+            return await test(AsyncAuthService(db, UserCache(MemoryUserCacheBackend())), user, db)
+
+    return asyncio.run(run())
+
+
+def test_refresh_rotates_within_family(async_session_factory):
+    async def test(service, user, db):
+        first = await service.create_tokens(user, device="phone")
+        second = await service.refresh_access_token(first.refresh_token)
+
+        rows = (await db.scalars(select(RefreshToken).order_by(RefreshToken.created_at))).all()
+        assert len(rows) == 2
+        assert len({row.family_id for row in rows}) == 1
+        assert {row.device for row in rows} == {"phone"}
+        old = next(row for row in rows if row.revoked_at is not None)
+        new = next(row for row in rows if row.revoked_at is None)
+        assert old.replaced_by == new.jti
+        assert new.token_hash != second.refresh_token
+
+    run_with_service(async_session_factory, test)
+
+
+def test_reuse_revokes_family_only(async_session_factory):
+    async def test(service, user, db):
+        phone = await service.create_tokens(user, device="phone")
+        tablet = await service.create_tokens(user, device="tablet")
+        rotated = await service.refresh_access_token(phone.refresh_token)
+
+        with pytest.raises(HTTPException) as exc_info:
+            await service.refresh_access_token(phone.refresh_token)
+        assert exc_info.value.detail == "Refresh token reuse detected"
+
+        # The legitimate successor died with its family, the other device is untouched
+        with pytest.raises(HTTPException):
+            await service.refresh_access_token(rotated.refresh_token)
+        assert (await service.refresh_access_token(tablet.refresh_token)).access_token
+
+    run_with_service(async_session_factory, test)
+
+
+def test_logout_with_refresh_token_revokes_one_device(async_session_factory):
+    async def test(service, user, db):
+        phone = await service.create_tokens(user, device="phone")
+        tablet = await service.create_tokens(user, device="tablet")
+
+        await service.logout_user(user, phone.refresh_token)
+        with pytest.raises(HTTPException) as exc_info:
+            await service.refresh_access_token(phone.refresh_token)
+        assert exc_info.value.detail == "Refresh token revoked"
+        assert (await service.refresh_access_token(tablet.refresh_token)).access_token
+
+        await service.logout_user(user)
+        with pytest.raises(HTTPException):
+            await service.refresh_access_token(tablet.refresh_token)
+
+    run_with_service(async_session_factory, test)
+
+
+def test_tampered_token_rejected(async_session_factory):
+    async def test(service, user, db):
+        tokens = await service.create_tokens(user)
+        with pytest.raises(HTTPException):
+            await service.refresh_access_token(tokens.refresh_token[:-2] + "xx")
+
+    run_with_service(async_session_factory, test)
+
+
+def test_purge_expired_tokens(async_session_factory):
+    async def test(service, user, db):
+        await service.create_tokens(user)
+        await service.create_tokens(user)
+        jti = await db.scalar(select(RefreshToken.jti).limit(1))
+        await db.execute(
+            update(RefreshToken).where(RefreshToken.jti == jti).values(expires_at=datetime.utcnow() - timedelta(days=1))
+        )
+        await db.commit()
+
+        assert await service.purge_expired_tokens() == 1
+        assert await db.scalar(select(func.count()).select_from(RefreshToken)) == 1
+
+    run_with_service(async_session_factory, test)
+
+
+def test_periodic_purge(session_factory, db):
+    user = User(email="purge@example.com", username="purge", provider="email")
+    db.add(user)
+    db.flush()
+    db.add_all(
+        RefreshToken(jti=f"jti-{days}", user_id=user.id, family_id="family", token_hash="hash",
+                     expires_at=datetime.utcnow() + timedelta(days=days))
+        for days in (-1, 1)
+    )
+    db.commit()
+
+    assert purge_expired_refresh_tokens(session_factory) == 1
+    assert db.query(RefreshToken).count() == 1
@@ -0,0 +1,268 @@
+import asyncio
+import os
+import numpy as np
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+from src.api import videos as videos_api
+from src.config.database import get_async_db
+from src.models.channel import Channel
+from src.models.user import User
+from src.models.videos.video import Video
+from src.services import video_service
+from src.services.related_videos import RelatedVideoIndex, RelatedVideos, tokenize
+
+VIDEOS = [
+    ("cooking-1", "Easy pasta carbonara", "Cooking creamy carbonara pasta with eggs and pecorino"),
+    ("cooking-2", "Pasta carbonara part 2", "More carbonara: guanciale, eggs, pecorino and pasta"),
+    ("cooking-3", "Sourdough bread", "Baking bread with a sourdough starter"),
+    ("space-1", "Rocket launch explained", "How orbital rockets reach space"),
+    ("space-2", "Mars rover landing", "The rover lands on Mars after a long space flight"),
+    ("empty", "", None),
+]
+
+
+def ids(related):
+    return [video_id for video_id, _ in related]
+
+
+def test_tokenize_weights_titles_and_drops_stopwords():
+    assert tokenize("The Pasta", "pasta of the day") == {"pasta": 3, "day": 1}
+
+
+def test_similar_ranks_by_text_similarity():
+    index = RelatedVideoIndex(feature_bits=12)
+    index.add_many(VIDEOS)
+
+    related = ids(index.similar("cooking-1"))
+    assert related[0] == "cooking-2" and "cooking-1" not in related
+    assert set(related) <= {"cooking-2", "cooking-3"}
+    assert ids(index.similar("space-1")) == ["space-2"]
+    assert index.similar("empty") == [] and index.similar("missing") is None
+    scores = [score for _, score in index.similar("cooking-1")]
+    assert scores == sorted(scores, reverse=True) and 0 < scores[0] <= 1
+
+
+def test_remove_and_re_add():
+    index = RelatedVideoIndex(feature_bits=12)
+    index.add_many(VIDEOS)
+    assert index.remove("cooking-2") and not index.remove("cooking-2")
+    assert "cooking-2" not in ids(index.similar("cooking-1"))
+
+    index.add("space-1", "Carbonara without cream", "Eggs, pecorino and pasta")  # re-adding replaces
+    assert ids(index.similar("cooking-1"))[0] == "space-1"
+    assert index.stats() == {"videos": 5, "slots": 7, "features": index.nnz}
+
+
+def test_removed_slots_are_compacted():
+    index = RelatedVideoIndex(feature_bits=12)
+    index.add_many((f"v{i}", f"title {i}", "shared words") for i in range(2000))
+    index.remove_many(f"v{i}" for i in range(1500))
+    assert index.stats()["slots"] == 500 and index.slot["v1500"] == 0
+    assert len(index.similar("v1500", 600)) == 499
+
+
+def test_signature_scan_finds_near_duplicates():
+    rng = np.random.default_rng(3)
+    words = [f"w{i}" for i in range(5000)]
+    rows = [(f"v{i}", "", " ".join(rng.choice(words, 20))) for i in range(3000)]
+    index = RelatedVideoIndex(max_candidates=50)
+    index.add_many(rows)
+    for i in range(0, 3000, 300):
+        near = rows[i][2].split()
+        index.add(f"copy{i}", "", " ".join(near[:18] + ["x1", "x2"]))
+    for i in range(0, 3000, 300):
+        assert ids(index.similar(f"v{i}"))[0] == f"copy{i}"
+
+
+def test_save_and_mapped_load(tmp_path):
+    index = RelatedVideoIndex(feature_bits=12)
+    index.add_many(VIDEOS)
+    index.remove("cooking-3")
+    path = str(tmp_path / "related")
+    index.save(path)
+    index.save(path)  # replaces the previous save
+    assert not index.dirty
+
+    loaded = RelatedVideoIndex(feature_bits=12)
+    assert loaded.load(path) == 5
+    assert isinstance(loaded.signatures, np.memmap)
+    assert loaded.similar("cooking-1") == index.similar("cooking-1")
+    loaded.add("cooking-4", "Carbonara for two", "pasta eggs pecorino")
+    loaded.remove("space-2")
+    assert "cooking-4" in ids(loaded.similar("cooking-1")) and loaded.similar("space-1") == []
+
+    assert os.listdir(tmp_path) == ["related"]
+    assert len(os.listdir(path)) == 7  # meta.json and the arrays of the last save only
+
+    other = RelatedVideoIndex(feature_bits=13)
+    try:
+        other.load(path)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("loaded an index built with other settings")
+
+
+def test_failed_save_stays_dirty(tmp_path, monkeypatch):
+    index = RelatedVideoIndex(feature_bits=12)
+    index.add_many(VIDEOS)
+    path = str(tmp_path / "related")
+
+    def full_disk(*args):
+        raise OSError("No space left on device")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(os, "replace", full_disk)
+        with pytest.raises(OSError):
+            index.save(path)
+    assert index.dirty and os.listdir(path) == []  # nothing half-written left behind
+
+    save_array = np.save
+
+    def add_while_writing(*args):
+        if "late" not in index.slot:
+            index.add("late", "Added during the write", None)
+        return save_array(*args)
+
+    monkeypatch.setattr(np, "save", add_while_writing)
+    index.save(path)
+    assert index.dirty  # "late" isn't in this save
+
+
+def test_concurrent_saves_leave_one_complete_index(tmp_path, monkeypatch):
+    path = str(tmp_path / "related")
+    first, second = RelatedVideoIndex(feature_bits=12), RelatedVideoIndex(feature_bits=12)
+    first.add_many(VIDEOS)
+    second.add_many(VIDEOS[:3])
+    save_array = np.save
+    interleaved = []
+
+    def second_saves_meanwhile(*args):
+        if not interleaved:
+            interleaved.append(True)
+            second.save(path)  # another worker, mid-way through this save
+        return save_array(*args)
+
+    monkeypatch.setattr(np, "save", second_saves_meanwhile)
+    first.save(path)
+    monkeypatch.undo()
+
+    loaded = RelatedVideoIndex(feature_bits=12)
+    assert loaded.load(path) == len(VIDEOS)  # the save that finished last, whole
+    assert loaded.similar("cooking-1") == first.similar("cooking-1")
+    assert len(os.listdir(path)) == 7
+
+
+def seed(db):
+    owner = User(email="related@example.com", username="related")
+    db.add(owner)
+    db.flush()
+    channel = Channel(name="related", owner_id=owner.id)
+    db.add(channel)
+    db.flush()
+    db.add_all(Video(id=video_id, title=title, description=description, video_url="u",
+                     uploader_id=owner.id, channel_id=channel.id) for video_id, title, description in VIDEOS)
+    db.commit()
+
+
+def test_start_builds_saves_and_replays_early_changes(session_factory, db, tmp_path):
+    seed(db)
+    path = str(tmp_path / "related")
+    related = RelatedVideos(session_factory, RelatedVideoIndex(feature_bits=12), path)
+    add_video(db, "cooking-4", "Carbonara for two", "pasta eggs pecorino")
+    related.add("cooking-4", "Carbonara for two", "pasta eggs pecorino")  # before start: queued
+    db.delete(db.get(Video, "cooking-2"))  # deleted videos must stay out of the next sync too
+    db.commit()
+    related.remove("cooking-2")
+    assert related.similar("cooking-1") is None
+
+    assert related.start() == 6
+    assert ids(related.similar("cooking-1"))[0] == "cooking-4"
+    related.save_if_changed()
+
+    restarted = RelatedVideos(session_factory, RelatedVideoIndex(feature_bits=12), path)
+    assert restarted.start() == 6  # loaded, not rebuilt
+    assert isinstance(restarted.index.features, np.memmap)
+    assert ids(restarted.similar("cooking-1"))[0] == "cooking-4"
+
+
+def add_video(db, video_id, title, description):
+    video = db.get(Video, "cooking-1")
+    db.add(Video(id=video_id, title=title, description=description, video_url="u",
+                 uploader_id=video.uploader_id, channel_id=video.channel_id))
+    db.commit()
+
+
+def test_start_and_sync_pick_up_videos_other_workers_created(session_factory, db, tmp_path):
+    seed(db)
+    path = str(tmp_path / "related")
+    first = RelatedVideos(session_factory, RelatedVideoIndex(feature_bits=12), path)
+    second = RelatedVideos(session_factory, RelatedVideoIndex(feature_bits=12), path)
+    first.start()
+    second.start()
+
+    # Uploaded through the first worker after its save
+    add_video(db, "cooking-4", "Carbonara for two", "pasta eggs pecorino")
+    first.add("cooking-4", "Carbonara for two", "pasta eggs pecorino")
+    assert second.similar("cooking-4") is None
+    assert second.sync() == 1 and first.sync() == 0
+    assert "cooking-4" in ids(second.similar("cooking-1"))
+
+    # A restart catches up with videos created since the save it loads
+    add_video(db, "space-3", "Rocket landing", "rockets land after reaching space")
+    restarted = RelatedVideos(session_factory, RelatedVideoIndex(feature_bits=12), path)
+    assert restarted.start() == 8
+    assert "space-3" in ids(restarted.similar("space-1"))
+
+    # Deleted through another worker (or by hand): every index drops it on its next sync
+    db.delete(db.get(Video, "cooking-4"))
+    db.commit()
+    second.sync()
+    restarted.sync()
+    assert second.similar("cooking-4") is None and restarted.similar("cooking-4") is None
+    assert "cooking-4" not in ids(restarted.similar("cooking-1"))
+
+
+def test_related_route(session_factory, db, tmp_path, monkeypatch, async_session_factory, override_get_async_db):
+    seed(db)
+    related = RelatedVideos(session_factory, RelatedVideoIndex(feature_bits=12), str(tmp_path / "related"))
+    related.start()
+    monkeypatch.setattr(video_service, "related_videos", related)
+
+    async def seed_async():
+        async with async_session_factory() as session:
+            await session.run_sync(seed)
+            owner_id = await session.scalar(select(User.id))
+            channel_id = await session.scalar(select(Channel.id))
+            session.add(Video(id="unindexed", title="t", video_url="u", uploader_id=owner_id, channel_id=channel_id))
+            await session.commit()
+
+    asyncio.run(seed_async())
+    app = FastAPI()
+    app.include_router(videos_api.router)
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    client = TestClient(app)
+
+    response = client.get("/video/cooking-1/related", params={"limit": 1})
+    assert response.status_code == 200
+    assert [video["id"] for video in response.json()["items"]] == ["cooking-2"]
+    assert [video["id"] for video in client.get("/video/space-1/related").json()["items"]] == ["space-2"]
+    assert client.get("/video/unindexed/related").json()["items"] == []
+    assert client.get("/video/missing/related").status_code == 404
+
+    on_loop = []
+    similar = related.similar
+
+    def spy(*args):
+        try:
+            asyncio.get_running_loop()
+            on_loop.append(True)
+        except RuntimeError:
+            on_loop.append(False)
+        return similar(*args)
+
+    monkeypatch.setattr(related, "similar", spy)
+    assert client.get("/video/cooking-1/related").status_code == 200
+    assert on_loop == [False]  # the signature scan runs in a worker thread
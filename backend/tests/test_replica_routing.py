@@ -0,0 +1,119 @@
+import asyncio
+import pytest
+from sqlalchemy import create_engine, select, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+from src.config.database import Base, build_replica_router, ENGINE_PROFILES
+from src.models.user import User
+from src.utils.db_routing import Replica, ReplicaRouter, RoutingSession, pin_primary
+
+
+def make_db(path):
+    """A SQLite file with the schema and one marker user naming the database."""
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(User.__table__.insert().values(email=f"{path.stem}@example.com", username=path.stem))
+    return engine
+
+
+@pytest.fixture
+def router(tmp_path):
+    primary = make_db(tmp_path / "primary.db")
+    replicas = [Replica(f"replica-{i}", make_db(tmp_path / f"replica{i}.db")) for i in range(2)]
+    yield ReplicaRouter(primary, replicas)
+    for engine in [primary] + [replica.engine for replica in replicas]:
+        engine.dispose()
+
+
+def marker(session) -> str:
+    return session.scalar(select(User.username).order_by(User.id).limit(1))
+
+
+def test_reads_round_robin_over_replicas(router):
+    Session = sessionmaker(class_=RoutingSession, router=router)
+    seen = []
+    for _ in range(4):
+        with Session() as session:
+            # One replica per session
+            assert marker(session) == marker(session)
+            seen.append(marker(session))
+    assert seen == ["replica0", "replica1", "replica0", "replica1"]
+    assert router.stats()["reads"] == 12
+
+
+def test_session_is_pinned_to_primary_after_a_write(router):
+    Session = sessionmaker(class_=RoutingSession, router=router)
+    with Session() as session:
+        assert marker(session) == "replica0"
+        session.add(User(email="new@example.com", username="new"))
+        session.commit()
+        # Read-your-writes: the replica doesn't have the row yet
+        assert session.scalar(select(User.id).where(User.username == "new")) is not None
+        assert marker(session) == "primary"
+
+    with Session() as session:
+        assert session.scalar(select(User.id).where(User.username == "new")) is None  # replica1, not replicated
+        assert session.scalar(select(User).with_for_update().limit(1)).username == "primary"
+
+    with Session() as session:
+        session.execute(text("SELECT 1"))  # unknown intent goes to the primary
+        assert marker(session) == "primary"
+
+
+def test_pin_primary_block(router):
+    Session = sessionmaker(class_=RoutingSession, router=router)
+    with pin_primary():
+        with Session() as session:
+            assert marker(session) == "primary"
+    with Session() as session:
+        assert marker(session) != "primary"
+
+
+def test_failed_replica_leaves_rotation_until_healthy(router, tmp_path):
+    down = Replica("down", create_engine(f"sqlite:///{tmp_path / 'missing' / 'x.db'}"))
+    router.replicas = [down, router.replicas[0]]
+    assert router.check() == {"down": False, "replica-0": True}
+
+    Session = sessionmaker(class_=RoutingSession, router=router)
+    for _ in range(3):
+        with Session() as session:
+            assert marker(session) == "replica0"
+
+    router.replicas[1].mark_down("connection refused")
+    with Session() as session:
+        assert marker(session) == "primary"
+    assert router.stats()["primary_reads"] == 1
+
+    (tmp_path / "missing").mkdir()
+    router.check()
+    assert down.healthy and router.replicas[1].healthy
+    assert down.stats()["failures"] == 1
+
+
+def test_async_sessions_route_through_the_async_engines(tmp_path):
+    for name in ("primary", "replica0"):
+        make_db(tmp_path / f"{name}.db").dispose()
+    async_primary = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'primary.db'}", poolclass=NullPool)
+    router = build_replica_router(
+        create_engine(f"sqlite:///{tmp_path / 'primary.db'}"), async_primary,
+        [f"sqlite:///{tmp_path / 'replica0.db'}"], ENGINE_PROFILES["test"],
+    )
+    Session = sessionmaker(class_=AsyncSession, sync_session_class=RoutingSession, router=router,
+                           is_async=True, expire_on_commit=False)
+
+    async def scenario():
+        first_user = select(User.username).order_by(User.id).limit(1)
+        async with Session() as session:
+            with pin_primary():
+                pinned = await session.scalar(first_user)
+        async with Session() as session:
+            first = await session.scalar(first_user)
+            session.add(User(email="async@example.com", username="async"))
+            await session.commit()
+            after = await session.scalar(first_user)
+        return pinned, first, after
+
+    assert asyncio.run(scenario()) == ("primary", "replica0", "primary")
+    assert router.check() == {"replica-0": True}
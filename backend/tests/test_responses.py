@@ -0,0 +1,54 @@
+from datetime import datetime, timezone
+from types import SimpleNamespace
+import orjson
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from src.schemas.channel import ChannelDetails
+from src.schemas.recommendation import Recommendation
+from src.utils.responses import ORJSONResponse, trusted_content, trusted_json, trusted_response
+
+
+def channel(i: int) -> SimpleNamespace:
+    return SimpleNamespace(
+        id=i, name=f"channel {i}", description="about", subscribers_count=i,
+        videos_count=2 * i, created_at=datetime(2026, 1, 1), links=["https://example.com"],
+        owner_id=99,  # not part of the schema
+    )
+
+
+def test_trusted_content_picks_schema_fields_from_objects_and_dicts():
+    rows = trusted_content([channel(1)], ChannelDetails)
+    assert rows == [ChannelDetails.model_validate(channel(1), from_attributes=True).model_dump()]
+    assert trusted_content([{"id": 1, "user_id": 2, "video_id": 3, "score": 0.5, "x": 1}], Recommendation) == [
+        {"user_id": 2, "video_id": 3, "score": 0.5, "id": 1}
+    ]
+    assert trusted_content([], Recommendation) == []
+    # Fields the objects lack get the schema default, as with from_attributes validation
+    bare = SimpleNamespace(id=2, name="bare", description=None, created_at=datetime(2026, 1, 1, tzinfo=timezone.utc))
+    assert trusted_content([bare], ChannelDetails) == [ChannelDetails.model_validate(bare, from_attributes=True).model_dump()]
+    assert orjson.loads(trusted_json([bare], ChannelDetails))[0]["created_at"] == "2026-01-01T00:00:00Z"
+    with pytest.raises(AttributeError):
+        trusted_content([SimpleNamespace(id=1)], ChannelDetails)
+    assert orjson.loads(trusted_json([{"id": 1, "user_id": 2, "video_id": 3, "score": datetime(2026, 1, 1)}], Recommendation)) == [
+        {"id": 1, "user_id": 2, "video_id": 3, "score": "2026-01-01T00:00:00"}
+    ]
+
+
+def test_fast_path_matches_validated_response():
+    app = FastAPI(default_response_class=ORJSONResponse)
+    channels = [channel(i) for i in range(5)]
+
+    @app.get("/validated", response_model=list[ChannelDetails])
+    async def validated():
+        return channels
+
+    @app.get("/trusted", response_model=list[ChannelDetails])
+    async def trusted():
+        return trusted_response(channels, ChannelDetails)
+
+    client = TestClient(app)
+    validated_response, trusted_response_ = client.get("/validated"), client.get("/trusted")
+    assert validated_response.headers["content-type"] == "application/json"
+    assert trusted_response_.json() == validated_response.json()
+    assert "owner_id" not in trusted_response_.json()[0]
@@ -0,0 +1,38 @@
+from sqlalchemy import Column, ForeignKey, Index, Integer, MetaData, String, Table
+from src.config.database import Base
+from src.utils.ids import UUID_STR
+from src.utils.schema_lint import check_metadata
+
+
+def test_models_have_matching_and_indexed_foreign_keys():
+    assert [str(problem) for problem in check_metadata(Base.metadata)] == []
+
+
+def test_mismatched_and_unindexed_foreign_keys_are_reported():
+    metadata = MetaData()
+    Table("users", metadata, Column("id", Integer, primary_key=True))
+    Table("videos", metadata, Column("id", UUID_STR, primary_key=True))
+    Table(
+        "likes", metadata,
+        Column("id", Integer, primary_key=True),
+        Column("user_id", String, ForeignKey("users.id")),
+        Column("video_id", String, ForeignKey("videos.id")),  # UUID on PostgreSQL, text on SQLite
+        Index("ix_likes_user_id_video_id", "user_id", "video_id"),
+    )
+    Table(
+        "views", metadata,
+        Column("id", Integer, primary_key=True),
+        Column("video_id", UUID_STR, ForeignKey("videos.id")),
+        Column("user_id", Integer, ForeignKey("users.id")),
+        Index("ix_views_user_id_video_id", "user_id", "video_id"),  # covers user_id only
+    )
+
+    problems = {(problem.kind, problem.table, problem.columns) for problem in check_metadata(metadata)}
+    assert problems == {
+        ("type", "likes", ("user_id",)),
+        ("type", "likes", ("video_id",)),
+        ("index", "likes", ("video_id",)),
+        ("index", "views", ("video_id",)),
+    }
+    [video_id] = [p for p in check_metadata(metadata) if p.kind == "type" and p.columns == ("video_id",)]
+    assert "UUID on postgresql" in video_id.detail
@@ -0,0 +1,50 @@
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from fastapi.testclient import TestClient
+from src.middleware import RateLimitMiddleware, SecurityHeadersMiddleware
+
+
+def build_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/health")
+    async def health():
+        return {"status": "healthy"}
+
+    @app.get("/framed")
+    async def framed():
+        return PlainTextResponse("ok", headers={"X-Frame-Options": "SAMEORIGIN", "X-Custom": "1"})
+
+    @app.get("/stream")
+    async def stream():
+        async def chunks():
+            for i in range(3):
+                yield f"chunk{i};"
+        return StreamingResponse(chunks(), media_type="text/plain")
+
+    app.add_middleware(RateLimitMiddleware, calls=2, period=60)
+    app.add_middleware(SecurityHeadersMiddleware)
+    return app
+
+
+def test_security_headers_added_once():
+    client = TestClient(build_app())
+    response = client.get("/framed")
+    assert response.headers["X-Content-Type-Options"] == "nosniff"
+    assert "frame-ancestors 'none'" in response.headers["Content-Security-Policy"]
+    assert response.headers.get_list("X-Frame-Options") == ["DENY"]
+    assert response.headers["X-Custom"] == "1"
+
+
+def test_streaming_responses_pass_through():
+    client = TestClient(build_app())
+    response = client.get("/stream")
+    assert response.text == "chunk0;chunk1;chunk2;"
+    assert response.headers["Referrer-Policy"] == "strict-origin-when-cross-origin"
+
+
+def test_rate_limited_responses_carry_security_headers():
+    client = TestClient(build_app())
+    statuses = [client.get("/health") for _ in range(3)]
+    assert [r.status_code for r in statuses] == [200, 200, 429]
+    assert statuses[-1].headers["X-Content-Type-Options"] == "nosniff"
@@ -0,0 +1,131 @@
+import asyncio
+from datetime import datetime, timedelta
+import pytest
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+from sqlalchemy import update
+from src.api.auth import router as auth_router
+from src.config.database import get_async_db
+from src.models.user import User
+from src.schemas.user import TokenData
+from src.services import dependencies
+from src.services.auth import async_auth_service
+from src.services.auth.async_auth_service import AsyncAuthService
+from src.services.auth.token_versions import TokenVersionMap
+from src.services.auth.user_cache import UserCache, MemoryUserCacheBackend
+from src.services.dependencies import get_async_auth_service
+from src.utils.auth_utils import create_access_token, user_token_data
+
+
+def test_claims_checked_against_map():
+    versions = TokenVersionMap(window_seconds=60)
+    assert versions.is_current(TokenData(user_id=1, token_version=0))
+    assert not versions.is_current(TokenData(user_id=1, is_active=False))
+
+    versions.bump(1, 2, True)
+    assert not versions.is_current(TokenData(user_id=1, token_version=1))
+    assert versions.is_current(TokenData(user_id=1, token_version=2))
+
+    versions.bump(1, 3, False)
+    assert not versions.is_current(TokenData(user_id=1, token_version=3))
+
+
+def test_refresh_loads_recently_changed_users(db):
+    recent = User(email="recent@example.com", username="recent", token_version=4,
+                  updated_at=datetime.utcnow())
+    stale = User(email="stale@example.com", username="stale", token_version=9,
+                 updated_at=datetime.utcnow() - timedelta(hours=2))
+    db.add_all([recent, stale])
+    db.commit()
+
+    versions = TokenVersionMap(window_seconds=600)
+    assert not versions.ready
+    assert versions.refresh(db) == 1
+    assert versions.ready
+    assert not versions.is_current(TokenData(user_id=recent.id, token_version=3))
+    assert versions.is_current(TokenData(user_id=stale.id, token_version=0))
+
+
+@pytest.fixture
+def versions(db, monkeypatch):
+    versions = TokenVersionMap(window_seconds=600)
+    versions.refresh(db)
+    monkeypatch.setattr(dependencies, "token_versions", versions)
+    monkeypatch.setattr(async_auth_service, "token_versions", versions)
+    return versions
+
+
+@pytest.fixture
+def client(override_get_async_db):
+    cache = UserCache(MemoryUserCacheBackend())
+    app = FastAPI()
+    app.include_router(auth_router)
+
+    async def _get_auth_service():
+        async for db in override_get_async_db():
+            yield AsyncAuthService(db, cache)
+
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    app.dependency_overrides[get_async_auth_service] = _get_auth_service
+    return TestClient(app)
+
+
+def login(client, password="pw-123456"):
+    response = client.post("/auth/login", json={"email": "ver@example.com", "password": password})
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_logout_and_password_change_revoke_access_tokens(client, versions):
+    client.post("/auth/register", json={
+        "email": "ver@example.com", "username": "veruser", "password": "pw-123456"
+    })
+    headers = {"Authorization": f"Bearer {login(client)['access_token']}"}
+    assert client.get("/auth/verify-token", headers=headers).status_code == 200
+
+    assert client.post("/auth/logout", headers=headers).status_code == 200
+    assert client.get("/auth/verify-token", headers=headers).status_code == 401
+    assert client.get("/auth/me", headers=headers).status_code == 401
+
+    headers = {"Authorization": f"Bearer {login(client)['access_token']}"}
+    assert client.get("/auth/me", headers=headers).status_code == 200
+    response = client.post("/auth/change-password", headers=headers, json={
+        "current_password": "pw-123456", "new_password": "pw-654321"
+    })
+    assert response.status_code == 200
+    assert client.get("/auth/verify-token", headers=headers).status_code == 401
+    login(client, "pw-654321")
+
+
+
+def test_bump_from_a_stale_cached_user(async_session_factory, versions):
+    cache = UserCache(MemoryUserCacheBackend())
+
+    async def run():
+        async with async_session_factory() as db:
+            user = User(email="stale@example.com", username="staleuser", provider="email")
+            db.add(user)
+            await db.commit()
+            service = AsyncAuthService(db, cache)
+            await service.get_user_for_auth(user.id)
+            token = create_access_token(user_token_data(user))
+
+            # Another worker bumps the row; this worker's cache still says 0
+            await db.execute(update(User).values(token_version=1))
+            await db.commit()
+            db.expunge_all()
+
+            cached = await service.get_user_for_auth(user.id)
+            assert cached.token_version == 0
+            await service.bump_token_version(cached)
+            assert cached.token_version == 2
+            assert (await db.get(User, user.id, populate_existing=True)).token_version == 2
+
+            # Even if a stale snapshot is cached again, the version map rejects the old token
+            cache.backend.set(user.id, {**UserCache.snapshot(cached), "token_version": 0})
+            db.expunge_all()
+            with pytest.raises(HTTPException) as e:
+                await service.get_current_user_from_token(token)
+            return e.value.status_code
+
+    assert asyncio.run(run()) == 401
@@ -0,0 +1,140 @@
+import math
+import random
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+from src.api import trending as trending_api
+from src.models.channel import Channel
+from src.models.user import User
+from src.models.videos.trending_score import TrendingScore
+from src.models.videos.video import Video
+from src.services.trending import REFERENCE, TopK, TrendingFeed
+from src.services.video_counters import VideoCounterBuffer
+
+HOUR = 3600.0
+NOW = REFERENCE + 400 * 24 * HOUR
+
+
+class Clock:
+    def __init__(self):
+        self.now = NOW
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def videos(session_factory):
+    with session_factory() as db:
+        user = User(email="trend@example.com", username="trend")
+        db.add(user)
+        db.flush()
+        channels = [Channel(name=f"c{i}", owner_id=user.id) for i in range(2)]
+        db.add_all(channels)
+        db.flush()
+        db.add_all(
+            Video(id=f"tv{i}", title=f"v{i}", video_url="u", uploader_id=user.id, channel_id=channels[i % 2].id)
+            for i in range(6)
+        )
+        db.commit()
+        return [channel.id for channel in channels]
+
+
+def test_top_k_tracks_increasing_scores():
+    rng = random.Random(4)
+    top, scores = TopK(5), {}
+    for _ in range(2000):
+        key = f"k{rng.randrange(40)}"
+        scores[key] = scores.get(key, 0.0) + rng.random()
+        top.offer(key, scores[key])
+        expected = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:5]
+        assert top.items() == expected
+
+
+def test_scores_decay_by_half_life_without_rescans():
+    clock = Clock()
+    feed = TrendingFeed(None, k=3, half_life_hours=6, clock=clock)
+    feed.record("old", 8, at=NOW - 12 * HOUR)  # 8 two half-lives ago is worth 2 now
+    feed.record("new", 3, at=NOW)
+    feed.record("new", 1, at=NOW - 6 * HOUR)
+    [(first, first_score), (second, second_score)] = feed.top(10)
+    assert (first, second) == ("new", "old")
+    assert first_score == pytest.approx(3.5) and second_score == pytest.approx(2)
+    assert feed.top(10, now=NOW + 6 * HOUR)[0][1] == pytest.approx(1.75)
+
+
+def test_counter_events_feed_global_and_channel_top(session_factory, videos):
+    clock = Clock()
+    feed = TrendingFeed(session_factory, k=2, like_weight=3, clock=clock)
+    counters = VideoCounterBuffer(session_factory)
+    counters.subscribe(feed.observe)
+    for video_id, views in (("tv0", 5), ("tv1", 4), ("tv2", 1), ("tv3", 2)):
+        for _ in range(views):
+            counters.record_view(video_id)
+    counters.record_like("tv2")  # 1 view + 3
+    counters.record_like("tv1", liked=False)  # dislikes don't count
+    feed.record("missing", 50)
+
+    assert [video_id for video_id, _ in feed.top(10)] == ["missing", "tv0"]
+    feed.resolve_channels()  # channels come from the videos table; unknown videos are dropped
+    assert [video_id for video_id, _ in feed.top(10)] == ["tv0", "tv1"]
+    assert [video_id for video_id, _ in feed.top(10, channel_id=videos[0])] == ["tv0", "tv2"]
+    assert [video_id for video_id, _ in feed.top(10, channel_id=videos[1])] == ["tv1", "tv3"]
+
+
+def test_snapshot_warm_start_and_prune(session_factory, videos):
+    clock = Clock()
+    feed = TrendingFeed(session_factory, k=2, clock=clock)
+    for i, weight in enumerate((5, 4, 3, 2)):
+        feed.record(f"tv{i}", weight)
+    assert feed.snapshot() == 4
+    assert feed.snapshot() == 0  # nothing changed
+
+    restarted = TrendingFeed(session_factory, k=1, clock=clock)
+    restarted.record("tv3", 10)  # arrived before the warm start finished
+    assert restarted.load() == 4
+    assert [video_id for video_id, _ in restarted.top(10)] == ["tv3"]
+    assert restarted.top(10, channel_id=videos[0]) == feed.top(1, channel_id=videos[0])
+
+    # Three days on everything has decayed below min_score; only top-K members are kept
+    clock.now += 72 * HOUR
+    restarted.snapshot()
+    assert set(restarted.scores) == {"tv0", "tv3"}
+    with session_factory() as db:
+        assert set(db.scalars(select(TrendingScore.video_id))) == {"tv0", "tv3"}
+
+
+def test_workers_snapshots_add_up(session_factory, videos):
+    clock = Clock()
+    first, second = (TrendingFeed(session_factory, k=5, clock=clock) for _ in range(2))
+    first.record("tv0", 4)
+    second.record("tv0", 2)
+    second.record("tv1", 1)
+    first.snapshot()
+    second.snapshot()
+    first.snapshot()  # nothing new: must not add its 4 again
+
+    with session_factory() as db:
+        stored = dict(db.execute(select(TrendingScore.video_id, TrendingScore.log_score)).all())
+    assert stored["tv0"] == pytest.approx(first.scores["tv0"] + math.log(6 / 4))
+    # The second worker got the merged score back from its snapshot
+    assert dict(second.top(10))["tv0"] == pytest.approx(6)
+    restarted = TrendingFeed(session_factory, k=5, clock=clock)
+    restarted.load()
+    assert dict(restarted.top(10)) == pytest.approx({"tv0": 6, "tv1": 1})
+
+
+def test_trending_route_reads_memory(monkeypatch):
+    feed = TrendingFeed(None, k=5)
+    feed.record("a", 2, channel_id=1)
+    feed.record("b", 1, channel_id=2)
+    monkeypatch.setattr(trending_api, "trending_feed", feed)
+    app = FastAPI()
+    app.include_router(trending_api.router)
+    client = TestClient(app)
+
+    assert [item["video_id"] for item in client.get("/trending").json()["items"]] == ["a", "b"]
+    assert [item["video_id"] for item in client.get("/trending", params={"channel_id": 2}).json()["items"]] == ["b"]
+    assert client.get("/trending", params={"channel_id": 3}).json() == {"items": []}
+    assert client.get("/trending", params={"limit": 0}).status_code == 422
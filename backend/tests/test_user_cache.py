@@ -0,0 +1,180 @@
+import asyncio
+from datetime import datetime
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from src.api.auth import router as auth_router
+from src.config.auth import auth_settings
+from src.config.database import get_async_db
+from src.models.user import User
+from src.schemas.user import UserUpdate
+from src.services.auth.async_auth_service import AsyncAuthService
+from src.services.auth.user_cache import (
+    MemoryUserCacheBackend, RedisUserCacheBackend, UserCache, backend_from_settings,
+)
+from src.services.dependencies import get_async_auth_service
+from src.utils.auth_utils import create_access_token
+
+
+def count_queries(engine):
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    return statements
+
+
+def test_cache_hit_skips_database(async_session_factory):
+    cache = UserCache(MemoryUserCacheBackend())
+
+    async def run():
+        async with async_session_factory() as db:
+            user = User(email="cache@example.com", username="cacheuser", provider="email")
+            db.add(user)
+            await db.commit()
+            service = AsyncAuthService(db, cache)
+            assert (await service.get_user_for_auth(user.id)).id == user.id
+            db.expunge_all()
+
+            statements = count_queries(async_session_factory.kw["bind"].sync_engine)
+            cached = await service.get_user_for_auth(user.id)
+            return cached, statements
+
+    cached, statements = asyncio.run(run())
+    assert cached.email == "cache@example.com"
+    assert cached.is_active
+    assert statements == []
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_cache_entry_expires():
+    now = [0.0]
+    backend = MemoryUserCacheBackend(ttl=60, timer=lambda: now[0])
+    backend.set(1, {"id": 1})
+    assert backend.get(1) == {"id": 1}
+    now[0] = 61.0
+    assert backend.get(1) is None
+
+
+def test_logout_deactivate_and_update_invalidate(async_session_factory):
+    cache = UserCache(MemoryUserCacheBackend())
+
+    async def run():
+        async with async_session_factory() as db:
+            user = User(email="cache@example.com", username="cacheuser", provider="email")
+            db.add(user)
+            await db.commit()
+            service = AsyncAuthService(db, cache)
+
+            await service.get_user_for_auth(user.id)
+            await service.logout_user(user)
+            assert cache.backend.get(user.id) is None
+
+            await service.get_user_for_auth(user.id)
+            await service.update_user(user, UserUpdate(full_name="New Name"))
+            assert cache.backend.get(user.id) is None
+            assert (await service.get_user_for_auth(user.id)).full_name == "New Name"
+
+            await service.deactivate_user(user)
+            assert cache.backend.get(user.id) is None
+            assert not (await service.get_user_for_auth(user.id)).is_active
+
+    asyncio.run(run())
+
+
+def test_me_endpoint_uses_cache(override_get_async_db, async_session_factory):
+    cache = UserCache(MemoryUserCacheBackend())
+    app = FastAPI()
+    app.include_router(auth_router)
+    app.dependency_overrides[get_async_db] = override_get_async_db
+
+    async def _get_auth_service():
+        async for db in override_get_async_db():
+            yield AsyncAuthService(db, cache)
+
+    app.dependency_overrides[get_async_auth_service] = _get_auth_service
+    client = TestClient(app)
+
+    async def seed():
+        async with async_session_factory() as db:
+            user = User(email="cache@example.com", username="cacheuser", provider="email")
+            db.add(user)
+            await db.commit()
+            return create_access_token({"user_id": user.id, "email": user.email})
+
+    headers = {"Authorization": f"Bearer {asyncio.run(seed())}"}
+    for _ in range(3):
+        response = client.get("/auth/me", headers=headers)
+        assert response.status_code == 200
+        assert response.json()["email"] == "cache@example.com"
+
+    assert cache.stats()["misses"] == 1
+    assert cache.stats()["hits"] == 2
+
+    response = client.patch("/auth/me", headers=headers, json={"full_name": "Patched"})
+    assert response.status_code == 200
+    assert client.get("/auth/me", headers=headers).json()["full_name"] == "Patched"
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None):
+        self.data[key] = value
+
+    def delete(self, key):
+        self.data.pop(key, None)
+
+    def scan_iter(self, pattern):
+        return [key for key in list(self.data) if key.startswith(pattern.rstrip("*"))]
+
+
+def test_backend_is_chosen_by_setting(monkeypatch):
+    monkeypatch.setattr(auth_settings, "user_cache_backend", "memory")
+    assert isinstance(backend_from_settings(), MemoryUserCacheBackend)
+    monkeypatch.setattr(auth_settings, "user_cache_backend", "memcached")
+    with pytest.raises(ValueError):
+        backend_from_settings()
+
+    cache = UserCache(RedisUserCacheBackend(FakeRedis()))
+    user = User(id=7, email="redis@example.com", username="redis", created_at=datetime(2024, 1, 1))
+    cache.set(user)
+    assert cache.load(7).created_at == datetime(2024, 1, 1) and cache.load(8) is None
+    cache.invalidate(7)
+    assert cache.load(7) is None
+    assert cache.stats()["backend"] == "RedisUserCacheBackend"
+    assert (cache.stats()["hits"], cache.stats()["misses"]) == (1, 2)
+
+
+class LoopCheckingRedis(FakeRedis):
+    """Fails any call made on the event loop thread."""
+
+    def __getattribute__(self, name):
+        if name in ("get", "set", "delete"):
+            with pytest.raises(RuntimeError):
+                asyncio.get_running_loop()
+        return super().__getattribute__(name)
+
+
+def test_redis_backend_runs_off_the_event_loop(async_session_factory):
+    cache = UserCache(RedisUserCacheBackend(LoopCheckingRedis()))
+
+    async def run():
+        async with async_session_factory() as db:
+            user = User(email="redis@example.com", username="redisuser", provider="email")
+            db.add(user)
+            await db.commit()
+            service = AsyncAuthService(db, cache)
+            await service.get_user_for_auth(user.id)
+            db.expunge_all()
+            cached = await service.get_user_for_auth(user.id)
+            await service.logout_user(cached)
+            return user.id
+
+    user_id = asyncio.run(run())
+    assert cache.backend.get(user_id) is None
+    assert (cache.stats()["hits"], cache.stats()["invalidations"]) == (1, 1)
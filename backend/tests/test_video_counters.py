@@ -0,0 +1,99 @@
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from sqlalchemy import event
+from sqlalchemy.exc import OperationalError
+from src.models.channel import Channel
+from src.models.user import User
+from src.models.videos.video import Video
+from src.models.videos.video_like import VideoLike
+from src.models.videos.video_view import VideoView
+from src.services.video_counters import VideoCounterBuffer
+
+
+@pytest.fixture
+def videos(db):
+    user = User(email="counters@example.com", username="counters")
+    db.add(user)
+    db.flush()
+    channel = Channel(name="counters", owner_id=user.id)
+    db.add(channel)
+    db.flush()
+    db.add_all(Video(id=f"cv{i}", title=f"v{i}", video_url="u", uploader_id=user.id, channel_id=channel.id)
+               for i in range(2))
+    db.commit()
+    return user.id
+
+
+def test_concurrent_likes_flush_as_one_batched_update(videos, session_factory, engine, db):
+    counters = VideoCounterBuffer(session_factory, shards=4)
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(lambda _: counters.record_like("cv0"), range(1000)))
+    counters.record_view("cv0")
+    counters.record_like("cv1", liked=False)
+
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append((args[2], args[5])))
+    assert counters.flush() == 2
+    updates = [executemany for statement, executemany in statements if statement.startswith("UPDATE videos")]
+    assert updates == [True]
+
+    assert counters.counts(db, "cv0") == {"view_count": 1, "like_count": 1000, "dislike_count": 0}
+    assert counters.counts(db, "cv1") == {"view_count": 0, "like_count": 0, "dislike_count": 1}
+    assert counters.pending == 0
+    assert counters.flush() == 0
+
+
+def test_videos_are_sharded_by_id(session_factory):
+    counters = VideoCounterBuffer(session_factory, shards=8)
+    for i in range(64):
+        counters.record_view(f"v{i}")
+        counters.record_view(f"v{i}")
+    # Each video lives in exactly one shard, and they spread over the shards
+    assert sum(len(shard.deltas) for shard in counters._shards) == 64
+    assert sum(1 for shard in counters._shards if shard.deltas) > 1
+    assert counters.pending_deltas("v3")["view_count"] == 2
+
+
+def test_reads_include_unflushed_deltas(videos, session_factory, db):
+    counters = VideoCounterBuffer(session_factory)
+    counters.record_like("cv0")
+    counters.record_like("cv0", liked=False, previous=True)  # changed their mind
+    counters.record_view("cv0")
+
+    assert counters.counts(db, "cv0") == {"view_count": 1, "like_count": 0, "dislike_count": 1}
+    assert counters.counts(db, "missing") is None
+    video = db.get(Video, "cv0")
+    counters.apply_pending([video])
+    assert video.view_count == 1
+    assert not db.dirty
+
+
+def test_failed_flush_keeps_deltas(videos, session_factory, engine, db):
+    counters = VideoCounterBuffer(session_factory)
+    counters.record_view("cv0")
+
+    def fail(*_args):
+        raise OperationalError("UPDATE", {}, Exception("database is locked"))
+
+    event.listen(engine, "before_cursor_execute", fail)
+    with pytest.raises(OperationalError):
+        counters.flush()
+    event.remove(engine, "before_cursor_execute", fail)
+
+    counters.record_view("cv0")
+    counters.flush()
+    assert counters.counts(db, "cv0")["view_count"] == 2
+
+
+def test_reconcile_recounts_from_views_and_likes(videos, session_factory, db):
+    user_id = videos
+    db.add(VideoView(video_id="cv0", user_id=user_id))
+    db.add(VideoLike(video_id="cv0", user_id=user_id, is_liked=False))
+    db.commit()
+    counters = VideoCounterBuffer(session_factory)
+    counters.add("cv1", views=5)  # lost track: no rows back these
+
+    assert counters.reconcile(db) == 2
+    assert counters.counts(db, "cv0") == {"view_count": 1, "like_count": 0, "dislike_count": 1}
+    assert counters.counts(db, "cv1") == {"view_count": 0, "like_count": 0, "dislike_count": 0}
+    assert counters.reconcile(db, ["cv0", "cv1"]) == 0
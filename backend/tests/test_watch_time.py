@@ -0,0 +1,97 @@
+import asyncio
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import event, select
+from src.api import watch
+from src.models.channel import Channel
+from src.models.user import User
+from src.models.videos.video import Video
+from src.models.videos.video_view import VideoView
+from src.schemas.user import TokenData
+from src.services.dependencies import get_token_claims
+from src.services.video_counters import VideoCounterBuffer
+from src.services.watch_time import HeartbeatBatcher, upsert_watch_times
+
+
+@pytest.fixture
+def user_ids(db):
+    users = [User(email=f"hb{i}@example.com", username=f"hb{i}") for i in range(3)]
+    db.add_all(users)
+    db.flush()
+    channel = Channel(name="heartbeats", owner_id=users[0].id)
+    db.add(channel)
+    db.flush()
+    db.add_all(Video(id=f"hv{i}", title=f"v{i}", video_url="u", uploader_id=users[0].id, channel_id=channel.id)
+               for i in range(2))
+    db.commit()
+    return [user.id for user in users]
+
+
+def watch_times(db):
+    return {(view.video_id, view.user_id): view.watch_time for view in db.scalars(select(VideoView))}
+
+
+def test_upsert_keeps_the_furthest_watch_time(db, user_ids):
+    first, second = user_ids[:2]
+    new_views = upsert_watch_times(db, {("hv0", first): 30, ("hv1", first): 5, ("missing", first): 9})
+    db.commit()
+    assert sorted(new_views) == [("hv0", first), ("hv1", first)]
+
+    new_views = upsert_watch_times(db, {("hv0", first): 10, ("hv1", first): 50, ("hv0", second): 1})
+    db.commit()
+    assert new_views == [("hv0", second)]
+    db.expire_all()
+    assert watch_times(db) == {("hv0", first): 30, ("hv1", first): 50, ("hv0", second): 1}
+
+
+def test_concurrent_requests_share_one_upsert(db, user_ids, session_factory, engine):
+    counters = VideoCounterBuffer(session_factory)
+    batcher = HeartbeatBatcher(session_factory, max_delay=0.05, counters=counters)
+    inserts = []
+    event.listen(engine, "before_cursor_execute",
+                 lambda *args: inserts.append(args[2]) if args[2].startswith("INSERT INTO video_views") else None)
+
+    async def players():
+        await asyncio.gather(*(
+            batcher.submit(user_id, [("hv0", second), ("hv0", second + 1), ("hv1", 2)])
+            for user_id in user_ids for second in range(0, 50, 5)
+        ))
+
+    asyncio.run(players())
+    assert len(inserts) == 1
+    assert batcher.stats()["writes"] == 1
+    assert watch_times(db) == {**{("hv0", user_id): 46 for user_id in user_ids},
+                               **{("hv1", user_id): 2 for user_id in user_ids}}
+    assert counters.pending_deltas("hv0")["view_count"] == 3
+
+
+def test_max_batch_writes_early(user_ids, session_factory):
+    batcher = HeartbeatBatcher(session_factory, max_delay=10, max_batch=2,
+                               counters=VideoCounterBuffer(session_factory))
+
+    async def player():
+        await asyncio.wait_for(batcher.submit(user_ids[0], [("hv0", 1), ("hv1", 1)]), timeout=2)
+
+    asyncio.run(player())
+    assert batcher.stats()["rows_written"] == 2
+
+
+def test_heartbeat_endpoint(db, user_ids, session_factory, monkeypatch):
+    batcher = HeartbeatBatcher(session_factory, max_delay=0, counters=VideoCounterBuffer(session_factory))
+    monkeypatch.setattr(watch, "heartbeat_batcher", batcher)
+    app = FastAPI()
+    app.include_router(watch.router)
+    app.dependency_overrides[get_token_claims] = lambda: TokenData(user_id=user_ids[1])
+    client = TestClient(app)
+
+    response = client.post("/video/heartbeats", json={"heartbeats": [
+        {"video_id": "hv1", "watch_time": 12}, {"video_id": "hv1", "watch_time": 8},
+    ]})
+    assert response.status_code == 202
+    assert response.json() == {"accepted": 2}
+    assert watch_times(db) == {("hv1", user_ids[1]): 12}
+
+    assert client.post("/video/heartbeats", json={"heartbeats": []}).status_code == 422
+    bad = {"heartbeats": [{"video_id": "hv1", "watch_time": -1}]}
+    assert client.post("/video/heartbeats", json=bad).status_code == 422
@@ -0,0 +1,145 @@
+import asyncio
+from datetime import datetime
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+from src.models.user import User
+from src.schemas.user import UserUpdate
+from src.services.auth.async_auth_service import AsyncAuthService
+from src.services.auth.user_cache import UserCache, MemoryUserCacheBackend
+from src.services.write_behind import WriteBehindBuffer
+from src.utils.auth_utils import get_password_hash
+
+
+@pytest.fixture
+def users(db):
+    users = [User(email=f"wb{i}@example.com", username=f"wb{i}") for i in range(3)]
+    db.add_all(users)
+    db.commit()
+    return users
+
+
+def test_coalesces_updates_into_one_batch(users, session_factory, engine, db):
+    flushed = []
+    buffer = WriteBehindBuffer(User, session_factory, on_flush=flushed.extend)
+    for _ in range(5):
+        buffer.record(users[0].id, last_login=datetime(2026, 1, 1))
+    buffer.record(users[0].id, full_name="Zero")
+    buffer.record(users[1].id, last_login=datetime(2026, 1, 2), avatar_url="a.png")
+
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    assert buffer.flush() == 2
+    assert sum(s.startswith("UPDATE users") for s in statements) <= 2
+
+    db.expire_all()
+    assert users[0].full_name == "Zero"
+    assert users[0].last_login.year == 2026
+    assert users[1].avatar_url == "a.png"
+    assert sorted(flushed) == sorted([users[0].id, users[1].id])
+    assert buffer.stats()["last_flush_coalesced"] == 5
+    assert buffer.pending == 0
+    assert buffer.flush() == 0
+
+
+def test_discard_drops_buffered_fields(users, session_factory, db):
+    buffer = WriteBehindBuffer(User, session_factory)
+    buffer.record(users[0].id, full_name="Stale", last_login=datetime(2026, 1, 1))
+    buffer.discard(users[0].id, "full_name")
+    buffer.flush()
+
+    db.expire_all()
+    assert users[0].full_name is None
+    assert users[0].last_login is not None
+
+
+def test_discard_during_flush_wins(users, session_factory, engine, db):
+    buffer = WriteBehindBuffer(User, session_factory)
+    buffer.record(users[0].id, full_name="Stale", last_login=datetime(2026, 1, 1))
+    buffer.record(users[1].id, full_name="Other")
+
+    # An explicit edit lands while the batch is already on its way to the database
+    updates = []
+
+    def discard_once(conn, cursor, statement, *args):
+        if statement.startswith("UPDATE users"):
+            updates.append(statement)
+            if len(updates) == 1:
+                buffer.discard(users[0].id, "full_name")
+
+    event.listen(engine, "before_cursor_execute", discard_once)
+    assert buffer.flush() == 2
+    assert len(updates) >= 2  # written again without the dropped value
+
+    db.expire_all()
+    assert users[0].full_name is None
+    assert users[0].last_login is not None
+    assert users[1].full_name == "Other"
+
+
+def test_failed_flush_keeps_updates(users, session_factory, engine):
+    buffer = WriteBehindBuffer(User, session_factory)
+    buffer.record(users[0].id, full_name="Kept")
+
+    def fail(*_args):
+        raise OperationalError("UPDATE", {}, Exception("database is locked"))
+
+    event.listen(engine, "before_cursor_execute", fail)
+    with pytest.raises(OperationalError):
+        buffer.flush()
+    event.remove(engine, "before_cursor_execute", fail)
+
+    buffer.record(users[0].id, last_login=datetime(2026, 1, 1))
+    assert buffer.flush() == 1
+
+
+def test_stats_report_lag_and_failures(users, session_factory, engine):
+    now = [100.0]
+    buffer = WriteBehindBuffer(User, session_factory, timer=lambda: now[0])
+    assert buffer.stats()["lag_seconds"] == 0.0
+    buffer.record(users[0].id, full_name="First")
+    now[0] = 103.0
+    buffer.record(users[1].id, full_name="Second")
+    assert buffer.stats()["pending"] == 2 and buffer.stats()["lag_seconds"] == 3.0
+
+    def fail(*_args):
+        raise OperationalError("UPDATE", {}, Exception("database is locked"))
+
+    event.listen(engine, "before_cursor_execute", fail)
+    with pytest.raises(OperationalError):
+        buffer.flush()
+    event.remove(engine, "before_cursor_execute", fail)
+    now[0] = 110.0
+    assert buffer.stats()["lag_seconds"] == 10.0 and buffer.stats()["failed_flushes"] == 1
+
+    buffer.flush()
+    assert buffer.stats()["lag_seconds"] == 0.0 and buffer.stats()["pending"] == 0
+
+
+def test_login_buffers_last_login(async_session_factory):
+    # The buffer flushes through a sync session on the same database file
+    engine = create_engine(async_session_factory.kw["bind"].url.set(drivername="sqlite"))
+    buffer = WriteBehindBuffer(User, sessionmaker(bind=engine))
+
+    async def run():
+        async with async_session_factory() as db:
+            user = User(email="wb@example.com", username="wb", hashed_password=get_password_hash("pw-123456"))
+            db.add(user)
+            await db.commit()
+            service = AsyncAuthService(db, UserCache(MemoryUserCacheBackend()), buffer)
+
+            user = await service.authenticate_user("wb@example.com", "pw-123456")
+            assert user.last_login is None
+            assert buffer.pending == 1
+            assert buffer._pending[user.id]["last_login"].tzinfo is not None  # timestamptz column
+
+            await service.update_user(user, UserUpdate(full_name="Edited"))
+            assert buffer.flush() == 1
+            await db.refresh(user)
+            return user
+
+    user = asyncio.run(run())
+    engine.dispose()
+    assert user.last_login is not None
+    assert user.full_name == "Edited"